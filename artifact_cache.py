@@ -0,0 +1,289 @@
+"""
+워크플로 산출물 캐시 (내용 주소 기반)
+
+같은 CSV 를 다시 올리거나 "워크플로 실행"을 여러 번 누르면 기초 통계 / 상관 / 차트 / 모델 학습을
+매번 처음부터 다시 돌린다. 여기서는
+
+    키 = sha256(업로드 파일 내용) + sha256(파라미터 JSON)
+
+으로 워크플로 결과 dict 와 src/outputs/{sessionId}/ 산출물을 보관해 두고, 적중하면
+새 세션의 출력 폴더에 하드링크(불가하면 복사)로 꺼내 놓은 뒤 파이프라인 없이 결과를 돌려준다.
+
+- 저장 위치: {root}/{key}/workflow.json + 산출물 파일, {root}/index.json (LRU 메타데이터)
+- index.json 은 여러 서버 프로세스(uvicorn --workers N)가 공유한다: 바꿀 때마다 파일 락 아래에서
+  다시 읽고 고쳐 쓴다 (다른 프로세스가 저장/삭제한 항목이 보이고, 용량 상한도 전체 기준)
+- 용량 상한(max_bytes)을 넘으면 가장 오래 쓰지 않은 항목부터 삭제
+- 결과 dict 안의 원래 sessionId 는 꺼낼 때 새 sessionId 로 바꿔 넣는다 (경로/URL 이 세션 폴더 기준이라)
+- 하드링크라 산출물을 쓰는 쪽은 제자리 덮어쓰기 대신 임시 파일 + rename 으로 교체해야 한다
+  (artifact_manifest.write_text / artifactManifest.ts writeArtifactSync)
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:        # Windows: 프로세스 간 락 없음 (단일 프로세스 실행 기준)
+    fcntl = None
+
+CACHE_VERSION = 2          # 산출물 형식이 바뀌면 올려서 이전 항목을 무효화
+HASH_CHUNK = 1 << 20
+
+
+def _link_or_copy(src: Path, dst: Path):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _replace_with(src: Path, dst: Path):
+    """dst 를 src 의 링크(불가하면 복사)로 교체 — 같은 이름의 이전 실행 파일이 있어도 덮어씀"""
+    tmp = dst.with_name(f"{dst.name}.{os.getpid()}.tmp")
+    try:
+        tmp.unlink()
+    except FileNotFoundError:
+        pass
+    _link_or_copy(src, tmp)
+    os.replace(tmp, dst)
+
+
+@contextmanager
+def _index_lock(root: Path):
+    if fcntl is None:
+        yield
+        return
+    with open(root / ".index.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class ArtifactCache:
+    def __init__(self, root: Path, max_bytes: int, enabled: bool = True):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._index: dict[str, dict] = {}
+        self._hash_memo: dict[tuple, str] = {}    # (경로, 크기, mtime) → 내용 해시
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        if enabled:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._index = self._read_index()
+
+    # ------------------------------
+    # 키
+    # ------------------------------
+    def file_hash(self, path: Path) -> str:
+        """업로드 파일 내용의 sha256 (같은 파일은 크기/mtime 기준으로 한 번만 계산)"""
+        st = os.stat(path)
+        memo_key = (str(path), st.st_size, st.st_mtime_ns)
+        digest = self._hash_memo.get(memo_key)
+        if digest is None:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                while chunk := f.read(HASH_CHUNK):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            self._hash_memo[memo_key] = digest
+        return digest
+
+    def seed_hash(self, path: Path, digest: str):
+        """업로드 때 스트리밍으로 계산한 해시를 등록 (다시 읽지 않도록)"""
+        st = os.stat(path)
+        self._hash_memo[(str(path), st.st_size, st.st_mtime_ns)] = digest
+
+    def key_for(self, file_path: Path, params: dict) -> str:
+        params_json = json.dumps({"v": CACHE_VERSION, **params}, sort_keys=True, ensure_ascii=False)
+        h = hashlib.sha256(self.file_hash(file_path).encode())
+        h.update(params_json.encode("utf-8"))
+        return h.hexdigest()
+
+    # ------------------------------
+    # 조회 / 꺼내기
+    # ------------------------------
+    def lookup(self, key: str, session_id: str, out_dir: Path, file_path: Path, on_restore=None) -> dict | None:
+        """적중하면 산출물을 out_dir 에 꺼내 놓고 새 세션 기준으로 고친 워크플로 dict 반환
+
+        on_restore(out_dir, 파일명 목록): 꺼내 놓은 뒤 호출 (산출물 매니페스트 기록용)
+        """
+        if not self.enabled:
+            return None
+        entry_dir = self.root / key
+
+        def touch(index: dict):
+            meta = index.get(key)
+            if meta is None:
+                return None
+            meta["last_used"] = time.time()
+            meta["hits"] = meta.get("hits", 0) + 1
+            return dict(meta)
+
+        meta = self._update(touch)
+        with self._lock:
+            if meta is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        try:
+            out_dir.mkdir(parents=True, exist_ok=True)
+            # 같은 이름의 파일(다른 표본/타깃 실행이 남긴 차트·전처리 CSV 등)이 있어도 이 항목의 것으로 교체
+            for name in meta.get("files", []):
+                _replace_with(entry_dir / name, out_dir / name)
+            text = (entry_dir / "workflow.json").read_text(encoding="utf-8")
+            if on_restore is not None:
+                on_restore(out_dir, meta.get("files", []))
+        except OSError as e:
+            print(f"[CACHE] materialize 실패 → 항목 폐기: {e}")
+            self.discard(key)
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+            return None
+
+        old_sid = meta.get("session_id")
+        if old_sid and old_sid != session_id:
+            text = text.replace(old_sid, session_id)
+        workflow = json.loads(text)
+        workflow["filePath"] = str(file_path)
+        return workflow
+
+    # ------------------------------
+    # 저장
+    # ------------------------------
+    def store(self, key: str, workflow: dict, session_id: str, out_dir: Path, names):
+        """이 실행의 산출물(names: out_dir 안의 파일 이름)과 워크플로 dict 를 보관
+
+        names 는 워크플로 결과가 가리키는 파일들이다 — 폴더를 mtime 으로 훑으면 같은 세션에서 동시에 돈
+        다른 작업의 산출물까지 이 키에 섞인다.
+        """
+        if not self.enabled or not isinstance(workflow, dict):
+            return
+        # 숨김 파일(세션 매니페스트 등)은 세션마다 따로 — 하드링크로 공유하면 안 됨
+        files = [out_dir / n for n in sorted(set(names)) if not n.startswith(".") and (out_dir / n).is_file()]
+
+        entry_dir = self.root / key
+        tmp_dir = self.root / f".{key}.{threading.get_ident()}.tmp"
+        try:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            tmp_dir.mkdir(parents=True)
+            size = 0
+            for p in files:
+                _link_or_copy(p, tmp_dir / p.name)
+                size += p.stat().st_size
+            body = json.dumps(workflow, ensure_ascii=False)
+            (tmp_dir / "workflow.json").write_text(body, encoding="utf-8")
+            size += len(body.encode("utf-8"))
+        except OSError as e:
+            print(f"[CACHE] 저장 실패: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        if size > self.max_bytes:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        def add(index: dict):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+            now = time.time()
+            index[key] = {
+                "session_id": session_id,
+                "files": [p.name for p in files],
+                "size": size,
+                "created": now,
+                "last_used": now,
+                "hits": 0,
+            }
+            self.stores += 1
+
+        self._update(add)
+
+    def discard(self, key: str):
+        def drop(index: dict):
+            index.pop(key, None)
+            shutil.rmtree(self.root / key, ignore_errors=True)
+
+        self._update(drop)
+
+    def clear(self):
+        def drop_all(index: dict):
+            for key in list(index):
+                shutil.rmtree(self.root / key, ignore_errors=True)
+            index.clear()
+
+        self._update(drop_all)
+
+    # ------------------------------
+    # LRU / 인덱스
+    # ------------------------------
+    def total_bytes(self) -> int:
+        return sum(m.get("size", 0) for m in self._index.values())
+
+    def _evict_locked(self):
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for key, meta in sorted(self._index.items(), key=lambda kv: kv[1].get("last_used", 0)):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self.root / key, ignore_errors=True)
+            del self._index[key]
+            total -= meta.get("size", 0)
+            self.evictions += 1
+
+    def _update(self, fn):
+        """파일 락 아래에서 index.json 을 다시 읽어 fn(index) 적용 → 용량 정리 → 저장. fn 의 반환값을 돌려줌"""
+        with self._lock, _index_lock(self.root):
+            self._index = self._read_index()
+            result = fn(self._index)
+            self._evict_locked()
+            self._save_index()
+            return result
+
+    def _read_index(self) -> dict:
+        path = self.root / "index.json"
+        try:
+            index = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            index = {}
+        # 폴더가 사라진 항목은 버림
+        return {k: v for k, v in index.items() if (self.root / k / "workflow.json").exists()}
+
+    def _save_index(self):
+        path = self.root / "index.json"
+        tmp = path.with_name(f"index.json.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps(self._index), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[CACHE] index 저장 실패: {e}")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            if self.enabled:
+                self._index = self._read_index()      # 다른 프로세스가 저장/삭제한 항목까지 반영
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._index),
+                "bytes": self.total_bytes(),
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 3) if lookups else None,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,288 @@
+"""
+워크플로 결과 추출기 비교 (before: 정규식 캐스케이드 / after: output_extractor 단일 패스)
+
+- 녹화된 오케스트레이터 stdout 파일을 --inputs 로 주면 그 파일들로,
+  없으면 넓은 CSV(--cols 개 컬럼)를 가정한 합성 출력 5종으로 측정
+  (마커 JSON / util.inspect 풍 JS 객체 / 코드펜스 / answers JSON / BasicAnalysisTool 로그 배열)
+- 두 추출기의 결과가 같은지도 함께 확인 (다르면 종료 코드 1)
+
+사용 예)
+    python bench/extractor_bench.py --cols 400 --repeat 5 --out bench_extractor.json
+    python bench/extractor_bench.py --inputs recorded/*.log
+"""
+import argparse
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from output_extractor import extract_workflow_dict  # noqa: E402
+
+
+# ─────────────────────────────────────────────
+# 기준 구현: 교체 전 fastapi_main.extract_workflow_dict (비교용으로 그대로 보존)
+# ─────────────────────────────────────────────
+def legacy_coerce_to_json(s: str):
+    try:
+        return json.loads(s)
+    except Exception:
+        pass
+    if not s or "{" not in s or "}" not in s:
+        return None
+    blocks = []
+    depth = 0
+    in_str = False
+    esc = False
+    start = None
+    for i, ch in enumerate(s):
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch == '"':
+            in_str = True
+            continue
+        if ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0 and start is not None:
+                blocks.append(s[start:i+1])
+                start = None
+    if not blocks:
+        return None
+    prefer = ("columnStats", "selectedColumns", "mlModelRecommendation", "mlResultPath")
+    blocks.sort(key=lambda b: (any(k in b for k in prefer), len(b)), reverse=True)
+    for core in blocks:
+        try:
+            core2 = re.sub(r'([,{]\s*)([A-Za-z_][A-Za-z0-9_]*)\s*:', r'\1"\2":', core)
+            core2 = core2.replace("'", '"')
+            core2 = core2.replace("undefined", "null")
+            core2 = re.sub(r'\bNaN\b', 'null', core2)
+            core2 = re.sub(r'\bInfinity\b', 'null', core2)
+            core2 = re.sub(r'\b-Infinity\b', 'null', core2)
+            core2 = re.sub(r'\[\s*Object\s*\]', "{}", core2)
+            core2 = core2.replace("[Object], [Object]", "{}, {}")
+            core2 = re.sub(r',\s*([}\]])', r'\1', core2)
+            return json.loads(core2)
+        except Exception:
+            continue
+    return None
+
+
+def legacy_looks_like_workflow(obj) -> bool:
+    if not isinstance(obj, dict):
+        return False
+    keys = {
+        "columnStats", "selectedColumns", "recommendedPairs",
+        "preprocessingRecommendations", "preprocessedFilePath",
+        "preprocessedFilePathUrl", "mlModelRecommendation",
+        "mlResultPath", "chartPaths", "chartUrls"
+    }
+    return any(k in obj for k in keys)
+
+
+def legacy_jsonify_js_like(text: str) -> str:
+    s = text
+    s = re.sub(r'([{\[,]\s*)([A-Za-z_][A-Za-z0-9_]*)\s*:', r'\1"\2":', s)
+    s = s.replace("'", '"')
+    s = re.sub(r'\bNaN\b', 'null', s)
+    s = re.sub(r'\b-Infinity\b', 'null', s)
+    s = re.sub(r'\bInfinity\b', 'null', s)
+    s = re.sub(r',\s*([}\]])', r'\1', s)
+    return s
+
+
+def legacy_extract_workflow_dict(output_str: str):
+    s = re.sub(r"\x1b\[[0-9;]*m", "", output_str or "").strip()
+
+    m = re.search(r"<<<WORKFLOW_JSON_START>>>\s*([\s\S]*?)\s*<<<WORKFLOW_JSON_END>>>", s)
+    if m:
+        try:
+            obj = json.loads(m.group(1))
+            cand = obj.get("workflow") if isinstance(obj, dict) else None
+            if isinstance(cand, dict):
+                return cand, obj
+        except Exception:
+            pass
+
+    top = legacy_coerce_to_json(s)
+    if isinstance(top, dict):
+        for cand in (top.get("workflow"), top.get("result"), top):
+            if isinstance(cand, dict) and legacy_looks_like_workflow(cand):
+                return cand, top
+
+    for m in re.finditer(r"```(?:json)?\s*([\s\S]*?)```", s, re.I):
+        block = m.group(1).strip()
+        try:
+            obj = json.loads(block)
+            for cand in (obj.get("workflow"), obj.get("result"), obj):
+                if isinstance(cand, dict) and legacy_looks_like_workflow(cand):
+                    return cand, obj
+        except Exception:
+            pass
+
+    try:
+        maybe = json.loads(s)
+        if isinstance(maybe, dict):
+            for a in (maybe.get("answers") or []):
+                content = ((a.get("message") or {}).get("content") or "").strip()
+                if not content:
+                    continue
+                try:
+                    obj = json.loads(content)
+                except Exception:
+                    obj = legacy_coerce_to_json(content.replace('\\"', '"'))
+                if isinstance(obj, dict):
+                    for cand in (obj.get("workflow"), obj.get("result"), obj):
+                        if isinstance(cand, dict) and legacy_looks_like_workflow(cand):
+                            return cand, obj
+    except Exception:
+        pass
+
+    m = re.search(r"BasicAnalysisTool\s*결과\s*:\s*(\[[\s\S]*?\])", s, re.I)
+    if m:
+        arr_text = legacy_jsonify_js_like(m.group(1))
+        try:
+            arr = json.loads(arr_text)
+            if isinstance(arr, list) and arr and isinstance(arr[0], dict):
+                wf = {"columnStats": arr}
+                return wf, {"columnStats": arr}
+        except Exception:
+            pass
+
+    return None, None
+
+
+# ─────────────────────────────────────────────
+# 합성 출력
+# ─────────────────────────────────────────────
+def column_stats(n_cols: int, rng: random.Random) -> list[dict]:
+    stats = []
+    for i in range(n_cols):
+        numeric = i % 3 != 0
+        stats.append({
+            "column": f"col_{i}",
+            "dtype": "number" if numeric else "string",
+            "missing": rng.randint(0, 50),
+            "unique": rng.randint(1, 5000),
+            "mean": round(rng.uniform(-100, 100), 4) if numeric else None,
+            "std": round(rng.uniform(0, 50), 4) if numeric else None,
+        })
+    return stats
+
+
+def inspect_like(obj, indent: int = 0) -> str:
+    """Node util.inspect 와 비슷한 모양 (따옴표 없는 키, '문자열', undefined)"""
+    pad = "  " * indent
+    if isinstance(obj, dict):
+        items = [f"{pad}  {k}: {inspect_like(v, indent + 1)}" for k, v in obj.items()]
+        return "{\n" + ",\n".join(items) + f"\n{pad}}}"
+    if isinstance(obj, list):
+        return "[\n" + ",\n".join(f"{pad}  {inspect_like(v, indent + 1)}" for v in obj) + f"\n{pad}]"
+    if obj is None:
+        return "undefined"
+    if isinstance(obj, str):
+        return f"'{obj}'"
+    if isinstance(obj, bool):
+        return "true" if obj else "false"
+    return str(obj)
+
+
+def log_noise(lines: int, rng: random.Random) -> str:
+    words = ["[Workflow:START]", "[CorrelationTool 저장]", "[VisualizationTool]", "✅ 완료", "skip", "rows=", "cols="]
+    return "\n".join(" ".join(rng.choice(words) for _ in range(8)) for _ in range(lines))
+
+
+def synthetic_outputs(n_cols: int, seed: int = 0) -> dict[str, str]:
+    rng = random.Random(seed)
+    stats = column_stats(n_cols, rng)
+    workflow = {
+        "filePath": "src/uploads/s/data.csv",
+        "columnStats": stats,
+        "selectedColumns": [s["column"] for s in stats[:20]],
+        "recommendedPairs": [{"column1": "col_1", "column2": "col_2"}],
+        "preprocessingRecommendations": [{"column": s["column"], "fillna": "mean"} for s in stats[:50]],
+        "targetColumn": "col_1",
+        "problemType": "regression",
+        "mlModelRecommendation": {"model": "RandomForestRegressor", "score": 0.81, "reason": "mixed features"},
+        "chartPaths": [f"src/outputs/s/chart_{i}.png" for i in range(10)],
+        "preprocessedFilePath": "src/outputs/s/preprocessed.csv",
+        "mlResultPath": {"reportPath": "src/outputs/s/ml_result.txt"},
+    }
+    noise = log_noise(2000, rng)
+    basic_log = " BasicAnalysisTool 결과: " + inspect_like(stats)
+    inspect_stats = [{k: v for k, v in s.items() if v is not None} for s in stats]
+    return {
+        "sentinel": "\n".join([noise, basic_log, "<<<WORKFLOW_JSON_START>>>",
+                               json.dumps({"workflow": workflow}), "<<<WORKFLOW_JSON_END>>>"]),
+        "js_object": "\n".join([noise, inspect_like({"workflow": {**workflow, "columnStats": inspect_stats}})]),
+        "fenced": "\n".join([noise, "분석 결과입니다.", "```json", json.dumps({"result": workflow}, indent=2), "```"]),
+        "answers": json.dumps({"answers": [{"message": {"content": json.dumps({"workflow": workflow})}}]}),
+        "basic_log_only": "\n".join([noise, basic_log.replace("undefined", "NaN"), noise]),
+    }
+
+
+# ─────────────────────────────────────────────
+def time_it(fn, text: str, repeat: int) -> tuple[float, tuple]:
+    samples = []
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(text)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples), out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--inputs", nargs="*", help="녹화된 오케스트레이터 stdout 파일")
+    ap.add_argument("--cols", type=int, default=400, help="합성 출력의 컬럼 수")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--out", help="결과 JSON 저장 경로")
+    args = ap.parse_args()
+
+    if args.inputs:
+        cases = {Path(p).name: Path(p).read_text(encoding="utf-8", errors="replace") for p in args.inputs}
+    else:
+        cases = synthetic_outputs(args.cols)
+
+    report = []
+    mismatched = 0
+    for name, text in cases.items():
+        before_s, before = time_it(legacy_extract_workflow_dict, text, args.repeat)
+        after_s, after = time_it(extract_workflow_dict, text, args.repeat)
+        same = before[0] == after[0]
+        mismatched += not same
+        row = {
+            "case": name,
+            "size_kb": round(len(text.encode("utf-8")) / 1024, 1),
+            "before_ms": round(before_s * 1000, 2),
+            "after_ms": round(after_s * 1000, 2),
+            "speedup": round(before_s / after_s, 1) if after_s else None,
+            "found": after[0] is not None,
+            "match": same,
+        }
+        report.append(row)
+        print(f"{name:16s} {row['size_kb']:>9.1f} KB  before {row['before_ms']:>9.2f} ms  "
+              f"after {row['after_ms']:>8.2f} ms  x{row['speedup']}  match={same}")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
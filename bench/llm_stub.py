@@ -0,0 +1,142 @@
+"""
+결정적 로컬 LLM 스텁 (OpenAI 호환 /v1/chat/completions)
+
+벤치마크가 네트워크/API 키 없이 /run_workflow/, /chat/ 전체 경로를 돌릴 수 있도록
+오케스트레이터의 OpenAI 클라이언트를 이 서버로 돌린다 (OPENAI_BASE_URL, OPENAI_API_KEY 환경변수 → 자식 프로세스 상속).
+
+- 도구 호출 없이 마지막 user 메시지를 그대로 돌려준다 → 같은 입력이면 항상 같은 응답, 지연은 --latency-ms 만큼 고정
+- stream=true 요청은 SSE(한 덩어리 + [DONE])로 응답
+- 받은 요청 수/프롬프트 글자 수를 기록 (벤치 결과에 LLM 왕복 횟수로 남김)
+
+사용 예)
+    python bench/llm_stub.py --port 8765
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub uvicorn fastapi_main:app
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _last_user_text(messages) -> str:
+    for m in reversed(messages or []):
+        if m.get("role") == "user":
+            content = m.get("content")
+            if isinstance(content, list):
+                return "".join(p.get("text", "") for p in content if isinstance(p, dict))
+            return str(content or "")
+    return ""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "llm-stub/1"
+
+    def log_message(self, *args):  # 요청마다 stderr 로그 남기지 않음
+        pass
+
+    def _json(self, code: int, body: dict):
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            return self._json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._json(404, {"error": {"message": "not found"}})
+        req = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        stub: LLMStub = self.server.stub
+        text = _last_user_text(req.get("messages"))
+        stub.record(req, text)
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        model = req.get("model") or "stub"
+        usage = {"prompt_tokens": len(text) // 4, "completion_tokens": len(text) // 4,
+                 "total_tokens": len(text) // 2}
+        if not req.get("stream"):
+            return self._json(200, {
+                "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": text}}],
+                "usage": usage,
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for delta, finish in (({"role": "assistant", "content": text}, None), ({}, "stop")):
+            chunk = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": 0, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+class LLMStub:
+    """백그라운드 스레드에서 도는 스텁 서버. with 문으로 쓰면 종료까지 처리"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.requests = 0
+        self.prompt_chars = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.stub = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def record(self, req: dict, text: str):
+        with self._lock:
+            self.requests += 1
+            self.prompt_chars += sum(len(json.dumps(m, ensure_ascii=False)) for m in req.get("messages") or [])
+
+    def env(self) -> dict:
+        """오케스트레이터(자식 프로세스 포함)가 이 스텁을 쓰도록 하는 환경변수"""
+        return {"OPENAI_BASE_URL": self.base_url, "OPENAI_API_KEY": "stub"}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "promptChars": self.prompt_chars}
+
+    def start(self) -> "LLMStub":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="응답마다 고정 지연 (실제 API 왕복 흉내)")
+    a = ap.parse_args()
+    stub = LLMStub(a.host, a.port, a.latency_ms)
+    print(f"LLM stub → {stub.base_url}  (OPENAI_BASE_URL={stub.base_url} OPENAI_API_KEY=stub)")
+    try:
+        stub._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+/chat/ 1회당 오케스트레이터 기동 비용 측정 (before: 매번 spawn / after: 워커 풀)
+
+- before: `npx ts-node src/main.ts --mode=ping` 을 매번 새로 실행 (TS 컴파일 + Node 기동 + 모듈 로딩)
+- after : 미리 데워둔 `--mode=server` 워커에 ping 프레임 왕복
+- --chat "메시지" --csv <경로> 를 주면 실제 chat 작업으로도 비교 (OPENAI_API_KEY 필요)
+- --worker compute: 같은 풀로 파이썬 계산 워커(src/scripts/compute_worker.py)를 측정
+  (before: 매번 인터프리터 기동 + pandas/sklearn/xgboost import 후 ready 까지, after: ping 왕복 — node_modules 불필요)
+
+사용 예)
+    python bench/orchestrator_latency.py --runs 5 --out bench_output.json
+    python bench/orchestrator_latency.py --worker compute --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from orchestrator_pool import OrchestratorPool, OrchestratorWorker  # noqa: E402
+
+NPX = "npx.cmd" if os.name == "nt" else "npx"
+WORKERS = {
+    "orchestrator": [NPX, "ts-node", "src/main.ts", "--mode=server"],
+    "compute": [sys.executable, "src/scripts/compute_worker.py"],
+}
+
+
+def summarize(samples: list[float]) -> dict:
+    return {
+        "runs": len(samples),
+        "mean_s": round(statistics.mean(samples), 4),
+        "median_s": round(statistics.median(samples), 4),
+        "min_s": round(min(samples), 4),
+        "max_s": round(max(samples), 4),
+    }
+
+
+def cold_once(args: list[str]) -> float:
+    t0 = time.perf_counter()
+    subprocess.run([NPX, "ts-node", "src/main.ts", *args], cwd=PROJECT_ROOT,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - t0
+
+
+def cold_ready_once(cmd: list[str]) -> float:
+    """상주 워커를 새로 띄워 ready 프레임까지 (요청마다 프로세스를 띄우는 경우의 기동 비용)"""
+    t0 = time.perf_counter()
+    worker = OrchestratorWorker(cmd, str(PROJECT_ROOT), os.environ.copy())
+    ok = worker.wait_ready(180)
+    elapsed = time.perf_counter() - t0
+    worker.close()
+    if not ok:
+        print("워커를 띄우지 못했습니다.", file=sys.stderr)
+        sys.exit(1)
+    return elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--chat", default=None, help="실제 chat 메시지로도 비교")
+    ap.add_argument("--csv", default=None)
+    ap.add_argument("--session", default="bench")
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--worker", choices=list(WORKERS), default="orchestrator")
+    opts = ap.parse_args()
+
+    report: dict = {"worker": opts.worker}
+
+    # before: 매 요청 spawn
+    if opts.worker == "compute":
+        report["spawn_ready"] = summarize([cold_ready_once(WORKERS["compute"]) for _ in range(opts.runs)])
+    else:
+        report["spawn_ping"] = summarize([cold_once(["--mode=ping"]) for _ in range(opts.runs)])
+    if opts.chat and opts.worker == "orchestrator":
+        report["spawn_chat"] = summarize([
+            cold_once(["--mode=chat", opts.chat, opts.csv or "", opts.session]) for _ in range(opts.runs)
+        ])
+
+    # after: 워커 풀 (기동 시간은 1회만 지불)
+    t0 = time.perf_counter()
+    pool = OrchestratorPool(cmd=WORKERS[opts.worker], cwd=PROJECT_ROOT, size=1)
+    worker = pool._spawn()
+    if worker is None:
+        print("워커를 띄우지 못했습니다 (npx/ts-node 확인).", file=sys.stderr)
+        sys.exit(1)
+    pool._idle.put(worker)
+    report["pool_warmup_s"] = round(time.perf_counter() - t0, 3)
+
+    samples = []
+    for _ in range(opts.runs):
+        t = time.perf_counter()
+        worker.ping()
+        samples.append(time.perf_counter() - t)
+    report["pool_ping"] = summarize(samples)
+
+    if opts.chat and opts.worker == "orchestrator":
+        samples = []
+        for _ in range(opts.runs):
+            t = time.perf_counter()
+            pool.run("chat", message=opts.chat, filePath=opts.csv or "", sessionId=opts.session)
+            samples.append(time.perf_counter() - t)
+        report["pool_chat"] = summarize(samples)
+
+    pool.shutdown()
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if opts.out:
+        Path(opts.out).write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
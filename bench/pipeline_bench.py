@@ -0,0 +1,388 @@
+"""
+파이프라인 구간별 벤치마크 (합성 CSV → 구간마다 따로 측정 → JSON 결과 / 기준 결과와 비교)
+
+측정 구간 (--stages 로 고름, 기본: e2e 제외 전부)
+- preview     : fastapi_main.get_csv_preview (cold: 미리보기 사이드카/메모 없음, warm: 메모 적중)
+- extract     : output_extractor.extract_workflow_dict (녹화된 stdout --recorded, 없으면 합성 출력 5종)
+- correlation : src/scripts/correlation_engine.py
+- preprocess  : src/scripts/preprocess_engine.py
+- visualize   : src/scripts/visualize_from_json.py
+- train       : src/scripts/train_ml_model.py (입력은 preprocess 산출물)
+- visualize_worker / train_worker : 같은 작업을 상주 계산 워커(src/scripts/compute_worker.py)에 보냄
+                (워커 기동/import 는 측정 제외 → 스크립트 구간과의 차이가 작업당 인터프리터 기동 비용)
+- e2e         : 업로드 → POST /run_workflow/ 전체 경로 (오케스트레이터 필요). LLM 은 bench/llm_stub.py 로 대체되어
+                네트워크/API 키 없이 결정적으로 돈다. 산출물 캐시는 끄고 force=1 로 단계 재사용도 끈다.
+
+스크립트 구간은 서버와 같은 방식(새 인터프리터)으로 실행하고, stage_metrics 가 남긴 import/CPU/최대 RSS 를 함께 기록한다.
+--baseline 이전결과.json 을 주면 구간별 중앙값을 비교해 --tolerance 이상 느려진 구간을 표시하고 종료 코드 1.
+
+사용 예)
+    python bench/pipeline_bench.py --rows 200000 --numeric 12 --categorical 4 --out bench_pipeline.json
+    python bench/pipeline_bench.py --stages e2e --repeat 2
+    python bench/pipeline_bench.py --baseline bench_pipeline.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "src" / "scripts"))
+
+from synth_csv import generate_csv, shape_of  # noqa: E402
+from llm_stub import LLMStub  # noqa: E402
+
+ALL_STAGES = ("preview", "extract", "correlation", "preprocess", "visualize", "train",
+              "visualize_worker", "train_worker", "e2e")
+DEFAULT_STAGES = tuple(s for s in ALL_STAGES if s != "e2e")
+
+
+def summarize(samples: list[float]) -> dict:
+    return {
+        "runs": len(samples),
+        "mean_s": round(statistics.mean(samples), 4),
+        "median_s": round(statistics.median(samples), 4),
+        "min_s": round(min(samples), 4),
+        "max_s": round(max(samples), 4),
+    }
+
+
+def time_runs(fn, repeat: int) -> dict:
+    """fn() 을 repeat 번 실행. fn 이 돌려준 dict(세부 지표)는 마지막 실행 것을 detail 로 남김"""
+    samples, detail = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        detail = fn()
+        samples.append(time.perf_counter() - t0)
+    out = summarize(samples)
+    if detail:
+        out["detail"] = detail
+    return out
+
+
+# ─────────────────────────────────────────────
+# 스크립트 실행 (서버와 같은 새 인터프리터 + stage_metrics 기록)
+# ─────────────────────────────────────────────
+class ScriptRunner:
+    def __init__(self, workdir: Path):
+        self.metrics_file = workdir / "stage_metrics.jsonl"
+
+    def run(self, script: str, *args: str) -> dict:
+        self.metrics_file.unlink(missing_ok=True)
+        env = {**os.environ, "STAGE_METRICS_FILE": str(self.metrics_file), "STAGE_METRICS_STEP": script}
+        proc = subprocess.run([sys.executable, f"src/scripts/{script}.py", *args], cwd=PROJECT_ROOT, env=env,
+                              capture_output=True, text=True, encoding="utf-8", errors="replace")
+        if proc.returncode != 0:
+            raise RuntimeError(f"{script} 실패 (code {proc.returncode}): {proc.stderr.strip()[-500:]}")
+        try:
+            rec = json.loads(self.metrics_file.read_text(encoding="utf-8").splitlines()[-1])
+            return {k: rec.get(k) for k in ("importSeconds", "cpuSeconds", "peakRssMb", "childPeakRssMb")}
+        except (OSError, ValueError, IndexError):
+            return {}
+
+
+class WorkerRunner:
+    """상주 계산 워커 1개 (서버의 COMPUTE_POOL 과 같은 풀 클래스). 첫 사용 때 기동하고 준비될 때까지 기다림"""
+
+    def __init__(self, workdir: Path):
+        self.metrics_file = workdir / "stage_metrics.jsonl"
+        self.pool = None
+
+    def run(self, op: str, **payload) -> dict:
+        if self.pool is None:
+            from orchestrator_pool import OrchestratorPool
+            self.pool = OrchestratorPool(cmd=[sys.executable, "src/scripts/compute_worker.py"], cwd=PROJECT_ROOT,
+                                         size=1, acquire_timeout=600, job_timeout=600, ready_timeout=120)
+            self.pool.start()
+            self.pool.release(self.pool.acquire())     # 준비 대기 (측정 제외)
+        self.metrics_file.unlink(missing_ok=True)
+        frame = self.pool.run_frame(op, metrics={"file": str(self.metrics_file), "step": op}, **payload)
+        if int(frame.get("code", 1)) != 0:
+            raise RuntimeError(f"{op} 실패: {frame.get('stderr', '').strip()[-500:]}")
+        try:
+            rec = json.loads(self.metrics_file.read_text(encoding="utf-8").splitlines()[-1])
+            return {k: rec.get(k) for k in ("cpuSeconds", "peakRssMb", "childPeakRssMb")}
+        except (OSError, ValueError, IndexError):
+            return {}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def recommendations_for(shape: dict) -> list[dict]:
+    """SelectorTool 규칙과 같은 모양의 전처리 권고 (numeric → mean/zscore, 범주 → mode/onehot|label)"""
+    recs = [{"column": f"num_{i}", "fillna": "mean", "normalize": "zscore"} for i in range(shape["numeric"])]
+    enc = "onehot" if shape["cardinality"] <= 10 else "label"
+    recs += [{"column": f"cat_{i}", "fillna": "mode", "encoding": enc} for i in range(shape["categorical"])]
+    return recs
+
+
+def selector_for(shape: dict) -> dict:
+    nums = [f"num_{i}" for i in range(shape["numeric"])]
+    pairs = [{"column1": nums[i], "column2": nums[i + 1]} for i in range(0, min(len(nums) - 1, 6), 2)]
+    model = "RandomForestClassifier" if shape["problem"] == "classification" else "RandomForestRegressor"
+    return {
+        "selectedColumns": nums, "recommendedPairs": pairs,
+        "targetColumn": "target", "problemType": shape["problem"],
+        "mlModelRecommendation": {"model": model, "params": {}, "reason": "bench"},
+    }
+
+
+# ─────────────────────────────────────────────
+# 구간
+# ─────────────────────────────────────────────
+def bench_preview(csv_path: Path, repeat: int) -> dict:
+    import fastapi_main as fm
+    from csv_preview import preview_cache_path
+
+    def cold():
+        preview_cache_path(str(csv_path)).unlink(missing_ok=True)
+        fm._preview_memo.clear()
+        return {"columns": len(fm.get_csv_preview(str(csv_path))[0])}
+
+    out = {"preview_cold": time_runs(cold, repeat)}
+    out["preview_warm"] = time_runs(lambda: fm.get_csv_preview(str(csv_path)) and None, max(repeat, 20))
+    return out
+
+
+def bench_extract(recorded: list[str] | None, cols: int, repeat: int) -> dict:
+    from output_extractor import extract_workflow_dict
+    if recorded:
+        cases = {Path(p).name: Path(p).read_text(encoding="utf-8", errors="replace") for p in recorded}
+    else:
+        from extractor_bench import synthetic_outputs
+        cases = synthetic_outputs(cols)
+    out = {}
+    for name, text in cases.items():
+        r = time_runs(lambda: {"found": extract_workflow_dict(text)[0] is not None}, repeat)
+        r["size_kb"] = round(len(text.encode("utf-8")) / 1024, 1)
+        out[f"extract:{name}"] = r
+    return out
+
+
+def run_e2e(csv_path: Path, repeat: int, chat: str | None, stub: LLMStub) -> dict:
+    import re
+    import fastapi_main as fm
+    from fastapi.testclient import TestClient
+
+    out = {}
+    with TestClient(fm.app) as client:
+        t0 = time.perf_counter()
+        with open(csv_path, "rb") as f:
+            resp = client.post("/upload_csv/", files={"file": (csv_path.name, f, "text/csv")})
+        upload_s = time.perf_counter() - t0
+        m = re.search(r'name="sessionId"\s+value="([^"]+)"', resp.text)
+        if resp.status_code != 200 or not m:
+            return {"e2e": {"error": f"업로드 실패 (HTTP {resp.status_code})"}}
+        sid = m.group(1)
+        out["e2e:upload"] = {**summarize([upload_s]), "bytes": csv_path.stat().st_size}
+
+        try:
+            samples, timings, error = [], None, None
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                resp = client.post("/run_workflow/", data={"sessionId": sid, "force": "1"})
+                samples.append(time.perf_counter() - t0)
+                job = next(reversed(fm.job_manager.jobs.values()), None)
+                result = (job.result or {}) if job else {}
+                if resp.status_code != 200 or (job and job.status == "error") or result.get("reply"):
+                    error = (job.error if job else None) or result.get("reply") or f"HTTP {resp.status_code}"
+                    break
+                timings = (result.get("workflow") or {}).get("timings")
+            out["e2e:run_workflow"] = {**summarize(samples), "stages": timings, "llm": stub.snapshot(),
+                                       **({"error": str(error)[:500]} if error else {})}
+
+            if chat and not error:
+                before = stub.snapshot()["requests"]
+                samples = []
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    client.post("/chat/", data={"sessionId": sid, "message": chat})
+                    samples.append(time.perf_counter() - t0)
+                out["e2e:chat"] = {**summarize(samples), "llmRequests": stub.snapshot()["requests"] - before}
+        finally:
+            shutil.rmtree(fm.UPLOAD_DIR / sid, ignore_errors=True)
+            shutil.rmtree(fm.OUTPUT_DIR / sid, ignore_errors=True)
+    return out
+
+
+# ─────────────────────────────────────────────
+# 비교
+# ─────────────────────────────────────────────
+def compare(current: dict, baseline: dict, tolerance: float, min_delta_s: float) -> list[dict]:
+    """구간별 중앙값 비교. tolerance(비율)와 min_delta_s(절대값)를 모두 넘으면 regression"""
+    rows = []
+    for name, cur in current.get("stages", {}).items():
+        base = baseline.get("stages", {}).get(name)
+        if not base or "median_s" not in base or "median_s" not in cur or cur.get("error") or base.get("error"):
+            continue   # 실패한 실행은 시간이 의미 없음
+        delta = cur["median_s"] - base["median_s"]
+        ratio = cur["median_s"] / base["median_s"] if base["median_s"] else None
+        rows.append({
+            "stage": name, "baseline_s": base["median_s"], "current_s": cur["median_s"],
+            "ratio": round(ratio, 3) if ratio else None,
+            "regression": bool(ratio and ratio > 1 + tolerance and delta > min_delta_s),
+            "improved": bool(ratio and ratio < 1 - tolerance and -delta > min_delta_s),
+        })
+    return rows
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=50_000)
+    ap.add_argument("--numeric", type=int, default=8)
+    ap.add_argument("--categorical", type=int, default=3)
+    ap.add_argument("--cardinality", type=int, default=20)
+    ap.add_argument("--missing", type=float, default=0.02)
+    ap.add_argument("--problem", choices=["regression", "classification"], default="regression")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--stages", default=",".join(DEFAULT_STAGES), help=f"쉼표 구분 ({','.join(ALL_STAGES)})")
+    ap.add_argument("--recorded", nargs="*", help="extract 구간에 쓸 녹화된 오케스트레이터 stdout 파일")
+    ap.add_argument("--extract-cols", type=int, default=400, help="합성 추출 입력의 컬럼 수")
+    ap.add_argument("--chat", default=None, help="e2e 에서 /chat/ 도 측정 (스텁 LLM 사용)")
+    ap.add_argument("--llm-latency-ms", type=float, default=0.0, help="스텁 LLM 응답 지연")
+    ap.add_argument("--workdir", default=None, help="합성 CSV/산출물 위치 (기본: 임시 폴더, 끝나면 삭제)")
+    ap.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    ap.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="이 비율 이상 느려지면 regression")
+    ap.add_argument("--min-delta-ms", type=float, default=50.0, help="이보다 작은 차이는 잡음으로 보고 무시")
+    a = ap.parse_args()
+
+    stages = [s.strip() for s in a.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(ALL_STAGES)
+    if unknown:
+        ap.error(f"알 수 없는 구간: {', '.join(sorted(unknown))}")
+
+    os.chdir(PROJECT_ROOT)
+    # 서버 모듈을 불러오기 전에: 캐시/정리 작업이 측정에 끼어들지 않도록
+    os.environ["ARTIFACT_CACHE"] = "0"
+    os.environ.setdefault("GC_INTERVAL", "0")
+    os.environ.setdefault("ORCH_POOL_SIZE", "0")
+
+    workdir = Path(a.workdir) if a.workdir else Path(tempfile.mkdtemp(prefix="autoanalyst_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    out_dir = workdir / "outputs"
+    out_dir.mkdir(exist_ok=True)
+    shape = shape_of(a.rows, a.numeric, a.categorical, a.cardinality, a.missing, a.problem, a.seed)
+
+    t0 = time.perf_counter()
+    csv_info = generate_csv(workdir / "synthetic.csv", shape)
+    csv_path = Path(csv_info["path"])
+    print(f"[BENCH] 합성 CSV {csv_info['rows']:,}행 × {csv_info['columns']}열, "
+          f"{csv_info['bytes'] / 1e6:.1f}MB ({time.perf_counter() - t0:.1f}s)")
+
+    stub = LLMStub(latency_ms=a.llm_latency_ms).start()
+    os.environ.update(stub.env())       # 오케스트레이터(자식 프로세스)가 상속
+    runner = ScriptRunner(workdir)
+    worker = WorkerRunner(workdir)
+    results: dict = {}
+    preprocessed = out_dir / "bench_preprocessed.csv"
+    recs = json.dumps(recommendations_for(shape))
+    selector = json.dumps(selector_for(shape))
+    try:
+        for stage in stages:
+            print(f"[BENCH] {stage} ...", flush=True)
+            try:
+                if stage == "preview":
+                    results.update(bench_preview(csv_path, a.repeat))
+                elif stage == "extract":
+                    results.update(bench_extract(a.recorded, a.extract_cols, a.repeat))
+                elif stage == "correlation":
+                    results["correlation"] = time_runs(lambda: runner.run(
+                        "correlation_engine", str(csv_path), str(out_dir), "--method", "pearson",
+                        "--threshold", "0.7"), a.repeat)
+                elif stage == "preprocess":
+                    results["preprocess"] = time_runs(lambda: runner.run(
+                        "preprocess_engine", str(csv_path), str(out_dir), "--recommendations", recs,
+                        "--output-name", preprocessed.name), a.repeat)
+                elif stage == "visualize":
+                    results["visualize"] = time_runs(lambda: runner.run(
+                        "visualize_from_json", str(csv_path), selector, str(out_dir), "bench"), a.repeat)
+                elif stage == "train":
+                    if not preprocessed.exists():   # 학습 입력 준비 (측정 제외)
+                        runner.run("preprocess_engine", str(csv_path), str(out_dir), "--recommendations", recs,
+                                   "--output-name", preprocessed.name)
+                    results["train"] = time_runs(lambda: runner.run(
+                        "train_ml_model", str(preprocessed), selector, str(out_dir), "bench"), a.repeat)
+                elif stage == "visualize_worker":
+                    results[stage] = time_runs(lambda: worker.run(
+                        "visualize", filePath=str(csv_path), selectorResult=json.loads(selector),
+                        outputDir=str(out_dir)), a.repeat)
+                elif stage == "train_worker":
+                    if not preprocessed.exists():
+                        runner.run("preprocess_engine", str(csv_path), str(out_dir), "--recommendations", recs,
+                                   "--output-name", preprocessed.name)
+                    results[stage] = time_runs(lambda: worker.run(
+                        "train", filePath=str(preprocessed), selectorResult=json.loads(selector),
+                        outputDir=str(out_dir), timestamp="bench"), a.repeat)
+                elif stage == "e2e":
+                    results.update(run_e2e(csv_path, a.repeat, a.chat, stub))
+            except Exception as e:     # 한 구간이 실패해도 나머지는 측정
+                results[stage] = {"error": f"{type(e).__name__}: {e}"[:500]}
+                print(f"[BENCH] {stage} 실패: {e}", file=sys.stderr)
+    finally:
+        stub.stop()
+        worker.close()
+        if not a.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "createdAt": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "shape": shape,
+            "csvBytes": csv_info["bytes"],
+            "repeat": a.repeat,
+        },
+        "stages": results,
+    }
+
+    for name, r in results.items():
+        if "median_s" in r:
+            print(f"{name:28s} median {r['median_s'] * 1000:>10.1f} ms   min {r['min_s'] * 1000:>10.1f} ms"
+                  + (f"   ({r['error'].splitlines()[0]})" if r.get("error") else ""))
+        else:
+            print(f"{name:28s} {r.get('error', '-')}")
+
+    regressed = []
+    if a.baseline:
+        baseline = json.loads(Path(a.baseline).read_text(encoding="utf-8"))
+        if baseline.get("meta", {}).get("shape") != shape:
+            print("[BENCH] ⚠️ 기준 결과와 데이터 형태가 다릅니다 (비교는 참고용)", file=sys.stderr)
+        report["comparison"] = compare(report, baseline, a.tolerance, a.min_delta_ms / 1000)
+        for row in report["comparison"]:
+            mark = "⚠️ REGRESSION" if row["regression"] else ("✅ faster" if row["improved"] else "")
+            print(f"{row['stage']:28s} {row['baseline_s'] * 1000:>10.1f} → {row['current_s'] * 1000:>10.1f} ms"
+                  f"  x{row['ratio']}  {mark}")
+        regressed = [r["stage"] for r in report["comparison"] if r["regression"]]
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if a.out:
+        Path(a.out).write_text(text, encoding="utf-8")
+        print(f"[BENCH] 결과 → {a.out}")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
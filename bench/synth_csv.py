@@ -0,0 +1,101 @@
+"""
+벤치마크용 합성 CSV 생성기 (시드 고정 → 같은 옵션이면 바이트 단위로 같은 파일)
+
+- 숫자형 컬럼: 정규분포 + 일부는 앞 컬럼과 상관(상관 분석/페어 추천이 실제로 일을 하도록)
+- 범주형 컬럼: 카디널리티(--cardinality) 만큼의 값에서 Zipf 분포로 추출
+- 결측: 컬럼마다 --missing 비율로 빈 칸 (타깃 컬럼은 제외)
+- 타깃: 마지막 컬럼 `target` (regression: 숫자 피처의 선형 결합 + 잡음 / classification: 3개 클래스)
+
+행 단위로 청크를 만들어 쓰므로 수백만 행도 메모리 부담 없이 생성된다.
+
+사용 예)
+    python bench/synth_csv.py out.csv --rows 200000 --numeric 12 --categorical 4 --cardinality 50 --missing 0.05
+"""
+import argparse
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+
+CHUNK_ROWS = 50_000
+
+
+def shape_of(rows: int = 10_000, numeric: int = 8, categorical: int = 3, cardinality: int = 20,
+             missing: float = 0.02, problem: str = "regression", seed: int = 0) -> dict:
+    """생성 옵션 dict (결과 JSON 에 그대로 남겨 실행끼리 비교할 때 쓴다)"""
+    return {"rows": int(rows), "numeric": int(numeric), "categorical": int(categorical),
+            "cardinality": max(int(cardinality), 2), "missing": float(missing),
+            "problem": problem, "seed": int(seed)}
+
+
+def column_names(shape: dict) -> list[str]:
+    return ([f"num_{i}" for i in range(shape["numeric"])]
+            + [f"cat_{i}" for i in range(shape["categorical"])] + ["target"])
+
+
+def _chunk(rng: np.random.Generator, n: int, shape: dict, weights: np.ndarray, levels: list[str]) -> list[list]:
+    k = shape["numeric"]
+    num = rng.normal(0.0, 1.0, size=(n, k)) * (1 + np.arange(k)) + np.arange(k) * 10
+    for i in range(1, k, 3):                    # 세 컬럼 중 하나는 바로 앞 컬럼과 강한 상관
+        num[:, i] = num[:, i - 1] * 0.9 + rng.normal(0.0, 0.3, size=n) * (1 + i)
+    signal = num @ weights if k else np.zeros(n)
+
+    # Zipf 비슷한 빈도 (앞쪽 수준이 자주 나옴)
+    p = 1.0 / np.arange(1, len(levels) + 1)
+    p /= p.sum()
+    cats = [rng.choice(levels, size=n, p=p) for _ in range(shape["categorical"])]
+
+    if shape["problem"] == "classification":
+        cut = np.quantile(signal, [1 / 3, 2 / 3]) if n > 2 else [0.0, 0.0]
+        target = np.array(["low", "mid", "high"])[np.searchsorted(cut, signal)]
+    else:
+        target = np.round(signal + rng.normal(0.0, 1.0, size=n), 4)
+
+    mask = rng.random((n, k + shape["categorical"])) < shape["missing"]
+    out = []
+    for r in range(n):
+        row = [("" if mask[r, c] else round(float(num[r, c]), 4)) for c in range(k)]
+        row += [("" if mask[r, k + c] else cats[c][r]) for c in range(shape["categorical"])]
+        row.append(target[r])
+        out.append(row)
+    return out
+
+
+def generate_csv(path, shape: dict) -> dict:
+    """shape 대로 CSV 를 쓰고 {path, bytes, rows, columns} 반환"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(shape["seed"])
+    weights = rng.uniform(-2.0, 2.0, size=shape["numeric"])
+    levels = [f"c{j:03d}" for j in range(shape["cardinality"])]
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(column_names(shape))
+        left = shape["rows"]
+        while left > 0:
+            n = min(CHUNK_ROWS, left)
+            w.writerows(_chunk(rng, n, shape, weights, levels))
+            left -= n
+    return {"path": str(path), "bytes": path.stat().st_size, "rows": shape["rows"],
+            "columns": len(column_names(shape))}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("out")
+    ap.add_argument("--rows", type=int, default=10_000)
+    ap.add_argument("--numeric", type=int, default=8)
+    ap.add_argument("--categorical", type=int, default=3)
+    ap.add_argument("--cardinality", type=int, default=20)
+    ap.add_argument("--missing", type=float, default=0.02)
+    ap.add_argument("--problem", choices=["regression", "classification"], default="regression")
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args()
+    shape = shape_of(a.rows, a.numeric, a.categorical, a.cardinality, a.missing, a.problem, a.seed)
+    print(json.dumps(generate_csv(a.out, shape), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, Request, UploadFile, File, Form, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 import os, subprocess, csv, json
@@ -8,7 +8,7 @@ from pathlib import Path
 from typing import List, Dict
 
 # ADD sessions
-import uuid, subprocess, json, re
+import uuid, subprocess, json, re, shutil
 
 app = FastAPI()
 
@@ -27,40 +27,209 @@ import re
 PROJECT_ROOT = Path(__file__).resolve().parent
 NPX = "npx.cmd" if os.name == "nt" else "npx"
 
-def run_ts_workflow(file_path: Path, sessionId:str, message: str = "분석해줘"):
-    import shlex, subprocess, os
-    # ⬇️ 여기: main.ts + --mode=workflow
-    base_args = [NPX, "ts-node", "src/main.ts", "--mode=workflow", message, str(file_path), sessionId]
-    env = os.environ.copy()
-    try:
-        proc = subprocess.Popen(
-            base_args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            shell=False,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
-            cwd=str(PROJECT_ROOT),
-            env=env,
+# src/scripts 의 파이썬 엔진(미리보기 등)을 서버에서도 import 해서 사용
+import sys
+SCRIPTS_DIR = PROJECT_ROOT / "src" / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+# ------------------------------
+# 오케스트레이터 실행 (상주 워커 풀 → 실패 시 1회성 프로세스)
+# ------------------------------
+import tempfile
+
+from orchestrator_pool import OrchestratorPool, PoolBusyError, WorkerDiedError
+
+ORCH_POOL_SIZE = int(os.environ.get("ORCH_POOL_SIZE", "2"))              # 0이면 풀 미사용(매 요청 spawn)
+ORCH_MAX_JOBS = int(os.environ.get("ORCH_MAX_JOBS", "50"))               # 워커당 N건 처리 후 재시작
+ORCH_ACQUIRE_TIMEOUT = float(os.environ.get("ORCH_ACQUIRE_TIMEOUT", "30"))    # 워커가 모두 바쁠 때 (워밍업 중엔 ready 까지 대기)
+ORCH_JOB_TIMEOUT = float(os.environ.get("ORCH_JOB_TIMEOUT", "600"))
+ORCH_HEALTH_INTERVAL = float(os.environ.get("ORCH_HEALTH_INTERVAL", "60"))
+
+_orchestrator_pool: OrchestratorPool | None = None
+
+def get_orchestrator_pool() -> OrchestratorPool | None:
+    global _orchestrator_pool
+    if ORCH_POOL_SIZE <= 0:
+        return None
+    if _orchestrator_pool is None:
+        _orchestrator_pool = OrchestratorPool(
+            cmd=[NPX, "ts-node", "src/main.ts", "--mode=server"],
+            cwd=PROJECT_ROOT,
+            size=ORCH_POOL_SIZE,
+            max_jobs=ORCH_MAX_JOBS,
+            acquire_timeout=ORCH_ACQUIRE_TIMEOUT,
+            job_timeout=ORCH_JOB_TIMEOUT,
+            health_interval=ORCH_HEALTH_INTERVAL,
+            env=os.environ.copy(),
         )
-        stdout, stderr = proc.communicate(timeout=600)
-        return proc.returncode, stdout, stderr
-    except FileNotFoundError:
-        cmd_str = f'{NPX} ts-node src/main.ts --mode=workflow {shlex.quote(message)} {shlex.quote(str(file_path))}'
-        proc = subprocess.Popen(
-            cmd_str,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            shell=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
-            cwd=str(PROJECT_ROOT),
-            env=env,
+        _orchestrator_pool.start()
+    return _orchestrator_pool
+
+
+# 로컬 엔진의 시각화/학습용 상주 파이썬 계산 워커 (라이브러리 import 를 작업마다 반복하지 않음)
+COMPUTE_POOL_SIZE = int(os.environ.get("COMPUTE_POOL_SIZE", "2"))        # 0이면 작업마다 스크립트 실행
+COMPUTE_MAX_JOBS = int(os.environ.get("COMPUTE_MAX_JOBS", "100"))        # 워커당 N건 처리 후 재시작 (메모리 회수)
+COMPUTE_JOB_TIMEOUT = float(os.environ.get("LOCAL_SCRIPT_TIMEOUT", "600"))
+
+_compute_pool: OrchestratorPool | None = None
+
+def get_compute_pool() -> OrchestratorPool | None:
+    global _compute_pool
+    if COMPUTE_POOL_SIZE <= 0:
+        return None
+    if _compute_pool is None:
+        _compute_pool = OrchestratorPool(
+            cmd=[sys.executable, "src/scripts/compute_worker.py"],
+            cwd=PROJECT_ROOT,
+            size=COMPUTE_POOL_SIZE,
+            max_jobs=COMPUTE_MAX_JOBS,
+            acquire_timeout=COMPUTE_JOB_TIMEOUT,     # 바쁘면 앞 작업이 끝날 때까지 기다림
+            job_timeout=COMPUTE_JOB_TIMEOUT,
+            ready_timeout=60,
+            health_interval=ORCH_HEALTH_INTERVAL,
+            env=os.environ.copy(),
         )
-        stdout, stderr = proc.communicate(timeout=600)
-        return proc.returncode, stdout, stderr
+        _compute_pool.start()
+    return None if _compute_pool.broken else _compute_pool
+
+
+WORKFLOW_STEP = "<<<WORKFLOW_STEP>>>"
+WORKFLOW_JSON_START = "<<<WORKFLOW_JSON_START>>>"
+WORKFLOW_JSON_END = "<<<WORKFLOW_JSON_END>>>"
+STDOUT_TAIL_LINES = 200   # 워크플로 모드에서 로그로 남길 stdout 꼬리 줄 수
+
+
+def _popen_ts(mode: str, message: str, file_path: Path, sessionId: str, options: dict | None = None,
+              env: dict | None = None):
+    import shlex
+    base_args = [NPX, "ts-node", "src/main.ts", f"--mode={mode}", message, str(file_path), sessionId]
+    if options:
+        base_args.append(json.dumps(options, ensure_ascii=False))
+    kwargs = dict(stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8",
+                  errors="replace", cwd=str(PROJECT_ROOT), env={**os.environ, **(env or {})})
+    try:
+        return subprocess.Popen(base_args, shell=False, **kwargs)
+    except FileNotFoundError:
+        cmd_str = " ".join([NPX] + [shlex.quote(a) for a in base_args[1:]])
+        return subprocess.Popen(cmd_str, shell=True, **kwargs)
+
+
+def _spawn_ts(mode: str, message: str, file_path: Path, sessionId: str, on_step=None, options: dict | None = None,
+              state_file: Path | None = None):
+    """워커 풀을 쓸 수 없을 때의 기존 방식: 요청마다 ts-node 프로세스 1회 실행
+
+    stdout 을 한 줄씩 읽으면서 단계 이벤트(<<<WORKFLOW_STEP>>>)는 바로 on_step 으로 넘기고,
+    결과 JSON 은 마커 구간만 모은다. 워크플로 모드에선 나머지 로그는 꼬리만 보관.
+    state_file: 채팅 에이전트 상태를 주고받을 파일 (CHAT_STATE_FILE — 실행 전에 읽고 끝나면 덮어씀)
+    → (returncode, stdout, stderr, workflow | None)
+    """
+    import threading
+    from collections import deque
+
+    proc = _popen_ts(mode, message, file_path, sessionId, options,
+                     {"CHAT_STATE_FILE": str(state_file)} if state_file else None)
+    stderr_buf: list[str] = []
+    t_err = threading.Thread(target=lambda: stderr_buf.extend(proc.stderr), daemon=True)
+    t_err.start()
+    timed_out = threading.Event()
+    timer = threading.Timer(ORCH_JOB_TIMEOUT, lambda: (timed_out.set(), proc.kill()))
+    timer.start()
+
+    streaming = mode == "workflow"
+    out_lines = deque(maxlen=STDOUT_TAIL_LINES) if streaming else []
+    json_lines: list[str] | None = None
+    workflow = None
+    try:
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            if streaming and line.startswith(WORKFLOW_STEP):
+                if on_step:
+                    try:
+                        on_step(json.loads(line[len(WORKFLOW_STEP):]))
+                    except ValueError:
+                        pass
+                continue
+            if streaming and line.strip() == WORKFLOW_JSON_START:
+                json_lines = []
+                continue
+            if json_lines is not None:
+                if line.strip() == WORKFLOW_JSON_END:
+                    try:
+                        workflow = (json.loads("\n".join(json_lines)) or {}).get("workflow")
+                    except (ValueError, AttributeError):
+                        workflow = None
+                    json_lines = None
+                else:
+                    json_lines.append(line)
+                continue
+            out_lines.append(line)
+        proc.wait()
+    finally:
+        timer.cancel()
+    t_err.join(timeout=5)
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd="ts-node src/main.ts", timeout=ORCH_JOB_TIMEOUT)
+    return proc.returncode, "\n".join(out_lines), "".join(stderr_buf), workflow if isinstance(workflow, dict) else None
+
+
+def _run_orchestrator(mode: str, message: str, file_path: Path, sessionId: str, on_step=None,
+                      options: dict | None = None, state: dict | None = None):
+    """→ (returncode, stdout, stderr, workflow | None, state | None)
+
+    state: 채팅 에이전트 상태 {histories, slots}. 워커는 요청에 실린 상태로 시작하고 끝난 상태를 결과로 돌려준다
+    (워커 안에 남기지 않음 → 풀에 세션 고정이 없어도, 워커가 재시작돼도 문맥 유지)
+    """
+    pool = get_orchestrator_pool()
+    if pool is not None and not pool.broken:
+        on_event = (lambda f: on_step(f) if f.get("event") == "step" else None) if on_step else None
+        try:
+            frame = pool.run_frame(mode, on_event, message=message, filePath=str(file_path), sessionId=sessionId,
+                                   **({"options": options} if options else {}),
+                                   **({"state": state} if mode == "chat" else {}))
+        except WorkerDiedError as e:
+            return 1, "", f"orchestrator worker died: {e}", None, None
+        workflow, new_state = frame.get("workflow"), frame.get("state")
+        return (int(frame.get("code", 1)), frame.get("stdout", ""), frame.get("stderr", ""),
+                workflow if isinstance(workflow, dict) else None, new_state if isinstance(new_state, dict) else None)
+    if mode != "chat":
+        return (*_spawn_ts(mode, message, file_path, sessionId, on_step, options), None)
+
+    # 단발 실행: 상태는 임시 파일로 주고받음
+    fd, tmp = tempfile.mkstemp(prefix="chat_state_", suffix=".json")
+    state_file = Path(tmp)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state or {}, f, ensure_ascii=False)
+        out = _spawn_ts(mode, message, file_path, sessionId, on_step, options, state_file)
+        try:
+            new_state = json.loads(state_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            new_state = None
+        return (*out, new_state if isinstance(new_state, dict) and new_state else None)
+    finally:
+        state_file.unlink(missing_ok=True)
+
+
+def run_ts_workflow(file_path: Path, sessionId:str, message: str = "분석해줘", on_step=None,
+                    options: dict | None = None):
+    """options: 워크플로 옵션(targetColumn / problemType / model / force). 바뀐 값에 의존하는 단계만 다시 계산"""
+    return _run_orchestrator("workflow", message, file_path, sessionId, on_step, options)[:4]
+
+
+def run_ts_chat(file_path: Path, sessionId: str, message: str):
+    """채팅 1턴. 에이전트 상태는 세션 저장소에서 꺼내 보내고 돌려받은 상태로 갱신"""
+    code, stdout, stderr, _, state = _run_orchestrator("chat", message, file_path, sessionId,
+                                                       state=session_store.agent_state(sessionId))
+    if state is not None:
+        session_store.set_agent_state(sessionId, state)
+    return code, stdout, stderr
+
+
+def busy_or_timeout_reply(e: Exception) -> str:
+    if isinstance(e, PoolBusyError):
+        return "⚠️ 요청이 많아 처리 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요."
+    return "⚠️ 응답 시간 초과"
 
 
 def extract_json_and_text(output_str: str):
@@ -213,9 +382,14 @@ def map_artifacts(workflow: dict, sessionId: str) -> dict:
     return wf
 
 def build_steps(wf: dict, corr_has_table: bool = False) -> list[dict]:  # [CHANGED]
-    """워크플로 dict에서 단계(툴)별 완료 여부를 계산"""
+    """워크플로 dict에서 단계(툴)별 완료 여부를 계산 (reused: 이전 실행의 출력을 그대로 쓴 단계,
+    timing: 단계 소요 시간/메모리 + 그 단계에서 실행된 파이썬 스크립트별 지표)"""
+    reused = set(wf.get("reusedSteps") or [])
+    timings = wf.get("timings") or {}
+
     def st(key, title, ok):
-        return {"key": key, "title": title, "status": "done" if ok else "skipped"}
+        return {"key": key, "title": title, "status": "done" if ok else "skipped", "reused": ok and key in reused,
+                "timing": timings.get(key)}
 
     steps = []
     steps.append(st("basic",     "1) BasicAnalysisTool",            bool(wf.get("columnStats"))))
@@ -228,80 +402,6 @@ def build_steps(wf: dict, corr_has_table: bool = False) -> list[dict]:  # [CHANG
     steps.append(st("train",     "6) MachineLearningTool",          ml_ok))
     return steps
 
-def coerce_to_json(s: str):
-    """
-    로그에 여러 JSON-유사 블록이 섞여 있을 때,
-    - 키워드 포함 블록(columnStats 등) 우선
-    - 없으면 가장 큰 블록
-    을 골라 보정 후 json.loads 시도.
-    """
-    # 0) 정상 JSON 먼저
-    try:
-        return json.loads(s)
-    except Exception:
-        pass
-
-    if not s or "{" not in s or "}" not in s:
-        return None
-
-    # 1) 모든 최상위 {…} 블록 추출 (문자열/이스케이프 인지)
-    blocks = []
-    depth = 0
-    in_str = False
-    esc = False
-    start = None
-    for i, ch in enumerate(s):
-        if in_str:
-            if esc:
-                esc = False
-            elif ch == "\\":
-                esc = True
-            elif ch == '"':
-                in_str = False
-            continue
-        if ch == '"':
-            in_str = True
-            continue
-        if ch == "{":
-            if depth == 0:
-                start = i
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0 and start is not None:
-                blocks.append(s[start:i+1])
-                start = None
-
-    if not blocks:
-        return None
-
-    # 2) 키워드가 들어있는 블록을 우선, 없으면 길이순 내림차순
-    prefer = ("columnStats", "selectedColumns", "mlModelRecommendation", "mlResultPath")
-    blocks.sort(key=lambda b: (any(k in b for k in prefer), len(b)), reverse=True)
-
-    # 3) 각 블록에 대해 보정 후 파싱 시도
-    for core in blocks:
-        try:
-            # { key: ... } -> { "key": ... }
-            core2 = re.sub(r'([,{]\s*)([A-Za-z_][A-Za-z0-9_]*)\s*:', r'\1"\2":', core)
-            # ' -> "
-            core2 = core2.replace("'", '"')
-            # JS 특수값 → JSON 값
-            core2 = core2.replace("undefined", "null")
-            core2 = re.sub(r'\bNaN\b', 'null', core2)
-            core2 = re.sub(r'\bInfinity\b', 'null', core2)
-            core2 = re.sub(r'\b-Infinity\b', 'null', core2)
-            # [Object] → {}
-            core2 = re.sub(r'\[\s*Object\s*\]', "{}", core2)
-            core2 = core2.replace("[Object], [Object]", "{}, {}")
-            # 끝 콤마 제거
-            core2 = re.sub(r',\s*([}\]])', r'\1', core2)
-            return json.loads(core2)
-        except Exception:
-            continue
-
-    return None
-
 import re, time, json
 ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
 
@@ -309,125 +409,34 @@ def sanitize_stdout(s: str) -> str:
     if not s: return ""
     return ANSI_RE.sub("", s).strip()
 
-def _looks_like_workflow(obj: dict) -> bool:
-    """워크플로 핵심 키가 1개라도 있어야 유효로 간주"""
-    if not isinstance(obj, dict):
-        return False
-    keys = {
-        "columnStats", "selectedColumns", "recommendedPairs",
-        "preprocessingRecommendations", "preprocessedFilePath",
-        "preprocessedFilePathUrl", "mlModelRecommendation",
-        "mlResultPath", "chartPaths", "chartUrls"
-    }
-    return any(k in obj for k in keys)
-
-def _jsonify_js_like(text: str) -> str:
-    """JS풍 객체/배열 문자열을 JSON으로 근사 변환"""
-    s = text
-    # 키에 쌍따옴표 없으면 추가: { key: ... } => { "key": ... }
-    s = re.sub(r'([{\[,]\s*)([A-Za-z_][A-Za-z0-9_]*)\s*:', r'\1"\2":', s)
-    # ' -> "
-    s = s.replace("'", '"')
-    # NaN/Infinity 계열
-    s = re.sub(r'\bNaN\b', 'null', s)
-    s = re.sub(r'\b-Infinity\b', 'null', s)
-    s = re.sub(r'\bInfinity\b', 'null', s)
-    # 끝 콤마 제거
-    s = re.sub(r',\s*([}\]])', r'\1', s)
-    return s
-
-def extract_workflow_dict(output_str: str):
-    """
-    1) coerce_to_json
-    2) ```json ... ``` 코드블록
-    3) 최상위 JSON의 answers[*].message.content 내부 JSON
-    4) 로그 텍스트의 'BasicAnalysisTool 결과: [ ... ]' 패턴 재구성 → {'columnStats': [...]}
-    실패 시 (None, None)
-    """
-    s = sanitize_stdout(output_str)
-
-    m = re.search(r"<<<WORKFLOW_JSON_START>>>\s*([\s\S]*?)\s*<<<WORKFLOW_JSON_END>>>", s)
-    if m:
-        try:
-            obj = json.loads(m.group(1))
-            cand = obj.get("workflow") if isinstance(obj, dict) else None
-            if isinstance(cand, dict):
-                return cand, obj
-        except Exception:
-            pass
-
-
-    # 1) 1차: 기존 보정 파서
-    top = coerce_to_json(s)
-    if isinstance(top, dict):
-        for cand in (top.get("workflow"), top.get("result"), top):
-            if isinstance(cand, dict) and _looks_like_workflow(cand):
-                return cand, top
-
-    # 2) ```json ... ``` 코드블록
-    for m in re.finditer(r"```(?:json)?\s*([\s\S]*?)```", s, re.I):
-        block = m.group(1).strip()
-        try:
-            obj = json.loads(block)
-            for cand in (obj.get("workflow"), obj.get("result"), obj):
-                if isinstance(cand, dict) and _looks_like_workflow(cand):
-                    return cand, obj
-        except Exception:
-            pass
-
-    # 3) answers[*].message.content 내부 JSON
-    try:
-        maybe = json.loads(s)
-        if isinstance(maybe, dict):
-            for a in (maybe.get("answers") or []):
-                content = ((a.get("message") or {}).get("content") or "").strip()
-                if not content:
-                    continue
-                try:
-                    obj = json.loads(content)
-                except Exception:
-                    obj = coerce_to_json(content.replace('\\"','"'))
-                if isinstance(obj, dict):
-                    for cand in (obj.get("workflow"), obj.get("result"), obj):
-                        if isinstance(cand, dict) and _looks_like_workflow(cand):
-                            return cand, obj
-    except Exception:
-        pass
-
-    # 4) 로그 텍스트에서 BasicAnalysisTool 배열만이라도 추출
-    m = re.search(r"BasicAnalysisTool\s*결과\s*:\s*(\[[\s\S]*?\])", s, re.I)
-    if m:
-        arr_text = _jsonify_js_like(m.group(1))
-        try:
-            arr = json.loads(arr_text)
-            if isinstance(arr, list) and arr and isinstance(arr[0], dict):
-                wf = {"columnStats": arr}
-                return wf, {"columnStats": arr}
-        except Exception:
-            pass
-
-    return None, None
+# 워크플로 결과 추출: 단일 패스 추출기 (마커 → 보정 파서 → 코드펜스 → answers → BasicAnalysisTool 로그)
+from output_extractor import extract_workflow_dict
 
 
 # ------------------------------
 # 생성물 리스트
 # ------------------------------
+# 각 단계가 src/outputs/{sessionId}/.manifest.jsonl 에 덧붙인 기록을 세션별로 증분 로드
+from artifact_manifest import ManifestIndex, record as record_artifacts
+
+artifact_index = ManifestIndex(OUTPUT_DIR)
+
+
 def list_generated_files(sessionId:str) -> List[Dict]:
-    """OUTPUT_DIR 내 생성물 파일 리스트를 dict 목록으로 반환"""
-    files = []
+    """세션 산출물 매니페스트 기준 생성물 리스트 (폴더 glob/파일별 stat 없음)"""
     if not sessionId:
         # 적절한 기본값 또는 에러 처리
         sessionId = "default"  # 임시 기본 디렉토리
-    session_dir = OUTPUT_DIR / sessionId
-    if OUTPUT_DIR.exists():
-        for p in sorted(session_dir.glob("*")):
-            if p.is_file():
-                files.append({
-                    "name": p.name,
-                    "url": f"/outputs/{sessionId}/{p.name}",
-                    "size": p.stat().st_size,
-                    "ext": p.suffix.lower(),
-                })
+    files = []
+    for e in sorted(artifact_index.entries(sessionId), key=lambda e: e["name"]):
+        files.append({
+            "name": e["name"],
+            "url": f"/outputs/{sessionId}/{e['name']}",
+            "size": e.get("size"),
+            "ext": Path(e["name"]).suffix.lower(),
+            "kind": e.get("kind"),
+            "step": e.get("step"),
+        })
     return files
 
 
@@ -446,33 +455,110 @@ app.add_middleware(
 # ------------------------------
 # CSV 미리보기
 # ------------------------------
+# (경로, 크기, mtime) → 미리보기. 파일당 1회만 청크 스트리밍으로 계산하고
+# 디스크 캐시(<파일>.preview.json) + 프로세스 메모리 캐시에서 응답한다.
+from collections import OrderedDict
+from fastapi.concurrency import run_in_threadpool
+PREVIEW_MEMO_SIZE = 64
+_preview_memo: "OrderedDict[tuple, tuple]" = OrderedDict()
+
 def get_csv_preview(file_path: str):
     head_columns, head_rows = [], []
     describe_columns, describe_rows = [], []
 
     try:
-        import pandas as pd
-        df = pd.read_csv(file_path)
-        head_rows = df.head().to_dict(orient="records")
-        head_columns = df.columns.tolist()
-
-        describe_df = df.describe(include="all").reset_index()
-        describe_rows = describe_df.to_dict(orient="records")
-        describe_columns = describe_df.columns.tolist()
+        from csv_preview import load_or_build_preview
+        st = os.stat(file_path)
+        memo_key = (str(file_path), st.st_size, st.st_mtime_ns)
+        if memo_key in _preview_memo:
+            _preview_memo.move_to_end(memo_key)
+            return _preview_memo[memo_key]
+
+        preview = load_or_build_preview(str(file_path))
+        head_columns = preview["head_columns"]
+        head_rows = preview["head_rows"]
+        describe_columns = preview["describe_columns"]
+        describe_rows = preview["describe_rows"]
+
+        _preview_memo[memo_key] = (head_columns, head_rows, describe_columns, describe_rows)
+        if len(_preview_memo) > PREVIEW_MEMO_SIZE:
+            _preview_memo.popitem(last=False)
     except Exception as e:
         print(f"CSV 미리보기 오류: {e}")
 
     return head_columns, head_rows, describe_columns, describe_rows
 
 
+async def get_csv_preview_async(file_path) -> tuple:
+    """async 핸들러용: 캐시가 없으면 파일 전체를 청크로 훑으므로 스레드 풀에서 (이벤트 루프·SSE 를 막지 않게)"""
+    return await run_in_threadpool(get_csv_preview, str(file_path))
+
+
 # 생성물 폴더를 /outputs 경로로 정적 서빙
 app.mount("/outputs", StaticFiles(directory=str(OUTPUT_DIR)), name="outputs")
 
+
+# ------------------------------
+# 워커 풀 수명 주기
+# ------------------------------
+@app.on_event("startup")
+async def _warm_orchestrator_pool():
+    # 첫 요청 전에 워커를 미리 데워둔다 (백그라운드에서 기동)
+    get_orchestrator_pool()
+    if WORKFLOW_ENGINE == "local":
+        get_compute_pool()
+
+
+@app.on_event("shutdown")
+async def _stop_orchestrator_pool():
+    if _orchestrator_pool is not None:
+        _orchestrator_pool.shutdown()
+    if _compute_pool is not None:
+        _compute_pool.shutdown()
+
+
+@app.get("/pool/stats")
+async def pool_stats():
+    pool = get_orchestrator_pool()
+    stats = pool.snapshot() if pool else {"size": 0}
+    stats["compute"] = _compute_pool.snapshot() if _compute_pool else {"size": 0}
+    return stats
+
+# ------------------------------
+# 지표 (Prometheus 텍스트 형식)
+# ------------------------------
+# 단계별(스폰/도구/파이썬 스크립트) 소요 시간·최대 RSS + 엔드포인트별 응답 시간
+import metrics
+from fastapi.responses import PlainTextResponse
+import stage_metrics
+
+app.add_middleware(metrics.RequestMetricsMiddleware)
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 # ------------------------------
 # 세션 관리
 # ------------------------------
-session_files: Dict[str, str] = {}
-chat_histories: Dict[str, List[Dict]] = {}
+# 업로드 파일 경로 + 채팅 기록. memory(LRU+TTL, 단일 워커) / sqlite(WAL, 여러 워커 공유·재시작 후 유지)
+from session_store import make_session_store
+
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "memory")
+SESSION_DB = Path(os.environ.get("SESSION_DB", "src/cache/sessions.sqlite3"))
+SESSION_MAX = int(os.environ.get("SESSION_MAX", "10000"))
+SESSION_TTL = float(os.environ.get("SESSION_TTL", str(7 * 86400)))
+CHAT_MAX_TURNS = int(os.environ.get("CHAT_MAX_TURNS", "50"))     # 원문으로 두는 최근 메시지 수 (이전은 요약으로 접힘)
+CHAT_MAX_BYTES = int(os.environ.get("CHAT_MAX_BYTES", str(1 << 20)))
+CHAT_PAGE_SIZE = int(os.environ.get("CHAT_PAGE_SIZE", "20"))      # 화면/API 한 번에 보여주는 메시지 수
+session_store = make_session_store(SESSION_BACKEND, sqlite_path=SESSION_DB, max_sessions=SESSION_MAX,
+                                   ttl=SESSION_TTL, max_turns=CHAT_MAX_TURNS, max_bytes=CHAT_MAX_BYTES)
+
+
+@app.get("/sessions/stats")
+async def sessions_stats():
+    return session_store.snapshot()
 
 # ------------------------------
 # 홈
@@ -480,8 +566,7 @@ chat_histories: Dict[str, List[Dict]] = {}
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request, sessionId: str = Query(None)):
     # ADD
-    file_path = session_files.get(sessionId)
-    chat_history = chat_histories.get(sessionId, [])
+    file_path = session_store.get_file(sessionId)
     
     head_columns = []
     head_rows = []
@@ -506,7 +591,7 @@ async def home(request: Request, sessionId: str = Query(None)):
     #         # ✅ pandas 기반 미리보기 + 기술통계
     #         head_columns, head_rows, describe_columns, describe_rows = get_csv_preview(str(file_path))
     if file_path:
-        head_columns, head_rows, describe_columns, describe_rows = get_csv_preview(file_path)
+        head_columns, head_rows, describe_columns, describe_rows = await get_csv_preview_async(file_path)
 
     generated_files = list_generated_files(sessionId)
 
@@ -515,6 +600,7 @@ async def home(request: Request, sessionId: str = Query(None)):
 
     return templates.TemplateResponse("index.html", {
         "request": request,
+        **chat_view(sessionId, generated_files),
         "head_columns": head_columns,
         "head_rows": head_rows,
         "describe_columns": describe_columns,
@@ -530,28 +616,55 @@ async def home(request: Request, sessionId: str = Query(None)):
 # ------------------------------
 # CSV 업로드
 # ------------------------------
+from columnar_store import ensure_columnar
+from upload_ingest import (UploadSizeLimitMiddleware, UploadTooLargeError, UploadValidationError,
+                           load_ingest_meta, save_upload)
+
+COLUMNAR_INGEST = os.environ.get("COLUMNAR_INGEST", "1") != "0"
+UPLOAD_MAX_MB = int(os.environ.get("UPLOAD_MAX_MB", "2048"))          # 0이면 제한 없음
+UPLOAD_CHUNK_KB = int(os.environ.get("UPLOAD_CHUNK_KB", "1024"))
+
+# 멀티파트 파싱 전에 Content-Length / 누적 바이트로 큰 요청 거절
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=UPLOAD_MAX_MB << 20)
+
+
 @app.post("/upload_csv/")
 async def upload_csv(request: Request, file: UploadFile = File(...)):
     sessionId = str(uuid.uuid4())
     session_dir = UPLOAD_DIR / sessionId
     session_dir.mkdir(exist_ok=True, parents=True)
 
-    file_path = session_dir / file.filename
+    file_path = session_dir / Path(file.filename or "upload.csv").name
 
-    with file_path.open("wb") as f:
-        f.write(await file.read())
+    # 청크 단위 저장 + 같은 패스에서 해시/인코딩/구분자/행·컬럼 수 계산
+    try:
+        meta = await save_upload(file, file_path, UPLOAD_MAX_MB << 20, UPLOAD_CHUNK_KB << 10)
+    except (UploadTooLargeError, UploadValidationError) as e:
+        shutil.rmtree(session_dir, ignore_errors=True)
+        resp = render_notice(request, f"⚠️ 업로드 실패: {e}")
+        resp.status_code = 413 if isinstance(e, UploadTooLargeError) else 400
+        return resp
+    print(f"[UPLOAD] {file_path.name} {meta['size'] / 1e6:.1f}MB rows={meta['rows']} cols={meta['columns']} "
+          f"sep={meta['delimiter']!r} enc={meta['encoding']} ({meta['seconds']}s)")
+    artifact_cache.seed_hash(file_path, meta["sha256"])
+
+    # 컬럼형 사본 생성 (이후 미리보기/상관/시각화/학습이 필요한 컬럼만 읽음)
+    if COLUMNAR_INGEST:
+        info = await run_in_threadpool(ensure_columnar, str(file_path))
+        if info:
+            print(f"[COLUMNAR] {file_path.name} → parquet {info}")
 
     # sessionId 기준으로 저장
-    session_files[sessionId] = str(file_path)
-    chat_histories[sessionId] = []
+    session_store.create(sessionId, str(file_path))
 
-    head_columns, head_rows, describe_columns, describe_rows = get_csv_preview(str(file_path))
+    # 미리보기는 전체 파일을 청크로 훑으므로(컬럼형 사본이 있으면 그걸 읽음) 스레드 풀에서 — 큰 업로드 중에도 루프가 멈추지 않게
+    head_columns, head_rows, describe_columns, describe_rows = await get_csv_preview_async(file_path)
 
     return templates.TemplateResponse("index.html", {
         "request": request,
-        "current_filename": file.filename,
+        "current_filename": file_path.name,
         "current_session": sessionId,
-        "chat_history": chat_histories[sessionId],
+        "chat_history": [],
         "workflow": None,
         "steps": [],
         "generated_files": list_generated_files(sessionId),
@@ -563,6 +676,18 @@ async def upload_csv(request: Request, file: UploadFile = File(...)):
         "corr": {"headers": [], "rows": []},  # [NEW]
     })
 
+
+@app.get("/upload_meta")
+async def upload_meta(sessionId: str = Query(...)):
+    """업로드 때 계산한 메타데이터 (sha256, 크기, 인코딩, 구분자, 행/컬럼 수)"""
+    stored = session_store.get_file(sessionId)
+    if stored is None:
+        return JSONResponse({"error": "unknown session"}, status_code=404)
+    meta = load_ingest_meta(stored)
+    if meta is None:
+        return JSONResponse({"error": "metadata unavailable"}, status_code=404)
+    return meta
+
 # [NEW] 업로드 폴더 내 Correlation CSV 경로 추정 + 로딩 ------------------------
 def _load_corr_csv(csv_path: str | None) -> dict:  # [NEW]
     if not csv_path:
@@ -582,199 +707,728 @@ def _load_corr_csv(csv_path: str | None) -> dict:  # [NEW]
 # ---------------------------------------------------------------------------
 
 
-# [ADD] 업로드된 파일로 워크플로우를 한 번에 실행하는 엔드포인트
-@app.post("/run_workflow/", response_class=HTMLResponse)
-async def run_workflow(request: Request, sessionId: str = Form(None), filename: str = Form(None)):
-    # 파일이 없으면 안내만 보여줌
-    if sessionId not in session_files:
-        generated_files = list_generated_files(sessionId)
-        preview_images = [f for f in generated_files if f["ext"] in {".png", ".jpg", ".jpeg", ".gif", ".webp"}]
-        return templates.TemplateResponse("index.html", {
-            "request": request, "reply": "⚠️ 먼저 CSV를 업로드하세요.","current_session": None,
-            "current_filename": None, "generated_files": generated_files, "preview_images": preview_images,
-            "workflow": None, "steps": [], "head_columns": [], "head_rows": [],
-            "describe_columns": [], "describe_rows": [],
-            "corr": {"headers": [], "rows": []},
-        })
-    file_path = Path(session_files[sessionId])
+# ------------------------------
+# 작업 실행 (executor 스레드에서 동작 — 이벤트 루프를 막지 않음)
+# ------------------------------
+# 산출물 캐시: 업로드 내용 해시 + 파라미터 → 워크플로 결과/산출물 (LRU, 용량 상한)
+from artifact_cache import ArtifactCache
+
+ARTIFACT_CACHE_ENABLED = os.environ.get("ARTIFACT_CACHE", "1") != "0"
+ARTIFACT_CACHE_DIR = Path(os.environ.get("ARTIFACT_CACHE_DIR", "src/cache/artifacts"))
+ARTIFACT_CACHE_MAX_MB = int(os.environ.get("ARTIFACT_CACHE_MAX_MB", "1024"))
+artifact_cache = ArtifactCache(ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_MB * 1024 * 1024,
+                               enabled=ARTIFACT_CACHE_ENABLED)
+
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+
+# 빠른 분석(fast mode): 업로드에서 재현 가능한 행 표본을 한 번 뽑아 워크플로 전체를 표본으로 실행
+import sampler
+
+# 워크플로 엔진: orchestrator = TS 오케스트레이터(기본, 단계별 상태 재사용 포함)
+#               local = LLM/Node 없이 파이썬에서 바로 (src/scripts/local_workflow.py, 선택 — 단계 재사용 없음)
+# 해설(narrative)은 선택 — 켜면 결과 요약을 LLM 에 한 번 보내 설명문을 붙인다
+import local_workflow
+import workflow_narrative
+
+WORKFLOW_ENGINES = ("local", "orchestrator")
+WORKFLOW_ENGINE = os.environ.get("WORKFLOW_ENGINE", "orchestrator")
+WORKFLOW_NARRATIVE = os.environ.get("WORKFLOW_NARRATIVE", "0") == "1"
+# TS 오케스트레이터에 넘기지 않는 서버 쪽 옵션
+SERVER_OPTION_KEYS = ("engine", "narrative")
+templates.env.globals["workflow_engine"] = WORKFLOW_ENGINE
+
+FAST_SAMPLE_ROWS = int(os.environ.get("FAST_SAMPLE_ROWS", "100000"))
+FAST_SAMPLE_SEED = int(os.environ.get("FAST_SAMPLE_SEED", "42"))
+
+
+def sample_options(fast: str | None, rows: int | None, seed: int | None, stratify: str | None) -> dict | None:
+    """폼 값 → 표본 설정 (fast 가 꺼져 있으면 None = 전체 데이터)"""
+    if not fast or fast in ("0", "false", "off"):
+        return None
+    return {"rows": max(int(rows or FAST_SAMPLE_ROWS), 100),
+            "seed": FAST_SAMPLE_SEED if seed is None else int(seed),
+            "stratify": (stratify or "").strip() or None}
+
+
+def workflow_options(targetColumn: str | None, model: str | None, problemType: str | None,
+                     force: str | None, engine: str | None = None, narrative: str | None = None) -> dict | None:
+    """폼 값 → 워크플로 옵션 (지정한 값이 없으면 None = 추천값 그대로, 엔진은 WORKFLOW_ENGINE)"""
+    opts = {"targetColumn": (targetColumn or "").strip() or None, "model": (model or "").strip() or None,
+            "problemType": problemType if problemType in ("regression", "classification") else None,
+            "force": bool(force) and force not in ("0", "false", "off") or None,
+            "engine": engine if engine in WORKFLOW_ENGINES else None,
+            "narrative": bool(narrative) and narrative not in ("0", "false", "off") or None}
+    opts = {k: v for k, v in opts.items() if v}
+    return opts or None
+
+
+STEP_TITLES = {
+    "sample": "0) Sampling",
+    "basic": "1) BasicAnalysisTool", "corr": "2) Correlation", "selector": "3) SelectorTool",
+    "visual": "4) VisualizationTool", "preprocess": "5) PreprocessExecutorTool", "train": "6) MachineLearningTool",
+}
+
+
+def find_corr_csv(sessionId: str, filename: str) -> str | None:
+    """세션 매니페스트에서 상관 행렬 CSV 찾기 (파일명과 딱 맞는 것 우선, 없으면 가장 최근 것)"""
+    e = artifact_index.find(sessionId, "corr_matrix", prefer=f"{Path(filename).stem}.corr_matrix.csv")
+    return str(OUTPUT_DIR / sessionId / e["name"]) if e else None
+
+
+def step_event(ev: dict, partial: dict, sessionId: str, filename: str) -> dict:
+    """TS 단계 이벤트 → 브라우저용 요약 (상태 + 바로 열어볼 수 있는 산출물 URL)"""
+    key = ev.get("key")
+    data = ev.get("data") or {}
+    partial.update({k: v for k, v in data.items() if k not in ("corrMatrixPath", "error", "sampling")})
+    wf = map_artifacts(partial, sessionId)
+
+    summary, artifacts = "", []
+    if key == "sample":
+        info = data.get("sampling") or {}
+        summary = f"{info.get('rows', 0):,} / {info.get('totalRows', 0):,}행 ({info.get('method')})"
+    elif key == "basic":
+        summary = f"컬럼 {len(wf.get('columnStats') or [])}개 분석"
+    elif key == "corr":
+        csv_path = find_corr_csv(sessionId, filename)
+        if csv_path:
+            artifacts.append({"name": Path(csv_path).name, "url": path_to_outputs_url(csv_path, sessionId)})
+    elif key == "selector":
+        cols = wf.get("selectedColumns") or []
+        summary = f"선택 컬럼 {len(cols)}개" + (f", 타깃: {wf['targetColumn']}" if wf.get("targetColumn") else "")
+    elif key == "visual":
+        artifacts = [{"name": Path(u).name, "url": u, "image": True} for u in wf.get("chartUrls") or [] if u]
+    elif key == "preprocess" and wf.get("preprocessedFilePathUrl"):
+        artifacts.append({"name": Path(wf["preprocessedFilePath"]).name, "url": wf["preprocessedFilePathUrl"]})
+    elif key == "train":
+        rec = wf.get("mlModelRecommendation") or {}
+        summary = f"추천 모델: {rec.get('model')}" if rec.get("model") else ""
+        report = (wf.get("mlResultPath") or {}).get("reportUrl")
+        if report:
+            artifacts.append({"name": "리포트", "url": report})
+
+    if ev.get("reused"):
+        summary = f"{summary} · 이전 결과 재사용" if summary else "이전 결과 재사용"
+    timing = ev.get("timing") or {}
+    if isinstance(timing.get("seconds"), (int, float)):
+        summary = f"{summary} · ⏱ {timing['seconds']:.2f}s" if summary else f"⏱ {timing['seconds']:.2f}s"
+    return {"key": key, "title": STEP_TITLES.get(key, key), "status": ev.get("status", "done"),
+            "summary": summary, "artifacts": artifacts, "reused": bool(ev.get("reused")),
+            "timing": timing or None}
+
+
+# 캐시 적중 시 단계 이벤트를 다시 만들 때 쓰는 단계별 결과 키
+STEP_DATA_KEYS = {
+    "basic": ("columnStats",),
+    "corr": (),
+    "selector": ("selectedColumns", "recommendedPairs", "preprocessingRecommendations", "targetColumn", "problemType"),
+    "visual": ("chartPaths",),
+    "preprocess": ("preprocessedFilePath",),
+    "train": ("mlModelRecommendation", "mlResultPath"),
+}
+
+
+def replay_steps(wf: dict, on_step, sessionId: str, filename: str):
+    """캐시된 워크플로 dict 로 단계 이벤트를 순서대로 발행 (진행 화면이 실행 때와 같게 보이도록)"""
+    if wf.get("sampling"):
+        on_step({"key": "sample", "status": "done", "data": {"sampling": wf["sampling"]}})
+    for key, fields in STEP_DATA_KEYS.items():
+        data = {k: wf[k] for k in fields if wf.get(k)}
+        ok = bool(find_corr_csv(sessionId, filename)) if key == "corr" else bool(data)
+        on_step({"key": key, "status": "done" if ok else "skipped", "data": data})
+
+
+def sampling_summary(sessionId: str, info: dict, wf_raw: dict, since: float) -> dict:
+    """표본 실행 결과에 붙일 신뢰구간 요약 (상관 CSV / 학습 리포트 JSON 은 이번 실행 산출물에서)"""
+    corr = _load_corr_csv(find_corr_csv(sessionId, info["file"]))
+    ml_report = None
+    for e in artifact_index.recent(sessionId, "report", since=since):
+        if e["name"].startswith("ml_result_") and e["name"].endswith(".json"):
+            try:
+                ml_report = json.loads((OUTPUT_DIR / sessionId / e["name"]).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                pass
+    return sampler.sampling_report(info, wf_raw, corr, ml_report)
+
+
+def workflow_artifact_names(wf: dict) -> list[str]:
+    """워크플로 결과가 가리키는 세션 산출물 이름 (새로 쓴 것 + 이전 실행 출력을 재사용한 단계의 것)
+
+    캐시 항목에 이 파일들만 보관한다 — 같은 세션에서 동시에 돈 다른 작업의 파일이 섞이지 않게.
+    """
+    paths = list(wf.get("chartPaths") or [])
+    if wf.get("preprocessedFilePath"):
+        paths += [wf["preprocessedFilePath"], wf["preprocessedFilePath"] + ".spec.json"]
+    mlp = wf.get("mlResultPath")
+    report = Path((mlp.get("reportPath") if isinstance(mlp, dict) else mlp) or "")
+    m = re.match(r"ml_result_(\w+)\.txt$", report.name)
+    if m:
+        ts = m.group(1)
+        paths += [report.name, f"ml_result_{ts}.json", f"model_{ts}.pkl", f"model_{ts}.meta.json",
+                  f"leaderboard_{ts}.csv"]
+    if wf.get("correlationResults"):
+        stem = Path(wf.get("filePath") or "").stem
+        paths += [f"{stem}.corr_matrix.csv", f"{stem}.corr_pairs.json"]
+    return [Path(p).name for p in paths if p]
+
+
+def load_ml_report(wf: dict) -> dict | None:
+    """학습 결과 JSON (ml_result_{ts}.txt 옆의 .json) — 해설에 지표를 넣을 때 사용"""
+    report = Path((wf.get("mlResultPath") or {}).get("reportPath") or "")
+    if report.suffix != ".txt":
+        return None
+    try:
+        return json.loads(report.with_suffix(".json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def spawn_timing(wall: float, wf: dict | None) -> dict:
+    """오케스트레이터 호출 전체(wall) 중 워크플로 밖에서 쓴 시간 = 프로세스 기동/풀 대기/IPC/결과 파싱"""
+    orch = ((wf or {}).get("timings") or {}).get("orchestrator") or {}
+    inside = orch.get("seconds") if isinstance(orch.get("seconds"), (int, float)) else 0.0
+    return {"component": "orchestrator", "mode": orch.get("mode") or ("pool" if get_orchestrator_pool() else "spawn"),
+            "seconds": round(max(wall - inside, 0.0), 3), "wallSeconds": round(wall, 3),
+            "startupSeconds": orch.get("startupSeconds")}
+
+
+def execute_workflow(sessionId: str, file_path: Path, job=None, sample: dict | None = None,
+                     options: dict | None = None) -> dict:
+    """오케스트레이터 워크플로 실행 + 결과 파싱 → 화면 렌더에 필요한 dict
+
+    job 이 주어지면 단계가 끝날 때마다 진행 이벤트를 job 에 발행한다 (SSE 로 브라우저에 전달).
+    같은 파일 내용 + 파라미터로 돌린 결과가 산출물 캐시에 있으면 파이프라인을 건너뛴다.
+    sample({rows, seed, stratify})이 주어지면 업로드 대신 행 표본으로 전체 단계를 실행한다.
+    options({targetColumn, model, ...})를 바꿔 다시 실행하면 오케스트레이터가 단계별 입력 지문을 비교해
+    바뀐 값에 의존하는 단계만 다시 계산한다 (나머지는 세션의 이전 출력 재사용).
+    """
+    source_path = file_path
+    engine = (options or {}).get("engine") or WORKFLOW_ENGINE
+    narrative = bool((options or {}).get("narrative") or WORKFLOW_NARRATIVE)
+    ts_options = {k: v for k, v in (options or {}).items() if k not in SERVER_OPTION_KEYS} or None
+    if sample:
+        file_path = sampler.sample_path(source_path, sample["rows"], sample["seed"], sample["stratify"])
     filename = file_path.name
-    print(file_path, filename)
+    partial: dict = {}
+    message = "분석해줘"
 
-    if not file_path.exists():
-        generated_files  = list_generated_files(sessionId)
-        preview_images = [f for f in generated_files if f["ext"] in {".png",".jpg",".jpeg",".gif",".webp"}]
-        return templates.TemplateResponse("index.html", {
-            "request": request, "reply": "⚠️ 업로드된 파일을 찾지 못했습니다.", "current_session": sessionId,
-            "current_filename": filename, "generated_files": generated_files, "preview_images": preview_images,
-            "workflow": None, "steps": [], "head_columns": [], "head_rows": [],
-            "describe_columns": [], "describe_rows": [],
-            "corr": {"headers": [], "rows": []},
-        })
+    def on_step(ev: dict):
+        if job is not None:
+            job_manager.publish(job, step_event(ev, partial, sessionId, filename))
 
-    # 워크플로우 실행
+    cache_key = None
+    wf_raw = None
     try:
-        code, stdout, stderr = run_ts_workflow(file_path, sessionId, message="분석해줘")
+        params = {"op": "workflow", "message": message}
+        if sample:
+            params["sample"] = {**sample, "v": sampler.SAMPLE_VERSION}
+        if ts_options:
+            params["options"] = {k: v for k, v in ts_options.items() if k != "force"}
+        if engine != "orchestrator":
+            params["engine"] = engine
+        if narrative:
+            params["narrative"] = workflow_narrative.NARRATIVE_MODEL
+        cache_key = artifact_cache.key_for(source_path, params)
+        if not (options or {}).get("force"):
+            wf_raw = artifact_cache.lookup(cache_key, sessionId, OUTPUT_DIR / sessionId, file_path,
+                                           on_restore=record_artifacts)
+    except OSError as e:
+        print(f"[CACHE] 조회 실패: {e}")
+
+    t_start = time.perf_counter()
+    rss_start = stage_metrics.current_rss_mb()    # 서버 프로세스 안 단계는 최대 RSS 대신 전후 RSS
+    timings: dict = {}
+    if wf_raw is not None:
+        print(f"[CACHE] hit {cache_key[:12]} → {sessionId}")
+        replay_steps(wf_raw, on_step, sessionId, filename)
+        # 저장 당시의 단계 시간 대신 이번 요청이 실제로 쓴 시간(캐시 복원)만 남긴다
+        timings["cache"] = {"component": "cache", "seconds": round(time.perf_counter() - t_start, 3),
+                            **stage_metrics.rss_fields(rss_start)}
+        wf_raw["timings"] = timings
+    else:
+        started = time.time()
+        info = None
+        if sample:
+            try:
+                _, info = sampler.ensure_sample(source_path, sample["rows"], sample["seed"], sample["stratify"])
+            except (OSError, ValueError) as e:
+                return {"reply": f"❌ 표본 추출 실패: {e}", "workflow": None, "steps": [],
+                        "corr": {"headers": [], "rows": []}}
+            timings["sample"] = {"component": "python:sampler", "seconds": round(time.perf_counter() - t_start, 3),
+                                 **stage_metrics.rss_fields(rss_start), "reused": bool(info.get("reused"))}
+            print(f"[SAMPLE] {info['rows_sampled']}/{info['rows_total']} rows ({info['method']}, "
+                  f"{'재사용' if info['reused'] else str(info['seconds']) + 's'}) → {filename}")
+            on_step({"key": "sample", "status": "done",
+                     "data": {"sampling": sampler.sampling_report(info, None)}})
+        t_orch = time.perf_counter()
+        try:
+            if engine == "local":
+                code, stdout, stderr = 0, "", ""
+                # 오케스트레이터처럼 절대 경로로 넘겨 산출물 경로/URL 규칙을 맞춘다
+                wf_raw = local_workflow.run(file_path, (OUTPUT_DIR / sessionId).resolve(), sessionId,
+                                            ts_options, on_step, compute=get_compute_pool())
+            else:
+                code, stdout, stderr, wf_raw = run_ts_workflow(file_path, sessionId, message=message,
+                                                               on_step=on_step, options=ts_options)
+        except (subprocess.TimeoutExpired, PoolBusyError) as e:
+            return {"reply": busy_or_timeout_reply(e), "workflow": None, "steps": [], "corr": {"headers": [], "rows": []}}
+        except Exception as e:       # 로컬 엔진 자체 오류 (단계 실패는 내부에서 건너뜀으로 처리됨)
+            code, stdout, stderr, wf_raw = 1, "", f"{type(e).__name__}: {e}", None
+        if engine != "local":
+            timings["spawn"] = spawn_timing(time.perf_counter() - t_orch, wf_raw if isinstance(wf_raw, dict) else None)
+
         print(file_path, sessionId, filename)
         if code != 0:
             reply = f"❌ 오류: {stderr.strip() or 'unknown error'}"
-            generated_files  = list_generated_files(sessionId)
-            preview_images  = [f for f in generated_files if f["ext"] in {".png",".jpg",".jpeg",".gif",".webp"}]
-            hc, hr, dc, dr = get_csv_preview(str(file_path))
-            return templates.TemplateResponse("index.html", {
-                "request": request, "reply": reply, "current_filename": filename, "current_session": sessionId,
-                "generated_files": generated_files, "preview_images": preview_images, "workflow": None, "steps": [],
-                "head_columns": hc, "head_rows": hr, "describe_columns": dc, "describe_rows": dr,
-                "corr": {"headers": [], "rows": []},
-            })
-
-        # JSON 파싱 → 카드 데이터 구성
-        output_str = (stdout or "").strip()
-        print("output_str", output_str)
-        wf_raw, _ = extract_workflow_dict(output_str)
-
-        # (선택) 파싱 실패 시 최근 생성 이미지로 최소 Visualization 카드라도 띄우기
+            return {"reply": reply, "workflow": None, "steps": [], "corr": {"headers": [], "rows": []}}
+
+        # 결과는 구조화 필드/마커 구간으로 받음. 없을 때만(구버전 오케스트레이터) 로그 전체를 파싱
         if not isinstance(wf_raw, dict):
-            now = time.time()
-            recent = []
-            for p in OUTPUT_DIR.glob("*"):
-                if p.is_file() and p.suffix.lower() in {".png",".jpg",".jpeg",".gif",".webp"}:
-                    if now - p.stat().st_mtime <= 15:
-                        recent.append(f"/outputs/{sessionId}/{p.name}")
-            if recent:
-                wf_raw = {"chartPaths": recent}
-
-        # 매핑/스텝 구성
-
-        workflow_mapped = map_artifacts(wf_raw, sessionId) if isinstance(wf_raw, dict) else None
-
-        # [NEW] Correlation CSV 로드 → 템플릿 전달 + steps 반영
-        corr_csv_path = None
-        root = OUTPUT_DIR / sessionId                      # ← src/outputs/<sessionId>
-        if root.exists():
-            # 1) 파일명과 딱 맞는 것 우선
-            exact = root / f"{Path(filename).stem}.corr_matrix.csv"
-            if exact.exists():
-                corr_csv_path = str(exact)
-            else:
-                # 2) 없으면 폴더 전체에서 패턴 검색
-                for q in root.rglob("*corr_matrix.csv"):
-                    corr_csv_path = str(q)
-                    break
-        corr = _load_corr_csv(corr_csv_path)                  # [NEW]
-        corr_has_table = bool(corr.get("headers"))            # [NEW]
+            output_str = (stdout or "").strip()
+            wf_raw, _ = extract_workflow_dict(output_str)
+
+        if info is not None and isinstance(wf_raw, dict):
+            wf_raw["sampling"] = sampling_summary(sessionId, info, wf_raw, started)
+        if narrative and isinstance(wf_raw, dict):
+            t_llm = time.perf_counter()
+            wf_raw["narrative"] = workflow_narrative.generate(wf_raw, load_ml_report(wf_raw))
+            timings["narrative"] = {"component": "llm", "seconds": round(time.perf_counter() - t_llm, 3)}
+        if isinstance(wf_raw, dict):
+            wf_raw["timings"] = {**timings, **(wf_raw.get("timings") or {})}
+
+        # 정상 결과만 캐시에 보관 (아래 이미지 폴백 결과는 제외)
+        if cache_key and isinstance(wf_raw, dict):
+            artifact_cache.store(cache_key, wf_raw, sessionId, OUTPUT_DIR / sessionId,
+                                 workflow_artifact_names(wf_raw))
+
+    # (선택) 파싱 실패 시 최근 생성 이미지로 최소 Visualization 카드라도 띄우기
+    if not isinstance(wf_raw, dict):
+        recent = [f"/outputs/{sessionId}/{e['name']}"
+                  for e in artifact_index.recent(sessionId, "chart", since=time.time() - 15)]
+        if recent:
+            wf_raw = {"chartPaths": recent}
+
+    # 매핑/스텝 구성
+
+    workflow_mapped = map_artifacts(wf_raw, sessionId) if isinstance(wf_raw, dict) else None
+
+    # [NEW] Correlation CSV 로드 → 템플릿 전달 + steps 반영
+    corr = _load_corr_csv(find_corr_csv(sessionId, filename))  # [NEW]
+    corr_has_table = bool(corr.get("headers"))            # [NEW]
+
+    steps = build_steps(workflow_mapped, corr_has_table) if workflow_mapped else []  # [CHANGED]
+
+    # 폴백: 파싱 실패했지만 이미지가 있다면 최소 Visualization 카드라도 표시
+    if not workflow_mapped:
+        images = [f for f in list_generated_files(sessionId) if f["ext"] in IMAGE_EXTS]
+        if images:
+            workflow_mapped = {"chartUrls": [img["url"] for img in images]}
+            steps = build_steps(workflow_mapped, corr_has_table)  # [CHANGED]
 
+    print("[WF] keys:", list((workflow_mapped or {}).keys()))
+    timings = (wf_raw.get("timings") if isinstance(wf_raw, dict) else None) or timings
+    metrics.observe_timings(timings)
+    print("[WF] timings:", {k: t.get("seconds") for k, t in timings.items() if isinstance(t, dict)})
+    sampling = wf_raw.get("sampling") if isinstance(wf_raw, dict) else None
+    narrative_text = wf_raw.get("narrative") if isinstance(wf_raw, dict) else None
+    return {"reply": None, "workflow": workflow_mapped, "steps": steps, "corr": corr, "sampling": sampling,
+            "narrative": narrative_text}
 
-        steps = build_steps(workflow_mapped, corr_has_table) if workflow_mapped else []  # [CHANGED]
 
-        # 파일/미리보기/기술통계
-        generated_files = list_generated_files(sessionId)
-        preview_images = [f for f in generated_files if f["ext"] in {".png",".jpg",".jpeg",".gif",".webp"}]
-        hc, hr, dc, dr = get_csv_preview(str(file_path))
+def execute_chat(sessionId: str, file_path: Path, message: str) -> dict:
+    """오케스트레이터 채팅 실행 → Markdown 응답 + 이번 턴에 생긴 산출물 이름을 대화 기록에 추가"""
+    t0 = time.perf_counter()
+    existing = {e["name"] for e in artifact_index.entries(sessionId)}
+    try:
+        code, stdout, stderr = run_ts_chat(file_path, sessionId, message)
+    except (subprocess.TimeoutExpired, PoolBusyError) as e:
+        reply = busy_or_timeout_reply(e)
+        session_store.append(sessionId, {"role": "bot", "content": reply})
+        return {"reply": reply}
+    finally:
+        # 채팅은 LLM 호출 + 도구 실행이 한 덩어리 → 오케스트레이터 호출 전체를 "chat" 단계로 기록
+        metrics.observe_timings({"chat": {"component": "orchestrator", "seconds": time.perf_counter() - t0}})
 
-        # 폴백: 파싱 실패했지만 이미지가 있다면 최소 Visualization 카드라도 표시
-        if not workflow_mapped and preview_images:
-            workflow_mapped = {"chartUrls": [img["url"] for img in preview_images]}
-            steps = build_steps(workflow_mapped, corr_has_table)  # [CHANGED]
+    output_str = sanitize_stdout(stdout)
 
+    # ✅ 텍스트 + JSON 분리
+    text_part, parsed_json = extract_json_and_text(output_str)
 
-        print("[WF] keys:", list((workflow_mapped or {}).keys()))
+    # ✅ Markdown 생성
+    md_output = ""
+    if text_part:
+        md_output += text_part + "\n\n"
+    if parsed_json:
+        md_output += format_tool_output(parsed_json, sessionId)
 
+    # ✅ 이미지/파일은 본문에 넣지 않고 이번 턴에 새로 생긴 산출물 이름만 저장 (화면에서 링크/이미지로 그림)
+    artifacts = [e["name"] for e in artifact_index.entries(sessionId)
+                 if e["name"] not in existing and Path(e["name"]).suffix.lower() in CHAT_ARTIFACT_EXTS]
+
+    session_store.append(sessionId, {"role": "bot", "content": md_output.strip(), "artifacts": artifacts})
+    return {"reply": None}
+
+
+# ------------------------------
+# 화면 렌더
+# ------------------------------
+CHAT_ARTIFACT_EXTS = IMAGE_EXTS | {".csv", ".json", ".txt", ".html", ".md"}
+
+
+def chat_view(sessionId: str | None, generated_files: List[Dict], before: int | None = None,
+              limit: int = CHAT_PAGE_SIZE) -> dict:
+    """채팅 기록 한 페이지 (최근 limit 개) + 접힌 요약. 산출물 이름은 아직 남아 있는 파일만 URL 로 풀어줌"""
+    page = session_store.page(sessionId, limit, before)
+    present = {f["name"] for f in generated_files}
+    messages = []
+    for m in page["messages"]:
+        files = [{"name": n, "url": f"/outputs/{sessionId}/{n}", "image": Path(n).suffix.lower() in IMAGE_EXTS}
+                 for n in m.get("artifacts") or [] if n in present]
+        messages.append({"role": m.get("role"), "content": m.get("content", ""), "seq": m.get("seq"),
+                         "files": files})
+    return {"chat_history": messages, "chat_summary": page["summary"] if before is None else None,
+            "chat_more": page["more"], "chat_before": page["before"]}
+
+
+async def render_workflow_page(request: Request, sessionId: str, file_path: Path, outcome: dict,
+                               job_id: str | None = None):
+    generated_files = list_generated_files(sessionId)
+    preview_images = [f for f in generated_files if f["ext"] in IMAGE_EXTS]
+    hc, hr, dc, dr = await get_csv_preview_async(file_path)
+    return templates.TemplateResponse("index.html", {
+        "request": request, "reply": outcome.get("reply"),
+        "current_filename": file_path.name, "current_session": sessionId,
+        "generated_files": generated_files, "preview_images": preview_images,
+        "workflow": outcome.get("workflow"), "steps": outcome.get("steps", []),
+        "head_columns": hc, "head_rows": hr, "describe_columns": dc, "describe_rows": dr,
+        "corr": outcome.get("corr") or {"headers": [], "rows": []},
+        "sampling": outcome.get("sampling"), "fast_sample_rows": FAST_SAMPLE_ROWS,
+        "narrative": outcome.get("narrative"),
+        "job_id": job_id,
+    })
+
+
+async def render_chat_page(request: Request, sessionId: str, file_path: Path, job_id: str | None = None):
+    generated_files = list_generated_files(sessionId)
+    preview_images = [f for f in generated_files if f["ext"] in IMAGE_EXTS]
+    head_columns, head_rows, describe_columns, describe_rows = await get_csv_preview_async(file_path)
+    return templates.TemplateResponse("index.html", {
+        "request": request,
+        **chat_view(sessionId, generated_files),
+        "current_filename": file_path.name,
+        "current_session": sessionId,
+        "head_columns": head_columns,
+        "head_rows": head_rows,
+        "describe_columns": describe_columns,
+        "describe_rows": describe_rows,
+        "generated_files": generated_files,
+        "preview_images": preview_images,
+        "corr": {"headers": [], "rows": []},
+        "job_id": job_id,
+    })
+
+
+def render_notice(request: Request, reply: str, sessionId: str | None = None, filename: str | None = None):
+    generated_files = list_generated_files(sessionId)
+    preview_images = [f for f in generated_files if f["ext"] in IMAGE_EXTS]
+    return templates.TemplateResponse("index.html", {
+        "request": request, "reply": reply, "current_session": sessionId,
+        "current_filename": filename, "generated_files": generated_files, "preview_images": preview_images,
+        "workflow": None, "steps": [], "head_columns": [], "head_rows": [],
+        "describe_columns": [], "describe_rows": [],
+        "corr": {"headers": [], "rows": []},
+    })
+
+
+# ------------------------------
+# 작업 관리
+# ------------------------------
+import functools
+
+from job_manager import JobManager, QueueFullError
+
+JOB_CONCURRENCY = int(os.environ.get("JOB_CONCURRENCY", str(max(ORCH_POOL_SIZE, 2))))
+JOB_QUEUE_LIMIT = int(os.environ.get("JOB_QUEUE_LIMIT", "100"))
+job_manager = JobManager(concurrency=JOB_CONCURRENCY, queue_limit=JOB_QUEUE_LIMIT)
+
+
+@app.on_event("shutdown")
+async def _stop_job_manager():
+    job_manager.shutdown()
+
+
+def submit_job(kind: str, sessionId: str, file_path: Path, message: str = "", sample: dict | None = None,
+               options: dict | None = None):
+    if kind == "chat":
+        session_store.append(sessionId, {"role": "user", "content": message})
+        return job_manager.submit("chat", execute_chat, sessionId, file_path, message,
+                                  session_id=sessionId, params={"message": message})
+    params = {k: v for k, v in (("sample", sample), ("options", options)) if v}
+    return job_manager.submit("workflow", functools.partial(execute_workflow, sample=sample, options=options),
+                              sessionId, file_path, session_id=sessionId, params=params or None, pass_job=True)
+
+
+@app.post("/jobs/")
+async def create_job(kind: str = Form("workflow"), sessionId: str = Form(None), message: str = Form(""),
+                     fast: str = Form(None), sampleRows: int = Form(None), sampleSeed: int = Form(None),
+                     stratify: str = Form(None), targetColumn: str = Form(None), model: str = Form(None),
+                     problemType: str = Form(None), force: str = Form(None), engine: str = Form(None),
+                     narrative: str = Form(None)):
+    """작업을 제출하고 즉시 job id 반환 (실행은 백그라운드). fast=1 이면 행 표본으로 워크플로 실행"""
+    stored = session_store.get_file(sessionId)
+    if stored is None:
+        return JSONResponse({"error": "unknown session"}, status_code=404)
+    file_path = Path(stored)
+    if not file_path.exists():
+        return JSONResponse({"error": "uploaded file missing"}, status_code=404)
+    if kind not in ("workflow", "chat"):
+        return JSONResponse({"error": f"unknown kind: {kind}"}, status_code=400)
+    try:
+        job = submit_job(kind, sessionId, file_path, message,
+                         sample=sample_options(fast, sampleRows, sampleSeed, stratify),
+                         options=workflow_options(targetColumn, model, problemType, force, engine, narrative))
+    except QueueFullError as e:
+        return JSONResponse({"error": str(e)}, status_code=429)
+    return JSONResponse({**job.to_dict(), "statusUrl": f"/jobs/{job.id}", "viewUrl": f"/jobs/{job.id}/view"},
+                        status_code=202)
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "unknown job"}, status_code=404)
+    body = job.to_dict()
+    body["queuePosition"] = job_manager.queue_position(job)
+    if job.finished and isinstance(job.result, dict):
+        body["reply"] = job.result.get("reply")
+        if job.kind == "workflow":
+            body["workflow"] = job.result.get("workflow")
+            body["steps"] = job.result.get("steps")
+            body["sampling"] = job.result.get("sampling")
+            body["narrative"] = job.result.get("narrative")
+    return body
+
+
+@app.get("/jobs/{job_id}/view", response_class=HTMLResponse)
+async def job_view(request: Request, job_id: str):
+    """작업 결과 화면. 아직 실행 중이면 잠시 후 새로고침되는 안내 화면"""
+    job = job_manager.get(job_id)
+    stored = session_store.get_file(job.session_id) if job is not None else None
+    if stored is None:
+        return render_notice(request, "⚠️ 작업을 찾을 수 없습니다.")
+    file_path = Path(stored)
+    if not job.finished:
+        return render_notice(request, "⏳ 작업이 진행 중입니다. 잠시 후 다시 확인해주세요.",
+                             job.session_id, file_path.name)
+    if job.status == "error":
+        return render_notice(request, f"❌ 오류: {job.error}", job.session_id, file_path.name)
+    if job.kind == "chat":
+        return await render_chat_page(request, job.session_id, file_path, job_id=job.id)
+    return await render_workflow_page(request, job.session_id, file_path, job.result, job_id=job.id)
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """진행 이벤트 스트림 (Server-Sent Events)
+
+    event: step  → 단계 하나가 끝날 때마다 {key,title,status,summary,artifacts}
+    event: done  → 작업 종료 {status, viewUrl}
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "unknown job"}, status_code=404)
+
+    async def gen():
+        async for ev in job_manager.stream(job):
+            if ev is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: step\ndata: {json.dumps(ev, ensure_ascii=False)}\n\n"
+        done = {"status": job.status, "error": job.error, "viewUrl": f"/jobs/{job.id}/view"}
+        yield f"event: done\ndata: {json.dumps(done, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(gen(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/jobs")
+async def jobs_stats():
+    return job_manager.snapshot()
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return artifact_cache.snapshot()
+
+
+# ------------------------------
+# 업로드/산출물 정리 (GC)
+# ------------------------------
+from output_gc import OutputSweeper
+
+GC_INTERVAL = float(os.environ.get("GC_INTERVAL", "600"))                 # 0이면 백그라운드 정리 안 함
+GC_MAX_AGE = float(os.environ.get("GC_MAX_AGE", str(SESSION_TTL)))
+GC_MAX_TOTAL_MB = int(os.environ.get("GC_MAX_TOTAL_MB", "10240"))
+GC_SESSION_QUOTA_MB = int(os.environ.get("GC_SESSION_QUOTA_MB", "1024"))
+GC_GRACE = float(os.environ.get("GC_GRACE", "3600"))
+output_sweeper = OutputSweeper(UPLOAD_DIR, OUTPUT_DIR, session_store, job_manager.live_sessions,
+                               max_age=GC_MAX_AGE, max_total_bytes=GC_MAX_TOTAL_MB << 20,
+                               session_quota_bytes=GC_SESSION_QUOTA_MB << 20, grace=GC_GRACE,
+                               interval=GC_INTERVAL, manifest=artifact_index)
+
+
+@app.on_event("startup")
+async def _start_output_sweeper():
+    output_sweeper.start()
+
+
+@app.on_event("shutdown")
+async def _stop_output_sweeper():
+    output_sweeper.stop()
+
+
+@app.get("/gc/stats")
+async def gc_stats():
+    return output_sweeper.snapshot()
+
+
+@app.post("/gc/run")
+async def gc_run():
+    """즉시 1회 정리"""
+    try:
+        result = await output_sweeper.sweep()
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+    return {**result, "stats": output_sweeper.snapshot()}
+
+
+# ------------------------------
+# 모델 서빙
+# ------------------------------
+from model_registry import (ModelCache, ModelNotFoundError, PredictInputError,
+                            frame_from_csv, frame_from_json, list_models, predict as predict_rows)
+
+MODEL_CACHE_SIZE = int(os.environ.get("MODEL_CACHE_SIZE", "8"))
+PREDICT_BATCH_ROWS = int(os.environ.get("PREDICT_BATCH_ROWS", "50000"))
+model_cache = ModelCache(max_models=MODEL_CACHE_SIZE)
+
+
+def session_output_dir(sessionId: str | None) -> Path | None:
+    """sessionId 가 uuid 형식일 때만 출력 폴더 경로 (경로 조작 방지)"""
+    try:
+        return OUTPUT_DIR / str(uuid.UUID(str(sessionId)))
+    except ValueError:
+        return None
+
+
+@app.get("/predict/models")
+async def predict_models(sessionId: str = Query(...)):
+    session_dir = session_output_dir(sessionId)
+    if session_dir is None:
+        return JSONResponse({"error": "invalid sessionId"}, status_code=400)
+    return {"sessionId": sessionId, "models": list_models(session_dir), "cache": model_cache.snapshot()}
+
+
+@app.post("/predict")
+async def predict_endpoint(request: Request, sessionId: str = Query(None), model: str = Query(None),
+                           proba: bool = Query(False)):
+    """세션 모델로 예측
+
+    입력: JSON ({"rows": [{...}]} / {"columns": [...], "data": [[...]]} / 레코드 배열),
+          text/csv 본문, 또는 multipart 의 file(CSV)
+    출력: {modelId, model, n, predictions, missingFeatures[, classes, probabilities]}
+    """
+    ctype = request.headers.get("content-type", "")
+    try:
+        if ctype.startswith("application/json"):
+            body = await request.json()
+            if isinstance(body, dict):
+                sessionId = sessionId or body.get("sessionId")
+                model = model or body.get("model")
+            df = frame_from_json(body)
+        elif ctype.startswith("multipart/form-data"):
+            form = await request.form()
+            sessionId = sessionId or form.get("sessionId")
+            model = model or form.get("model")
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise PredictInputError("multipart 입력에는 CSV file 필드가 필요합니다.")
+            df = frame_from_csv(await upload.read())
+            await form.close()
+        else:
+            df = frame_from_csv(await request.body())
+    except ValueError as e:   # PredictInputError 포함, 잘못된 JSON
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    session_dir = session_output_dir(sessionId)
+    if session_dir is None:
+        return JSONResponse({"error": "invalid sessionId"}, status_code=400)
+    try:
+        loaded = await run_in_threadpool(model_cache.get, session_dir, model)
+        return await run_in_threadpool(predict_rows, loaded, df, proba, PREDICT_BATCH_ROWS)
+    except ModelNotFoundError as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
+    except PredictInputError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+
+# [ADD] 업로드된 파일로 워크플로우를 한 번에 실행하는 엔드포인트
+@app.post("/run_workflow/", response_class=HTMLResponse)
+async def run_workflow(request: Request, sessionId: str = Form(None), filename: str = Form(None),
+                       fast: str = Form(None), sampleRows: int = Form(None), sampleSeed: int = Form(None),
+                       stratify: str = Form(None), targetColumn: str = Form(None), model: str = Form(None),
+                       problemType: str = Form(None), force: str = Form(None), engine: str = Form(None),
+                       narrative: str = Form(None)):
+    # 파일이 없으면 안내만 보여줌
+    stored = session_store.get_file(sessionId)
+    if stored is None:
+        return render_notice(request, "⚠️ 먼저 CSV를 업로드하세요.")
+    file_path = Path(stored)
+    filename = file_path.name
+    print(file_path, filename)
+
+    if not file_path.exists():
+        return render_notice(request, "⚠️ 업로드된 파일을 찾지 못했습니다.", sessionId, filename)
+
+    # 워크플로우 실행: 작업으로 제출하고 완료를 (이벤트 루프를 막지 않고) 기다림
+    try:
+        job = submit_job("workflow", sessionId, file_path,
+                         sample=sample_options(fast, sampleRows, sampleSeed, stratify),
+                         options=workflow_options(targetColumn, model, problemType, force, engine, narrative))
+    except QueueFullError:
+        return render_notice(request, busy_or_timeout_reply(PoolBusyError()), sessionId, filename)
+    await job_manager.wait(job)
+    if job.status == "error":
+        return render_notice(request, f"❌ 오류: {job.error}", sessionId, filename)
+    return await render_workflow_page(request, sessionId, file_path, job.result, job_id=job.id)
 
-        return templates.TemplateResponse("index.html", {
-            "request": request, "current_filename": filename, "current_session":sessionId,
-            "generated_files": generated_files, "preview_images": preview_images,
-            "workflow": workflow_mapped, "steps": steps,
-            "head_columns": hc, "head_rows": hr, "describe_columns": dc, "describe_rows": dr, "corr": corr,
-        })
 
-    except subprocess.TimeoutExpired:
-        gf = list_generated_files(sessionId)
-        pv = [f for f in gf if f["ext"] in {".png",".jpg",".jpeg",".gif",".webp"}]
-        hc, hr, dc, dr = get_csv_preview(str(file_path))
-        return templates.TemplateResponse("index.html", {
-            "request": request, "reply": "⚠️ 응답 시간 초과", "current_filename": filename,
-            "generated_files": gf, "preview_images": pv,
-            "workflow": None, "steps": [], "head_columns": hc, "head_rows": hr,
-            "describe_columns": dc, "describe_rows": dr,
-            "corr": {"headers": [], "rows": []},
-        })
 # ------------------------------
 # 채팅
 # ------------------------------
 @app.post("/chat/", response_class=HTMLResponse)
 async def chat(request: Request, message: str = Form(...), sessionId: str = Form(None), filename: str = Form(None)):
-    if sessionId not in session_files:
+    stored = session_store.get_file(sessionId)
+    if stored is None:
         reply = "⚠️ 파일이 유효하지 않습니다. CSV를 먼저 업로드해주세요."
         return templates.TemplateResponse("index.html", {"request": request, "reply": reply})
 
-    file_path = Path(session_files[sessionId])
-    filename = file_path.name
-    chat_history = chat_histories.get(sessionId, [])
-    chat_history.append({"role": "user", "content": message})
-
+    file_path = Path(stored)
     try:
-        cmd = [NPX, "ts-node", "src/main.ts", "--mode=chat", message, str(file_path), sessionId]
-        proc = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            shell=False,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
-            cwd=str(PROJECT_ROOT),
-        )
-        stdout, stderr = proc.communicate(timeout=600)
-        output_str = sanitize_stdout(stdout)
-
-        # ✅ 텍스트 + JSON 분리
-        text_part, parsed_json = extract_json_and_text(output_str)
-
-        # ✅ Markdown 생성
-        md_output = ""
-        if text_part:
-            md_output += text_part + "\n\n"
-        if parsed_json:
-            md_output += format_tool_output(parsed_json, sessionId)
-
-        # ✅ 이미지/파일 링크 추가
-        generated_files = list_generated_files(sessionId)
-        preview_images = [f for f in generated_files if f["ext"] in {".png", ".jpg", ".jpeg", ".gif", ".webp"}]
-        other_files = [f for f in generated_files if f["ext"] in {".csv", ".json", ".txt", ".html", ".md"}]
-        if preview_images or other_files:
-            md_output += "\n\n### 📂 시각화/결과 파일\n"
-            for img in preview_images:
-                rel = f"/outputs/{sessionId}/{img['name']}"
-                md_output += f'<a href="{rel}" target="_blank"><img src="{rel}" alt="{img["name"]}" style="max-width:100%;height:auto;border-radius:8px;"/></a>\n'
-            for f in other_files:
-                rel = f"/outputs/{sessionId}/{f['name']}"
-                md_output += f"- [{f['name']}]({rel})\n"
-
-        chat_history.append({"role": "bot", "content": md_output})
-        chat_histories[sessionId] = chat_history
-
-        head_columns, head_rows, describe_columns, describe_rows = get_csv_preview(file_path)
-        return templates.TemplateResponse("index.html", {
-            "request": request,
-            "chat_history": chat_history,
-            "current_filename": filename,
-            "current_session": sessionId,
-            "head_columns": head_columns,
-            "head_rows": head_rows,
-            "describe_columns": describe_columns,
-            "describe_rows": describe_rows,
-            "generated_files": generated_files,
-            "preview_images": preview_images,
-            "corr": {"headers": [], "rows": []},
-        })
-
-    except subprocess.TimeoutExpired:
-        reply = "⚠️ 응답 시간 초과"
-        chat_history.append({"role": "bot", "content": reply})
-        chat_histories[sessionId] = chat_history
-        return templates.TemplateResponse("index.html", {
-            "request": request,
-            "chat_history": chat_history,
-            "reply": reply,
-            "current_filename": filename,
-        })
+        job = submit_job("chat", sessionId, file_path, message)
+    except QueueFullError:
+        return render_notice(request, busy_or_timeout_reply(PoolBusyError()), sessionId, file_path.name)
+    await job_manager.wait(job)
+    if job.status == "error":
+        session_store.append(sessionId, {"role": "bot", "content": f"❌ 오류: {job.error}"})
+    return await render_chat_page(request, sessionId, file_path, job_id=job.id)
+
+
+@app.get("/chat/history")
+async def chat_history_page(sessionId: str = Query(...), before: int = Query(None),
+                            limit: int = Query(CHAT_PAGE_SIZE, ge=1, le=200)):
+    """이전 메시지 페이지 (before 보다 오래된 최근 limit 개). 화면의 "이전 메시지 더 보기" 가 사용"""
+    if session_store.get_file(sessionId) is None:
+        return JSONResponse({"error": "unknown session"}, status_code=404)
+    view = chat_view(sessionId, list_generated_files(sessionId), before, limit)
+    return {"messages": view["chat_history"], "more": view["chat_more"], "before": view["chat_before"]}
@@ -0,0 +1,169 @@
+"""
+비동기 작업(Job) 관리
+
+`/run_workflow/`, `/chat/` 의 무거운 작업(오케스트레이터 호출 + 결과 파싱)은 이벤트 루프를 막지 않도록
+스레드 executor 에서 실행한다. 동시에 실행되는 작업 수는 세마포어로 제한하고,
+제출 즉시 job id 를 돌려준 뒤 상태/결과는 별도 엔드포인트에서 조회한다.
+실행 중 발생하는 진행 이벤트(워크플로 단계 완료 등)는 job.events 에 쌓이고 SSE 로 전달된다.
+"""
+import asyncio
+import functools
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class QueueFullError(RuntimeError):
+    """대기 중인 작업이 queue_limit 을 넘음"""
+
+
+class Job:
+    def __init__(self, kind: str, session_id: Optional[str], params: Optional[dict] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.session_id = session_id
+        self.params = params or {}
+        self.status = "queued"          # queued → running → done | error
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.done = asyncio.Event()
+        self.events: list[dict] = []         # 진행 이벤트 (SSE 재접속 시 처음부터 재생)
+        self.updated = asyncio.Event()       # 이벤트 추가/종료 시 set → 스트림 대기 해제
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error")
+
+    def to_dict(self) -> dict:
+        return {
+            "jobId": self.id,
+            "kind": self.kind,
+            "sessionId": self.session_id,
+            "status": self.status,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    def __init__(self, concurrency: int = 2, queue_limit: int = 100, keep_finished: int = 500):
+        self.concurrency = max(1, concurrency)
+        self.queue_limit = queue_limit
+        self.keep_finished = keep_finished
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        return self._sem
+
+    # ── 제출 / 조회 ─────────────────────────────
+    def submit(self, kind: str, fn: Callable[..., Any], *args, session_id: Optional[str] = None,
+               params: Optional[dict] = None, pass_job: bool = False) -> Job:
+        """작업을 등록하고 즉시 반환. 실제 실행은 세마포어 슬롯이 나면 executor 에서 진행
+
+        pass_job=True 면 fn(*args, job=job) 으로 호출 → 작업 안에서 publish(job, ...) 가능
+        """
+        if self.pending() >= self.queue_limit:
+            raise QueueFullError("대기 중인 작업이 너무 많습니다.")
+        job = Job(kind, session_id, params)
+        self.jobs[job.id] = job
+        self._loop = asyncio.get_running_loop()
+        if pass_job:
+            fn = functools.partial(fn, job=job)
+        self._loop.create_task(self._run(job, fn, args))
+        self._trim()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    async def wait(self, job: Job, timeout: Optional[float] = None) -> Job:
+        await asyncio.wait_for(job.done.wait(), timeout)
+        return job
+
+    def publish(self, job: Job, event: dict):
+        """진행 이벤트 추가 (executor 스레드에서 호출해도 안전)"""
+        job.events.append(event)
+        self._notify(job)
+
+    def _notify(self, job: Job):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(job.updated.set)
+
+    async def stream(self, job: Job, keepalive: float = 15.0):
+        """진행 이벤트를 순서대로 내보내고, 작업이 끝나면 종료. 오래 조용하면 None(keepalive)"""
+        sent = 0
+        while True:
+            job.updated.clear()
+            while sent < len(job.events):
+                yield job.events[sent]
+                sent += 1
+            if job.finished:
+                return
+            try:
+                await asyncio.wait_for(job.updated.wait(), keepalive)
+            except asyncio.TimeoutError:
+                yield None
+
+    def pending(self) -> int:
+        return sum(1 for j in self.jobs.values() if j.status == "queued")
+
+    def running(self) -> int:
+        return sum(1 for j in self.jobs.values() if j.status == "running")
+
+    def live_sessions(self) -> set[str]:
+        """아직 끝나지 않은 작업이 있는 세션 (산출물 정리 시 보호 대상)"""
+        return {j.session_id for j in self.jobs.values() if not j.finished and j.session_id}
+
+    def queue_position(self, job: Job) -> int:
+        if job.status != "queued":
+            return 0
+        pos = 0
+        for j in self.jobs.values():
+            if j.status == "queued":
+                pos += 1
+            if j is job:
+                break
+        return pos
+
+    # ── 실행 ─────────────────────────────
+    async def _run(self, job: Job, fn: Callable[..., Any], args: tuple):
+        loop = asyncio.get_running_loop()
+        async with self._semaphore():
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = await loop.run_in_executor(self._executor, fn, *args)
+                job.status = "done"
+            except Exception as e:  # 작업 실패는 상태로만 남기고 서버는 계속 동작
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = "error"
+                print(f"[JOB] {job.kind} {job.id} failed: {job.error}")
+            finally:
+                job.finished_at = time.time()
+                job.done.set()
+                job.updated.set()
+
+    def _trim(self):
+        # 끝난 작업은 최근 keep_finished 개만 보관
+        finished = [jid for jid, j in self.jobs.items() if j.finished]
+        for jid in finished[: max(0, len(finished) - self.keep_finished)]:
+            self.jobs.pop(jid, None)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def snapshot(self) -> dict:
+        return {"concurrency": self.concurrency, "queued": self.pending(), "running": self.running(),
+                "tracked": len(self.jobs)}
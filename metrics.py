@@ -0,0 +1,195 @@
+"""
+단계별 시간/메모리 지표 + Prometheus 텍스트 노출 (/metrics)
+
+외부 라이브러리 없이 필요한 만큼만 구현한다.
+- Histogram : 지연 시간 분포 (단계별, 엔드포인트별) — _bucket / _sum / _count
+- Gauge     : 단계별 최대 RSS 등 마지막/최댓값
+- Counter   : 단계 실행 수 (재사용 여부별)
+
+RequestMetricsMiddleware 는 요청마다 라우트 경로(`/jobs/{job_id}` 처럼 템플릿 그대로)와 상태 코드로
+지연 시간을 기록한다. 원시 경로를 쓰면 세션/작업 id 마다 시계열이 생기므로 라우트가 없으면 "other" 로 묶는다.
+"""
+import math
+import threading
+import time
+
+# 초 단위 버킷: 수 ms(캐시 적중) ~ 수십 분(대용량 학습)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    return "+Inf" if v == math.inf else repr(float(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}_total{_labels(self.label_names, k)} {_num(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def set_max(self, value: float, **labels):
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = max(self._values.get(k, -math.inf), float(value))
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.label_names, k)} {_num(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        k = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(k) or ([0] * len(self.buckets), 0.0)
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    counts[i] += 1
+                    break
+            self._values[k] = (counts, total + value)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._values.items())
+        lines = self.header()
+        for k, (counts, total) in items:
+            acc = 0
+            for b, c in zip(self.buckets, counts):
+                acc += c
+                le = 'le="' + _num(b) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, k, le)} {acc}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, k)} {_num(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, k)} {acc}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            lines += m.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.register(Histogram(
+    "autoanalyst_stage_seconds", "워크플로 단계별 소요 시간(초)", ("stage", "component")))
+stage_peak_rss = registry.register(Gauge(
+    "autoanalyst_stage_peak_rss_bytes", "단계별 관측된 최대 RSS(바이트)", ("stage", "component")))
+stage_runs = registry.register(Counter(
+    "autoanalyst_stage_runs", "단계 실행 횟수 (reused: 이전 출력 재사용)", ("stage", "component", "reused")))
+http_seconds = registry.register(Histogram(
+    "autoanalyst_http_request_seconds", "엔드포인트별 응답 시간(초)", ("method", "endpoint", "status")))
+
+
+# ------------------------------
+# 워크플로 결과 → 지표
+# ------------------------------
+def observe_timings(timings: dict | None):
+    """워크플로 dict 의 timings({단계: {seconds, peakRssMb, scripts: [...]}})를 지표에 반영
+
+    최대 RSS 는 별도 프로세스(스크립트/워커)가 보고한 peakRssMb 만 쓴다. 서버 프로세스 안 단계는 rssMb(전후 RSS)만 있음
+    """
+    for stage, t in (timings or {}).items():
+        if not isinstance(t, dict):
+            continue
+        component = t.get("component") or "tool"
+        reused = "true" if t.get("reused") else "false"
+        stage_runs.inc(stage=stage, component=component, reused=reused)
+        if isinstance(t.get("seconds"), (int, float)) and not t.get("reused"):
+            stage_seconds.observe(float(t["seconds"]), stage=stage, component=component)
+        if isinstance(t.get("peakRssMb"), (int, float)):
+            stage_peak_rss.set_max(t["peakRssMb"] * 1024 * 1024, stage=stage, component=component)
+        for s in t.get("scripts") or []:
+            name = s.get("script") or "python"
+            if isinstance(s.get("seconds"), (int, float)):
+                stage_seconds.observe(float(s["seconds"]), stage=stage, component=f"python:{name}")
+            if isinstance(s.get("peakRssMb"), (int, float)):
+                stage_peak_rss.set_max(s["peakRssMb"] * 1024 * 1024, stage=stage, component=f"python:{name}")
+
+
+# ------------------------------
+# 요청 지연 시간 (ASGI 미들웨어)
+# ------------------------------
+class RequestMetricsMiddleware:
+    def __init__(self, app, skip: tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.skip = skip
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip or scope["path"].startswith("/outputs/"):
+            return await self.app(scope, receive, send)
+
+        t0 = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "other"
+            http_seconds.observe(time.perf_counter() - t0, method=scope.get("method", ""),
+                                 endpoint=endpoint, status=status["code"])
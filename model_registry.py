@@ -0,0 +1,186 @@
+"""
+학습된 모델 서빙용 캐시
+
+train_ml_model.py 는 세션 출력 폴더에 model_{timestamp}.pkl 과 model_{timestamp}.meta.json
+(피처 순서, 타깃, 분류 라벨 순서)을 남긴다. 여기서는
+
+- (경로, mtime) 기준 LRU 로 모델을 프로세스 안에 한 번만 로드 (joblib mmap_mode="r": 큰 numpy 배열은 메모리 매핑)
+- 입력 행(JSON 레코드 / columns+data / CSV)을 학습 때의 피처 순서로 맞추고 float32 로 변환
+  (없는 피처는 NaN, 숫자가 아닌 값은 NaN)
+- 배치 단위 벡터화 예측 후 분류면 라벨 인코딩을 원래 라벨로 되돌림
+- 전처리 결과로 학습한 모델(meta["preprocess"])은 입력에 같은 전처리 스펙을 먼저 적용
+"""
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+
+class ModelNotFoundError(Exception):
+    pass
+
+
+class PredictInputError(ValueError):
+    pass
+
+
+class LoadedModel:
+    def __init__(self, model_id: str, path: Path, model, meta: dict):
+        self.model_id = model_id
+        self.path = path
+        self.model = model
+        self.meta = meta
+        self.features: list[str] = meta.get("features") or []
+        self.classes = meta.get("classes")
+
+    def to_dict(self) -> dict:
+        return {
+            "modelId": self.model_id,
+            "model": self.meta.get("model"),
+            "problemType": self.meta.get("problemType"),
+            "target": self.meta.get("target"),
+            "features": self.features,
+            "classes": self.classes,
+            "metric": self.meta.get("metric"),
+        }
+
+
+def list_models(session_dir: Path) -> list[str]:
+    """세션 폴더의 모델 id(timestamp) 목록 — 최신순. 메타데이터가 있는 모델만 서빙 가능"""
+    if not session_dir.exists():
+        return []
+    ids = [p.name[len("model_"):-len(".meta.json")] for p in session_dir.glob("model_*.meta.json")]
+    ids = [i for i in ids if (session_dir / f"model_{i}.pkl").exists()]
+    return sorted(ids, key=lambda i: (len(i), i), reverse=True)
+
+
+class ModelCache:
+    def __init__(self, max_models: int = 8):
+        self.max_models = max_models
+        self._models: "OrderedDict[tuple, LoadedModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_dir: Path, model_id: str | None = None) -> LoadedModel:
+        ids = list_models(session_dir)
+        if model_id is None:
+            if not ids:
+                raise ModelNotFoundError("학습된 모델이 없습니다. 먼저 워크플로/학습을 실행하세요.")
+            model_id = ids[0]
+        elif model_id not in ids:
+            raise ModelNotFoundError(f"모델을 찾을 수 없습니다: {model_id}")
+
+        path = session_dir / f"model_{model_id}.pkl"
+        key = (str(path), os.stat(path).st_mtime_ns)
+        with self._lock:
+            hit = self._models.get(key)
+            if hit is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return hit
+            self.misses += 1
+
+        # 로드는 락 밖에서 (다른 모델 요청을 막지 않도록). 같은 모델을 동시에 로드하면 먼저 끝난 쪽이 남음
+        meta = json.loads((session_dir / f"model_{model_id}.meta.json").read_text(encoding="utf-8"))
+        try:
+            model = joblib.load(path, mmap_mode="r")
+        except (ValueError, OSError):
+            model = joblib.load(path)
+        loaded = LoadedModel(model_id, path, model, meta)
+
+        with self._lock:
+            self._models[key] = loaded
+            self._models.move_to_end(key)
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+        return loaded
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"loaded": len(self._models), "maxModels": self.max_models,
+                    "hits": self.hits, "misses": self.misses,
+                    "models": [m.path.name for m in self._models.values()]}
+
+
+# ------------------------------
+# 입력 파싱
+# ------------------------------
+def frame_from_json(body) -> pd.DataFrame:
+    """[{...}, ...] 또는 {"rows": [{...}]} 또는 {"columns": [...], "data": [[...]]}"""
+    if isinstance(body, dict):
+        if "columns" in body and "data" in body:
+            return pd.DataFrame(body["data"], columns=body["columns"])
+        body = body.get("rows", body.get("records"))
+    if not isinstance(body, list) or not all(isinstance(r, dict) for r in body):
+        raise PredictInputError('JSON 입력은 {"rows": [{컬럼: 값, ...}]} 또는 {"columns": [...], "data": [[...]]} 형식이어야 합니다.')
+    return pd.DataFrame.from_records(body)
+
+
+def frame_from_csv(raw: bytes) -> pd.DataFrame:
+    try:
+        return pd.read_csv(io.BytesIO(raw))
+    except (ValueError, pd.errors.ParserError) as e:
+        raise PredictInputError(f"CSV 파싱 실패: {e}")
+
+
+# ------------------------------
+# 예측
+# ------------------------------
+def feature_matrix(loaded: LoadedModel, df: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
+    """학습 때 피처 순서로 float32 프레임 구성 → (X, 입력에 없던 피처 목록)
+
+    모델이 DataFrame 으로 학습됐으므로 컬럼명을 유지한 프레임으로 넘긴다 (피처명 검증 경고 방지)
+    """
+    missing = [c for c in loaded.features if c not in df.columns]
+    cols = {}
+    for c in loaded.features:
+        if c in df.columns:
+            s = df[c]
+            if pd.api.types.is_bool_dtype(s):
+                s = s.astype("float32")
+            elif not pd.api.types.is_numeric_dtype(s):
+                s = pd.to_numeric(s, errors="coerce")
+            cols[c] = s.to_numpy(dtype=np.float32, na_value=np.nan)
+        else:
+            cols[c] = np.full(len(df), np.nan, dtype=np.float32)
+    return pd.DataFrame(cols, columns=loaded.features, index=df.index), missing
+
+
+def predict(loaded: LoadedModel, df: pd.DataFrame, proba: bool = False, batch_rows: int = 50_000) -> dict:
+    """배치(batch_rows 행) 단위로 벡터화 예측 — 큰 CSV 도 피처 행렬을 한 번에 만들지 않음"""
+    if df.empty:
+        raise PredictInputError("예측할 행이 없습니다.")
+    preds, probs, missing = [], [], []
+    want_proba = proba and hasattr(loaded.model, "predict_proba")
+    spec = loaded.meta.get("preprocess")
+    if spec is not None:
+        from preprocess_engine import apply_spec    # src/scripts (fastapi_main 이 sys.path 에 추가)
+    for start in range(0, len(df), batch_rows):
+        batch = df.iloc[start:start + batch_rows]
+        if spec is not None:
+            batch = apply_spec(batch, spec, serving=True)
+        X, missing = feature_matrix(loaded, batch)
+        try:
+            preds.append(np.asarray(loaded.model.predict(X)))
+            if want_proba:
+                probs.append(loaded.model.predict_proba(X))
+        except ValueError as e:
+            raise PredictInputError(f"예측 실패: {e}")
+
+    y = np.concatenate(preds)
+    if loaded.classes is not None and y.dtype.kind in "iuf":
+        classes = np.asarray(loaded.classes, dtype=object)
+        y = classes[y.astype(int)]
+    out = {"modelId": loaded.model_id, "model": loaded.meta.get("model"), "n": len(df),
+           "predictions": y.tolist(), "missingFeatures": missing}
+    if want_proba:
+        out["classes"] = loaded.classes
+        out["probabilities"] = np.round(np.concatenate(probs), 6).tolist()
+    return out
@@ -0,0 +1,304 @@
+"""
+오케스트레이터 워커 풀
+
+요청마다 `npx ts-node src/main.ts ...` 를 새로 띄우면 TS 컴파일 + Node 기동 + Agentica/툴 생성을
+매번 다시 한다. 여기서는 `--mode=server` 로 띄운 상주 워커 N개를 미리 데워두고
+stdin/stdout 프레임("<<<FRAME>>>" + JSON 한 줄)으로 작업을 주고받는다.
+
+- 풀 크기 / 워커당 최대 작업 수(초과 시 재시작) / 작업 타임아웃 / 대기 타임아웃 설정
+- 유휴 시간이 길었던 워커는 꺼내기 전에 ping 으로 헬스체크
+- 모든 워커가 바쁘면 acquire_timeout 까지만 기다리고 PoolBusyError (backpressure)
+"""
+import itertools
+import json
+import queue
+import subprocess
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Optional
+
+FRAME = "<<<FRAME>>>"
+
+
+class PoolBusyError(RuntimeError):
+    """모든 워커가 사용 중이라 acquire_timeout 안에 워커를 얻지 못함"""
+
+
+class WorkerDiedError(RuntimeError):
+    """작업 도중 워커 프로세스가 종료됨"""
+
+
+class OrchestratorWorker:
+    _ids = itertools.count(1)
+
+    def __init__(self, cmd: list[str], cwd: str, env: Optional[dict] = None):
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+            cwd=cwd,
+            env=env,
+        )
+        self.frames: "queue.Queue[dict | None]" = queue.Queue()
+        self.stderr_tail: deque[str] = deque(maxlen=200)
+        self.jobs_done = 0
+        self.started_at = time.time()
+        self.last_used = self.started_at
+        self.pid = self.proc.pid
+
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+
+    # ── 파이프 리더 ─────────────────────────────
+    def _read_stdout(self):
+        for line in self.proc.stdout:
+            if not line.startswith(FRAME):
+                continue  # 프레임이 아닌 출력(라이브러리 로그 등)은 무시
+            try:
+                self.frames.put(json.loads(line[len(FRAME):]))
+            except ValueError:
+                continue
+        self.frames.put(None)  # EOF → 워커 종료
+
+    def _read_stderr(self):
+        # 파이프가 가득 차서 워커가 멈추지 않도록 항상 비워준다
+        for line in self.proc.stderr:
+            self.stderr_tail.append(line.rstrip("\n"))
+
+    # ── 프로토콜 ─────────────────────────────
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def send(self, payload: dict):
+        self.proc.stdin.write(FRAME + json.dumps(payload, ensure_ascii=False) + "\n")
+        self.proc.stdin.flush()
+
+    def wait_for(self, pred: Callable[[dict], bool], timeout: float,
+                 on_event: Optional[Callable[[dict], None]] = None) -> dict:
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(cmd="orchestrator-worker", timeout=timeout)
+            try:
+                frame = self.frames.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if frame is None:
+                raise WorkerDiedError("\n".join(self.stderr_tail) or "worker exited")
+            if pred(frame):
+                return frame
+            if on_event and frame.get("type") == "event":
+                on_event(frame)
+
+    def wait_ready(self, timeout: float) -> bool:
+        try:
+            self.wait_for(lambda f: f.get("type") == "ready", timeout)
+            return True
+        except (subprocess.TimeoutExpired, WorkerDiedError):
+            return False
+
+    def request(self, payload: dict, timeout: float,
+                on_event: Optional[Callable[[dict], None]] = None) -> dict:
+        job_id = payload.setdefault("id", f"{self.pid}-{next(self._ids)}")
+        self.send(payload)
+        frame = self.wait_for(lambda f: f.get("id") == job_id and f.get("type") != "event", timeout, on_event)
+        self.last_used = time.time()
+        return frame
+
+    def ping(self, timeout: float = 5.0) -> bool:
+        try:
+            return self.request({"op": "ping"}, timeout).get("type") == "pong"
+        except (subprocess.TimeoutExpired, WorkerDiedError, OSError, ValueError):
+            return False
+
+    def close(self):
+        if self.alive():
+            try:
+                self.send({"op": "shutdown"})
+                self.proc.wait(timeout=3)
+            except Exception:
+                pass
+        if self.alive():
+            self.proc.kill()
+            try:
+                self.proc.wait(timeout=3)
+            except Exception:
+                pass
+
+
+class OrchestratorPool:
+    def __init__(
+        self,
+        cmd: list[str],
+        cwd: str | Path,
+        size: int = 2,
+        max_jobs: int = 50,
+        acquire_timeout: float = 30.0,
+        job_timeout: float = 600.0,
+        ready_timeout: float = 180.0,
+        health_interval: float = 60.0,
+        env: Optional[dict] = None,
+    ):
+        self.cmd = cmd
+        self.cwd = str(cwd)
+        self.size = size
+        self.max_jobs = max_jobs
+        self.acquire_timeout = acquire_timeout
+        self.job_timeout = job_timeout
+        self.ready_timeout = ready_timeout
+        self.health_interval = health_interval
+        self.env = env
+
+        self._idle: "queue.Queue[OrchestratorWorker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers: set[OrchestratorWorker] = set()
+        self._pending = 0          # 띄우는 중(ready 대기)인 워커 수
+        self._closed = False
+        self.spawn_failures = 0
+        self.stats = {"jobs": 0, "recycled": 0, "health_failed": 0, "busy_rejected": 0, "errors": 0}
+
+    # ── 수명 관리 ─────────────────────────────
+    def start(self):
+        """워커들을 백그라운드에서 미리 띄운다 (준비되는 대로 idle 큐에 들어감)"""
+        for _ in range(self.size):
+            self._spawn_async()
+
+    @property
+    def broken(self) -> bool:
+        """한 번도 워커를 띄우지 못했다면 풀을 쓸 수 없는 환경(npx 없음 등)"""
+        with self._lock:
+            return not self._workers and self.spawn_failures >= self.size
+
+    def _spawn(self) -> Optional[OrchestratorWorker]:
+        if self._closed:
+            return None
+        try:
+            worker = OrchestratorWorker(self.cmd, self.cwd, self.env)
+        except OSError as e:
+            print(f"[POOL] spawn failed: {e}")
+            with self._lock:
+                self.spawn_failures += 1
+            return None
+        t0 = time.monotonic()
+        if not worker.wait_ready(self.ready_timeout):
+            print(f"[POOL] worker {worker.pid} not ready: {' / '.join(list(worker.stderr_tail)[-3:])}")
+            worker.close()
+            with self._lock:
+                self.spawn_failures += 1
+            return None
+        print(f"[POOL] worker {worker.pid} ready in {time.monotonic() - t0:.2f}s")
+        with self._lock:
+            self._workers.add(worker)
+            self.spawn_failures = 0
+        return worker
+
+    def _spawn_async(self):
+        def run():
+            worker = None
+            try:
+                worker = self._spawn()
+                if worker is not None:
+                    self._idle.put(worker)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+            if worker is None and not self._closed and not self.broken:
+                # 일시적 실패 → 잠시 후 재시도해서 풀 용량을 유지
+                threading.Timer(5.0, self._spawn_async).start()
+        with self._lock:
+            self._pending += 1
+        threading.Thread(target=run, daemon=True).start()
+
+    def _bump(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _retire(self, worker: OrchestratorWorker, replace: bool = True):
+        with self._lock:
+            self._workers.discard(worker)
+        threading.Thread(target=worker.close, daemon=True).start()
+        if replace and not self._closed:
+            self._spawn_async()
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for w in workers:
+            w.close()
+
+    # ── 대여 / 반납 ─────────────────────────────
+    def acquire(self) -> OrchestratorWorker:
+        started = time.monotonic()
+        while True:
+            # 부팅 직후처럼 워커가 아직 하나도 없고 띄우는 중이면 "바쁨"이 아니라 준비 대기 → ready_timeout 까지 기다림
+            with self._lock:
+                warming = not self._workers and self._pending > 0
+            limit = max(self.acquire_timeout, self.ready_timeout) if warming else self.acquire_timeout
+            remaining = started + limit - time.monotonic()
+            if remaining <= 0:
+                self._bump("busy_rejected")
+                raise PoolBusyError("모든 오케스트레이터 워커가 사용 중입니다.")
+            try:
+                worker = self._idle.get(timeout=min(remaining, 1.0))   # 준비 상태 변화를 1초마다 다시 확인
+            except queue.Empty:
+                continue
+            # 헬스체크: 죽었거나, 오래 놀았는데 ping 응답이 없으면 교체
+            idle_for = time.time() - worker.last_used
+            if not worker.alive() or (idle_for > self.health_interval and not worker.ping()):
+                self._bump("health_failed")
+                self._retire(worker)
+                continue
+            return worker
+
+    def release(self, worker: OrchestratorWorker, failed: bool = False):
+        worker.jobs_done += 1
+        if failed or not worker.alive():
+            self._retire(worker)
+        elif worker.jobs_done >= self.max_jobs:
+            self._bump("recycled")
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+
+    # ── 작업 실행 ─────────────────────────────
+    def run_frame(self, op: str, on_event: Optional[Callable[[dict], None]] = None, **payload) -> dict:
+        """작업 1건 실행 → 워커의 result 프레임 그대로 반환 (code/stdout/stderr + 구조화 필드)"""
+        worker = self.acquire()
+        failed = False
+        t0 = time.monotonic()
+        try:
+            frame = worker.request({"op": op, **payload}, self.job_timeout, on_event)
+            self._bump("jobs")
+            return frame
+        except (subprocess.TimeoutExpired, WorkerDiedError, OSError):
+            failed = True
+            self._bump("errors")
+            raise
+        finally:
+            print(f"[POOL] {op} on worker {worker.pid}: {time.monotonic() - t0:.2f}s")
+            self.release(worker, failed=failed)
+
+    def run(self, op: str, on_event: Optional[Callable[[dict], None]] = None, **payload) -> tuple[int, str, str]:
+        """작업 1건 실행 → (returncode, stdout, stderr). 기존 Popen.communicate 결과와 같은 모양"""
+        frame = self.run_frame(op, on_event, **payload)
+        return int(frame.get("code", 1)), frame.get("stdout", ""), frame.get("stderr", "")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            workers = [
+                {"pid": w.pid, "jobs_done": w.jobs_done, "alive": w.alive(),
+                 "uptime_s": round(time.time() - w.started_at, 1)}
+                for w in self._workers
+            ]
+            stats = dict(self.stats, pending=self._pending)
+        return {"size": self.size, "idle": self._idle.qsize(), "workers": workers, **stats}
@@ -0,0 +1,271 @@
+"""
+오케스트레이터 stdout → 워크플로 dict 추출기 (단일 패스)
+
+기존 `extract_workflow_dict` 는 같은 문자열을 마커 정규식, 블록 스캐너 + 블록마다 정규식 7회,
+코드펜스 정규식, 전체 json.loads, `_jsonify_js_like` 등으로 여러 번 훑었다.
+여기서는 마커 구간을 먼저 찾고(정상 경로는 여기서 끝), 없을 때만 정규식 기반 토크나이저로
+문자열을 **한 번만** 지나가며
+
+- 최상위 `{ ... }` 블록 (문자열/이스케이프 인지. 올바른 JSON 이면 C 디코더로 바로 파싱)
+- ```json ... ``` 코드펜스 구간
+- `BasicAnalysisTool 결과: [ ... ]` 배열
+
+의 위치만 기록하고, JS풍 보정(따옴표 없는 키, '문자열', undefined/NaN/Infinity,
+[Object]/[Array], `... N more items`, 끝 콤마)은 실제로 파싱을 시도하는 블록에만 1회 적용한다.
+
+결과 우선순위는 기존 추출기와 같다: 마커 → 보정 파서(키워드 블록 우선, 없으면 가장 큰 블록)
+→ 코드펜스 → answers[*].message.content → BasicAnalysisTool 배열.
+"""
+import bisect
+import json
+import re
+
+_DECODER = json.JSONDecoder()
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+
+WORKFLOW_KEYS = {
+    "columnStats", "selectedColumns", "recommendedPairs",
+    "preprocessingRecommendations", "preprocessedFilePath",
+    "preprocessedFilePathUrl", "mlModelRecommendation",
+    "mlResultPath", "chartPaths", "chartUrls",
+}
+PREFER_RE = re.compile(r"columnStats|selectedColumns|mlModelRecommendation|mlResultPath")
+
+START = "<<<WORKFLOW_JSON_START>>>"
+END = "<<<WORKFLOW_JSON_END>>>"
+
+# 블록 밖: 구조 토큰만 (작은따옴표는 본문 아포스트로피일 수 있어 문자열로 보지 않음)
+_OUTER_RE = re.compile(
+    r'"(?:[^"\\\n]|\\.)*"'
+    r"|\{|```"
+    r"|BasicAnalysisTool\s*결과\s*:\s*\["
+)
+# 블록 안: 문자열(쌍/홑따옴표)과 괄호
+_INNER_RE = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|[{}\[\]]')
+
+# JS풍 → JSON 보정 (한 번의 re.sub)
+_NORM_RE = re.compile(
+    r'(?P<dq>"(?:[^"\\]|\\.)*")'
+    r"|'(?P<sq>(?:[^'\\]|\\.)*)'"
+    r"|,(?P<trail>\s*[}\]])"
+    r"|(?P<more>,?\s*\.\.\. \d+ more items?)"
+    r"|(?P<pre>[{\[,]\s*)(?P<key>[A-Za-z_$][\w$]*)(?P<colon>\s*:)"
+    r"|(?P<obj>\[\s*Object\s*\])"
+    r"|(?P<arr>\[\s*Array\s*\])"
+    r"|(?P<nul>\bundefined\b|-?\bInfinity\b|\bNaN\b)"
+)
+
+
+def _norm_sub(m: re.Match) -> str:
+    g = m.lastgroup
+    if g == "dq":
+        return m.group("dq")
+    if g == "sq":
+        return json.dumps(m.group("sq").replace("\\'", "'"), ensure_ascii=False)
+    if g == "trail":
+        return m.group("trail")
+    if g == "more":
+        return ""
+    if g == "colon":
+        return f'{m.group("pre")}"{m.group("key")}"{m.group("colon")}'
+    if g == "obj":
+        return "{}"
+    if g == "arr":
+        return "[]"
+    return "null"
+
+
+def jsonify_js_like(text: str) -> str:
+    """JS풍 객체/배열 문자열(util.inspect 출력 등)을 JSON 으로 근사 변환"""
+    return _NORM_RE.sub(_norm_sub, text)
+
+
+def loads_lenient(text: str):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(jsonify_js_like(text))
+
+
+def looks_like_workflow(obj) -> bool:
+    """워크플로 핵심 키가 1개라도 있어야 유효로 간주"""
+    return isinstance(obj, dict) and any(k in obj for k in WORKFLOW_KEYS)
+
+
+def _pick_workflow(obj):
+    if not isinstance(obj, dict):
+        return None
+    for cand in (obj.get("workflow"), obj.get("result"), obj):
+        if looks_like_workflow(cand):
+            return cand
+    return None
+
+
+class ScanResult:
+    def __init__(self):
+        self.blocks: list[tuple[int, int]] = []    # 최상위 {…} 블록
+        self.fences: list[tuple[int, int]] = []    # ``` 사이 본문
+        self.label_array = None                    # BasicAnalysisTool 결과: [ … ]
+        self.parsed: dict[tuple[int, int], object] = {}   # 이미 올바른 JSON 이었던 블록의 파싱 결과
+
+
+def _close_block(s: str, pos: int, opener: str):
+    """s[pos] 의 여는 괄호와 짝이 맞는 닫는 괄호 다음 위치 (없으면 None). opener 종류의 괄호만 센다"""
+    closer = "}" if opener == "{" else "]"
+    depth = 0
+    search = _INNER_RE.search
+    while True:
+        m = search(s, pos)
+        if m is None:
+            return None
+        tok = m.group()
+        pos = m.end()
+        if tok == opener:
+            depth += 1
+        elif tok == closer:
+            depth -= 1
+            if depth == 0:
+                return pos
+
+
+def scan(s: str) -> ScanResult:
+    """문자열을 한 번 지나가며 후보 구간의 위치만 기록"""
+    res = ScanResult()
+    search = _OUTER_RE.search
+    pos = 0
+    fence_at = None
+    unclosed = False
+    while True:
+        m = search(s, pos)
+        if m is None:
+            break
+        tok = m.group()
+        pos = m.end()
+        if tok == "{":
+            if unclosed:
+                continue
+            # 올바른 JSON 블록이면 C 디코더가 끝 위치와 값을 한 번에 준다
+            try:
+                obj, end = _DECODER.raw_decode(s, m.start())
+                res.parsed[(m.start(), end)] = obj
+            except ValueError:
+                end = _close_block(s, m.start(), "{")
+            if end is None:
+                # 닫히지 않은 블록 → 이후 {…} 는 모두 그 안쪽이므로 블록 후보는 더 없음 (마커/펜스는 계속 탐색)
+                unclosed = True
+                continue
+            res.blocks.append((m.start(), end))
+            pos = end
+            continue
+        if tok == "```":
+            if fence_at is None:
+                fence_at = pos
+            else:
+                res.fences.append((fence_at, m.start()))
+                fence_at = None
+        elif tok[0] == "B" and res.label_array is None:
+            arr_start = m.end() - 1
+            end = _close_block(s, arr_start, "[")
+            if end is not None:
+                res.label_array = (arr_start, end)
+                pos = end
+    return res
+
+
+def _parse_best_block(s: str, res: ScanResult):
+    """키워드(columnStats 등) 포함 블록 우선, 그다음 큰 블록 순으로 처음 파싱에 성공한 블록"""
+    blocks = res.blocks
+    if not blocks:
+        return None
+    kw = [m.start() for m in PREFER_RE.finditer(s)]
+
+    def has_kw(span):
+        i = bisect.bisect_left(kw, span[0])
+        return i < len(kw) and kw[i] < span[1]
+
+    for a, b in sorted(blocks, key=lambda sp: (has_kw(sp), sp[1] - sp[0]), reverse=True):
+        if (a, b) in res.parsed:
+            return res.parsed[(a, b)]
+        try:
+            return loads_lenient(s[a:b])
+        except ValueError:
+            continue
+    return None
+
+
+def extract_workflow_dict(output_str: str):
+    """stdout 에서 워크플로 dict 추출 → (workflow, 감싼 최상위 객체). 실패 시 (None, None)"""
+    s = ANSI_RE.sub("", output_str or "").strip()
+    if not s:
+        return None, None
+
+    # 전체가 JSON 인 경우 (비 JSON 이면 첫 글자에서 바로 실패하므로 저렴)
+    whole = None
+    try:
+        whole = json.loads(s)
+    except ValueError:
+        pass
+
+    # 0) 마커 구간 — 정상 경로. 찾으면 나머지 스캔 없이 바로 반환
+    i = s.find(START)
+    j = s.find(END, i + len(START)) if i >= 0 else -1
+    if j >= 0:
+        try:
+            obj = json.loads(s[i + len(START):j])
+            cand = obj.get("workflow") if isinstance(obj, dict) else None
+            if isinstance(cand, dict):
+                return cand, obj
+        except ValueError:
+            pass
+
+    # 전체가 JSON 이면 블록 후보는 필요 없음 → 펜스/로그 배열이 있을 때만 스캔
+    if whole is None or "```" in s or "BasicAnalysisTool" in s:
+        res = scan(s)
+    else:
+        res = ScanResult()
+
+    # 1) 보정 파서: 키워드 포함 블록 우선, 그다음 큰 블록. 처음 파싱에 성공한 블록 하나만 본다
+    top = whole if whole is not None else _parse_best_block(s, res)
+    cand = _pick_workflow(top)
+    if cand is not None:
+        return cand, top
+
+    # 2) ```json ... ``` 코드블록
+    for a, b in res.fences:
+        block = s[a:b].strip()
+        if block[:4].lower() == "json":
+            block = block[4:].strip()
+        try:
+            obj = json.loads(block)
+        except ValueError:
+            continue
+        cand = _pick_workflow(obj)
+        if cand is not None:
+            return cand, obj
+
+    # 3) answers[*].message.content 내부 JSON
+    if isinstance(whole, dict):
+        for a in (whole.get("answers") or []):
+            content = (((a or {}).get("message") or {}).get("content") or "").strip()
+            if not content:
+                continue
+            try:
+                obj = json.loads(content)
+            except ValueError:
+                text = content.replace('\\"', '"')
+                obj = _parse_best_block(text, scan(text))
+            cand = _pick_workflow(obj)
+            if cand is not None:
+                return cand, obj
+
+    # 4) 로그 텍스트의 BasicAnalysisTool 배열만이라도
+    if res.label_array:
+        try:
+            arr = loads_lenient(s[res.label_array[0]:res.label_array[1]])
+            if isinstance(arr, list) and arr and isinstance(arr[0], dict):
+                return {"columnStats": arr}, {"columnStats": arr}
+        except ValueError:
+            pass
+
+    return None, None
@@ -0,0 +1,284 @@
+"""
+업로드 / 산출물 폴더 정리 (GC)
+
+업로드마다 src/uploads/{sessionId}/ 가, 실행마다 src/outputs/{sessionId}/ 에 차트·전처리 CSV·모델이
+쌓이는데 지우는 곳이 없어 디스크가 며칠 만에 찬다. 여기서는 세션 단위로 주기적으로 정리한다.
+
+정리 순서 (한 번의 sweep)
+1. 고아   : 세션 저장소에 없는(만료/삭제된) 세션의 폴더, 폴더가 사라진 세션 저장소 항목
+2. 나이   : 마지막 활동(파일 mtime, 세션 접근 시각 중 최근)이 max_age 보다 오래된 세션
+3. 쿼터   : 세션 산출물 용량이 session_quota 를 넘으면 산출물 파일을 오래된 것부터 삭제
+            (업로드·컬럼형 사본·표본은 산출물을 지워도 줄지 않으므로 세지 않음)
+4. 전체   : 전체 용량이 max_total 을 넘으면 마지막 활동이 오래된 세션부터 통째로 삭제
+
+보호: 아직 끝나지 않은 작업이 있는 세션, 최근 grace 초 안에 활동이 있는 세션(다른 워커의 작업 포함)은
+모든 정리 대상(쿼터 포함)에서 빠진다 — 사용자가 보고 있는 세션의 차트/모델이 지워지지 않게.
+
+세션을 지울 때는 (이벤트 루프에서) 세션 저장소 항목을 먼저 지운 뒤 폴더를 지운다.
+작업 제출도 이벤트 루프에서 일어나므로 "작업 중 여부 확인 → 저장소 삭제" 사이에 새 작업이 끼어들 수 없고,
+삭제 이후 요청은 unknown session 으로 처리된다.
+"""
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
+
+
+def _is_session_dir(p: Path) -> bool:
+    try:
+        uuid.UUID(p.name)
+        return p.is_dir()
+    except ValueError:
+        return False
+
+
+def _files(root: Path) -> list[tuple[float, int, Path]]:
+    """폴더 아래 파일 (mtime, size, path). 스캔 중 사라진 파일은 건너뜀"""
+    out = []
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            p = Path(dirpath) / name
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            out.append((st.st_mtime, st.st_size, p))
+    return out
+
+
+def _freed_bytes(p: Path) -> int:
+    """삭제 시 실제로 비워지는 바이트 (산출물 캐시와 하드링크로 공유된 파일은 0)"""
+    try:
+        st = p.stat()
+    except FileNotFoundError:
+        return 0
+    return st.st_size if st.st_nlink <= 1 else 0
+
+
+class SessionUsage:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.upload_bytes = 0
+        self.output_bytes = 0
+        self.newest_mtime = 0.0
+        self.output_files: list[tuple[float, int, Path]] = []
+
+    @property
+    def total_bytes(self) -> int:
+        return self.upload_bytes + self.output_bytes
+
+
+class OutputSweeper:
+    def __init__(self, upload_dir: Path, output_dir: Path, session_store,
+                 live_sessions: Callable[[], set[str]], *, max_age: float, max_total_bytes: int,
+                 session_quota_bytes: int, grace: float = 3600, interval: float = 600, manifest=None):
+        self.upload_dir = Path(upload_dir)
+        self.output_dir = Path(output_dir)
+        self.session_store = session_store
+        self.live_sessions = live_sessions
+        self.max_age = max_age
+        self.max_total_bytes = max_total_bytes
+        self.session_quota_bytes = session_quota_bytes
+        self.grace = grace
+        self.interval = interval
+        self.manifest = manifest          # ManifestIndex — 지운 파일/세션을 산출물 목록에서도 뺌
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        # 지표
+        self.runs = 0
+        self.last_run_at: float | None = None
+        self.last_duration_s: float | None = None
+        self.last_error: str | None = None
+        self.bytes_reclaimed = 0
+        self.files_deleted = 0
+        self.sessions_evicted = 0
+        self.entries_purged = 0       # 폴더 없이 남아 있던 세션 저장소 항목
+        self.by_reason = {"orphan": 0, "age": 0, "quota": 0, "size": 0}    # 사유별 회수 바이트
+        self.usage = {"sessions": 0, "bytes": 0}
+
+    # ------------------------------
+    # 스캔 (스레드)
+    # ------------------------------
+    def scan(self) -> dict[str, SessionUsage]:
+        usage: dict[str, SessionUsage] = {}
+        for root, is_output in ((self.upload_dir, False), (self.output_dir, True)):
+            if not root.exists():
+                continue
+            for d in root.iterdir():
+                if not _is_session_dir(d):
+                    continue
+                u = usage.setdefault(d.name, SessionUsage(d.name))
+                files = _files(d)
+                size = sum(f[1] for f in files)
+                if is_output:
+                    u.output_bytes += size
+                    # 매니페스트(.manifest.jsonl) 같은 숨김 파일은 쿼터 정리 대상에서 제외
+                    u.output_files = sorted((f for f in files if not f[2].name.startswith(".")), key=lambda f: f[0])
+                else:
+                    u.upload_bytes += size
+                u.newest_mtime = max([u.newest_mtime, d.stat().st_mtime] + [f[0] for f in files])
+        return usage
+
+    # ------------------------------
+    # 계획 (이벤트 루프 — await 없이 한 번에)
+    # ------------------------------
+    def plan(self, usage: dict[str, SessionUsage], now: float) -> tuple[list, list]:
+        """→ (지울 세션 [(sid, 사유)], 지울 파일 [(path, 사유)]). 세션 저장소 항목은 여기서 바로 삭제"""
+        live = self.live_sessions()
+        sessions, files = [], []
+
+        def last_active(u: SessionUsage) -> float:
+            return max(u.newest_mtime, self.session_store.last_access(u.session_id) or 0.0)
+
+        def evictable(u: SessionUsage) -> bool:
+            return u.session_id not in live and now - last_active(u) > self.grace
+
+        # 1. 고아: 폴더가 사라진 세션 저장소 항목
+        for sid in self.session_store.session_ids():
+            if sid not in usage and sid not in live and now - (self.session_store.last_access(sid) or 0) > self.grace:
+                self.session_store.delete(sid)
+                self.entries_purged += 1
+
+        remaining = dict(usage)
+        for sid, u in list(remaining.items()):
+            if not evictable(u):
+                continue
+            if self.session_store.last_access(sid) is None:
+                reason = "orphan"                                  # 1. 저장소에 없는 세션의 폴더
+            elif now - last_active(u) > self.max_age:
+                reason = "age"                                     # 2. 오래된 세션
+            else:
+                continue
+            sessions.append((sid, reason))
+            del remaining[sid]
+
+        # 3. 세션 쿼터: 산출물 파일을 오래된 것부터 (활동 중인 세션은 제외)
+        for sid, u in remaining.items():
+            if not evictable(u) or u.output_bytes <= self.session_quota_bytes:
+                continue
+            over = u.output_bytes - self.session_quota_bytes
+            while over > 0 and u.output_files:
+                mtime, size, p = u.output_files.pop(0)
+                files.append((p, "quota"))
+                u.output_bytes -= size
+                over -= size
+
+        # 4. 전체 용량: 마지막 활동이 오래된 세션부터
+        total = sum(u.total_bytes for u in remaining.values())
+        if total > self.max_total_bytes:
+            for u in sorted(remaining.values(), key=last_active):
+                if total <= self.max_total_bytes:
+                    break
+                if not evictable(u):
+                    continue
+                sessions.append((u.session_id, "size"))
+                total -= u.total_bytes
+
+        for sid, _ in sessions:
+            self.session_store.delete(sid)
+        return sessions, files
+
+    # ------------------------------
+    # 삭제 (스레드)
+    # ------------------------------
+    def apply(self, sessions: list, files: list) -> int:
+        reclaimed = 0
+        deleted: dict[str, list[str]] = {}
+        for p, reason in files:
+            freed = _freed_bytes(p)
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                continue
+            deleted.setdefault(p.parent.name, []).append(p.name)
+            reclaimed += freed
+            self.by_reason[reason] += freed
+            self.files_deleted += 1
+        if self.manifest is not None:
+            for sid, names in deleted.items():
+                self.manifest.forget(sid, names)
+        for sid, reason in sessions:
+            freed, count = 0, 0
+            for root in (self.upload_dir, self.output_dir):
+                d = root / sid
+                if not d.exists():
+                    continue
+                for _, _, p in _files(d):
+                    freed += _freed_bytes(p)
+                    count += 1
+                shutil.rmtree(d, ignore_errors=True)
+            if self.manifest is not None:
+                self.manifest.drop(sid)
+            reclaimed += freed
+            self.by_reason[reason] += freed
+            self.files_deleted += count
+            self.sessions_evicted += 1
+        self.bytes_reclaimed += reclaimed
+        return reclaimed
+
+    async def sweep(self) -> dict:
+        """스캔 → 계획 → 삭제 1회. 동시에 두 번 돌지 않음"""
+        async with self._lock:
+            t0 = time.perf_counter()
+            try:
+                usage = await asyncio.to_thread(self.scan)
+                sessions, files = self.plan(usage, time.time())
+                reclaimed = await asyncio.to_thread(self.apply, sessions, files)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"[GC] 정리 실패: {self.last_error}")
+                raise
+            finally:
+                self.runs += 1
+                self.last_run_at = time.time()
+                self.last_duration_s = round(time.perf_counter() - t0, 3)
+            evicted = {sid for sid, _ in sessions}
+            self.usage = {"sessions": len(usage) - len(evicted),
+                          "bytes": sum(u.total_bytes for sid, u in usage.items() if sid not in evicted)}
+            if sessions or files:
+                print(f"[GC] 세션 {len(sessions)}개, 파일 {len(files)}개 정리, {reclaimed / 1e6:.1f}MB 회수")
+            return {"sessions": [{"sessionId": sid, "reason": r} for sid, r in sessions],
+                    "files": len(files), "bytesReclaimed": reclaimed}
+
+    # ------------------------------
+    # 백그라운드 루프
+    # ------------------------------
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception:
+                pass    # 다음 주기에 다시 시도 (오류는 last_error 에 남음)
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "intervalS": self.interval,
+            "maxAgeS": self.max_age,
+            "maxTotalBytes": self.max_total_bytes,
+            "sessionQuotaBytes": self.session_quota_bytes,
+            "graceS": self.grace,
+            "runs": self.runs,
+            "lastRunAt": self.last_run_at,
+            "lastDurationS": self.last_duration_s,
+            "lastError": self.last_error,
+            "bytesReclaimed": self.bytes_reclaimed,
+            "bytesReclaimedByReason": dict(self.by_reason),
+            "filesDeleted": self.files_deleted,
+            "sessionsEvicted": self.sessions_evicted,
+            "storeEntriesPurged": self.entries_purged,
+            "usage": dict(self.usage),
+        }
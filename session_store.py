@@ -0,0 +1,396 @@
+"""
+세션 저장소 (업로드 파일 경로 + 채팅 기록 + 오케스트레이터 에이전트 상태)
+
+기존 `session_files` / `chat_histories` 모듈 전역 dict 는 끝없이 커지고, 재시작하면 사라지고,
+uvicorn --workers N 에서는 워커마다 따로 가지고 있어 세션이 깨졌다. 여기서는 같은 인터페이스의
+두 백엔드를 둔다.
+
+- MemorySessionStore : 프로세스 안 LRU(최대 세션 수) + TTL(마지막 접근 기준). 단일 워커용
+- SQLiteSessionStore : 로컬 SQLite 파일(WAL). 같은 호스트의 여러 워커 프로세스가 공유, 재시작 후에도 유지
+
+공통: 세션당 채팅 기록은 최근 max_turns 개, 본문 합계 max_bytes 이하만 원문으로 두고,
+그보다 오래된 메시지는 버리지 않고 요약(메시지당 한 줄, 최근 SUMMARY_MAX_LINES 줄)으로 접는다.
+봇 메시지는 마크다운 본문 + 산출물 이름 목록(artifacts)만 저장하고 <img> 등은 화면에서 만든다.
+메시지마다 seq(세션 안에서 증가)가 붙어 page(before=seq) 로 오래된 쪽을 나눠 읽는다.
+
+에이전트 상태(TS 오케스트레이터의 LLM 대화 기록 + 선택기 결과)도 세션에 둔다. 채팅 요청마다 실어 보내고
+결과로 돌려받아 저장하므로, 풀의 어느 워커가 받아도(워커 재시작 후에도) 같은 문맥으로 이어진다.
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+def _msg_bytes(msg: dict) -> int:
+    return len(str(msg.get("content", "")).encode("utf-8"))
+
+
+def _split(history: list[dict], max_turns: int, max_bytes: int) -> tuple[list[dict], list[dict]]:
+    """최근 것부터 세어 턴 수/바이트 상한 안에 드는 만큼 → (접을 것, 남길 것)"""
+    kept, total = [], 0
+    for msg in reversed(history):
+        size = _msg_bytes(msg)
+        if len(kept) >= max_turns or (kept and total + size > max_bytes):
+            break
+        kept.append(msg)
+        total += size
+    kept.reverse()
+    return history[:len(history) - len(kept)], kept
+
+
+# ------------------------------
+# 오래된 메시지 요약 (LLM 없이, 메시지당 한 줄)
+# ------------------------------
+SUMMARY_MAX_LINES = 30      # 요약에 남기는 접힌 메시지 줄 수 (더 오래된 것은 개수만)
+DIGEST_CHARS = 160
+_TAG = re.compile(r"<[^>]+>")
+_MD_EDGE = " #*-|>`_"
+
+
+def _digest(msg: dict) -> str:
+    """메시지 → 요약 한 줄 (HTML/마크다운 기호를 뺀 첫 줄)"""
+    text = _TAG.sub(" ", str(msg.get("content") or ""))
+    line = next((ln.strip(_MD_EDGE) for ln in text.splitlines() if ln.strip(_MD_EDGE)), "")
+    line = " ".join(line.split())
+    if len(line) > DIGEST_CHARS:
+        line = line[:DIGEST_CHARS - 1] + "…"
+    n = len(msg.get("artifacts") or [])
+    return f"{'👤' if msg.get('role') == 'user' else '🤖'} {line}" + (f" (파일 {n}개)" if n else "")
+
+
+def _fold(summary: dict | None, msgs: list[dict]) -> dict:
+    """기존 요약 + 접을 메시지들 → 새 요약 {turns, omitted, lines}"""
+    summary = summary or {"turns": 0, "omitted": 0, "lines": []}
+    lines = summary["lines"] + [_digest(m) for m in msgs]
+    overflow = max(0, len(lines) - SUMMARY_MAX_LINES)
+    return {"turns": summary["turns"] + len(msgs), "omitted": summary["omitted"] + overflow,
+            "lines": lines[overflow:]}
+
+
+def _page(messages: list[dict], limit: int, before: int | None) -> dict:
+    """seq 오름차순 메시지에서 before 이전 최근 limit 개"""
+    if before is not None:
+        messages = [m for m in messages if m["seq"] < before]
+    page = messages[-limit:] if limit > 0 else messages
+    return {"messages": page, "more": len(page) < len(messages),
+            "before": page[0]["seq"] if page else before}
+
+
+class SessionStore:
+    """인터페이스 (백엔드 공통)"""
+    backend = "base"
+
+    def __init__(self, ttl: float, max_turns: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+
+    def create(self, session_id: str, file_path: str): ...
+    def get_file(self, session_id: str | None) -> str | None: ...
+    def history(self, session_id: str | None) -> list[dict]: ...
+    def page(self, session_id: str | None, limit: int, before: int | None = None) -> dict: ...
+    def append(self, session_id: str, msg: dict): ...
+    def agent_state(self, session_id: str | None) -> dict | None: ...
+    def set_agent_state(self, session_id: str, state: dict): ...
+    def delete(self, session_id: str): ...
+    def session_ids(self) -> list[str]: ...
+    def last_access(self, session_id: str) -> float | None: ...
+    def purge_expired(self) -> int: ...
+    def snapshot(self) -> dict: ...
+
+    def __contains__(self, session_id) -> bool:
+        return self.get_file(session_id) is not None
+
+
+# ------------------------------
+# 메모리 (LRU + TTL)
+# ------------------------------
+class MemorySessionStore(SessionStore):
+    backend = "memory"
+
+    def __init__(self, max_sessions: int = 10_000, ttl: float = 86_400,
+                 max_turns: int = 200, max_bytes: int = 1 << 20):
+        super().__init__(ttl, max_turns, max_bytes)
+        self.max_sessions = max_sessions
+        self._data: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    def _live(self, session_id) -> dict | None:
+        s = self._data.get(session_id)
+        if s is None:
+            return None
+        if time.time() - s["last_access"] > self.ttl:
+            del self._data[session_id]
+            self.expired += 1
+            return None
+        s["last_access"] = time.time()
+        self._data.move_to_end(session_id)
+        return s
+
+    def create(self, session_id: str, file_path: str):
+        with self._lock:
+            now = time.time()
+            self._data[session_id] = {"file": str(file_path), "history": [], "bytes": 0, "seq": 0,
+                                      "summary": None, "agent": None, "created": now, "last_access": now}
+            self._data.move_to_end(session_id)
+            while len(self._data) > self.max_sessions:
+                self._data.popitem(last=False)
+                self.evicted += 1
+
+    def get_file(self, session_id):
+        with self._lock:
+            s = self._live(session_id)
+            return s["file"] if s else None
+
+    def history(self, session_id):
+        with self._lock:
+            s = self._live(session_id)
+            return list(s["history"]) if s else []
+
+    def page(self, session_id, limit, before=None):
+        with self._lock:
+            s = self._live(session_id)
+            if s is None:
+                return {"summary": None, "messages": [], "more": False, "before": None}
+            return {"summary": s["summary"], **_page(s["history"], limit, before)}
+
+    def append(self, session_id: str, msg: dict):
+        with self._lock:
+            s = self._live(session_id)
+            if s is None:
+                return
+            s["seq"] += 1
+            s["history"].append({**msg, "seq": s["seq"]})
+            s["bytes"] += _msg_bytes(msg)
+            if len(s["history"]) > self.max_turns or s["bytes"] > self.max_bytes:
+                old, s["history"] = _split(s["history"], self.max_turns, self.max_bytes)
+                s["summary"] = _fold(s["summary"], old)
+                s["bytes"] = sum(_msg_bytes(m) for m in s["history"])
+
+    def agent_state(self, session_id):
+        with self._lock:
+            s = self._live(session_id)
+            return s["agent"] if s else None
+
+    def set_agent_state(self, session_id, state):
+        with self._lock:
+            s = self._live(session_id)
+            if s is not None:
+                s["agent"] = state
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._data.pop(session_id, None)
+
+    def session_ids(self) -> list[str]:
+        with self._lock:
+            return list(self._data)
+
+    def last_access(self, session_id: str) -> float | None:
+        # 조회만 (접근 시각을 갱신하지 않음)
+        with self._lock:
+            s = self._data.get(session_id)
+            return s["last_access"] if s else None
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cutoff = time.time() - self.ttl
+            dead = [k for k, s in self._data.items() if s["last_access"] < cutoff]
+            for k in dead:
+                del self._data[k]
+            self.expired += len(dead)
+            return len(dead)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"backend": self.backend, "sessions": len(self._data), "maxSessions": self.max_sessions,
+                    "ttl": self.ttl, "evicted": self.evicted, "expired": self.expired,
+                    "historyBytes": sum(s["bytes"] for s in self._data.values())}
+
+
+# ------------------------------
+# SQLite (WAL, 여러 워커 프로세스 공유)
+# ------------------------------
+class SQLiteSessionStore(SessionStore):
+    backend = "sqlite"
+    TOUCH_INTERVAL = 30        # 마지막 접근 시각은 이 간격(초)보다 오래됐을 때만 갱신 (읽기마다 쓰지 않도록)
+    PURGE_EVERY = 500          # append N 회마다 만료 세션 정리
+
+    def __init__(self, path: Path, ttl: float = 86_400, max_turns: int = 200, max_bytes: int = 1 << 20):
+        super().__init__(ttl, max_turns, max_bytes)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        with self._conn() as con:
+            con.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    file_path TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_sessions_access ON sessions(last_access);
+                CREATE TABLE IF NOT EXISTS messages (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+                    body TEXT NOT NULL,
+                    bytes INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, seq);
+                CREATE TABLE IF NOT EXISTS summaries (
+                    session_id TEXT PRIMARY KEY REFERENCES sessions(id) ON DELETE CASCADE,
+                    body TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS agent_states (
+                    session_id TEXT PRIMARY KEY REFERENCES sessions(id) ON DELETE CASCADE,
+                    body TEXT NOT NULL
+                );
+            """)
+
+    def _conn(self) -> sqlite3.Connection:
+        # 스레드마다 연결 1개 (sqlite3 연결은 스레드 간 공유하지 않음)
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute("PRAGMA foreign_keys=ON")
+            con.execute("PRAGMA busy_timeout=10000")
+            self._local.con = con
+        return con
+
+    def _live_file(self, con, session_id) -> str | None:
+        row = con.execute("SELECT file_path, last_access FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > self.ttl:
+            con.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            return None
+        if now - row[1] > self.TOUCH_INTERVAL:
+            con.execute("UPDATE sessions SET last_access = ? WHERE id = ?", (now, session_id))
+        return row[0]
+
+    def create(self, session_id: str, file_path: str):
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO sessions (id, file_path, created, last_access) VALUES (?, ?, ?, ?)",
+            (session_id, str(file_path), now, now))
+
+    def get_file(self, session_id):
+        if not session_id:
+            return None
+        return self._live_file(self._conn(), session_id)
+
+    def history(self, session_id):
+        if not session_id:
+            return []
+        con = self._conn()
+        if self._live_file(con, session_id) is None:
+            return []
+        rows = con.execute("SELECT seq, body FROM messages WHERE session_id = ? ORDER BY seq",
+                           (session_id,)).fetchall()
+        return [{**json.loads(body), "seq": seq} for seq, body in rows]
+
+    def page(self, session_id, limit, before=None):
+        empty = {"summary": None, "messages": [], "more": False, "before": None}
+        if not session_id:
+            return empty
+        con = self._conn()
+        if self._live_file(con, session_id) is None:
+            return empty
+        # 최근 limit + 1 개만 읽어 더 있는지 판단
+        rows = con.execute("SELECT seq, body FROM messages WHERE session_id = ? AND seq < ? "
+                           "ORDER BY seq DESC LIMIT ?",
+                           (session_id, before if before is not None else 1 << 62, limit + 1)).fetchall()
+        more = len(rows) > limit
+        msgs = [{**json.loads(body), "seq": seq} for seq, body in reversed(rows[:limit])]
+        row = con.execute("SELECT body FROM summaries WHERE session_id = ?", (session_id,)).fetchone()
+        return {"summary": json.loads(row[0]) if row else None, "messages": msgs, "more": more,
+                "before": msgs[0]["seq"] if msgs else before}
+
+    def append(self, session_id: str, msg: dict):
+        con = self._conn()
+        body = json.dumps(msg, ensure_ascii=False)
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            if self._live_file(con, session_id) is None:
+                con.execute("ROLLBACK")
+                return
+            con.execute("INSERT INTO messages (session_id, body, bytes) VALUES (?, ?, ?)",
+                        (session_id, body, _msg_bytes(msg)))
+            # 최근 max_turns 개 & 누적 바이트 max_bytes 이하만 원문으로 (최신 1개는 항상 유지), 나머지는 요약으로
+            old = con.execute("""
+                SELECT seq, body FROM (
+                    SELECT seq, body,
+                           ROW_NUMBER() OVER (ORDER BY seq DESC) AS rn,
+                           SUM(bytes) OVER (ORDER BY seq DESC) AS running
+                    FROM messages WHERE session_id = ?1
+                ) WHERE rn > ?2 OR (rn > 1 AND running > ?3) ORDER BY seq
+            """, (session_id, self.max_turns, self.max_bytes)).fetchall()
+            if old:
+                row = con.execute("SELECT body FROM summaries WHERE session_id = ?", (session_id,)).fetchone()
+                summary = _fold(json.loads(row[0]) if row else None, [json.loads(b) for _, b in old])
+                con.execute("INSERT OR REPLACE INTO summaries (session_id, body) VALUES (?, ?)",
+                            (session_id, json.dumps(summary, ensure_ascii=False)))
+                con.execute("DELETE FROM messages WHERE session_id = ? AND seq <= ?", (session_id, old[-1][0]))
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def agent_state(self, session_id):
+        if not session_id:
+            return None
+        con = self._conn()
+        if self._live_file(con, session_id) is None:
+            return None
+        row = con.execute("SELECT body FROM agent_states WHERE session_id = ?", (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_agent_state(self, session_id, state):
+        con = self._conn()
+        if self._live_file(con, session_id) is None:
+            return
+        con.execute("INSERT OR REPLACE INTO agent_states (session_id, body) VALUES (?, ?)",
+                    (session_id, json.dumps(state, ensure_ascii=False)))
+
+    def delete(self, session_id: str):
+        self._conn().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def session_ids(self) -> list[str]:
+        return [r[0] for r in self._conn().execute("SELECT id FROM sessions")]
+
+    def last_access(self, session_id: str) -> float | None:
+        row = self._conn().execute("SELECT last_access FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return row[0] if row else None
+
+    def purge_expired(self) -> int:
+        cur = self._conn().execute("DELETE FROM sessions WHERE last_access < ?", (time.time() - self.ttl,))
+        return cur.rowcount
+
+    def snapshot(self) -> dict:
+        con = self._conn()
+        sessions = con.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        msgs, size = con.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM messages").fetchone()
+        return {"backend": self.backend, "path": str(self.path), "sessions": sessions, "messages": msgs,
+                "ttl": self.ttl, "historyBytes": size}
+
+
+def make_session_store(backend: str, *, sqlite_path: Path, max_sessions: int, ttl: float,
+                       max_turns: int, max_bytes: int) -> SessionStore:
+    if backend == "sqlite":
+        return SQLiteSessionStore(sqlite_path, ttl=ttl, max_turns=max_turns, max_bytes=max_bytes)
+    if backend != "memory":
+        print(f"[SESSION] 알 수 없는 백엔드 '{backend}' → memory 사용")
+    return MemorySessionStore(max_sessions=max_sessions, ttl=ttl, max_turns=max_turns, max_bytes=max_bytes)
@@ -63,6 +63,11 @@ export class AgentController {
         return this.sessionContexts.get(sessionId)!;
     }
 
+    // [ADD] 세션 컨텍스트 제거 (상주 워커에서 세션마다 쌓이지 않도록 — 턴 사이 상태는 호출자가 보관)
+    public forgetSession(sessionId: string) {
+        this.sessionContexts.delete(sessionId);
+    }
+
     // src/agent/AgentController.ts (클래스 내부)
     public getSelectorData(sessionId: string) {
     return this.getContext(sessionId).selectorData;
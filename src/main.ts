@@ -9,6 +9,7 @@ import { SelectorTool } from "./tools/SelectorTool";
 import { VisualizationTool } from "./tools/VisualizationTool";
 import { PreprocessingTool } from "./tools/PreprocessingTool";
 import { WorkflowTool } from "./tools/WorkflowTool";
+import { WorkflowStepEvent, WorkflowOptions } from "./tools/types";
 import { MachineLearningTool } from "./tools/MachineLearningTool";
 // 필요시 CorrelationTool도 import
 
@@ -18,10 +19,21 @@ import typia from "typia";
 import readline from "readline";
 import dotenv from "dotenv";
 import fs from "fs";
+import util from "util";
+
+// 서버(워커) 모드에서는 작업 중 console.log를 버퍼에 모아 응답 프레임(stdout 필드)으로 돌려준다.
+//  - captureLimit: 버퍼에 남길 최대 줄 수 (워크플로는 결과를 구조화 필드로 보내므로 로그 꼬리만 유지)
+let captured: string[] | null = null;
+let captureLimit: number | null = null;
 
 const originalConsoleLog = console.log;
 console.log = (...args: any[]) => {
-  if (args[0]?.includes("injecting env")) return;
+  if (typeof args[0] === "string" && args[0].includes("injecting env")) return;
+  if (captured) {
+    captured.push(util.format(...args));
+    if (captureLimit && captured.length > captureLimit) captured.splice(0, captured.length - captureLimit);
+    return;
+  }
   originalConsoleLog(...args);
 };
 
@@ -56,15 +68,41 @@ async function forceKoreanOnly(openai: OpenAI, text: string): Promise<string> {
 
 // ─────────────────────────────────────────────────────────────
 // 세션 메모리 (간단 버전)
+//  [ADD] 최근 CHAT_KEEP_HISTORIES 개만 원문으로 LLM 에 넘기고, 그 이전은 한 줄씩 요약한 텍스트 1개로 접는다
+//        (describe 에 붙은 도구 결과까지 계속 쌓여 프롬프트가 턴마다 커지지 않도록)
 type HistoryJson = any;
 const SESSIONS = new Map<string, HistoryJson[]>();
+const CHAT_KEEP_HISTORIES = Number(process.env.CHAT_KEEP_HISTORIES ?? 12);
+const SUMMARY_TAG = "[이전 대화 요약]";
+const SUMMARY_MAX_LINES = 30;
+
+function historyLine(h: any): string {
+  const text = String(h?.text ?? "").replace(/<[^>]+>/g, " ");
+  const line = text.split("\n").map((l) => l.replace(/^[\s#*\-|>`_]+|[\s#*\-|>`_]+$/g, "")).find(Boolean) ?? "";
+  return `- ${line.replace(/\s+/g, " ").slice(0, 160)}`;
+}
+
+function compactHistories(histories: HistoryJson[]): HistoryJson[] {
+  if (histories.length <= CHAT_KEEP_HISTORIES) return histories;
+  const head = histories[0]?.type === "text" && String(histories[0].text ?? "").startsWith(SUMMARY_TAG)
+    ? histories[0] : undefined;
+  const rest = head ? histories.slice(1) : histories;
+  const old = rest.slice(0, rest.length - CHAT_KEEP_HISTORIES);
+  if (!old.length) return histories;
+  const lines = [
+    ...(head ? String(head.text).split("\n").slice(1) : []),
+    ...old.map(historyLine),
+  ].slice(-SUMMARY_MAX_LINES);
+  return [{ type: "text", text: [SUMMARY_TAG, ...lines].join("\n") }, ...rest.slice(old.length)];
+}
+
 function loadHistories(k: string) { return SESSIONS.get(k) ?? []; }
 function saveHistories(k: string, prompts: any[]) {
   const prev = SESSIONS.get(k) ?? [];
   const delta = prompts
     .map((p) => (typeof p?.toJSON === "function" ? p.toJSON() : p))
     .filter((h: any) => h?.type === "text" || h?.type === "describe");
-  SESSIONS.set(k, [...prev, ...delta]);
+  SESSIONS.set(k, compactHistories([...prev, ...delta]));
 }
 
 // ─────────────────────────────────────────────────────────────
@@ -105,6 +143,30 @@ const getSlots = (k: string) => {
   return SESSION_SLOTS.get(k)!;
 };
 
+// [ADD] 채팅 에이전트 상태 (대화 기록 + 선택기 결과) — 세션 저장소(FastAPI)가 보관하고 요청마다 실어 보냄
+//  - 서버 모드: 요청 프레임의 state 로 시작 → 결과 프레임의 state 로 돌려주고 이 워커에서는 지움
+//    (풀이 세션과 무관하게 워커를 고르고, 워커가 재시작돼도 문맥이 이어지며, 워커 메모리가 쌓이지 않음)
+//  - 단발 실행: CHAT_STATE_FILE 파일로 같은 내용을 주고받음
+//  basic/corr 슬롯은 읽는 곳이 없어 넘기지 않는다
+type AgentState = { histories?: HistoryJson[]; slots?: Pick<Slots, "selector"> };
+
+function restoreSessionState(k: string, state?: AgentState | null) {
+  if (!state) return;
+  SESSIONS.set(k, Array.isArray(state.histories) ? state.histories : []);
+  SESSION_SLOTS.set(k, { ...(state.slots ?? {}) });
+}
+
+function takeSessionState(k: string, sessionId?: string): AgentState {
+  const state: AgentState = {
+    histories: SESSIONS.get(k) ?? [],
+    slots: { selector: SESSION_SLOTS.get(k)?.selector },
+  };
+  SESSIONS.delete(k);
+  SESSION_SLOTS.delete(k);
+  controller.forgetSession(sessionId ?? k);
+  return state;
+}
+
 function safeParse<T=any>(v: any): T | undefined {
   if (v == null) return undefined;
   if (typeof v === "string") {
@@ -114,27 +176,14 @@ function safeParse<T=any>(v: any): T | undefined {
 }
 
 
-// ─────────────────────────────────────────────────────────────
-async function main() {
-  // 인자 파싱
-  // 사용 예) ts-node src/main.ts --mode=workflow "분석해줘" /path/to.csv sessionA
-  //       또는 ts-node src/main.ts --mode=chat "품질에 영향 큰 변수?"
-  const args = process.argv.slice(2);
-  const modeArgIdx = args.findIndex(a => a.startsWith("--mode="));
-  const mode = modeArgIdx >= 0 ? args[modeArgIdx].split("=")[1] : "chat"; // 기본 chat
-  const rest = args.filter((_, i) => i !== modeArgIdx);
 
-  const userMessage = rest[0] || "";
-  const csvFilePath = rest[1];
-  const argSession = rest[2];
-  const sessionId = rest[2];     // FastAPI에서 전달된 sessionId
-
-  const sessionKey = argSession || (csvFilePath ? `local:${csvFilePath}` : "local:default");
-  const histories = loadHistories(sessionKey);
-
-  const openai = new OpenAI({ apiKey: process.env.OPENAI_API_KEY });
+// 세션별 SelectorTool 결과 저장소 (채팅 1턴 동안만 — 턴 사이의 선택기 결과는 AgentState.slots 로 이어짐)
+const controller = new AgentController();
 
-  const agent = new Agentica({
+// ─────────────────────────────────────────────────────────────
+// 에이전트 생성
+function createAgent(openai: OpenAI, histories: HistoryJson[]) {
+  return new Agentica({
     model: "chatgpt",
     vendor: { model: "gpt-4.1-mini", api: openai },
     controllers: [
@@ -177,235 +226,384 @@ async function main() {
     ],
     histories,
   });
+}
 
-  // ── REPL 보조
-    // REPL 모드
-  if (process.argv.includes("--interactive")) {
-    const rl = readline.createInterface({ input: process.stdin, output: process.stdout });
-    const ask = () => rl.question("> ", async (line) => {
-      const prompt = `### SYSTEM\n${CHAT_SYSTEM}\n\n### USER\n(아래 질문에 한국어로만 답하세요)\n${line}`;
-      const answers = await agent.conversate(prompt);
-      saveHistories(sessionKey, answers);
-      for (const ans of answers) if ("text" in ans && ans.text) {
-        let out = ans.text;
-        if (!isMostlyKorean(out)) out = await forceKoreanOnly(openai, out);
-        console.log(out);
-      }
-      ask();
-    });
-    console.log(`🗂 sessionKey=${sessionKey}`);
-    return ask();
-  }
-
-
-  // ─────────────────────────────────────────────────────────
-  // 모드 분기
-  // ─────────────────────────────────────────────────────────
+const sessionKeyOf = (sessionId?: string, csvFilePath?: string) =>
+  sessionId || (csvFilePath ? `local:${csvFilePath}` : "local:default");
 
-  if (mode === "workflow") {
-    // 워크플로 모드: 마커 JSON 한 번만 출력
-    if (!csvFilePath) throw new Error("workflow 모드에는 CSV 경로가 필요합니다.");
+// ─────────────────────────────────────────────────────────────
+// 워크플로 모드
+//  - 단계가 끝날 때마다 onStep 으로 진행 이벤트 전달 (FastAPI → 브라우저 SSE)
+//  - 최종 결과는 호출자에게 반환
+const WORKFLOW_STEP = "<<<WORKFLOW_STEP>>>";
+
+//  - [ADD] timings.orchestrator: 워크플로 전체 시간 + (단발 실행이면) Node/ts-node 기동 시간
+async function runWorkflow(csvFilePath: string | undefined, sessionId?: string,
+                           onStep?: (ev: WorkflowStepEvent) => void, options?: WorkflowOptions,
+                           mode: "spawn" | "server" = "spawn") {
+  if (!csvFilePath) throw new Error("workflow 모드에는 CSV 경로가 필요합니다.");
+  if (!fs.existsSync(csvFilePath)) throw new Error(`CSV 파일을 찾을 수 없습니다: ${csvFilePath}`);
+
+  const startupSeconds = Math.round(process.uptime() * 1000) / 1000;   // 프로세스 시작 ~ 여기까지
+  const t0 = performance.now();
+  const workflow = new WorkflowTool();
+  const result = await workflow.run({ filePath: csvFilePath, options }, { sessionId, onStep });
+  result.timings = {
+    ...result.timings,
+    orchestrator: {
+      component: "orchestrator",
+      mode,
+      seconds: Math.round(performance.now() - t0) / 1000,
+      ...(mode === "spawn" ? { startupSeconds } : {}),
+      rssMb: Math.round(process.memoryUsage().rss / 1048576 * 10) / 10,
+      peakRssMb: Math.round(process.resourceUsage().maxRSS / 1024 * 10) / 10,
+    },
+  };
+  return result;
+}
 
-    // (선택) 파일 확인
-    try { fs.readFileSync(csvFilePath, "utf-8"); } catch { /* ignore */ }
+// 단발 실행(CLI): 단계 이벤트는 한 줄씩 바로 내보내고, 결과는 마커 JSON으로 한 번 출력
+async function runWorkflowCli(csvFilePath: string | undefined, sessionId?: string, options?: WorkflowOptions) {
+  const result = await runWorkflow(csvFilePath, sessionId, (ev) => {
+    originalConsoleLog(`${WORKFLOW_STEP}${JSON.stringify(ev)}`);
+  }, options);
 
-    const workflow = new WorkflowTool();
-    const result = await workflow.run({ filePath: csvFilePath }, {sessionId});
+  // FastAPI가 파싱할 결과
+  console.log("<<<WORKFLOW_JSON_START>>>");
+  console.log(JSON.stringify({ workflow: result }));
+  console.log("<<<WORKFLOW_JSON_END>>>");
+}
 
-    // FastAPI가 파싱할 유일한 stdout
-    console.log("<<<WORKFLOW_JSON_START>>>");
-    console.log(JSON.stringify({ workflow: result }));
-    console.log("<<<WORKFLOW_JSON_END>>>");
-    return;
-  }
+// ─────────────────────────────────────────────────────────────
+// 채팅 모드
+async function runChat(openai: OpenAI, userMessage: string, csvFilePath?: string, sessionId?: string) {
+  const sessionKey = sessionKeyOf(sessionId, csvFilePath);
+  const agent = createAgent(openai, loadHistories(sessionKey));
 
-  // 기본: chat 모드
-  const controller = new AgentController();
-  const reply = (text: string) => {
-    console.log(text);
-    return;
-  };
-  {
-    let prompt = `### SYSTEM\n${CHAT_SYSTEM}\n\n### USER\n(아래 요청에 한국어로만 답하세요)\n${userMessage}`;
-    if (csvFilePath) prompt += `\n\n### CONTEXT\nCSV_FILE_PATH=${csvFilePath} \n SESSIONID=${sessionId}`;
+  let prompt = `### SYSTEM\n${CHAT_SYSTEM}\n\n### USER\n(아래 요청에 한국어로만 답하세요)\n${userMessage}`;
+  if (csvFilePath) prompt += `\n\n### CONTEXT\nCSV_FILE_PATH=${csvFilePath} \n SESSIONID=${sessionId}`;
 
-    
+  
 
-    // 🔒 라우팅 힌트만 주입(조기 return 없음) ← 여기 추가
-    if (/모델|예측|학습/.test(userMessage)) {
-      prompt += `
+  // 🔒 라우팅 힌트만 주입(조기 return 없음) ← 여기 추가
+  if (/모델|예측|학습/.test(userMessage)) {
+    prompt += `
     ### ROUTE (HARD)
     - 반드시 **MachineLearningTool**만 호출하세요.
     - **BasicAnalysisTool/SelectorTool/VisualizationTool/CorrelationTool/PreprocessingTool** 호출 금지.
     - 위반 시 "routing_error" 라고만 답하세요.
     `;
-    }
-    if (/시각화/.test(userMessage)) {
-      prompt += `
+  }
+  if (/시각화/.test(userMessage)) {
+    prompt += `
     ### ROUTE (HARD)
     - 반드시 **VisualizationTool**만 호출하세요.
     - **BasicAnalysisTool/SelectorTool/MachineLearningTool/CorrelationTool/PreprocessingTool** 호출 금지.
     - 위반 시 "routing_error" 라고만 답하세요.
     `;
-    }
-
+  }
 
-    let finalText = "";
 
-    // ➊ 중간 과정(선택/호출/실행) 이벤트를 UI로 내보내려면 마커로 찍기
-    agent.on("select", (e) => {
-      console.log("<<<AGENT_EVENT>>>", JSON.stringify({
-        type: "select",
-        operation: e.selection.operation?.name,
-        // e.selection에는 최종 선택만 들어있음. 후보 리스트가 필요하면 executor 커스텀 유지
-      }));
-    });
+  let finalText = "";
 
-    agent.on("call", (e) => {
-      const op = e.operation?.name ?? "";
-      const args = (e.arguments ?? {}) as any;
-      const slots = getSlots(sessionKey);
+  // ➊ 중간 과정(선택/호출/실행) 이벤트를 UI로 내보내려면 마커로 찍기
+  agent.on("select", (e) => {
+    console.log("<<<AGENT_EVENT>>>", JSON.stringify({
+      type: "select",
+      operation: e.selection.operation?.name,
+      // e.selection에는 최종 선택만 들어있음. 후보 리스트가 필요하면 executor 커스텀 유지
+    }));
+  });
 
+  agent.on("call", (e) => {
+    const op = e.operation?.name ?? "";
+    const args = (e.arguments ?? {}) as any;
+    const slots = getSlots(sessionKey);
 
-      // ① Selector 호출 시: null 인자 정리
-      const isSelectorCall =
-        /SelectorTool|컬럼\s*선택\s*도구/i.test(op) || Array.isArray(args?.columnStats);
-      if (isSelectorCall && args.correlationResults === null) {
-        delete args.correlationResults;
-        e.arguments = args;
-      }
 
-      // ② VisualizationTool 감지 보강 (_3_run 포함)
-      const isVizCall =
-        /VisualizationTool|시각화\s*도구/i.test(op) || /_3_run$/.test(op);
-
-      if (isVizCall) {
-        // slots 우선
-        let sel = safeParse(slots.selector) ?? slots.selector;
-
-        // slots 없으면 세션 컨텍스트 폴백
-        if (!sel || !sel.selectedColumns) {
-          const selCtx = controller.getSelectorData(sessionId);
-          if (selCtx) {
-            sel = {
-              selectedColumns: selCtx.selectedColumns,
-              recommendedPairs: selCtx.recommendedPairs,
-            };
-          }
-        }
+    // ① Selector 호출 시: null 인자 정리
+    const isSelectorCall =
+      /SelectorTool|컬럼\s*선택\s*도구/i.test(op) || Array.isArray(args?.columnStats);
+    if (isSelectorCall && args.correlationResults === null) {
+      delete args.correlationResults;
+      e.arguments = args;
+    }
 
-        if (!args.selectorResult && sel?.selectedColumns && sel?.recommendedPairs) {
-          args.selectorResult = {
-            selectedColumns: sel.selectedColumns,
-            recommendedPairs: sel.recommendedPairs,
+    // ② VisualizationTool 감지 보강 (_3_run 포함)
+    const isVizCall =
+      /VisualizationTool|시각화\s*도구/i.test(op) || /_3_run$/.test(op);
+
+    if (isVizCall) {
+      // slots 우선
+      let sel = safeParse(slots.selector) ?? slots.selector;
+
+      // slots 없으면 세션 컨텍스트 폴백
+      if (!sel || !sel.selectedColumns) {
+        const selCtx = controller.getSelectorData(sessionId ?? sessionKey);
+        if (selCtx) {
+          sel = {
+            selectedColumns: selCtx.selectedColumns,
+            recommendedPairs: selCtx.recommendedPairs,
           };
         }
-        if (!args.sessionId) args.sessionId = sessionId;
+      }
 
-        e.arguments = args;
+      if (!args.selectorResult && sel?.selectedColumns && sel?.recommendedPairs) {
+        args.selectorResult = {
+          selectedColumns: sel.selectedColumns,
+          recommendedPairs: sel.recommendedPairs,
+        };
       }
+      if (!args.sessionId) args.sessionId = sessionId;
 
-      // ③ MachineLearningTool 감지 보강 (_4_run 포함)
-      const isMLCall =
-        /MachineLearningTool|머신러닝\s*도구/i.test(op) || /_4_run$/.test(op);
-
-      if (isMLCall) {
-        let sel = safeParse(slots.selector) ?? slots.selector;
-
-        // slots 없으면 세션 컨텍스트 폴백
-        if (!sel || (!sel.targetColumn && !sel.problemType)) {
-          const selCtx = controller.getSelectorData(sessionId);
-          if (selCtx) {
-            sel = {
-              targetColumn: selCtx.targetColumn,
-              problemType: selCtx.problemType,
-              mlModelRecommendation: selCtx.mlModelRecommendation ?? null,
-            };
-          }
-        }
+      e.arguments = args;
+    }
 
-        if (!args.selectorResult) args.selectorResult = {};
-        if (sel) {
-          args.selectorResult.targetColumn = sel.targetColumn ?? args.selectorResult.targetColumn ?? null;
-          args.selectorResult.problemType = sel.problemType ?? args.selectorResult.problemType ?? null;
-          args.selectorResult.mlModelRecommendation =
-            sel.mlModelRecommendation ?? args.selectorResult.mlModelRecommendation ?? null;
+    // ③ MachineLearningTool 감지 보강 (_4_run 포함)
+    const isMLCall =
+      /MachineLearningTool|머신러닝\s*도구/i.test(op) || /_4_run$/.test(op);
+
+    if (isMLCall) {
+      let sel = safeParse(slots.selector) ?? slots.selector;
+
+      // slots 없으면 세션 컨텍스트 폴백
+      if (!sel || (!sel.targetColumn && !sel.problemType)) {
+        const selCtx = controller.getSelectorData(sessionId ?? sessionKey);
+        if (selCtx) {
+          sel = {
+            targetColumn: selCtx.targetColumn,
+            problemType: selCtx.problemType,
+            mlModelRecommendation: selCtx.mlModelRecommendation ?? null,
+          };
         }
-        if (!args.sessionId) args.sessionId = sessionId;
+      }
 
-        e.arguments = args;
+      if (!args.selectorResult) args.selectorResult = {};
+      if (sel) {
+        args.selectorResult.targetColumn = sel.targetColumn ?? args.selectorResult.targetColumn ?? null;
+        args.selectorResult.problemType = sel.problemType ?? args.selectorResult.problemType ?? null;
+        args.selectorResult.mlModelRecommendation =
+          sel.mlModelRecommendation ?? args.selectorResult.mlModelRecommendation ?? null;
       }
+      if (!args.sessionId) args.sessionId = sessionId;
 
+      e.arguments = args;
+    }
 
 
+
+    console.log("<<<AGENT_EVENT>>>", JSON.stringify({
+      type: "call",
+      id: e.id,
+      operation: op,
+      arguments: e.arguments,
+    }));
+  });
+
+  // [ADDED] 실행 직후: 툴 결과 저장
+  agent.on("execute", (e) => {
+    const op = e.operation?.name ?? "";
+    const value = safeParse(e.value) ?? e.value;
+    const args = (e.arguments ?? {}) as any;
+    const slots = getSlots(sessionKey);
+    const isSelectorExec =
+      /SelectorTool|컬럼\s*선택\s*도구/i.test(op) || Array.isArray(args?.columnStats);
+
+    if (isSelectorExec && value?.selectedColumns && value?.recommendedPairs) {
+      slots.selector = value;
+      controller.saveSelectorData(sessionId ?? sessionKey, value, csvFilePath);
       console.log("<<<AGENT_EVENT>>>", JSON.stringify({
-        type: "call",
-        id: e.id,
-        operation: op,
-        arguments: e.arguments,
+        type: "saved_selector",
+        sessionId,
+        target: value?.targetColumn,
+        problemType: value?.problemType
       }));
-    });
+    }
 
-    // [ADDED] 실행 직후: 툴 결과 저장
-    agent.on("execute", (e) => {
-      const op = e.operation?.name ?? "";
-      const value = safeParse(e.value) ?? e.value;
-      const args = (e.arguments ?? {}) as any;
-      const slots = getSlots(sessionKey);
-      const isSelectorExec =
-        /SelectorTool|컬럼\s*선택\s*도구/i.test(op) || Array.isArray(args?.columnStats);
-
-      if (isSelectorExec && value?.selectedColumns && value?.recommendedPairs) {
-        slots.selector = value;
-        controller.saveSelectorData(sessionId, value, csvFilePath);
-        console.log("<<<AGENT_EVENT>>>", JSON.stringify({
-          type: "saved_selector",
-          sessionId,
-          target: value?.targetColumn,
-          problemType: value?.problemType
-        }));
-      }
+    if (/기초\s*분석\s*도구|BasicAnalysisTool/i.test(op)) {
+      slots.basic = value;
+    }
+    if (/상관|CorrelationTool/i.test(op)) {
+      slots.corr = value;
+    }
+    if (/컬럼\s*선택\s*도구|SelectorTool/i.test(op)) {
+      slots.selector = value;
+    }
 
-      if (/기초\s*분석\s*도구|BasicAnalysisTool/i.test(op)) {
-        slots.basic = value;
-      }
-      if (/상관|CorrelationTool/i.test(op)) {
-        slots.corr = value;
-      }
-      if (/컬럼\s*선택\s*도구|SelectorTool/i.test(op)) {
-        slots.selector = value;
+    console.log("<<<AGENT_EVENT>>>", JSON.stringify({
+      type: "execute",
+      id: e.id,
+      operation: op,
+      arguments: e.arguments,
+      value: e.value, // 툴 반환값(원본)
+    }));
+  });
+
+  // ➋ describer 스트림 받아서 텍스트 토큰 합치기 (마크다운 최종 출력용)
+  agent.on("describe", async (e) => {
+    for await (const chunk of e.stream) {
+      finalText += chunk;               // 최종 MD에 합침
+      // 원하면 토큰도 중간중간 뿌릴 수 있음
+      // console.log("<<<AGENT_EVENT>>>", JSON.stringify({ type:"describe:chunk", text: chunk }));
+    }
+  });
+
+  await agent.conversate(prompt);
+
+  // 한국어 보정(옵션)
+  if (!isMostlyKorean(finalText)) {
+    finalText = await forceKoreanOnly(openai, finalText);
+  }
+
+  // ✅ 콘솔 출력은 "마크다운 한 덩어리"만
+  console.log(finalText.trim());
+  saveHistories(sessionKey, [{ type: "text", text: finalText }]); 
+}
+
+// ─────────────────────────────────────────────────────────────
+// 서버(워커) 모드: FastAPI 워커 풀이 띄워두는 상주 프로세스
+//  - stdin/stdout 한 줄 = 한 프레임: "<<<FRAME>>>" + JSON
+//  - 요청: { id, op: "workflow" | "chat" | "ping" | "shutdown", message?, filePath?, sessionId?, options?, state? }
+//  - 응답: { id, type: "result", code, stdout, stderr, workflow?, state? } / { id, type: "pong" }
+//          (chat 은 요청의 state 로 시작해 끝난 state 를 돌려줌 — 워커 안에는 세션 상태를 남기지 않음)
+//  - 진행: { id, type: "event", event: "step", key, status, data } (워크플로 단계 완료 시)
+//  - 작업은 도착 순서대로 하나씩 처리 (동시성은 풀의 워커 수로 조절)
+const FRAME = "<<<FRAME>>>";
+
+function writeFrame(frame: Record<string, any>) {
+  process.stdout.write(`${FRAME}${JSON.stringify(frame)}\n`);
+}
+
+async function handleFrame(openai: OpenAI, req: any) {
+  const { id, op } = req ?? {};
+
+  if (op === "ping") {
+    writeFrame({ id, type: "pong", pid: process.pid, rss: process.memoryUsage().rss });
+    return;
+  }
+  if (op === "shutdown") {
+    writeFrame({ id, type: "bye" });
+    process.exit(0);
+  }
+
+  captured = [];
+  captureLimit = op === "workflow" ? 200 : null;
+  let code = 0;
+  let stderr = "";
+  let workflow: any = undefined;
+  let state: AgentState | undefined;
+  try {
+    if (op === "workflow") {
+      // 결과는 stdout 스크래핑 대신 구조화 필드로 전달
+      workflow = await runWorkflow(req.filePath, req.sessionId, (ev) => {
+        writeFrame({ id, type: "event", event: "step", ...ev });
+      }, req.options ?? undefined, "server");
+    } else if (op === "chat") {
+      const key = sessionKeyOf(req.sessionId, req.filePath);
+      restoreSessionState(key, req.state);
+      try {
+        await runChat(openai, req.message ?? "", req.filePath, req.sessionId);
+      } finally {
+        state = takeSessionState(key, req.sessionId);
       }
+    } else {
+      throw new Error(`unknown op: ${op}`);
+    }
+  } catch (e: any) {
+    code = 1;
+    stderr = String(e?.stack ?? e?.message ?? e);
+  }
+  const stdout = captured.join("\n");
+  captured = null;
+  captureLimit = null;
+  writeFrame({ id, type: "result", code, stdout, stderr, ...(workflow ? { workflow } : {}), ...(state ? { state } : {}) });
+}
 
-      console.log("<<<AGENT_EVENT>>>", JSON.stringify({
-        type: "execute",
-        id: e.id,
-        operation: op,
-        arguments: e.arguments,
-        value: e.value, // 툴 반환값(원본)
-      }));
-    });
+function serve(openai: OpenAI) {
+  const rl = readline.createInterface({ input: process.stdin });
+  let queue: Promise<void> = Promise.resolve();
+
+  rl.on("line", (line) => {
+    if (!line.startsWith(FRAME)) return;
+    let req: any;
+    try { req = JSON.parse(line.slice(FRAME.length)); } catch { return; }
+    queue = queue.then(() => handleFrame(openai, req));
+  });
+  // 부모(FastAPI)가 파이프를 닫으면 같이 종료
+  rl.on("close", () => process.exit(0));
+
+  writeFrame({ type: "ready", pid: process.pid });
+}
 
-    // ➋ describer 스트림 받아서 텍스트 토큰 합치기 (마크다운 최종 출력용)
-    agent.on("describe", async (e) => {
-      for await (const chunk of e.stream) {
-        finalText += chunk;               // 최종 MD에 합침
-        // 원하면 토큰도 중간중간 뿌릴 수 있음
-        // console.log("<<<AGENT_EVENT>>>", JSON.stringify({ type:"describe:chunk", text: chunk }));
+// ─────────────────────────────────────────────────────────────
+async function main() {
+  // 인자 파싱
+  // 사용 예) ts-node src/main.ts --mode=workflow "분석해줘" /path/to.csv sessionA ['{"targetColumn":"MEDV"}']
+  //       또는 ts-node src/main.ts --mode=chat "품질에 영향 큰 변수?"
+  //       또는 ts-node src/main.ts --mode=server   (FastAPI 워커 풀용 상주 모드)
+  const args = process.argv.slice(2);
+  const modeArgIdx = args.findIndex(a => a.startsWith("--mode="));
+  const mode = modeArgIdx >= 0 ? args[modeArgIdx].split("=")[1] : "chat"; // 기본 chat
+  const rest = args.filter((_, i) => i !== modeArgIdx);
+
+  const userMessage = rest[0] || "";
+  const csvFilePath = rest[1];
+  const sessionId = rest[2];     // FastAPI에서 전달된 sessionId
+  const optionsJson = rest[3];   // [ADD] 워크플로 옵션 (WorkflowOptions JSON)
+
+  // 콜드스타트 측정용: 모듈 로딩까지만 하고 종료
+  if (mode === "ping") {
+    console.log("pong");
+    return;
+  }
+
+  const openai = new OpenAI({ apiKey: process.env.OPENAI_API_KEY });
+
+  if (mode === "server") return serve(openai);
+
+  // ── REPL 보조
+    // REPL 모드
+  if (process.argv.includes("--interactive")) {
+    const sessionKey = sessionKeyOf(sessionId, csvFilePath);
+    const agent = createAgent(openai, loadHistories(sessionKey));
+    const rl = readline.createInterface({ input: process.stdin, output: process.stdout });
+    const ask = () => rl.question("> ", async (line) => {
+      const prompt = `### SYSTEM\n${CHAT_SYSTEM}\n\n### USER\n(아래 질문에 한국어로만 답하세요)\n${line}`;
+      const answers = await agent.conversate(prompt);
+      saveHistories(sessionKey, answers);
+      for (const ans of answers) if ("text" in ans && ans.text) {
+        let out = ans.text;
+        if (!isMostlyKorean(out)) out = await forceKoreanOnly(openai, out);
+        console.log(out);
       }
+      ask();
     });
+    console.log(`🗂 sessionKey=${sessionKey}`);
+    return ask();
+  }
 
-    await agent.conversate(prompt);
 
-    // 한국어 보정(옵션)
-    if (!isMostlyKorean(finalText)) {
-      finalText = await forceKoreanOnly(openai, finalText);
-    }
+  // ─────────────────────────────────────────────────────────
+  // 모드 분기
+  // ─────────────────────────────────────────────────────────
 
-    // ✅ 콘솔 출력은 "마크다운 한 덩어리"만
-    console.log(finalText.trim());
-    saveHistories(sessionKey, [{ type: "text", text: finalText }]); 
+  if (mode === "workflow") {
+    await runWorkflowCli(csvFilePath, sessionId, safeParse<WorkflowOptions>(optionsJson));
+    return;
   }
 
+  // 기본: chat 모드
+  // [ADD] CHAT_STATE_FILE: FastAPI 단발 실행이 넘긴 에이전트 상태 (읽고 시작 → 끝난 상태로 덮어씀)
+  const stateFile = process.env.CHAT_STATE_FILE;
+  const sessionKey = sessionKeyOf(sessionId, csvFilePath);
+  if (stateFile) {
+    try { restoreSessionState(sessionKey, JSON.parse(fs.readFileSync(stateFile, "utf-8"))); } catch { /* 새 세션 */ }
+  }
+  try {
+    await runChat(openai, userMessage, csvFilePath, sessionId);
+  } finally {
+    if (stateFile) fs.writeFileSync(stateFile, JSON.stringify(takeSessionState(sessionKey, sessionId)), "utf-8");
+  }
 }
 
 main().catch(console.error);
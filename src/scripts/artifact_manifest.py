@@ -0,0 +1,229 @@
+"""
+세션 산출물 매니페스트
+
+각 단계(상관/시각화/전처리/학습)는 src/outputs/{sessionId}/ 에 파일을 쓴 뒤 같은 폴더의
+`.manifest.jsonl` 에 한 줄을 덧붙인다.
+
+    {"op": "add", "name": "...", "kind": "chart", "size": 1234, "step": "visual", "created_at": 1700000000.0}
+    {"op": "del", "name": "..."}                      ← 정리(GC)로 지운 파일
+
+서버(ManifestIndex)는 세션별로 이 파일을 읽은 위치(offset)를 기억해 두고, 요청마다 매니페스트
+stat 1번으로 바뀐 부분(덧붙은 줄)만 읽는다. 파일 목록 / 상관 행렬 찾기 / 최근 차트 조회가
+폴더 glob·파일별 stat 없이 처리된다.
+
+매니페스트가 없는 세션(이전 버전에서 만든 폴더)은 처음 한 번만 폴더를 훑어 매니페스트를 만든다.
+TS 도구(src/tools/artifactManifest.ts)도 같은 형식으로 기록한다.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+MANIFEST_NAME = ".manifest.jsonl"
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+
+# kind → 기본 step
+KIND_STEPS = {
+    "corr_matrix": "corr", "corr_pairs": "corr",
+    "chart": "visual",
+    "preprocessed": "preprocess", "preprocess_spec": "preprocess",
+    "model": "train", "model_meta": "train", "report": "train", "leaderboard": "train",
+}
+
+
+def kind_of(name: str) -> str:
+    low = name.lower()
+    if Path(low).suffix in IMAGE_EXTS:
+        return "chart"
+    if low.endswith(".corr_matrix.csv"):
+        return "corr_matrix"
+    if low.endswith((".corr_pairs.json", ".high_corr_pairs.json")):
+        return "corr_pairs"
+    if low.startswith("model_"):
+        return "model_meta" if low.endswith(".meta.json") else "model"
+    if low.startswith("ml_result_"):
+        return "report"
+    if low.startswith("leaderboard_"):
+        return "leaderboard"
+    if low.endswith(".spec.json"):
+        return "preprocess_spec"
+    if low.startswith("preprocessed_"):
+        return "preprocessed"
+    return "file"
+
+
+def _append(output_dir, lines: list[dict]):
+    if not lines:
+        return
+    path = Path(output_dir) / MANIFEST_NAME
+    data = "".join(json.dumps(l, ensure_ascii=False) + "\n" for l in lines).encode("utf-8")
+    # O_APPEND 한 번의 write → 여러 프로세스가 동시에 기록해도 줄이 섞이지 않음
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _entry(path: Path, kind: str | None, step: str | None) -> dict | None:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    kind = kind or kind_of(path.name)
+    return {"op": "add", "name": path.name, "kind": kind, "size": st.st_size,
+            "step": step or KIND_STEPS.get(kind), "created_at": round(st.st_mtime, 3)}
+
+
+def write_text(path, text: str):
+    """산출물 쓰기: 임시 파일에 쓰고 os.replace (같은 이름을 다시 써도 기존 inode 는 건드리지 않음)
+
+    산출물 캐시(artifact_cache)는 파일을 하드링크로 공유하므로, 제자리에서 덮어쓰면 캐시 사본과
+    그 캐시에서 꺼낸 다른 세션 파일까지 함께 바뀐다.
+    """
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def record(output_dir, paths, kind: str | None = None, step: str | None = None):
+    """output_dir 안에 쓴 파일들을 매니페스트에 추가 (같은 이름을 다시 쓰면 마지막 줄이 이김)"""
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    out = Path(output_dir)
+    names = [Path(p).name for p in paths]
+    if not (out / MANIFEST_NAME).exists():
+        bootstrap(out, exclude=set(names))
+    entries = [_entry(out / n, kind, step) for n in names]
+    _append(out, [e for e in entries if e])
+
+
+def record_delete(output_dir, names):
+    names = [Path(n).name for n in names]
+    if not (Path(output_dir) / MANIFEST_NAME).exists():
+        bootstrap(output_dir, exclude=set(names))
+    _append(output_dir, [{"op": "del", "name": n} for n in names])
+
+
+def bootstrap(output_dir, exclude=()) -> None:
+    """매니페스트가 없는 기존 세션 폴더를 한 번 훑어 매니페스트 생성 (exclude: 곧 따로 기록할 파일)"""
+    out = Path(output_dir)
+    if (out / MANIFEST_NAME).exists() or not out.is_dir():
+        return
+    files = sorted(p for p in out.iterdir()
+                   if p.is_file() and not p.name.startswith(".") and p.name not in exclude)
+    entries = [_entry(p, None, None) for p in files]
+    _append(out, [e for e in entries if e])
+    (out / MANIFEST_NAME).touch()
+
+
+# ───────────────────────────────────────────────
+# 서버용 인메모리 인덱스
+# ───────────────────────────────────────────────
+class _SessionManifest:
+    __slots__ = ("offset", "ino", "files")
+
+    def __init__(self):
+        self.offset = 0
+        self.ino = None
+        self.files: "OrderedDict[str, dict]" = OrderedDict()
+
+
+class ManifestIndex:
+    def __init__(self, output_dir: Path, max_sessions: int = 1024):
+        self.output_dir = Path(output_dir)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, _SessionManifest]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refresh(self, session_id: str) -> _SessionManifest | None:
+        out = self.output_dir / session_id
+        path = out / MANIFEST_NAME
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            if not out.is_dir():
+                self._sessions.pop(session_id, None)
+                return None
+            bootstrap(out)
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                return None
+
+        sm = self._sessions.get(session_id)
+        if sm is None or sm.ino != st.st_ino or st.st_size < sm.offset:
+            sm = _SessionManifest()
+            sm.ino = st.st_ino
+            self._sessions[session_id] = sm
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+        if st.st_size > sm.offset:
+            with path.open("rb") as f:
+                f.seek(sm.offset)
+                chunk = f.read(st.st_size - sm.offset)
+            # 쓰는 중인 마지막 줄(개행 없음)은 다음 번에
+            end = chunk.rfind(b"\n") + 1
+            for line in chunk[:end].splitlines():
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue
+                name = e.get("name")
+                if not name:
+                    continue
+                sm.files.pop(name, None)
+                if e.get("op") == "add":
+                    sm.files[name] = e
+            sm.offset += end
+        return sm
+
+    def entries(self, session_id: str) -> list[dict]:
+        """매니페스트 기준 산출물 목록 (기록 순서)"""
+        with self._lock:
+            sm = self._refresh(session_id)
+            return list(sm.files.values()) if sm else []
+
+    def find(self, session_id: str, kind: str, prefer: str | None = None) -> dict | None:
+        """kind 가 같은 가장 최근 항목 (prefer 이름이 있으면 그것)"""
+        with self._lock:
+            sm = self._refresh(session_id)
+            if sm is None:
+                return None
+            if prefer and prefer in sm.files and sm.files[prefer].get("kind") == kind:
+                return sm.files[prefer]
+            for e in reversed(sm.files.values()):
+                if e.get("kind") == kind:
+                    return e
+            return None
+
+    def recent(self, session_id: str, kind: str, since: float) -> list[dict]:
+        with self._lock:
+            sm = self._refresh(session_id)
+            if sm is None:
+                return []
+            return [e for e in sm.files.values() if e.get("kind") == kind and e.get("created_at", 0) >= since]
+
+    def forget(self, session_id: str, names: list[str]):
+        """정리(GC)로 지운 파일을 매니페스트에 삭제로 기록"""
+        out = self.output_dir / session_id
+        if names and out.is_dir():
+            record_delete(out, names)
+
+    def drop(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2:
+        print("usage: artifact_manifest.py <output_dir>")
+        sys.exit(2)
+    bootstrap(sys.argv[1])
+    idx = ManifestIndex(Path(sys.argv[1]).parent)
+    print(json.dumps(idx.entries(Path(sys.argv[1]).name), ensure_ascii=False, indent=2))
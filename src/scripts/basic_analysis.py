@@ -0,0 +1,219 @@
+"""
+기초 분석 엔진 (BasicAnalysisTool 의 columnStats 를 청크 스트리밍으로)
+
+기존 TS 경로는 파일 전체를 문자열로 읽어 행 객체 배열로 만든 뒤 컬럼마다 값 배열과 Set 을 만들었다
+(행 수에 비례하는 메모리, Math.min(...values) 는 수십만 행에서 스택 초과). 여기서는
+
+1. 1차 패스 : 청크마다 결측 수, 숫자 개수/합/최소/최대, 고유값(컬럼당 EXACT_UNIQUE 개까지는 정확히,
+              넘으면 HyperLogLog 근사)을 누적
+2. 2차 패스 : 숫자 값이 있는 컬럼만 다시 읽어 평균 기준 편차 제곱합 → 표준편차 (TS 와 같은 모집단 표준편차)
+
+컬럼당 메모리는 청크 + 고유값 집합(최대 EXACT_UNIQUE 개) 또는 HLL 레지스터(16KB)로 행 수와 무관하다.
+
+출력은 TS 도구와 같은 columnStats 스키마(column / dtype / missing / unique / mean / std / min / max)이고
+값 규칙도 같다 — 결측 = 빈 문자열, 숫자 = JS parseFloat, dtype = 숫자가 하나라도 있으면 "number",
+통계는 toFixed(2). 근사 고유값을 쓴 컬럼만 "uniqueApprox": true 가 붙는다.
+
+사용 예)
+    python src/scripts/basic_analysis.py src/uploads/<sessionId>/data.csv
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from columnar_store import iter_text_batches
+from csv_preview import HyperLogLog
+from preprocess_engine import js_key_order
+import stage_metrics
+
+EXACT_UNIQUE = int(os.environ.get("BASIC_EXACT_UNIQUE", "10000"))    # 이보다 많으면 HLL 근사
+
+# JS parseFloat (RE2). \s 는 JS 공백 문자 집합으로 직접 적음 (RE2 의 \s 는 ASCII 만)
+_JS_WS = r"[\t\n\v\f\r \x{00A0}\x{1680}\x{2000}-\x{200A}\x{2028}\x{2029}\x{202F}\x{205F}\x{3000}\x{FEFF}]"
+_JS_FLOAT_RE2 = rf"^{_JS_WS}*(?P<num>[+-]?(?:Infinity|(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?))"
+
+_FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+_FNV_PRIME = np.uint64(0x100000001B3)
+
+
+class EmptyDataError(ValueError):
+    pass
+
+
+def to_fixed2(x: float) -> float | None:
+    """parseFloat(x.toFixed(2)) — 이진 값 그대로 소수 둘째 자리 반올림(동률은 0에서 먼 쪽)"""
+    if not math.isfinite(x):
+        return None             # JSON.stringify(Infinity) → null
+    if abs(x) >= 1e21:
+        return x
+    return float(Decimal(x).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)) + 0.0
+
+
+# ───────────────────────────────────────────────
+# 벡터 헬퍼 (pyarrow 문자열 배열)
+# ───────────────────────────────────────────────
+def js_parse_float_arrow(a: pa.Array) -> np.ndarray:
+    """JS parseFloat. 깨끗한 숫자 컬럼은 cast 한 번, 아니면 정규식으로 앞부분 숫자만"""
+    try:
+        x = pc.cast(a, pa.float64()).to_numpy(zero_copy_only=False).copy()
+    except pa.ArrowInvalid:
+        head = pc.struct_field(pc.extract_regex(a, _JS_FLOAT_RE2), [0])
+        return pc.cast(head, pa.float64()).to_numpy(zero_copy_only=False)
+    bad = np.flatnonzero(~np.isfinite(x))          # "inf" / "nan" 은 JS 에서 NaN, "1e400" 은 Infinity
+    if bad.size:
+        head = pc.struct_field(pc.extract_regex(a.take(pa.array(bad)), _JS_FLOAT_RE2), [0])
+        x[bad] = pc.cast(head, pa.float64()).to_numpy(zero_copy_only=False)
+    return x
+
+
+def hash_strings(a: pa.Array) -> np.ndarray:
+    """문자열 배열 → 64bit 해시 (FNV-1a + splitmix64 마무리). 바이트 위치별로 벡터 연산"""
+    if pa.types.is_large_string(a.type):
+        off_dtype = np.int64
+    else:
+        a = a.cast(pa.string())
+        off_dtype = np.int32
+    _, offsets, data = a.buffers()
+    off = np.frombuffer(offsets, dtype=off_dtype)[a.offset:a.offset + len(a) + 1].astype(np.int64)
+    data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.empty(0, dtype=np.uint8)
+    h = np.full(len(a), _FNV_OFFSET, dtype=np.uint64)
+    pos, end = off[:-1].copy(), off[1:]
+    idx = np.flatnonzero(pos < end)
+    while idx.size:
+        h[idx] = (h[idx] ^ data[pos[idx]].astype(np.uint64)) * _FNV_PRIME
+        pos[idx] += 1
+        idx = idx[pos[idx] < end[idx]]
+    h ^= h >> np.uint64(30)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(27)
+    h *= np.uint64(0x94D049BB133111EB)
+    h ^= h >> np.uint64(31)
+    return h
+
+
+# ───────────────────────────────────────────────
+# 컬럼 누적기
+# ───────────────────────────────────────────────
+class ColumnStats:
+    def __init__(self, column: str, exact_limit: int = EXACT_UNIQUE):
+        self.column = column
+        self.exact_limit = exact_limit
+        self.missing = 0
+        self.n = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.m2 = 0.0
+        self.exact: set[str] | None = set()
+        self.hll: HyperLogLog | None = None
+
+    def update(self, a: pa.Array):
+        present = pc.filter(a, pc.not_equal(a, ""))
+        self.missing += len(a) - len(present)
+        if not len(present):
+            return
+        self._update_unique(present)
+        x = js_parse_float_arrow(present)
+        x = x[~np.isnan(x)]
+        if x.size:
+            self.n += x.size
+            self.sum += float(x.sum())
+            self.min = min(self.min, float(x.min()))
+            self.max = max(self.max, float(x.max()))
+
+    def _update_unique(self, present: pa.Array):
+        # 청크 안에서 먼저 중복 제거 → 고유값만 집합/HLL 에 (HLL 은 같은 값을 여러 번 넣어도 결과가 같음)
+        u = pc.unique(present)
+        if self.exact is not None:
+            if len(self.exact) + len(u) <= self.exact_limit or len(u) <= self.exact_limit // 4:
+                self.exact.update(u.to_pylist())
+                if len(self.exact) <= self.exact_limit:
+                    return
+            self.hll = HyperLogLog()
+            if self.exact:
+                self.hll.update_hashes(hash_strings(pa.array(list(self.exact), type=pa.string())))
+            self.exact = None
+        self.hll.update_hashes(hash_strings(u))
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.n
+
+    def update_dev(self, a: pa.Array):
+        x = js_parse_float_arrow(pc.filter(a, pc.not_equal(a, "")))
+        x = x[~np.isnan(x)]
+        if x.size:
+            with np.errstate(invalid="ignore"):     # Infinity 가 섞이면 표준편차는 NaN (TS 와 같음)
+                self.m2 += float(((x - self.mean) ** 2).sum())
+
+    def result(self) -> dict:
+        item = {
+            "column": self.column,
+            "dtype": "number" if self.n else "string",
+            "missing": self.missing,
+            "unique": len(self.exact) if self.exact is not None else self.hll.estimate(),
+        }
+        if self.exact is None:
+            item["uniqueApprox"] = True
+        if self.n:
+            item.update(mean=to_fixed2(self.mean), std=to_fixed2(math.sqrt(self.m2 / self.n)),
+                        min=to_fixed2(self.min), max=to_fixed2(self.max))
+        return item
+
+
+# ───────────────────────────────────────────────
+# 실행
+# ───────────────────────────────────────────────
+def analyze(file_path: str, exact_limit: int = EXACT_UNIQUE) -> dict:
+    t0 = time.perf_counter()
+    stats: dict[str, ColumnStats] = {}
+    rows = 0
+    for batch in iter_text_batches(file_path):
+        if not stats:
+            stats = {c: ColumnStats(c, exact_limit) for c in batch.schema.names}
+        rows += batch.num_rows
+        for c, a in zip(batch.schema.names, batch.columns):
+            stats[c].update(a)
+    if rows == 0:
+        raise EmptyDataError("CSV 파일에 데이터가 없습니다.")
+
+    numeric = [c for c, st in stats.items() if st.n]
+    if numeric:
+        for batch in iter_text_batches(file_path, numeric):
+            for c, a in zip(batch.schema.names, batch.columns):
+                stats[c].update_dev(a)
+
+    # 컬럼 순서: TS 의 Object.keys(records[0]) 와 같게 (정수형 이름 먼저)
+    return {
+        "columnStats": [stats[c].result() for c in js_key_order(list(stats))],
+        "rows": rows,
+        "passes": 2 if numeric else 1,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def main():
+    stage_metrics.track("basic_analysis")
+    ap = argparse.ArgumentParser()
+    ap.add_argument("file_path")
+    ap.add_argument("--exact-unique", type=int, default=EXACT_UNIQUE)
+    args = ap.parse_args()
+    try:
+        out = analyze(args.file_path, args.exact_unique)
+    except (EmptyDataError, pd.errors.EmptyDataError, pa.ArrowInvalid) as e:
+        print(str(e) if isinstance(e, EmptyDataError) else "CSV 파일에 데이터가 없습니다.", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+업로드 CSV → 컬럼형(Parquet) 사본
+
+- 업로드 직후 CSV 를 블록 단위로 한 번만 파싱해 dtype 을 추론하고
+  `<파일명>.parquet` 로 원본 옆에 저장한다. (원본 크기/mtime 은 스키마 메타데이터에 기록)
+- 미리보기 / 시각화 / 학습 / 상관 엔진은 `read_frame` / `iter_frames` 로 필요한 컬럼만 읽는다.
+  사본이 없거나 원본이 바뀌었으면(크기·mtime 불일치) CSV 를 직접 읽는다.
+- 업로드 때 남긴 `<파일명>.ingest.json` 의 구분자/인코딩을 변환과 CSV 직접 읽기에 그대로 쓴다.
+- 블록마다 추론 타입이 어긋나면(앞은 정수, 뒤에 소수/문자열) 해당 컬럼을
+  int64 → float64 → string 순으로 넓혀 다시 변환한다.
+
+사용 예)
+    python src/scripts/columnar_store.py src/uploads/<sessionId>/data.csv
+"""
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+COLUMNAR_VERSION = 1
+BLOCK_BYTES = 16 << 20         # CSV 파싱 블록 크기
+TEXT_BLOCK_BYTES = 1 << 20     # 문자열 그대로 읽을 때의 블록 크기 (문자열 배열은 원문보다 몇 배 커짐)
+ROW_GROUP_ROWS = 200_000
+CHUNK_ROWS = 200_000
+META_KEY = b"autoanalyst.source"
+
+_CONV_ERR_RE = re.compile(r"column #(\d+)")
+
+
+def columnar_path(file_path: str) -> Path:
+    p = Path(file_path)
+    return p.with_name(p.name + ".parquet")
+
+
+def csv_dialect(file_path: str) -> dict:
+    """업로드 메타데이터의 구분자/인코딩 (없으면 쉼표 + UTF-8)"""
+    p = Path(file_path)
+    try:
+        meta = json.loads(p.with_name(p.name + ".ingest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        meta = {}
+    return {"sep": meta.get("delimiter") or ",", "encoding": meta.get("encoding") or "utf-8"}
+
+
+def _arrow_options(file_path: str, column_types: dict | None = None, include_columns=None,
+                   block_bytes: int = BLOCK_BYTES) -> dict:
+    d = csv_dialect(file_path)
+    enc = "utf8" if d["encoding"] in ("utf-8", "utf-8-sig") else d["encoding"]     # UTF-8 BOM 은 pyarrow 가 건너뜀
+    opts = {"read_options": pacsv.ReadOptions(block_size=block_bytes, encoding=enc),
+            "parse_options": pacsv.ParseOptions(delimiter=d["sep"])}
+    if column_types is not None:
+        opts["convert_options"] = pacsv.ConvertOptions(column_types=column_types, include_columns=include_columns)
+    return opts
+
+
+def _source_key(file_path: str) -> dict:
+    st = os.stat(file_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "version": COLUMNAR_VERSION}
+
+
+def _open_fresh(file_path: str) -> pq.ParquetFile | None:
+    """원본과 짝이 맞는 Parquet 사본이 있으면 연다"""
+    path = columnar_path(file_path)
+    if not path.exists():
+        return None
+    try:
+        pf = pq.ParquetFile(path)
+        meta = pf.schema_arrow.metadata or {}
+        if json.loads(meta.get(META_KEY, b"{}")) != _source_key(file_path):
+            return None
+        return pf
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+
+
+def has_columnar(file_path: str) -> bool:
+    return _open_fresh(file_path) is not None
+
+
+# ───────────────────────────────────────────────
+# 변환
+# ───────────────────────────────────────────────
+def _widen(t: pa.DataType) -> pa.DataType:
+    if pa.types.is_integer(t) or pa.types.is_boolean(t):
+        return pa.float64()
+    return pa.string()
+
+
+def _write(file_path: str, out: Path, column_types: dict) -> dict:
+    reader = pacsv.open_csv(file_path, **_arrow_options(file_path, column_types))
+    schema = reader.schema.with_metadata({META_KEY: json.dumps(_source_key(file_path)).encode()})
+    rows = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for batch in reader:
+            writer.write_table(pa.Table.from_batches([batch]).replace_schema_metadata(schema.metadata),
+                               row_group_size=ROW_GROUP_ROWS)
+            rows += batch.num_rows
+    return {"rows": rows, "columns": len(schema)}
+
+
+def convert(file_path: str) -> dict:
+    """CSV 를 스트리밍 파싱해 Parquet 사본 작성 → {path, rows, columns, seconds}"""
+    t0 = time.perf_counter()
+    out = columnar_path(file_path)
+    tmp = out.with_name(out.name + ".tmp")
+    column_types: dict[str, pa.DataType] = {}
+    names = None
+    while True:
+        try:
+            info = _write(file_path, tmp, column_types)
+            break
+        except pa.ArrowInvalid as e:
+            # 블록 간 타입 불일치 → 문제 컬럼만 넓혀 다시 (컬럼당 최대 2번)
+            m = _CONV_ERR_RE.search(str(e))
+            if m is None:
+                tmp.unlink(missing_ok=True)
+                raise
+            if names is None:
+                names = pacsv.open_csv(file_path, **_arrow_options(file_path)).schema
+            field = names.field(int(m.group(1)))
+            cur = column_types.get(field.name, field.type)
+            if pa.types.is_string(cur):
+                tmp.unlink(missing_ok=True)
+                raise
+            column_types[field.name] = _widen(cur)
+    os.replace(tmp, out)
+    return {"path": str(out), **info, "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def ensure_columnar(file_path: str) -> dict | None:
+    """사본이 없거나 낡았으면 변환. 변환 실패는 None (호출부는 CSV 로 계속 진행)"""
+    if has_columnar(file_path):
+        return {"path": str(columnar_path(file_path)), "cached": True}
+    try:
+        return convert(file_path)
+    except (OSError, pa.ArrowException) as e:
+        print(f"[COLUMNAR] 변환 실패 → CSV 직접 사용: {e}")
+        return None
+
+
+# ───────────────────────────────────────────────
+# 읽기 (사본이 있으면 Parquet, 없으면 CSV)
+# ───────────────────────────────────────────────
+def column_names(file_path: str) -> list[str]:
+    pf = _open_fresh(file_path)
+    if pf is not None:
+        return list(pf.schema_arrow.names)
+    return [str(c) for c in pd.read_csv(file_path, nrows=0, **csv_dialect(file_path)).columns]
+
+
+def numeric_columns(file_path: str, include_bool: bool = False) -> list[str] | None:
+    """사본 스키마 기준 수치형 컬럼. 사본이 없으면 None (= 읽어보기 전엔 알 수 없음)"""
+    pf = _open_fresh(file_path)
+    if pf is None:
+        return None
+    return [f.name for f in pf.schema_arrow
+            if pa.types.is_integer(f.type) or pa.types.is_floating(f.type)
+            or (include_bool and pa.types.is_boolean(f.type))]
+
+
+def _existing(wanted, names: list[str]) -> list[str] | None:
+    if wanted is None:
+        return None
+    wanted = set(wanted)
+    return [c for c in names if c in wanted]
+
+
+def read_frame(file_path: str, columns=None) -> pd.DataFrame:
+    """필요한 컬럼만 DataFrame 으로 (없는 컬럼명은 무시, 원래 컬럼 순서 유지)"""
+    pf = _open_fresh(file_path)
+    if pf is not None:
+        cols = _existing(columns, pf.schema_arrow.names)
+        return pf.read(columns=cols).to_pandas()
+    wanted = set(columns) if columns is not None else None
+    return pd.read_csv(file_path, usecols=(lambda c: c in wanted) if wanted is not None else None,
+                       low_memory=False, **csv_dialect(file_path))
+
+
+def iter_frames(file_path: str, columns=None, chunk_rows: int = CHUNK_ROWS):
+    """행 청크 단위 DataFrame 제너레이터"""
+    pf = _open_fresh(file_path)
+    if pf is not None:
+        cols = _existing(columns, pf.schema_arrow.names)
+        if pf.metadata.num_rows == 0:
+            yield pf.schema_arrow.empty_table().select(pf.schema_arrow.names if cols is None else cols).to_pandas()
+            return
+        for batch in pf.iter_batches(batch_size=chunk_rows, columns=cols):
+            yield batch.to_pandas()
+        return
+    wanted = set(columns) if columns is not None else None
+    yield from pd.read_csv(file_path, usecols=(lambda c: c in wanted) if wanted is not None else None,
+                           chunksize=chunk_rows, low_memory=False, **csv_dialect(file_path))
+
+
+def iter_text_frames(file_path: str, columns=None, chunk_rows: int = CHUNK_ROWS):
+    """CSV 원문 문자열 그대로 청크 읽기 (타입 추론 / 결측 표기 변환 없음, 빈 칸은 "")
+
+    JS 도구(csv-parse)와 같은 값을 봐야 하는 전처리/기초 분석 엔진용 — Parquet 사본은 쓰지 않는다.
+    """
+    wanted = set(columns) if columns is not None else None
+    for chunk in pd.read_csv(file_path, dtype=str, keep_default_na=False, na_filter=False,
+                             usecols=(lambda c: c in wanted) if wanted is not None else None,
+                             chunksize=chunk_rows, skip_blank_lines=True, **csv_dialect(file_path)):
+        yield chunk.fillna("").astype(object)
+
+
+def iter_text_batches(file_path: str, columns=None):
+    """iter_text_frames 의 pyarrow 판: 모든 컬럼을 문자열(빈 칸은 "")로 읽는 RecordBatch 스트림
+
+    블록(TEXT_BLOCK_BYTES) 단위로 읽으므로 메모리 사용량이 행 수와 무관하다.
+    """
+    names = [str(c) for c in pd.read_csv(file_path, nrows=0, **csv_dialect(file_path)).columns]
+    include = None if columns is None else [c for c in names if c in set(columns)]
+    reader = pacsv.open_csv(file_path, **_arrow_options(file_path, {c: pa.string() for c in names}, include,
+                                                        block_bytes=TEXT_BLOCK_BYTES))
+    for batch in reader:
+        if batch.num_rows:
+            yield batch
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: columnar_store.py <csv>")
+        sys.exit(2)
+    print(json.dumps(convert(sys.argv[1]), ensure_ascii=False))
@@ -0,0 +1,154 @@
+"""
+상주 계산 워커 — 시각화/학습을 인터프리터 재기동 없이 실행
+
+visualize_from_json.py / train_ml_model.py 를 매번 `python ...` 으로 띄우면 pandas·seaborn·matplotlib·
+sklearn·xgboost import 만으로 몇 초가 든다. 이 워커는 시작할 때 한 번 import 해 두고
+두 스크립트의 run() 을 직접 호출하므로 작업당 비용은 실제 계산 시간만 남는다.
+selector JSON 도 명령행 인자가 아니라 프레임 본문으로 받으므로 크기 제한이 없다.
+
+프로토콜 (src/main.ts 서버 모드 / orchestrator_pool.py 와 같은 프레임)
+ - stdin/stdout 한 줄 = 한 프레임: "<<<FRAME>>>" + JSON
+ - 시작: { type: "ready", pid, importSeconds }
+ - 요청: { id, op: "visualize" | "train" | "ping" | "shutdown",
+          filePath, selectorResult, outputDir, timestamp?, options?, metrics?: { file, step } }
+ - 응답: { id, type: "result", code, stdout, stderr, result? } / { id, type: "pong", pid, rssMb, jobs }
+ - 작업은 도착 순서대로 하나씩 처리 (동시성은 워커 수로 조절)
+
+작업 중 print 는 결과 프레임의 stdout 으로 모으고, 프레임은 시작 시 복제해 둔 원래 stdout 으로만 쓴다
+(라이브러리가 fd 1 에 직접 쓰는 출력은 stderr 로 흘려 프레임 채널을 깨지 않게 함).
+
+사용 예)
+    python src/scripts/compute_worker.py        # 부모(FastAPI 풀 / TS computeWorker)가 띄움
+"""
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import time
+import traceback
+
+_t0 = time.perf_counter()
+import visualize_from_json   # noqa: E402  matplotlib(Agg) / seaborn / pandas
+import train_ml_model        # noqa: E402  sklearn / joblib
+import sklearn.ensemble      # noqa: E402,F401  load_model 이 지연 import 하는 모델들까지 미리
+import sklearn.linear_model  # noqa: E402,F401
+import sklearn.impute        # noqa: E402,F401  선형 모델 앞의 평균 대치 파이프라인
+import sklearn.pipeline      # noqa: E402,F401
+import stage_metrics         # noqa: E402
+try:
+    import xgboost           # noqa: F401
+except ImportError:          # xgboost 없는 환경에서도 나머지 모델은 동작
+    pass
+IMPORT_SECONDS = round(time.perf_counter() - _t0, 3)
+
+FRAME = "<<<FRAME>>>"
+STDERR_TAIL = 4000
+
+
+# ------------------------------
+# 작업
+# ------------------------------
+def _visualize(req: dict) -> dict:
+    opt = req.get("options") or {}
+    paths = visualize_from_json.run(
+        req["filePath"], req.get("selectorResult") or {}, req["outputDir"],
+        top_n=int(opt.get("topN", visualize_from_json.TOP_N)),
+        fmt=opt.get("format", visualize_from_json.IMAGE_FORMAT),
+        dpi=int(opt.get("dpi", visualize_from_json.DPI)),
+        jobs=int(opt.get("jobs", visualize_from_json.JOBS)),
+        agg_rows=int(opt.get("aggRows", visualize_from_json.AGG_ROWS)),
+    )
+    return {"chartPaths": paths}
+
+
+def _train(req: dict) -> dict:
+    opt = req.get("options") or {}
+    out = train_ml_model.run(
+        req["filePath"], req.get("selectorResult") or {}, req["outputDir"],
+        str(req.get("timestamp") or int(time.time() * 1000)),
+        time_budget=float(opt.get("timeBudget", train_ml_model.TIME_BUDGET)),
+        n_jobs=int(opt.get("nJobs", train_ml_model.N_JOBS)),
+        max_rows=int(opt.get("maxRows", train_ml_model.MAX_ROWS)),
+        leaderboard=bool(opt.get("leaderboard", train_ml_model.LEADERBOARD)),
+        cv_folds=int(opt.get("cvFolds", train_ml_model.CV_FOLDS)),
+    )
+    return {"reportPath": out["reportPath"], "modelPath": out["modelPath"], "metric": out["report"]["metric"]}
+
+
+OPS = {
+    "visualize": ("visualize_from_json", _visualize),
+    "train": ("train_ml_model", _train),
+}
+
+
+# ------------------------------
+# 프레임 처리
+# ------------------------------
+class Worker:
+    def __init__(self, out):
+        self.out = out
+        self.jobs = 0
+
+    def write(self, frame: dict):
+        self.out.write(FRAME + json.dumps(frame, ensure_ascii=False, default=str) + "\n")
+        self.out.flush()
+
+    def handle(self, req: dict) -> bool:
+        """프레임 1개 처리. False 면 종료"""
+        job_id, op = req.get("id"), req.get("op")
+        if op == "ping":
+            self.write({"id": job_id, "type": "pong", "pid": os.getpid(),
+                        "rssMb": stage_metrics.peak_rss_mb(), "jobs": self.jobs})
+            return True
+        if op == "shutdown":
+            self.write({"id": job_id, "type": "bye"})
+            return False
+
+        code, result, stderr = 0, None, ""
+        captured = io.StringIO()
+        metrics = req.get("metrics") or {}
+        try:
+            if op not in OPS:
+                raise ValueError(f"unknown op: {op}")
+            script, fn = OPS[op]
+            with contextlib.redirect_stdout(captured), \
+                    stage_metrics.measure(script, metrics.get("file"), metrics.get("step")):
+                result = fn(req)
+        except Exception:
+            code = 1
+            stderr = traceback.format_exc()[-STDERR_TAIL:]
+        finally:
+            self.jobs += 1
+            gc.collect()    # 큰 DataFrame/모델을 다음 작업 전에 돌려줌
+
+        frame = {"id": job_id, "type": "result", "code": code, "stdout": captured.getvalue().strip(),
+                 "stderr": stderr}
+        if result is not None:
+            frame["result"] = result
+        self.write(frame)
+        return True
+
+
+def main():
+    # 프레임 전용 채널 = 원래 stdout 복제본. fd 1 은 stderr 로 돌린다
+    out = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    worker = Worker(out)
+    worker.write({"type": "ready", "pid": os.getpid(), "importSeconds": IMPORT_SECONDS})
+    for line in sys.stdin:      # 부모가 파이프를 닫으면 종료
+        if not line.startswith(FRAME):
+            continue
+        try:
+            req = json.loads(line[len(FRAME):])
+        except ValueError:
+            continue
+        if not worker.handle(req):
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+상관행렬 계산 엔진 (CorrelationTool 이 호출)
+
+기존 TS 구현은 컬럼마다 JS 배열을 만들고 쌍마다 reduce 로 계산했다 (Kendall 은 쌍마다 O(n²)).
+여기서는 숫자형 컬럼 전체를 한 번에 행렬로 다룬다.
+
+- pearson : 결측을 쌍별(pairwise)로 제외한 합/제곱합/교차합을 행렬곱 4번으로 누적 (행 청크 단위)
+- spearman: 컬럼별 순위 변환 후 같은 Pearson 경로. 결측이 있는 쌍은 예산 안에서 쌍별로 재순위
+- kendall : scipy.stats.kendalltau (tau-b, O(n log n)) 를 컬럼 단위로 병렬 처리.
+            행이 많으면 재현 가능한 표본(--kendall-max-rows)으로 계산
+
+산출물(TS 구현과 같은 형식 → fastapi `_load_corr_csv` 가 그대로 읽음)
+- {base}.corr_matrix.csv : 첫 행 헤더, 값은 소수 3자리(JS toFixed 와 같은 반올림), 계산 불가는 빈칸
+- {base}.corr_pairs.json : |r| >= threshold 인 (col1, col2, corr) — 양방향, 컬럼 순서
+
+stdout 에는 CorrelationOutput JSON 한 줄 (+ matrixCsv / pairsJson 경로)
+
+사용 예)
+    python src/scripts/correlation_engine.py data.csv src/outputs/<sessionId> --method spearman --threshold 0.7
+"""
+import argparse
+import json
+import os
+import sys
+from decimal import Decimal, ROUND_HALF_UP
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from artifact_manifest import record as record_artifacts, write_text as write_artifact
+from columnar_store import iter_frames
+import stage_metrics
+
+CHUNK_ROWS = 200_000          # Pearson 누적 시 한 번에 올리는 행 수
+SPEARMAN_EXACT_BUDGET = 2e8   # 결측 쌍 재순위에 쓸 최대 (쌍 수 × 행 수)
+KENDALL_MAX_ROWS = 50_000
+
+
+# ─────────────────────────────────────────────
+# 로드
+# ─────────────────────────────────────────────
+def _to_numeric_frame(df: pd.DataFrame) -> pd.DataFrame:
+    out = {}
+    for c in df.columns:
+        s = df[c]
+        if not pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+            s = pd.to_numeric(s.astype("string").str.strip(), errors="coerce")
+        out[str(c)] = s.astype("float64").to_numpy()
+    return pd.DataFrame(out, index=df.index)
+
+
+def iter_numeric_chunks(csv_path: str, columns: list[str] | None = None, chunk_rows: int = CHUNK_ROWS):
+    """CSV(또는 업로드 때 만든 Parquet 사본)를 행 청크로 읽어 float64 프레임으로 (숫자가 아닌 값은 NaN)"""
+    for chunk in iter_frames(csv_path, columns or None, chunk_rows):
+        yield _to_numeric_frame(chunk)
+
+
+def load_numeric(csv_path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """숫자로 읽히는 컬럼만 float64 로 (값이 전부 비거나 숫자가 아니면 제외)"""
+    df = pd.concat(list(iter_numeric_chunks(csv_path, columns)), ignore_index=True)
+    return df.loc[:, df.notna().any()]
+
+
+# ─────────────────────────────────────────────
+# Pearson (pairwise complete)
+# ─────────────────────────────────────────────
+class PearsonAccumulator:
+    """행 청크를 받아 쌍별(pairwise complete) Pearson 에 필요한 합들을 행렬곱으로 누적
+
+    r_ij = cov / sqrt(var_i var_j), 세 통계량 모두 (i, j) 가 함께 있는 행에서 계산.
+    수치 안정성을 위해 첫 청크의 컬럼 평균만큼 이동한 뒤 누적한다 (이동 불변).
+    결측이 없는 청크는 행렬곱 1번, 있는 청크는 4번.
+    """
+
+    def __init__(self, p: int):
+        self.p = p
+        self.shift = None
+        self.P = np.zeros((p, p))    # Σ x_i x_j
+        self.N = np.zeros((p, p))    # 공통 행 수
+        self.S = np.zeros((p, p))    # S[i, j] = j 가 있는 행에서 Σ x_i
+        self.Q = np.zeros((p, p))    # Q[i, j] = j 가 있는 행에서 Σ x_i²
+
+    def update(self, X: np.ndarray):
+        if len(X) == 0:
+            return
+        mask = ~np.isnan(X)
+        if self.shift is None:
+            with np.errstate(invalid="ignore"):
+                self.shift = np.nan_to_num(np.nanmean(np.where(mask, X, np.nan), axis=0))
+        Xc = X - self.shift
+        if mask.all():
+            self.P += Xc.T @ Xc
+            self.N += len(X)
+            self.S += Xc.sum(axis=0)[:, None]
+            self.Q += (Xc * Xc).sum(axis=0)[:, None]
+            return
+        M = mask.astype(np.float64)
+        Xc = np.where(mask, Xc, 0.0)
+        self.P += Xc.T @ Xc
+        M32 = mask.astype(np.float32)           # 청크 행 수 < 2^24 → 개수는 float32 로도 정확
+        self.N += M32.T @ M32
+        self.S += Xc.T @ M
+        self.Q += (Xc * Xc).T @ M
+
+    def result(self) -> np.ndarray:
+        P, N, S, Q = self.P, self.N, self.S, self.Q
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = P - S * S.T / N
+            var_i = Q - S * S / N
+            var_j = var_i.T
+            r = cov / np.sqrt(var_i * var_j)
+        # 분산 0 → 0 (기존 TS 구현과 동일), 공통 행 2개 미만 → NaN
+        zero_var = (var_i <= 1e-12 * np.maximum(Q, 1.0)) | (var_j <= 1e-12 * np.maximum(Q.T, 1.0))
+        r = np.where(zero_var, 0.0, r)
+        r = np.where(N < 2, np.nan, r)
+        r = np.clip(r, -1.0, 1.0)
+        np.fill_diagonal(r, 1.0)
+        return r
+
+
+def pairwise_pearson(X: np.ndarray, chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """X: (n, p), NaN = 결측. 쌍마다 둘 다 있는 행만 사용한 Pearson r 행렬"""
+    acc = PearsonAccumulator(X.shape[1])
+    for a in range(0, X.shape[0], chunk_rows):
+        acc.update(X[a:a + chunk_rows])
+    return acc.result()
+
+
+# ─────────────────────────────────────────────
+# Spearman
+# ─────────────────────────────────────────────
+def rank_columns(X: np.ndarray) -> np.ndarray:
+    """컬럼별 평균 순위 (NaN 은 NaN 유지)"""
+    from scipy.stats import rankdata
+    return rankdata(X, axis=0, nan_policy="omit")
+
+
+def spearman(X: np.ndarray, exact_budget: float = SPEARMAN_EXACT_BUDGET) -> np.ndarray:
+    R = rank_columns(X)
+    r = pairwise_pearson(R)
+    # 결측이 있는 컬럼이 낀 쌍은 공통 행만으로 다시 순위를 매겨야 정확하다
+    has_missing = np.isnan(X).any(axis=0)
+    if not has_missing.any():
+        return r
+    p = X.shape[1]
+    pairs = [(i, j) for i in range(p) for j in range(i + 1, p) if has_missing[i] or has_missing[j]]
+    if len(pairs) * X.shape[0] > exact_budget:
+        print(f"[correlation] spearman: 결측 쌍 {len(pairs)}개는 컬럼별 순위로 근사", file=sys.stderr)
+        return r
+    from scipy.stats import rankdata
+    for i, j in pairs:
+        both = ~(np.isnan(X[:, i]) | np.isnan(X[:, j]))
+        if both.sum() < 2:
+            r[i, j] = r[j, i] = np.nan
+            continue
+        sub = np.column_stack([rankdata(X[both, i]), rankdata(X[both, j])])
+        r[i, j] = r[j, i] = pairwise_pearson(sub)[0, 1]
+    return r
+
+
+# ─────────────────────────────────────────────
+# Kendall tau-b
+# ─────────────────────────────────────────────
+def _kendall_row(X: np.ndarray, i: int) -> list[tuple[int, float]]:
+    from scipy.stats import kendalltau
+    out = []
+    xi = X[:, i]
+    for j in range(i + 1, X.shape[1]):
+        both = ~(np.isnan(xi) | np.isnan(X[:, j]))
+        if both.sum() < 2:
+            out.append((j, np.nan))
+            continue
+        tau = kendalltau(xi[both], X[both, j], variant="b").statistic
+        out.append((j, 0.0 if np.isnan(tau) else float(tau)))   # 상수 컬럼 → 0 (Pearson 과 동일 규칙)
+    return out
+
+
+def kendall(X: np.ndarray, max_rows: int = KENDALL_MAX_ROWS, n_jobs: int = -1, seed: int = 0) -> np.ndarray:
+    n, p = X.shape
+    if n > max_rows:
+        idx = np.sort(np.random.default_rng(seed).choice(n, size=max_rows, replace=False))
+        X = X[idx]
+        print(f"[correlation] kendall: {n}행 중 {max_rows}행 표본으로 계산", file=sys.stderr)
+    r = np.eye(p)
+    rows = range(p - 1)
+    if p > 8 and n_jobs != 1:
+        from joblib import Parallel, delayed
+        results = Parallel(n_jobs=n_jobs)(delayed(_kendall_row)(X, i) for i in rows)
+    else:
+        results = [_kendall_row(X, i) for i in rows]
+    for i, row in zip(rows, results):
+        for j, tau in row:
+            r[i, j] = r[j, i] = tau
+    return r
+
+
+def correlation_matrix(X: np.ndarray, method: str = "pearson", **kw) -> np.ndarray:
+    """kw 는 kendall 옵션(max_rows, n_jobs, seed)"""
+    if method == "spearman":
+        return spearman(X)
+    if method == "kendall":
+        return kendall(X, **kw)
+    return pairwise_pearson(X)
+
+
+# ─────────────────────────────────────────────
+# 산출물
+# ─────────────────────────────────────────────
+def js_fixed3(v: float) -> str:
+    """JS Number.prototype.toFixed(3) 과 같은 문자열 (정확한 2진값 기준 half-up)"""
+    return str(Decimal(v).quantize(Decimal("0.001"), rounding=ROUND_HALF_UP))
+
+
+def build_output(columns: list[str], r: np.ndarray, method: str, threshold: float) -> dict:
+    cells = [[js_fixed3(v) if np.isfinite(v) else "" for v in row] for row in r]
+    matrix = {
+        c1: {c2: (float(cells[i][j]) if cells[i][j] else None) for j, c2 in enumerate(columns)}
+        for i, c1 in enumerate(columns)
+    }
+    pairs = []
+    for i, c1 in enumerate(columns):
+        for j, c2 in enumerate(columns):
+            v = matrix[c1][c2]
+            if i != j and v is not None and abs(v) >= threshold:
+                pairs.append({"col1": c1, "col2": c2, "corr": v})
+    return {"method": method, "correlationMatrix": matrix, "highCorrPairs": pairs, "_cells": cells}
+
+
+def write_artifacts(out: dict, columns: list[str], csv_path: str, output_dir: str) -> tuple[str, str]:
+    os.makedirs(output_dir, exist_ok=True)
+    base = Path(csv_path).stem
+    matrix_csv = os.path.join(output_dir, f"{base}.corr_matrix.csv")
+    pairs_json = os.path.join(output_dir, f"{base}.corr_pairs.json")
+    lines = [",".join(["", *columns])]
+    lines += [",".join([c, *row]) for c, row in zip(columns, out["_cells"])]
+    write_artifact(matrix_csv, "\n".join(lines))
+    write_artifact(pairs_json, json.dumps(out["highCorrPairs"], ensure_ascii=False, indent=2))
+    record_artifacts(output_dir, [matrix_csv, pairs_json], step="corr")
+    return matrix_csv, pairs_json
+
+
+def run(csv_path: str, output_dir: str, method: str = "pearson", threshold: float = 0.5,
+        columns: list[str] | None = None, **kw) -> dict:
+    if method == "pearson":
+        # Pearson 은 합만 있으면 되므로 청크 단위로 읽으면서 누적 (전체 행렬을 메모리에 올리지 않음)
+        acc, cols = None, []
+        for chunk in iter_numeric_chunks(csv_path, columns):
+            if acc is None:
+                cols = list(chunk.columns)
+                acc = PearsonAccumulator(len(cols))
+            acc.update(chunk.to_numpy())
+        keep = np.diag(acc.N) > 0 if acc is not None else np.zeros(0, dtype=bool)
+        cols = [c for c, k in zip(cols, keep) if k]
+        r = acc.result()[np.ix_(keep, keep)] if cols else None
+    else:
+        df = load_numeric(csv_path, columns)
+        cols = list(df.columns)
+        r = correlation_matrix(df.to_numpy(dtype=np.float64), method, **kw) if cols else None
+    if not cols:
+        raise ValueError("유효한 숫자형 데이터가 없습니다.")
+    out = build_output(cols, r, method, threshold)
+    matrix_csv, pairs_json = write_artifacts(out, cols, csv_path, output_dir)
+    out.pop("_cells")
+    out["matrixCsv"] = matrix_csv
+    out["pairsJson"] = pairs_json
+    return out
+
+
+def main():
+    stage_metrics.track("correlation_engine")
+    ap = argparse.ArgumentParser()
+    ap.add_argument("csv_path")
+    ap.add_argument("output_dir")
+    ap.add_argument("--method", choices=["pearson", "spearman", "kendall"], default="pearson")
+    ap.add_argument("--threshold", type=float, default=0.5)
+    ap.add_argument("--kendall-max-rows", type=int, default=KENDALL_MAX_ROWS)
+    ap.add_argument("--jobs", type=int, default=-1, help="kendall 병렬 작업 수")
+    ap.add_argument("--columns", default="", help='대상 컬럼 JSON 배열 (예: \'["a","b"]\', 기본: 숫자형 전체)')
+    args = ap.parse_args()
+
+    columns = json.loads(args.columns) if args.columns else None
+    kw = {"max_rows": args.kendall_max_rows, "n_jobs": args.jobs} if args.method == "kendall" else {}
+    out = run(args.csv_path, args.output_dir, args.method, args.threshold, columns, **kw)
+    print(json.dumps(out, ensure_ascii=False, allow_nan=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+CSV 미리보기 엔진
+
+- 업로드된 CSV를 청크 단위로 "한 번만" 스트리밍하면서 head 행과
+  describe(include="all") 표를 계산한다.
+- 컬럼별 누적기는 서로 merge 가능하다.
+  (count / mean / std / min / max, 근사 분위수, top / freq, 근사 unique)
+- 결과는 업로드 파일 옆 `<파일명>.preview.json` 에 (경로, 크기, mtime) 키로 저장되고,
+  이후 요청은 이 캐시에서 바로 응답한다.
+
+사용 예)
+    python src/scripts/csv_preview.py src/uploads/<sessionId>/data.csv
+"""
+import json
+import math
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import iter_frames
+
+PREVIEW_VERSION = 1
+CHUNK_ROWS = 100_000
+HEAD_ROWS = 5
+
+# describe(include="all")의 행 순서
+DESCRIBE_CAT_ROWS = ["count", "unique", "top", "freq"]
+DESCRIBE_NUM_ROWS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+DESCRIBE_ALL_ROWS = ["count", "unique", "top", "freq", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+# ───────────────────────────────────────────────
+# 1. 근사 분위수 스케치 (KLL 방식의 단순 compactor)
+# ───────────────────────────────────────────────
+class QuantileSketch:
+    """
+    레벨 h의 원소는 가중치 2^h를 갖는다. 레벨 버퍼가 k를 넘으면 정렬 후
+    한 칸 건너 하나씩만 다음 레벨로 올린다. 전체 원소 수가 k 이하이면 정확한 값을 준다.
+    """
+
+    def __init__(self, k: int = 4096):
+        self.k = k
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self._flip = 0  # compaction 오프셋(결정적으로 번갈아 사용)
+
+    def update(self, values: np.ndarray):
+        if values.size == 0:
+            return
+        self.levels[0] = np.concatenate([self.levels[0], values.astype(np.float64, copy=False)])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        for h, buf in enumerate(other.levels):
+            if h >= len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[h] = np.concatenate([self.levels[h], buf])
+        self._compress()
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            buf = self.levels[h]
+            if buf.size > self.k:
+                buf = np.sort(buf)
+                keep = buf[-1:] if buf.size % 2 else buf[:0]
+                body = buf[:-1] if buf.size % 2 else buf
+                promoted = body[self._flip::2]
+                self._flip ^= 1
+                self.levels[h] = keep
+                if h + 1 >= len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def quantiles(self, qs):
+        if len(self.levels) == 1 or all(b.size == 0 for b in self.levels[1:]):
+            vals = self.levels[0]
+            if vals.size == 0:
+                return [math.nan for _ in qs]
+            # 압축이 일어나지 않았으면 pandas와 같은 선형보간 결과
+            return [float(v) for v in np.quantile(vals, qs)]
+
+        vals = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(b.size, 2 ** h, dtype=np.float64) for h, b in enumerate(self.levels)])
+        order = np.argsort(vals, kind="mergesort")
+        vals, weights = vals[order], weights[order]
+        cum = np.cumsum(weights)
+        total = cum[-1]
+        out = []
+        for q in qs:
+            target = q * (total - 1)
+            idx = int(np.searchsorted(cum - 1, target, side="left"))
+            out.append(float(vals[min(idx, vals.size - 1)]))
+        return out
+
+
+# ───────────────────────────────────────────────
+# 2. HyperLogLog (근사 고유값 개수)
+# ───────────────────────────────────────────────
+class HyperLogLog:
+    """64bit 해시 배열을 받아 레지스터를 갱신하는 벡터화 HLL. 상대오차 ≈ 1.04/sqrt(2^p)."""
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray):
+        if hashes.size == 0:
+            return
+        h = hashes.astype(np.uint64, copy=False)
+        idx = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        w = h << np.uint64(self.p)
+
+        rank = np.full(h.size, 64 - self.p + 1, dtype=np.int64)
+        nz = w != 0
+        if nz.any():
+            wn = w[nz]
+            e = np.floor(np.log2(wn.astype(np.float64))).astype(np.int64)
+            # float 반올림으로 지수가 1 커진 경우 보정
+            over = (wn >> e.astype(np.uint64)) == 0
+            e[over] -= 1
+            rank[nz] = 64 - e
+        np.maximum.at(self.registers, idx, rank.astype(np.uint8))
+
+    def update_series(self, s: pd.Series):
+        if len(s) == 0:
+            return
+        self.update_hashes(pd.util.hash_pandas_object(s, index=False).to_numpy())
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros > 0:
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+# ───────────────────────────────────────────────
+# 3. 컬럼 누적기
+# ───────────────────────────────────────────────
+class NumericAccumulator:
+    kind = "numeric"
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch()
+
+    def update(self, s: pd.Series):
+        values = pd.to_numeric(s, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        n = values.size
+        if n == 0:
+            return
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        self._combine(n, mean_b, m2_b, float(values.min()), float(values.max()))
+        self.sketch.update(values)
+
+    def _combine(self, n, mean_b, m2_b, min_b, max_b):
+        # Chan et al. 병렬 분산 결합
+        total = self.count + n
+        delta = mean_b - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2_b + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, min_b)
+        self.max = max(self.max, max_b)
+
+    def merge(self, other: "NumericAccumulator"):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+            self.sketch.merge(other.sketch)
+
+    def describe(self) -> dict:
+        if self.count == 0:
+            return {"count": 0.0, "mean": math.nan, "std": math.nan, "min": math.nan,
+                    "25%": math.nan, "50%": math.nan, "75%": math.nan, "max": math.nan}
+        std = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+        q25, q50, q75 = self.sketch.quantiles([0.25, 0.5, 0.75])
+        return {"count": float(self.count), "mean": self.mean, "std": std, "min": self.min,
+                "25%": q25, "50%": q50, "75%": q75, "max": self.max}
+
+
+class CategoricalAccumulator:
+    kind = "categorical"
+
+    def __init__(self, max_items: int = 10_000):
+        self.count = 0
+        self.counts: dict[str, int] = {}
+        self.max_items = max_items
+        self.pruned = False
+        self.hll = HyperLogLog()
+
+    def update(self, s: pd.Series):
+        s = s.dropna().astype(str)
+        if s.empty:
+            return
+        self.count += len(s)
+        for value, freq in s.value_counts(sort=False).items():
+            self.counts[value] = self.counts.get(value, 0) + int(freq)
+        self.hll.update_series(s)
+        self._prune()
+
+    def _prune(self):
+        # 고유값이 너무 많으면 상위 빈도만 유지 (top/freq는 근사가 됨)
+        if len(self.counts) > self.max_items:
+            keep = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[: self.max_items // 2]
+            self.counts = dict(keep)
+            self.pruned = True
+
+    def merge(self, other: "CategoricalAccumulator"):
+        self.count += other.count
+        for value, freq in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + freq
+        self.pruned = self.pruned or other.pruned
+        self.hll.merge(other.hll)
+        self._prune()
+
+    def describe(self) -> dict:
+        if not self.counts:
+            return {"count": float(self.count), "unique": 0, "top": math.nan, "freq": math.nan}
+        top, freq = max(self.counts.items(), key=lambda kv: kv[1])
+        unique = self.hll.estimate() if self.pruned else len(self.counts)
+        return {"count": float(self.count), "unique": unique, "top": top, "freq": freq}
+
+
+def _is_numeric(s: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s)
+
+
+# ───────────────────────────────────────────────
+# 4. 프로파일 계산 (청크 스트리밍)
+# ───────────────────────────────────────────────
+def iter_chunks(file_path: str, chunksize: int = CHUNK_ROWS):
+    # 업로드 때 만든 Parquet 사본이 있으면 그걸 읽고, 없으면 CSV 를 청크로
+    yield from iter_frames(file_path, chunk_rows=chunksize)
+
+
+def profile_chunks(chunks, head_n: int = HEAD_ROWS) -> dict:
+    columns: list[str] = []
+    head_rows: list[dict] = []
+    accs: dict[str, NumericAccumulator | CategoricalAccumulator] = {}
+    rows = 0
+
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            columns = [str(c) for c in chunk.columns]
+            head_rows = chunk.head(head_n).to_dict(orient="records")
+        rows += len(chunk)
+        for col in chunk.columns:
+            s = chunk[col]
+            key = str(col)
+            acc = accs.get(key)
+            if acc is None:
+                acc = NumericAccumulator() if _is_numeric(s) else CategoricalAccumulator()
+                accs[key] = acc
+            elif acc.kind == "numeric" and not _is_numeric(s):
+                # 앞 청크는 숫자였는데 문자열이 섞임 → pandas 전체 로드와 같이 범주형으로 전환
+                # (이전 청크의 count는 유지, top/freq는 이후 청크 기준 근사)
+                cat = CategoricalAccumulator()
+                cat.count = acc.count
+                cat.pruned = True
+                accs[key] = acc = cat
+            acc.update(s)
+
+    return {"columns": columns, "head_rows": head_rows, "rows": rows, "accumulators": accs}
+
+
+def build_describe(columns: list[str], accs: dict) -> tuple[list[str], list[dict]]:
+    kinds = {accs[c].kind for c in columns if c in accs}
+    if kinds == {"numeric"}:
+        index = DESCRIBE_NUM_ROWS
+    elif kinds == {"categorical"}:
+        index = DESCRIBE_CAT_ROWS
+    else:
+        index = DESCRIBE_ALL_ROWS
+
+    stats = {c: accs[c].describe() for c in columns if c in accs}
+    rows = []
+    for name in index:
+        row = {"index": name}
+        for c in columns:
+            row[c] = stats.get(c, {}).get(name, math.nan)
+        rows.append(row)
+    return ["index", *columns], rows
+
+
+def build_preview(file_path: str, chunksize: int = CHUNK_ROWS) -> dict:
+    prof = profile_chunks(iter_chunks(file_path, chunksize))
+    describe_columns, describe_rows = build_describe(prof["columns"], prof["accumulators"])
+    return {
+        "head_columns": prof["columns"],
+        "head_rows": prof["head_rows"],
+        "describe_columns": describe_columns,
+        "describe_rows": describe_rows,
+        "rows": prof["rows"],
+    }
+
+
+# ───────────────────────────────────────────────
+# 5. 업로드 옆 캐시 (경로 + 크기 + mtime 키)
+# ───────────────────────────────────────────────
+def preview_cache_path(file_path: str) -> Path:
+    p = Path(file_path)
+    return p.with_name(p.name + ".preview.json")
+
+
+def file_key(file_path: str) -> dict:
+    st = os.stat(file_path)
+    return {
+        "path": str(Path(file_path).resolve()),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "version": PREVIEW_VERSION,
+    }
+
+
+def load_or_build_preview(file_path: str) -> dict:
+    """캐시가 유효하면 그대로 읽고, 아니면 한 번 계산해 업로드 옆에 저장"""
+    key = file_key(file_path)
+    cache = preview_cache_path(file_path)
+    try:
+        cached = json.loads(cache.read_text(encoding="utf-8"))
+        if cached.get("key") == key:
+            return cached
+    except (OSError, ValueError):
+        pass
+
+    preview = build_preview(file_path)
+    preview["key"] = key
+    tmp = cache.with_name(cache.name + ".tmp")
+    tmp.write_text(json.dumps(preview, ensure_ascii=False, default=str), encoding="utf-8")
+    os.replace(tmp, cache)
+    return preview
+
+
+if __name__ == "__main__":
+    result = load_or_build_preview(sys.argv[1])
+    print(json.dumps({k: result[k] for k in ("head_columns", "rows")}, ensure_ascii=False))
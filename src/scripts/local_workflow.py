@@ -0,0 +1,252 @@
+"""
+LLM 없이 도는 로컬 워크플로 (오케스트레이터/Node 기동 없이 파이썬에서 바로 실행)
+
+WorkflowTool.ts 와 같은 순서와 같은 결과 모양(WorkflowResult)을 만든다.
+    1) 기본 통계      basic_analysis.analyze              (프로세스 안)
+    2) 상관 분석      correlation_engine.run              (프로세스 안)
+    3) 선택기         selector_rules.select               (프로세스 안, 규칙 기반)
+    4) 시각화         visualize_from_json.run             (계산 워커 — 5·6 과 동시에)
+    5) 전처리         preprocess_engine.run               (프로세스 안)
+    6) 학습           train_ml_model.run                  (계산 워커)
+
+시각화/학습은 matplotlib·sklearn 을 서버 프로세스에 올리지 않도록 상주 계산 워커(compute_worker.py)에 보낸다.
+compute 로 워커 풀(run_frame(op, **payload) 을 가진 객체, 예: OrchestratorPool)을 넘기지 않으면
+예전처럼 스크립트를 새 인터프리터로 실행한다 (selector JSON 은 표준입력으로).
+시각화는 전처리→학습과 겹쳐 돌려 전체 시간이 긴 쪽 하나로 끝나게 한다.
+단계가 끝날 때마다 on_step({key, status, data, timing}) 을 호출한다 (TS 단계 이벤트와 같은 모양).
+
+사용 예)
+    python src/scripts/local_workflow.py data.csv src/outputs/sessionA --target MEDV
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import basic_analysis
+import correlation_engine
+import preprocess_engine
+import selector_rules
+import stage_metrics
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SCRIPT_TIMEOUT = float(os.environ.get("LOCAL_SCRIPT_TIMEOUT", "600"))
+CORR_THRESHOLD = 0.7        # WorkflowTool 과 같은 기준
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".gif")
+
+
+class StepFailed(RuntimeError):
+    pass
+
+
+# ------------------------------
+# 단계 계측 + 이벤트
+# ------------------------------
+class _Recorder:
+    """단계별 시간/메모리 (StageTiming 모양) + 스크립트 지표 파일 + 이벤트 직렬화"""
+
+    def __init__(self, on_step=None, compute=None):
+        self.on_step = on_step
+        self.compute = compute
+        self.timings: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        fd, self.metrics_file = tempfile.mkstemp(prefix="stage_metrics_", suffix=".jsonl")
+        os.close(fd)
+
+    def script(self, step: str, script: str, *args: str, stdin: str | None = None) -> subprocess.CompletedProcess:
+        env = {**os.environ, "STAGE_METRICS_FILE": self.metrics_file, "STAGE_METRICS_STEP": step}
+        proc = subprocess.run([sys.executable, str(SCRIPT_DIR / f"{script}.py"), *args], env=env, input=stdin,
+                              capture_output=True, text=True, encoding="utf-8", errors="replace",
+                              timeout=SCRIPT_TIMEOUT)
+        if proc.returncode != 0:
+            raise StepFailed(proc.stderr.strip()[-2000:] or f"{script} 실패 (code {proc.returncode})")
+        return proc
+
+    def work(self, step: str, op: str, **payload) -> dict:
+        """계산 워커에 작업 1건 → result dict"""
+        frame = self.compute.run_frame(op, metrics={"file": self.metrics_file, "step": step}, **payload)
+        if int(frame.get("code", 1)) != 0:
+            raise StepFailed(frame.get("stderr", "").strip()[-2000:] or f"{op} 실패")
+        return frame.get("result") or {}
+
+    def _scripts(self, step: str) -> list[dict]:
+        try:
+            with open(self.metrics_file, encoding="utf-8") as f:
+                recs = [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError):
+            return []
+        return [{k: v for k, v in r.items() if k != "step"} for r in recs if r.get("step") == step]
+
+    def run(self, key: str, fn):
+        """fn() 실행 시간을 key 단계로 기록. 실패하면 None (워크플로는 계속)"""
+        t0 = time.perf_counter()
+        rss0 = stage_metrics.current_rss_mb()
+        try:
+            return fn()
+        except Exception as e:   # 단계 실패는 건너뜀으로 처리 (TS 와 같음)
+            print(f"[LOCAL:{key}] skip: {e}")
+            return None
+        finally:
+            # 서버 프로세스 안에서 돌 수 있으므로 최대 RSS(프로세스 평생 값) 대신 단계 전후 RSS
+            timing = {"component": "python", "seconds": round(time.perf_counter() - t0, 3),
+                      **stage_metrics.rss_fields(rss0)}
+            scripts = self._scripts(key)
+            if scripts:
+                timing["scripts"] = scripts
+            with self._lock:
+                self.timings[key] = timing
+
+    def emit(self, key: str, ok: bool, data: dict):
+        if self.on_step is None:
+            return
+        with self._lock:    # 시각화 스레드와 학습 쪽이 동시에 끝나도 한 번에 하나씩
+            try:
+                self.on_step({"key": key, "status": "done" if ok else "skipped", "data": data,
+                              "timing": self.timings.get(key)})
+            except Exception as e:
+                print(f"[LOCAL] listener failed: {e}")
+
+    def close(self):
+        try:
+            os.unlink(self.metrics_file)
+        except OSError:
+            pass
+
+
+# ------------------------------
+# 단계
+# ------------------------------
+def _visualize(rec: _Recorder, file_path: str, output_dir: Path, session_id: str | None, selector: dict) -> list[str]:
+    started = time.time()
+    payload = {"selectedColumns": selector["selectedColumns"], "recommendedPairs": selector["recommendedPairs"]}
+    web_base = f"/outputs/{session_id}" if session_id else "/outputs"
+    if rec.compute is not None:
+        out = rec.work("visual", "visualize", filePath=file_path, selectorResult=payload, outputDir=str(output_dir))
+        return [f"{web_base}/{Path(p).name}" for p in out.get("chartPaths") or []]
+    rec.script("visual", "visualize_from_json", file_path, "-", str(output_dir), str(int(started * 1000)),
+               stdin=json.dumps(payload, ensure_ascii=False))
+    # 이번 실행에 생성된 이미지 (VisualizationTool 과 같은 규칙: 수정시각 2초 여유)
+    return [f"{web_base}/{p.name}" for p in sorted(output_dir.iterdir())
+            if p.suffix.lower() in IMAGE_EXTS and p.stat().st_mtime >= started - 2]
+
+
+def _train(rec: _Recorder, file_path: str, output_dir: Path, selector_result: dict) -> dict | None:
+    ts = str(int(time.time() * 1000))
+    if rec.compute is not None:
+        out = rec.work("train", "train", filePath=file_path, selectorResult=selector_result,
+                       outputDir=str(output_dir), timestamp=ts)
+        return {"reportPath": out["reportPath"], "modelPath": out["modelPath"]}
+    rec.script("train", "train_ml_model", file_path, "-", str(output_dir), ts,
+               stdin=json.dumps(selector_result, ensure_ascii=False))
+    report = output_dir / f"ml_result_{ts}.txt"
+    if not report.exists():
+        raise StepFailed("ML 결과 파일을 찾을 수 없습니다.")
+    return {"reportPath": str(report), "modelPath": str(output_dir / f"model_{ts}.pkl")}
+
+
+def run(file_path, output_dir, session_id: str | None = None, options: dict | None = None, on_step=None,
+        compute=None) -> dict:
+    """CSV 한 개 → WorkflowResult (+ timings). compute: 계산 워커 풀 (없으면 스크립트 실행)"""
+    file_path = str(file_path)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    options = options or {}
+    rec = _Recorder(on_step, compute)
+    t_start = time.perf_counter()
+    rss_start = stage_metrics.current_rss_mb()
+    try:
+        # 1) 기본 통계
+        basic = rec.run("basic", lambda: basic_analysis.analyze(file_path))
+        column_stats = (basic or {}).get("columnStats") or []
+        rec.emit("basic", bool(column_stats), {"columnStats": column_stats})
+
+        # 2) 상관 분석 (숫자형 컬럼만)
+        numeric = selector_rules.numeric_columns(column_stats)
+        corr = rec.run("corr", lambda: correlation_engine.run(
+            file_path, str(output_dir), "pearson", CORR_THRESHOLD, numeric)) if numeric else None
+        correlation_results = ({k: corr[k] for k in ("method", "correlationMatrix", "highCorrPairs")}
+                               if corr else None)
+        rec.emit("corr", bool(corr), {"corrMatrixPath": (corr or {}).get("matrixCsv")})
+
+        # 3) 선택기 (options 의 타깃/문제 유형은 hint, 모델은 추천 교체)
+        hint = {k: options.get(k) for k in ("targetColumn", "problemType") if options.get(k)}
+        selector = rec.run("selector", lambda: selector_rules.select(column_stats, hint)) \
+            or selector_rules.select([], None)
+        selector["mlModelRecommendation"] = selector_rules.override_model(
+            selector["mlModelRecommendation"], options.get("model"))
+        rec.emit("selector", bool(selector["selectedColumns"] or selector["preprocessingRecommendations"]),
+                 {k: selector[k] for k in ("selectedColumns", "recommendedPairs", "preprocessingRecommendations",
+                                           "targetColumn", "problemType", "mlModelRecommendation")})
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-viz") as pool:
+            # 4) 시각화 — 전처리/학습과 동시에
+            def visual():
+                paths = rec.run("visual", lambda: _visualize(rec, file_path, output_dir, session_id, selector)) or []
+                rec.emit("visual", bool(paths), {"chartPaths": paths})
+                return paths
+            viz_future = pool.submit(visual)
+
+            # 5) 전처리
+            pre = rec.run("preprocess", lambda: preprocess_engine.run(
+                file_path, str(output_dir), selector["preprocessingRecommendations"],
+                f"preprocessed_{Path(file_path).name}", target=selector["targetColumn"]))
+            preprocessed = (pre or {}).get("preprocessedFilePath")
+            rec.emit("preprocess", bool(preprocessed), {"preprocessedFilePath": preprocessed})
+
+            # 6) 학습 (전처리 산출물이 있으면 그것으로)
+            selector_result = {"targetColumn": selector["targetColumn"], "problemType": selector["problemType"],
+                               "mlModelRecommendation": selector["mlModelRecommendation"]}
+            ml = rec.run("train", lambda: _train(rec, preprocessed or file_path, output_dir, selector_result))
+            ml_result = {"reportPath": ml["reportPath"]} if ml else None
+            rec.emit("train", bool(ml), {"mlResultPath": ml_result,
+                                          "mlModelRecommendation": selector["mlModelRecommendation"]})
+            chart_paths = viz_future.result()
+
+        rec.timings["local"] = {"component": "python", "mode": "local",
+                                "seconds": round(time.perf_counter() - t_start, 3),
+                                **stage_metrics.rss_fields(rss_start)}
+        return {
+            "filePath": file_path,
+            "columnStats": column_stats,
+            "correlationResults": correlation_results,
+            "selectedColumns": selector["selectedColumns"],
+            "recommendedPairs": selector["recommendedPairs"],
+            "preprocessingRecommendations": selector["preprocessingRecommendations"],
+            "targetColumn": selector["targetColumn"],
+            "problemType": selector["problemType"],
+            "mlModelRecommendation": selector["mlModelRecommendation"],
+            "chartPaths": chart_paths,
+            "preprocessedFilePath": preprocessed,
+            "mlResultPath": ml_result,
+            "timings": rec.timings,
+            "engine": "local",
+        }
+    finally:
+        rec.close()
+
+
+def main():
+    stage_metrics.track("local_workflow")
+    ap = argparse.ArgumentParser()
+    ap.add_argument("file_path")
+    ap.add_argument("output_dir")
+    ap.add_argument("--session", default=None)
+    ap.add_argument("--target", default=None)
+    ap.add_argument("--problem-type", choices=["regression", "classification"], default=None)
+    ap.add_argument("--model", default=None)
+    args = ap.parse_args()
+    options = {"targetColumn": args.target, "problemType": args.problem_type, "model": args.model}
+    out = run(args.file_path, args.output_dir, args.session, {k: v for k, v in options.items() if v},
+              on_step=lambda ev: print(f"[STEP] {ev['key']} {ev['status']} {(ev['timing'] or {}).get('seconds')}s",
+                                       file=sys.stderr))
+    print(json.dumps({"workflow": out}, ensure_ascii=False, allow_nan=False))
+
+
+if __name__ == "__main__":
+    main()
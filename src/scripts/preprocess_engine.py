@@ -0,0 +1,443 @@
+"""
+전처리 엔진 (PreprocessingTool 의 fillna / normalize / encoding 을 청크 단위 벡터 연산으로)
+
+기존 TS 경로는 CSV 전체를 행 객체 배열로 올리고, 원-핫 컬럼마다 모든 행을 `{ ...row }` 로 복사한 뒤
+결과를 한 번에 문자열로 만들었다 (행 수 × 인코딩 컬럼 수 만큼 메모리/시간). 여기서는
+
+1. fit  : 필요한 컬럼만 청크로 읽어 단계별 통계(평균/최빈값, min·max·평균·표준편차, 범주 목록)를 계산
+          (같은 컬럼의 앞 단계 결과가 필요한 단계는 다음 패스에서 — 보통 1~3 패스)
+2. 변환 : 전체를 청크로 읽어 fit 된 스펙을 적용하고 preprocessed_*.csv 로 이어 쓰기
+
+fit 결과는 `<출력 CSV>.spec.json` (변환기 스펙)으로 남겨 학습(train_ml_model.py → 모델 메타데이터)과
+서빙(/predict)이 같은 변환을 다시 적용한다.
+
+TS 도구와 같은 결과를 내도록 의미를 그대로 따른다.
+- 값은 CSV 원문 문자열 그대로 다루고, 바뀐 셀만 JS Number → 문자열 규칙으로 쓴다
+- 결측 = 빈 문자열/공백, 숫자 해석 = JS parseFloat (앞부분 숫자만), 평균/분산 = 앞에서부터 순차 합
+- 단계 순서: fillna(권고 순서) → normalize → encoding, 헤더 순서는 JS 객체 키 순서(정수형 키 먼저)
+
+사용 예)
+    python src/scripts/preprocess_engine.py <csv> <output_dir> --recommendations '[{"column":"age","fillna":"mean"}]'
+        [--target MEDV]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from artifact_manifest import record as record_artifacts, write_text as write_artifact
+from columnar_store import csv_dialect, iter_text_frames
+import stage_metrics
+
+SPEC_VERSION = 1
+CHUNK_ROWS = int(os.environ.get("PREPROCESS_CHUNK_ROWS", "200000"))
+
+_JS_FLOAT = r"^\s*([+-]?(?:Infinity|(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?))"
+_EXP_PAD_RE = re.compile(r"e([+-])0(\d)")
+_INDEX_KEY_RE = re.compile(r"^(?:0|[1-9]\d*)$")
+
+
+# ───────────────────────────────────────────────
+# JS 호환 헬퍼
+# ───────────────────────────────────────────────
+def js_parse_float(s: pd.Series) -> np.ndarray:
+    """JS parseFloat: 앞쪽 공백 무시, 숫자로 읽히는 앞부분만 ("12abc" → 12, "abc" → NaN)
+
+    대부분의 값은 pd.to_numeric 으로 바로 읽히므로, 못 읽었거나 inf 로 읽힌 값만 정규식으로 다시 본다
+    ("1,000" → 1, "inf" → NaN 등 JS 와 다른 경우)
+    """
+    s = s.astype(str)
+    x = pd.to_numeric(s, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    redo = ~np.isfinite(x) & (s.str.len().to_numpy() > 0)
+    if redo.any():
+        head = s[redo].str.extract(_JS_FLOAT, expand=False)
+        x[redo] = np.array(head.fillna("nan").tolist(), dtype=str).astype(np.float64)
+    return x
+
+
+def js_number_str(x) -> np.ndarray:
+    """JS String(number) 과 같은 문자열 (3.0 → "3", 1e-7 → "1e-7", 0.00001 → "0.00001")"""
+    x = np.asarray(x, dtype=np.float64)
+    out = x.astype(str).astype(object)
+    if out.size == 0:
+        return out
+    ax = np.abs(x)
+    # 파이썬 repr 은 1e-4 미만 / 1e16 이상에서 지수 표기, JS 는 1e-6 미만 / 1e21 이상에서만
+    positional = np.isfinite(x) & (((ax >= 1e-6) & (ax < 1e-4)) | ((ax >= 1e16) & (ax < 1e21)))
+    for i in np.flatnonzero(positional):
+        out[i] = np.format_float_positional(x[i], unique=True, trim="-")
+    s = pd.Series(out, dtype=object)
+    s = s.str.replace(r"\.0$", "", regex=True)
+    s = s.str.replace(_EXP_PAD_RE, r"e\1\2", regex=True)
+    s = s.replace({"-0": "0", "nan": "NaN", "inf": "Infinity", "-inf": "-Infinity"})
+    return s.to_numpy(dtype=object)
+
+
+def is_missing(s: pd.Series) -> np.ndarray:
+    return s.astype(str).str.strip().eq("").to_numpy()
+
+
+def js_key_order(columns: list[str]) -> list[str]:
+    """JS 객체 키 순서: 배열 인덱스 형태 키("0", "42")가 숫자 순으로 먼저, 나머지는 삽입 순"""
+    idx = sorted((c for c in columns if _INDEX_KEY_RE.match(c) and int(c) < 2 ** 32 - 1), key=int)
+    return idx + [c for c in columns if c not in set(idx)]
+
+
+def _seq_sum(carry: float, values: np.ndarray) -> float:
+    """JS reduce((a, b) => a + b) 와 같은 순서의 합 (np.sum 은 pairwise 라 끝자리가 다름)"""
+    if values.size == 0:
+        return carry
+    return float(np.cumsum(np.concatenate(([carry], values)))[-1])
+
+
+def _as_js_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """서빙 입력(JSON 숫자 등)을 CSV 원문과 같은 문자열 표현으로"""
+    cols = {}
+    for c in df.columns:
+        s = df[c]
+        if pd.api.types.is_bool_dtype(s):
+            cols[c] = s.map({True: "true", False: "false"}).astype(object)
+        elif pd.api.types.is_numeric_dtype(s):
+            v = js_number_str(s.to_numpy(dtype=np.float64, na_value=np.nan))
+            cols[c] = pd.Series(np.where(s.isna().to_numpy(), "", v), index=df.index, dtype=object)
+        else:
+            cols[c] = s.astype(object).where(s.notna(), "").astype(str)
+    return pd.DataFrame(cols, index=df.index)
+
+
+# ───────────────────────────────────────────────
+# 스펙 적용 (변환 / 서빙 공용)
+# ───────────────────────────────────────────────
+def build_steps(recommendations: list[dict], target: str | None = None) -> list[dict]:
+    """권고 → 단계 목록 (TS 와 같은 순서: fillna 전부 → normalize 전부 → encoding 전부)
+
+    target: 학습 타깃 컬럼. 스케일/인코딩은 건너뜀 (타깃이 바뀌면 학습·지표·/predict 가 모두 변환된 단위가 됨)
+    """
+    steps = []
+    for r in recommendations:
+        if r.get("fillna") == "drop":
+            steps.append({"op": "drop", "column": r["column"]})
+        elif r.get("fillna") in ("mean", "mode"):
+            steps.append({"op": "fill", "column": r["column"], "strategy": r["fillna"]})
+    for r in recommendations:
+        if target is not None and r["column"] == target:
+            continue
+        if r.get("normalize") in ("minmax", "zscore"):
+            steps.append({"op": "scale", "column": r["column"], "method": r["normalize"]})
+    for r in recommendations:
+        if target is not None and r["column"] == target:
+            continue
+        if r.get("encoding") in ("label", "onehot"):
+            steps.append({"op": r["encoding"], "column": r["column"]})
+    return steps
+
+
+def _apply_values(values: pd.Series, step: dict) -> pd.Series:
+    """fill / scale 단계를 한 컬럼(문자열)에 적용"""
+    op = step["op"]
+    if op == "fill":
+        if step.get("value") is None:
+            return values
+        return values.where(~is_missing(values), step["value"])
+    if op == "scale":
+        p = step.get("params")
+        if p is None:
+            return values
+        x = js_parse_float(values)
+        ok = ~np.isnan(x)
+        if step["method"] == "zscore":
+            y = np.zeros_like(x) if p["std"] == 0 else (x - p["mean"]) / p["std"]
+        else:
+            y = np.zeros_like(x) if p["max"] == p["min"] else (x - p["min"]) / (p["max"] - p["min"])
+        return pd.Series(np.where(ok, js_number_str(y), values.to_numpy(dtype=object)),
+                         index=values.index, dtype=object)
+    return values
+
+
+def apply_spec(df: pd.DataFrame, spec: dict, counters: dict | None = None, serving: bool = False) -> pd.DataFrame:
+    """fit 된 스펙을 청크(또는 서빙 입력)에 적용 → 문자열 DataFrame
+
+    serving=True: 행을 지우는 drop 단계는 건너뛰고(행마다 예측이 필요), 처음 보는 범주는 label → 빈 값 / onehot → 전부 0
+    counters: {단계 번호: 처리 개수} 누적 (drop/fill 메시지용)
+    """
+    df = _as_js_strings(df) if serving else df.copy()
+    for i, step in enumerate(spec["steps"]):
+        op, c = step["op"], step["column"]
+        present = c in df.columns
+        if op == "drop":
+            if serving:
+                continue
+            m = is_missing(df[c]) if present else np.ones(len(df), dtype=bool)
+            if counters is not None:
+                counters[i] = counters.get(i, 0) + int(m.sum())
+            df = df[~m]
+        elif op in ("fill", "scale"):
+            if not present:
+                continue
+            if op == "fill" and counters is not None and step.get("value") is not None:
+                counters[i] = counters.get(i, 0) + int(is_missing(df[c]).sum())
+            df[c] = _apply_values(df[c], step)
+        elif op == "label":
+            mapping = step["mapping"]
+            if present:
+                df[c] = df[c].map(lambda v: str(mapping[v]) if v in mapping else "").astype(object)
+            else:
+                df[c] = str(mapping.get("undefined", ""))     # TS: 없는 컬럼 → labelMap[undefined]
+        elif op == "onehot":
+            cats = step["categories"]
+            vals = df[c].to_numpy(dtype=object) if present else np.full(len(df), "undefined", dtype=object)
+            new = {f"{c}_{v}": np.where(vals == v, "1", "0").astype(object) for v in cats}
+            if present:
+                df = df.drop(columns=[c])
+            df = df.assign(**new) if new else df
+    return df[js_key_order([str(c) for c in df.columns])]
+
+
+# ───────────────────────────────────────────────
+# fit
+# ───────────────────────────────────────────────
+def _header(file_path: str) -> list[str]:
+    return [str(c) for c in pd.read_csv(file_path, nrows=0, **csv_dialect(file_path)).columns]
+
+
+def _relevant(steps: list[dict], i: int) -> set[str]:
+    """i 단계 직전 상태에 영향을 주는 컬럼 (자기 컬럼 + 앞선 drop 컬럼)"""
+    return {steps[i]["column"]} | {s["column"] for s in steps[:i] if s["op"] == "drop"}
+
+
+def _deps(steps: list[dict], i: int, needs_fit: set[int]) -> set[int]:
+    """i 단계의 통계를 내기 전에 fit 이 끝나야 하는 앞 단계"""
+    cols = _relevant(steps, i)
+    return {k for k in range(i) if k in needs_fit and steps[k]["column"] in cols}
+
+
+def _prefix_view(chunk: pd.DataFrame, steps: list[dict], i: int) -> pd.Series | None:
+    """i 단계 직전 상태의 i 컬럼 값 (앞선 drop 으로 남은 행, 같은 컬럼의 앞 단계 적용 후)"""
+    cols = _relevant(steps, i)
+    prefix = [s for s in steps[:i] if s["column"] in cols]
+    df = apply_spec(chunk, {"steps": prefix}) if prefix else chunk
+    return df[steps[i]["column"]] if steps[i]["column"] in df.columns else None
+
+
+class _Fit:
+    """단계 하나의 통계 누적기"""
+
+    def __init__(self, step: dict):
+        self.step = step
+        self.phase = 1
+        self.nonmissing = 0
+        self.n = 0
+        self.sum = 0.0
+        self.sq = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.counts: dict[str, int] = {}
+        self.seen: dict[str, None] = {}
+
+    def add(self, v: pd.Series | None):
+        op = self.step["op"]
+        if v is None:
+            return
+        if op == "fill":
+            present = v[~is_missing(v)]
+            self.nonmissing += len(present)
+            if self.step["strategy"] == "mean":
+                x = js_parse_float(present)
+                x = x[~np.isnan(x)]
+                self.n += x.size
+                self.sum = _seq_sum(self.sum, x)
+            else:
+                for key, cnt in present.astype(str).value_counts(sort=False).items():
+                    self.counts[key] = self.counts.get(key, 0) + int(cnt)
+        elif op == "scale":
+            x = js_parse_float(v)
+            x = x[~np.isnan(x)]
+            if self.phase == 1:
+                self.n += x.size
+                self.sum = _seq_sum(self.sum, x)
+                if x.size:
+                    self.min = min(self.min, float(x.min()))
+                    self.max = max(self.max, float(x.max()))
+            else:
+                self.sq = _seq_sum(self.sq, (x - self.mean) ** 2)
+        else:
+            for key in pd.unique(v.astype(str).to_numpy(dtype=object)):
+                self.seen.setdefault(key, None)
+
+    def finish(self) -> bool:
+        """→ 끝났으면 True (zscore 는 평균을 안 뒤 한 번 더 읽어 분산 계산)"""
+        s, op = self.step, self.step["op"]
+        if op == "fill":
+            s["value"], s["reason"] = None, None
+            if self.nonmissing == 0:
+                s["reason"] = "empty"
+            elif s["strategy"] == "mean":
+                if self.n == 0:
+                    s["reason"] = "non_numeric"
+                else:
+                    s["value"] = js_number_str([self.sum / self.n])[0]
+            else:
+                # Object.entries 순서(정수형 키 먼저)에서 처음 나오는 최빈값
+                order = js_key_order(list(self.counts))
+                s["value"] = max(order, key=lambda k: (self.counts[k], -order.index(k)))
+            return True
+        if op == "scale":
+            if self.n == 0:
+                s["params"] = None
+                return True
+            if self.phase == 1:
+                self.mean = self.sum / self.n
+                s["params"] = {"min": self.min, "max": self.max, "mean": self.mean}
+                if s["method"] == "zscore":
+                    self.phase = 2
+                    return False
+                return True
+            s["params"]["std"] = float(np.sqrt(self.sq / self.n))
+            return True
+        keys = list(self.seen)
+        if op == "label":
+            s["mapping"] = {k: i for i, k in enumerate(keys)}
+        else:
+            s["categories"] = keys
+        return True
+
+
+def fit(file_path: str, recommendations: list[dict], chunk_rows: int = CHUNK_ROWS,
+        target: str | None = None) -> dict:
+    header = _header(file_path)
+    steps = build_steps(recommendations, target)
+    needs_fit = set()
+    for i, s in enumerate(steps):
+        if s["op"] == "drop":
+            continue
+        if s["column"] not in header:
+            # 없는 컬럼: TS 와 같게 (fill/scale 은 데이터 없음, encoding 은 undefined 한 범주)
+            if s["op"] == "fill":
+                s.update(value=None, reason="empty")
+            elif s["op"] == "scale":
+                s["params"] = None
+            elif s["op"] == "label":
+                s["mapping"] = {"undefined": 0}
+            else:
+                s["categories"] = ["undefined"]
+            continue
+        needs_fit.add(i)
+
+    fits = {i: _Fit(steps[i]) for i in needs_fit}
+    done: set[int] = set()
+    passes = 0
+    while len(done) < len(needs_fit):
+        ready = [i for i in sorted(needs_fit - done) if _deps(steps, i, needs_fit) <= done]
+        cols = set().union(*(_relevant(steps, i) for i in ready))
+        for chunk in iter_text_frames(file_path, cols & set(header), chunk_rows):
+            for i in ready:
+                fits[i].add(_prefix_view(chunk, steps, i))
+        passes += 1
+        for i in ready:
+            if fits[i].finish():
+                done.add(i)
+
+    return {"version": SPEC_VERSION, "source": os.path.basename(file_path), "input_columns": header,
+            "target": target, "steps": steps, "fit_passes": passes}
+
+
+# ───────────────────────────────────────────────
+# 실행
+# ───────────────────────────────────────────────
+def messages(spec: dict, counters: dict) -> list[str]:
+    out = []
+    for i, s in enumerate(spec["steps"]):
+        c, op = s["column"], s["op"]
+        if op == "drop":
+            out.append(f"컬럼 {c} 결측치 처리 완료 (drop), 처리 개수: {counters.get(i, 0)}")
+        elif op == "fill":
+            if s.get("reason") == "empty":
+                out.append(f"컬럼 {c}: 결측치가 없거나 데이터 없음")
+            elif s.get("reason") == "non_numeric":
+                out.append(f"컬럼 {c}: 숫자형 데이터 없음")
+            else:
+                out.append(f"컬럼 {c} 결측치 처리 완료 ({s['strategy']}), 처리 개수: {counters.get(i, 0)}")
+        elif op == "scale":
+            out.append(f"컬럼 {c}: 숫자형 데이터 없음" if s.get("params") is None
+                       else f"컬럼 {c} 스케일링 완료 ({s['method']})")
+        else:
+            out.append(f"컬럼 {c} 인코딩 완료 ({op})")
+    return out
+
+
+def spec_path(output_csv) -> Path:
+    p = Path(output_csv)
+    return p.with_name(p.name + ".spec.json")
+
+
+def load_spec(csv_path) -> dict | None:
+    """CSV 옆의 변환기 스펙 (전처리 결과로 학습할 때 모델 메타데이터에 넣음)"""
+    try:
+        return json.loads(spec_path(csv_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def run(file_path: str, output_dir: str, recommendations: list[dict], output_name: str | None = None,
+        chunk_rows: int = CHUNK_ROWS, target: str | None = None) -> dict:
+    t0 = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    spec = fit(file_path, recommendations, chunk_rows, target)
+    t_fit = time.perf_counter() - t0
+
+    out_path = Path(output_dir) / (output_name or f"preprocessed_{Path(file_path).name}")
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    counters: dict[int, int] = {}
+    rows, out_cols = 0, None
+    with tmp.open("w", encoding="utf-8", newline="") as f:
+        for chunk in iter_text_frames(file_path, None, chunk_rows):
+            df = apply_spec(chunk, spec, counters)
+            if out_cols is None and len(df):
+                out_cols = list(df.columns)
+            if len(df):
+                df.to_csv(f, header=rows == 0, index=False, lineterminator="\n")
+                rows += len(df)
+    os.replace(tmp, out_path)      # 남은 행이 없으면 (TS 처럼) 빈 파일
+
+    spec["output_columns"] = out_cols or []
+    spec["rows"] = rows
+    sp = spec_path(out_path)
+    write_artifact(sp, json.dumps(spec, ensure_ascii=False, indent=2))
+    record_artifacts(output_dir, [out_path, sp], step="preprocess")
+    return {
+        "preprocessedFilePath": str(out_path),
+        "specPath": str(sp),
+        "messages": messages(spec, counters),
+        "rows": rows,
+        "fitPasses": spec["fit_passes"],
+        "seconds": {"fit": round(t_fit, 3), "total": round(time.perf_counter() - t0, 3)},
+    }
+
+
+def main():
+    stage_metrics.track("preprocess_engine")
+    ap = argparse.ArgumentParser()
+    ap.add_argument("file_path")
+    ap.add_argument("output_dir")
+    ap.add_argument("--recommendations", required=True, help="PreprocessStep[] JSON")
+    ap.add_argument("--output-name", default=None)
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    ap.add_argument("--target", default=None, help="학습 타깃 컬럼 (스케일/인코딩 제외)")
+    args = ap.parse_args()
+    try:
+        recs = json.loads(args.recommendations)
+    except ValueError as e:
+        print(f"recommendations JSON 파싱 실패: {e}", file=sys.stderr)
+        sys.exit(2)
+    out = run(args.file_path, args.output_dir, recs or [], args.output_name, args.chunk_rows, args.target)
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
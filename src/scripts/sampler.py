@@ -0,0 +1,328 @@
+"""
+빠른 분석용 행 표본 (fast mode)
+
+수천만 행 업로드를 탐색할 때는 정확한 통계/차트/점수가 필요 없으므로, 업로드에서 재현 가능한 표본을
+한 번만 뽑아 `src/uploads/{sessionId}/sample_<행수>_s<시드>[_<층화컬럼>]_<파일명>` 로 저장하고
+워크플로(기초 분석 · 상관 · 시각화 · 학습)는 이 파일로 돌린다. 이후 단계의 시간은 표본 크기에만 비례한다.
+
+표본 추출 (2 패스, 메모리는 표본 크기에 비례)
+1. 키 패스 : 행마다 시드 고정 난수 키를 주고 키가 가장 작은 n 개(bottom-k)의 행 번호만 유지
+             — 균등 무작위 비복원 표본과 같고, 청크 크기와 무관하게 같은 시드면 같은 표본
+             층화(stratify 컬럼)면 층별로 bottom-k 를 유지하다가 끝에서 층 크기 비례로 배분
+             (각 층 최소 1행). 층이 MAX_STRATA 를 넘으면 균등 표본으로 전환
+2. 추출 패스 : 뽑힌 행 번호만 청크에서 골라 CSV 로 이어 쓰기
+
+표본 옆 `<표본>.sample.json` 에 원본(크기, mtime)과 전체/표본 행 수를 남겨 같은 설정이면 다시 뽑지 않는다.
+sampling_report() 는 표본 결과에 신뢰구간(평균, 결측 비율, 상관계수, 모델 점수)을 붙인다.
+
+사용 예)
+    python src/scripts/sampler.py src/uploads/<sessionId>/data.csv --rows 100000 --seed 42
+"""
+import argparse
+import json
+import math
+import os
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+from columnar_store import column_names, iter_text_batches
+
+SAMPLE_VERSION = 1
+DEFAULT_ROWS = int(os.environ.get("FAST_SAMPLE_ROWS", "100000"))
+DEFAULT_SEED = int(os.environ.get("FAST_SAMPLE_SEED", "42"))
+MAX_STRATA = 100
+Z95 = 1.959964
+
+_SAFE_RE = re.compile(r"[^0-9A-Za-z가-힣_-]+")
+
+
+# ───────────────────────────────────────────────
+# 경로 / 캐시 키
+# ───────────────────────────────────────────────
+def sample_path(file_path, rows: int, seed: int, stratify: str | None = None) -> Path:
+    p = Path(file_path)
+    tag = f"_{_SAFE_RE.sub('-', stratify)[:32]}" if stratify else ""
+    return p.with_name(f"sample_{rows}_s{seed}{tag}_{p.name}")
+
+
+def info_path(sample) -> Path:
+    p = Path(sample)
+    return p.with_name(p.name + ".sample.json")
+
+
+def _source_key(file_path) -> dict:
+    st = os.stat(file_path)
+    return {"source": Path(file_path).name, "source_size": st.st_size, "source_mtime_ns": st.st_mtime_ns}
+
+
+def load_info(file_path, rows: int, seed: int, stratify: str | None = None) -> dict | None:
+    """같은 원본/설정으로 뽑아 둔 표본 정보 (없거나 원본이 바뀌었으면 None)"""
+    out = sample_path(file_path, rows, seed, stratify)
+    try:
+        info = json.loads(info_path(out).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    want = {**_source_key(file_path), "version": SAMPLE_VERSION, "rows": rows, "seed": seed, "stratify": stratify}
+    if any(info.get(k) != v for k, v in want.items()) or not out.exists():
+        return None
+    return info
+
+
+# ───────────────────────────────────────────────
+# 1. 키 패스: bottom-k 행 번호
+# ───────────────────────────────────────────────
+class _BottomK:
+    """난수 키가 가장 작은 k 개의 (키, 행 번호). 버퍼가 2k 를 넘을 때만 압축"""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.keys: list[np.ndarray] = []
+        self.idx: list[np.ndarray] = []
+        self.size = 0
+        self.threshold = np.inf          # k 개가 찬 뒤의 k 번째 키 — 이보다 큰 키는 볼 필요 없음
+
+    def add(self, keys: np.ndarray, idx: np.ndarray):
+        keep = keys < self.threshold
+        if not keep.all():
+            keys, idx = keys[keep], idx[keep]
+        if keys.size == 0:
+            return
+        self.keys.append(keys)
+        self.idx.append(idx)
+        self.size += keys.size
+        if self.size > 2 * self.k:
+            self._compact()
+
+    def _compact(self):
+        keys, idx = np.concatenate(self.keys), np.concatenate(self.idx)
+        if keys.size > self.k:
+            part = np.argpartition(keys, self.k - 1)[:self.k]
+            keys, idx = keys[part], idx[part]
+            self.threshold = float(keys.max())
+        self.keys, self.idx, self.size = [keys], [idx], keys.size
+
+    def take(self, k: int) -> np.ndarray:
+        """키 순서로 앞에서 k 개의 행 번호"""
+        if not self.keys:
+            return np.empty(0, dtype=np.int64)
+        keys, idx = np.concatenate(self.keys), np.concatenate(self.idx)
+        if keys.size > k:
+            idx = idx[np.argpartition(keys, k - 1)[:k]] if k > 0 else idx[:0]
+        return idx
+
+    def merge(self, other: "_BottomK"):
+        for keys, idx in zip(other.keys, other.idx):
+            self.add(keys, idx)
+
+
+def _allocate(counts: dict, rows: int) -> dict:
+    """층 크기 비례 배분 (최대 나머지 방식, 각 층 최소 1행)"""
+    total = sum(counts.values())
+    exact = {s: rows * c / total for s, c in counts.items()}
+    alloc = {s: min(counts[s], int(v)) for s, v in exact.items()}
+    rest = rows - sum(alloc.values())
+    for s in sorted(exact, key=lambda s: exact[s] - int(exact[s]), reverse=True):
+        if rest <= 0:
+            break
+        if alloc[s] < counts[s]:
+            alloc[s] += 1
+            rest -= 1
+    for s in counts:
+        if alloc[s] == 0:
+            donor = max(alloc, key=alloc.get)
+            if alloc[donor] > 1:
+                alloc[donor] -= 1
+                alloc[s] = 1
+    return alloc
+
+
+def select_rows(file_path: str, rows: int, seed: int, stratify: str | None = None) -> tuple[np.ndarray, dict]:
+    """→ (정렬된 표본 행 번호, 정보)"""
+    names = column_names(file_path)
+    if stratify and stratify not in names:
+        stratify = None
+    key_col = stratify or names[0]
+
+    rng = np.random.default_rng(seed)
+    overall = _BottomK(rows)
+    strata: dict[str, _BottomK] | None = {} if stratify else None
+    counts: dict[str, int] = {}
+    total = 0
+    for batch in iter_text_batches(file_path, [key_col]):
+        n = batch.num_rows
+        keys = rng.random(n)
+        idx = np.arange(total, total + n, dtype=np.int64)
+        total += n
+        if strata is None:
+            overall.add(keys, idx)
+            continue
+        values = batch.column(0).dictionary_encode()
+        codes = values.indices.to_numpy(zero_copy_only=False)
+        for code, name in enumerate(values.dictionary.to_pylist()):
+            m = codes == code
+            counts[name] = counts.get(name, 0) + int(m.sum())
+            strata.setdefault(name, _BottomK(rows)).add(keys[m], idx[m])
+        if len(strata) > MAX_STRATA:
+            # 층이 너무 많음 → 균등 표본 (층별 bottom-k 의 합집합에 전체 bottom-k 가 들어 있으므로 이어서 진행 가능)
+            for b in strata.values():
+                overall.merge(b)
+            strata = None
+
+    method = "uniform"
+    if total <= rows:
+        selected, method = np.arange(total, dtype=np.int64), "all"
+    elif strata is not None:
+        alloc = _allocate(counts, rows)
+        selected = np.concatenate([strata[s].take(alloc[s]) for s in counts])
+        method = "stratified"
+    else:
+        selected = overall.take(rows)
+    info = {"rows_total": total, "rows_sampled": int(selected.size), "method": method,
+            "stratify": stratify if method == "stratified" else None}
+    if method == "stratified":
+        info["strata"] = {s: {"rows": counts[s], "sampled": alloc[s]}
+                          for s in sorted(counts, key=counts.get, reverse=True)[:50]}
+    return np.sort(selected), info
+
+
+# ───────────────────────────────────────────────
+# 2. 추출 패스
+# ───────────────────────────────────────────────
+def write_rows(file_path: str, selected: np.ndarray, out: Path):
+    """뽑힌 행만 원문 문자열 그대로 CSV 로 (헤더 포함, 쉼표/UTF-8)"""
+    tmp = out.with_name(out.name + ".tmp")
+    offset, written_header = 0, False
+    with tmp.open("w", encoding="utf-8", newline="") as f:
+        for batch in iter_text_batches(file_path):
+            n = batch.num_rows
+            lo, hi = np.searchsorted(selected, [offset, offset + n])
+            if not written_header:
+                batch.slice(0, 0).to_pandas().to_csv(f, index=False, lineterminator="\n")
+                written_header = True
+            if hi > lo:
+                part = batch.take(pa.array(selected[lo:hi] - offset))
+                part.to_pandas().to_csv(f, index=False, header=False, lineterminator="\n")
+            offset += n
+    os.replace(tmp, out)
+
+
+def ensure_sample(file_path, rows: int = DEFAULT_ROWS, seed: int = DEFAULT_SEED,
+                  stratify: str | None = None) -> tuple[Path, dict]:
+    """표본 파일 경로와 정보. 같은 설정의 표본이 있으면 그대로, 없으면 뽑아서 저장"""
+    out = sample_path(file_path, rows, seed, stratify)
+    info = load_info(file_path, rows, seed, stratify)
+    if info is not None:
+        info["reused"] = True
+        return out, info
+    t0 = time.perf_counter()
+    selected, info = select_rows(str(file_path), rows, seed, stratify)
+    write_rows(str(file_path), selected, out)
+    info.update(_source_key(file_path))
+    info.update({"version": SAMPLE_VERSION, "rows": rows, "seed": seed, "stratify": stratify,
+                 "file": out.name, "seconds": round(time.perf_counter() - t0, 3)})
+    info_path(out).write_text(json.dumps(info, ensure_ascii=False), encoding="utf-8")
+    info["reused"] = False
+    return out, info
+
+
+# ───────────────────────────────────────────────
+# 신뢰구간
+# ───────────────────────────────────────────────
+def _fpc(n: int, N: int) -> float:
+    """유한 모집단 보정 (표본이 전체에 가까울수록 구간이 좁아짐)"""
+    return math.sqrt((N - n) / (N - 1)) if N > 1 and n < N else 0.0 if n >= N else 1.0
+
+
+def mean_interval(mean: float, std: float, n: int, N: int) -> list[float] | None:
+    if n < 2 or mean is None or std is None:
+        return None
+    half = Z95 * std / math.sqrt(n) * _fpc(n, N)
+    return [mean - half, mean + half]
+
+
+def proportion_interval(k: int, n: int) -> list[float] | None:
+    """Wilson 구간 (비율이 0/1 근처여도 안정적)"""
+    if n <= 0:
+        return None
+    p = k / n
+    denom = 1 + Z95 ** 2 / n
+    center = (p + Z95 ** 2 / (2 * n)) / denom
+    half = Z95 * math.sqrt(p * (1 - p) / n + Z95 ** 2 / (4 * n * n)) / denom
+    return [max(0.0, center - half), min(1.0, center + half)]
+
+
+def corr_interval(r: float, n: int) -> list[float] | None:
+    """Fisher z 변환 구간"""
+    if n <= 3 or r is None or not math.isfinite(r):
+        return None
+    if abs(r) >= 1:
+        return [r, r]
+    z = math.atanh(r)
+    half = Z95 / math.sqrt(n - 3)
+    return [math.tanh(z - half), math.tanh(z + half)]
+
+
+def _num(v):
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return None
+    return v if math.isfinite(v) else None
+
+
+def sampling_report(info: dict, wf: dict | None, corr: dict | None = None, ml_report: dict | None = None,
+                    top_pairs: int = 10) -> dict:
+    """표본 실행 결과에 붙이는 요약: 표본 정보 + 평균/결측 비율/상관계수/모델 점수의 95% 구간
+
+    층화 표본은 층 크기 비례 배분이므로 단순 무작위 표본 공식을 그대로 쓴다 (보수적인 근사).
+    """
+    n, N = int(info.get("rows_sampled", 0)), int(info.get("rows_total", 0))
+    out = {
+        "rows": n, "totalRows": N, "fraction": round(n / N, 6) if N else None, "requestedRows": info.get("rows"),
+        "method": info.get("method"), "seed": info.get("seed"), "stratify": info.get("stratify"),
+        "file": info.get("file"), "strata": info.get("strata"),
+        "columns": [], "correlations": [], "model": None,
+    }
+    for c in (wf or {}).get("columnStats") or []:
+        missing = int(c.get("missing") or 0)
+        item = {"column": c.get("column"), "missingPct": missing / n if n else None,
+                "missingPctCI": proportion_interval(missing, n)}
+        mean, std = _num(c.get("mean")), _num(c.get("std"))
+        if mean is not None:
+            item.update(mean=mean, meanCI=mean_interval(mean, std, n - missing, N))
+        out["columns"].append(item)
+
+    headers, rows = (corr or {}).get("headers") or [], (corr or {}).get("rows") or []
+    pairs = []
+    for i, row in enumerate(rows):
+        for j in range(i + 1, min(len(headers), len(row["vals"]))):
+            r = _num(row["vals"][j])
+            if r is not None:
+                pairs.append((abs(r), row["row"], headers[j], r))
+    for _, a, b, r in sorted(pairs, key=lambda t: t[0], reverse=True)[:top_pairs]:
+        out["correlations"].append({"col1": a, "col2": b, "r": r, "ci": corr_interval(r, n)})
+
+    metric = (ml_report or {}).get("metric")
+    if isinstance(metric, dict):
+        out["model"] = {"model": ml_report.get("model"), "metric": metric.get("name"),
+                        "value": metric.get("value"), "ci": metric.get("ci95"), "nTest": metric.get("n_test")}
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("file_path")
+    ap.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    ap.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    ap.add_argument("--stratify", default=None)
+    args = ap.parse_args()
+    out, info = ensure_sample(args.file_path, args.rows, args.seed, args.stratify)
+    print(json.dumps({"samplePath": str(out), **info}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+규칙 기반 컬럼/전처리/모델 선택기 (src/tools/SelectorTool.ts 의 파이썬 판)
+
+LLM 없이 도는 로컬 워크플로(local_workflow.py)가 쓰며, 출력은 SelectorOutput 스키마 그대로다.
+    selectedColumns / recommendedPairs / preprocessingRecommendations /
+    targetColumn / problemType / mlModelRecommendation(model, score, reason, params, alternatives)
+
+규칙도 TS 와 같다.
+- 선택 컬럼: 이름에 id / code 가 들어간 컬럼 제외
+- 추천 페어: 선택 컬럼의 모든 쌍
+- 전처리: 결측 있으면 numeric→mean, 그 외→mode / numeric 은 std>1 → zscore, 아니면 minmax /
+          범주형은 unique<=10 → onehot, 아니면 label
+          (타깃은 제외 — 스케일/인코딩하면 학습·지표·예측이 변환된 단위가 됨. 결측이 있으면 그 행만 drop)
+- 타깃: hint.targetColumn, 없으면 마지막 컬럼 / 문제 유형: hint.problemType, 없으면 타깃이 숫자면 regression
+
+단, 숫자형 판정은 basic_analysis 의 dtype("number") 도 숫자로 본다 (WorkflowTool.numericColumns 와 같은 기준).
+"""
+NUMERIC_DTYPES = {"numeric", "number", "int", "integer", "float", "double"}
+
+MODEL_CANDIDATES = {
+    "regression": [
+        {"model": "XGBoostRegressor", "score": 0.9, "reason": "수치형 중심이며 컬럼 수가 많아 부스팅 계열이 유리",
+         "params": {"max_depth": 6, "learning_rate": 0.1}},
+        {"model": "RandomForestRegressor", "score": 0.85, "reason": "트리 기반 모델로 범용성이 높음",
+         "params": {"n_estimators": 100, "max_depth": 5}},
+        {"model": "LinearRegression", "score": 0.7, "reason": "선형 관계가 강할 경우 빠르고 간단하게 적용 가능",
+         "params": {}},
+    ],
+    "classification": [
+        {"model": "XGBoostClassifier", "score": 0.91, "reason": "수치형 중심 + 컬럼 수 많음",
+         "params": {"max_depth": 6, "learning_rate": 0.1}},
+        {"model": "RandomForestClassifier", "score": 0.88, "reason": "범용 트리 기반 분류기",
+         "params": {"n_estimators": 100, "max_depth": 5}},
+        {"model": "LogisticRegression", "score": 0.75, "reason": "단순한 이진 분류 문제에 적합", "params": {}},
+    ],
+}
+
+
+def is_numeric(stat: dict) -> bool:
+    return str(stat.get("dtype") or "").lower() in NUMERIC_DTYPES
+
+
+def numeric_columns(column_stats: list[dict]) -> list[str]:
+    return [c["column"] for c in column_stats if is_numeric(c)]
+
+
+def recommend_model(problem_type: str) -> dict:
+    first, *rest = MODEL_CANDIDATES[problem_type]
+    return {**first, "alternatives": [dict(c) for c in rest]}
+
+
+def override_model(rec: dict | None, model: str | None) -> dict | None:
+    """사용자가 지정한 모델로 추천 교체 (WorkflowTool.overrideModel 과 같은 규칙)"""
+    if not model or (rec or {}).get("model") == model:
+        return rec
+    alt = next((a for a in (rec or {}).get("alternatives") or [] if a.get("model") == model), None)
+    others = [rec, *rec.get("alternatives", [])] if rec else []
+    return {
+        "model": model,
+        "score": (alt or {}).get("score", 0),
+        "reason": "사용자 지정 모델",
+        "params": (alt or {}).get("params", {}),
+        "alternatives": [{k: a.get(k) for k in ("model", "score", "reason", "params")}
+                         for a in others if a.get("model") != model],
+    }
+
+
+def _preprocess_step(stat: dict) -> dict:
+    numeric = is_numeric(stat)
+    step = {"column": stat["column"]}
+    if (stat.get("missing") or 0) > 0:
+        step["fillna"] = "mean" if numeric else "mode"
+    if numeric:
+        step["normalize"] = "zscore" if (stat.get("std") or 0) > 1 else "minmax"
+    else:
+        step["encoding"] = "onehot" if (stat.get("unique") or 0) <= 10 else "label"
+    return step
+
+
+def select(column_stats: list[dict], hint: dict | None = None) -> dict:
+    """columnStats (+ hint) → SelectorOutput"""
+    if not column_stats:
+        return {"selectedColumns": [], "recommendedPairs": [], "preprocessingRecommendations": [],
+                "targetColumn": None, "problemType": None, "mlModelRecommendation": None}
+    hint = hint or {}
+
+    selected = [c["column"] for c in column_stats
+                if "id" not in c["column"].lower() and "code" not in c["column"].lower()]
+    pairs = [{"column1": a, "column2": b} for i, a in enumerate(selected) for b in selected[i + 1:]]
+
+    target = hint.get("targetColumn") or column_stats[-1]["column"]
+    target_stat = next((c for c in column_stats if c["column"] == target), None)
+    problem_type = hint.get("problemType") or (
+        "regression" if target_stat is not None and is_numeric(target_stat) else "classification")
+
+    preprocessing = [_preprocess_step(c) for c in column_stats if c["column"] != target]
+    if target_stat is not None and (target_stat.get("missing") or 0) > 0:
+        preprocessing.append({"column": target, "fillna": "drop"})
+
+    return {
+        "selectedColumns": selected,
+        "recommendedPairs": pairs,
+        "preprocessingRecommendations": preprocessing,
+        "targetColumn": target,
+        "problemType": problem_type,
+        "mlModelRecommendation": recommend_model(problem_type),
+    }
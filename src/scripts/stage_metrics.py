@@ -0,0 +1,128 @@
+"""
+파이썬 엔진 실행 지표 (소요 시간 / import 시간 / CPU / 최대 RSS)
+
+오케스트레이터(WorkflowTool)가 단계마다 환경변수로 기록 파일과 단계 이름을 넘겨주면
+(STAGE_METRICS_FILE, STAGE_METRICS_STEP) 각 스크립트가 종료 시 한 줄(JSON)을 덧붙인다.
+환경변수가 없으면(직접 실행 등) 아무것도 하지 않는다.
+
+    {"step": "train", "script": "train_ml_model", "seconds": 3.2, "importSeconds": 1.1,
+     "cpuSeconds": 5.0, "peakRssMb": 412.3, "pid": 1234}
+
+사용 예) main() 첫 줄에서
+    stage_metrics.track("train_ml_model")
+
+상주 계산 워커(compute_worker.py)는 프로세스가 끝나지 않으므로 작업 단위로 measure() 를 쓴다
+(파일/단계는 요청 프레임으로 받음, importSeconds 는 0 — 라이브러리는 이미 올라와 있음).
+
+서버 프로세스 안에서 도는 단계(로컬 엔진, 캐시 복원, 표본 추출)는 최대 RSS 가 서버의 평생 최댓값이라
+의미가 없다 → peakRssMb 대신 rss_fields() 로 단계 종료 시점 RSS 와 시작 대비 증감을 남긴다.
+"""
+import atexit
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:         # Windows
+    resource = None
+
+
+def _process_start() -> float:
+    """프로세스 시작 시각(epoch). /proc 가 없으면 지금"""
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime", encoding="ascii") as f:
+            uptime = float(f.read().split()[0])
+        started_ago = uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return time.time() - max(started_ago, 0.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.time()
+
+
+def peak_rss_mb(who: str = "self") -> float | None:
+    """최대 RSS(MB). who="children" 이면 종료된 자식 프로세스(차트 렌더 워커 등) 중 최댓값"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN if who == "children" else resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1 << 20) if sys.platform == "darwin" else rss / 1024, 1)     # macOS 는 바이트, 리눅스는 KB
+
+
+def current_rss_mb() -> float | None:
+    """현재 RSS(MB) — /proc/self/statm (없으면 None)"""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1 << 20), 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def rss_fields(start_mb: float | None) -> dict:
+    """프로세스 안 단계용: {"rssMb": 종료 시점 RSS, "rssDeltaMb": 시작 대비 증감} (동시에 도는 단계가 있으면 근사)"""
+    end = current_rss_mb()
+    if end is None:
+        return {}
+    out = {"rssMb": end}
+    if start_mb is not None:
+        out["rssDeltaMb"] = round(end - start_mb, 1)
+    return out
+
+
+def _append(path: str, rec: dict):
+    try:
+        # 한 번의 append → 병렬로 도는 스크립트끼리 줄이 섞이지 않음
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec) + "\n")
+    except OSError:
+        pass
+
+
+def track(script: str):
+    path = os.environ.get("STAGE_METRICS_FILE")
+    if not path:
+        return
+    started = _process_start()
+    imported = time.time()
+
+    def _write():
+        rec = {
+            "step": os.environ.get("STAGE_METRICS_STEP") or None,
+            "script": script,
+            "seconds": round(time.time() - started, 3),
+            "importSeconds": round(imported - started, 3),
+            "cpuSeconds": round(time.process_time(), 3),
+            "peakRssMb": peak_rss_mb(),
+            "childPeakRssMb": peak_rss_mb("children") or None,
+            "pid": os.getpid(),
+        }
+        _append(path, rec)
+
+    atexit.register(_write)
+
+
+@contextmanager
+def measure(script: str, path: str | None = None, step: str | None = None):
+    """상주 프로세스 안의 작업 1건을 스크립트 실행 1번처럼 기록"""
+    if not path:
+        yield
+        return
+    t0 = time.time()
+    cpu0 = time.process_time()
+    try:
+        yield
+    finally:
+        _append(path, {
+            "step": step or None,
+            "script": script,
+            "seconds": round(time.time() - t0, 3),
+            "importSeconds": 0.0,
+            "cpuSeconds": round(time.process_time() - cpu0, 3),
+            "peakRssMb": peak_rss_mb(),
+            "childPeakRssMb": peak_rss_mb("children") or None,
+            "pid": os.getpid(),
+            "worker": True,
+        })
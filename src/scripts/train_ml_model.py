@@ -1,109 +1,576 @@
-import sys
+"""
+추천 모델 학습 + 평가 (MachineLearningTool 이 호출)
+
+대용량 대응 학습 경로
+- 필요한 컬럼만 읽고 피처 행렬 X 는 float32 로 다운캐스트
+- --max-rows 를 넘으면 (분류는 층화) 표본 추출
+- 시간 예산(--time-budget 초): 학습 데이터가 크면 작은 층화 표본 몇 개로 학습 곡선(행 수 → 학습 시간/점수)을
+  먼저 재고, 예산 안에 끝날 만큼의 행만 사용
+- XGBoost: tree_method="hist", n_jobs, 검증 분할 기반 early stopping, 예산 초과 시 중단 콜백
+- RandomForest: 트리를 나눠 warm_start 로 추가하다가 예산이 다하면 멈춤
+
+리더보드 모드(--leaderboard, selector JSON 의 "leaderboard": true, 또는 ML_LEADERBOARD=1)
+- 후보: 추천 모델 + 셀렉터가 준 alternatives + 기본 3종(Linear/Logistic, RandomForest, XGBoost)
+- 모든 후보가 같은 float32 피처 행렬과 같은 CV 폴드를 사용
+  (선형 모델은 평균 대치 + 모델 파이프라인 — 폴드마다 학습 분할 평균으로 대치, 최종 모델/서빙도 같은 방식)
+- (후보 × 폴드) 작업을 joblib 프로세스 풀로 동시에 실행 → 벽시계 시간은 가장 느린 모델 수준
+- leaderboard_{timestamp}.csv 에 순위 / 지표 평균·표준편차 / 학습 시간 / 1천 행당 예측 지연 기록,
+  1위 모델을 학습 분할 전체로 다시 학습해 평소와 같은 결과 파일과 pkl 을 쓴다
+
+결과: ml_result_{timestamp}.txt (사람이 읽는 요약 + metric / train_time_s / rows_used)
+      ml_result_{timestamp}.json (같은 내용 + 학습 곡선 등 상세)
+      model_{timestamp}.pkl + model_{timestamp}.meta.json (서빙용 피처 목록 / 라벨 매핑)
+
+상주 계산 워커(compute_worker.py)는 run() 을 직접 호출하고, 명령행 실행은 main() 이 같은 run() 을 부른다.
+
+사용 예)
+    python src/scripts/train_ml_model.py data.csv '<selector json>' src/outputs/<sessionId> <timestamp>
+        [--time-budget 300] [--n-jobs 4] [--max-rows 2000000] [--leaderboard] [--cv-folds 3]
+    selector json 자리에 "-" 를 주면 표준입력에서 읽는다 (명령행 길이 제한 회피)
+"""
+import argparse
 import json
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, mean_squared_error
-import joblib
-import os
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 
-# ───────────────────────────────────────────────
-# 1. 인자 받아오기
-# ───────────────────────────────────────────────
-file_path = sys.argv[1]
-selector_result = json.loads(sys.argv[2]) if len(sys.argv) > 2 else {}
-output_dir = sys.argv[3]
-timestamp = sys.argv[4]
+from artifact_manifest import record as record_artifacts
+from columnar_store import column_names, numeric_columns, read_frame
+from preprocess_engine import load_spec
+import stage_metrics
 
-df = pd.read_csv(file_path)
+TIME_BUDGET = float(os.environ.get("ML_TIME_BUDGET", "300"))     # 오케스트레이터 작업 타임아웃(600초)보다 작게
+N_JOBS = int(os.environ.get("ML_N_JOBS", str(os.cpu_count() or 1)))
+MAX_ROWS = int(os.environ.get("ML_MAX_ROWS", "2000000"))
 
-# ───────────────────────────────────────────────
-# 2. 안전한 파싱 (NoneType 방지)
-# ───────────────────────────────────────────────
-target = selector_result.get("targetColumn")
-problem_type = selector_result.get("problemType", "classification")
-ml_rec = selector_result.get("mlModelRecommendation")
-
-# ✅ 기본 모델 Fallback
-if not ml_rec or not isinstance(ml_rec, dict):
-    print("[WARN] mlModelRecommendation이 None이므로 기본 모델을 사용합니다.")
-    ml_rec = {
-        "model": "LogisticRegression" if problem_type == "classification" else "LinearRegression",
-        "params": {},
-        "reason": "기본 모델 사용 (추천 없음)"
-    }
+RANDOM_STATE = 42
+TEST_SIZE = 0.2
+VALID_SIZE = 0.1                 # XGBoost early stopping 용 (학습 분할에서 떼어냄)
+EARLY_STOPPING_ROUNDS = 30
+BOOTSTRAP_ROUNDS = 200           # 평가 점수 신뢰구간용 재표본 횟수
+XGB_MAX_ROUNDS = 1000            # early stopping 이 있으니 라운드 상한은 넉넉히
+CURVE_MIN_ROWS = 50_000          # 학습 분할이 이보다 크면 학습 곡선으로 사용할 행 수를 정함
+CURVE_FRACTIONS = (0.02, 0.05, 0.1)
+BUDGET_SAFETY = 0.8              # 외삽한 학습 시간이 (남은 예산 × 이 값) 안에 들어와야 함
+RF_TREES_PER_STEP = 10
+
+# 리더보드 모드
+LEADERBOARD = os.environ.get("ML_LEADERBOARD", "0") == "1"
+CV_FOLDS = int(os.environ.get("ML_CV_FOLDS", "3"))
+LEADERBOARD_MAX_ROWS = int(os.environ.get("ML_LEADERBOARD_MAX_ROWS", "200000"))   # CV 에 쓰는 최대 행 수
+LEADERBOARD_BUDGET_SHARE = 0.6      # 전체 예산 중 후보 비교에 쓰는 비율 (나머지는 1위 모델 재학습)
+BASELINE_MODELS = {
+    "classification": ["LogisticRegression", "RandomForestClassifier", "XGBoostClassifier"],
+    "regression": ["LinearRegression", "RandomForestRegressor", "XGBoostRegressor"],
+}
+
+VALID_TYPES = ['int64', 'float64', 'bool', 'category']
 
-model_name = ml_rec.get("model", "LogisticRegression")
-params = ml_rec.get("params", {})
 
 # ───────────────────────────────────────────────
-# 3. 입력 데이터 구성
+# 1. 데이터
 # ───────────────────────────────────────────────
-# One-hot 전처리된 컬럼 이름들 확인
-target_cols = [c for c in df.columns if target in c] if target else []
-if not target_cols:
-    # fallback — 마지막 컬럼을 타깃으로 사용
-    target_cols = [df.columns[-1]]
-    print(f"[WARN] targetColumn을 찾지 못해 '{target_cols[0]}'를 타깃으로 사용합니다.")
-
-X_drop = df.drop(labels=target_cols, axis=1)
-valid_types = ['int64', 'float64', 'bool', 'category']
-X = X_drop.select_dtypes(include=valid_types)
-y = df[target_cols[0]]
-
-if problem_type == "classification":
-    le = LabelEncoder()
-    y = le.fit_transform(y)
-else:
+def load_dataset(file_path: str, target, problem_type: str):
+    """→ (X float32, y, 타깃 컬럼명, LabelEncoder | None)"""
+    # One-hot 전처리된 컬럼 이름들 확인
+    all_cols = column_names(file_path)
+    target_cols = [c for c in all_cols if target in c] if target else []
+    if not target_cols:
+        # fallback — 마지막 컬럼을 타깃으로 사용
+        target_cols = [all_cols[-1]]
+        print(f"[WARN] targetColumn을 찾지 못해 '{target_cols[0]}'를 타깃으로 사용합니다.")
+
+    # 피처는 수치/불리언 컬럼만 쓰므로 Parquet 사본이 있으면 그 컬럼 + 타깃만 읽는다
+    feature_cols = numeric_columns(file_path, include_bool=True)
+    df = read_frame(file_path, None if feature_cols is None else feature_cols + target_cols)
+
+    X = df.drop(labels=target_cols, axis=1).select_dtypes(include=VALID_TYPES)
+    y = df[target_cols[0]]
+    del df
+    X = X.astype(np.float32)
+
     le = None
+    if problem_type == "classification":
+        le = LabelEncoder()
+        y = le.fit_transform(y)
+    else:
+        y = y.to_numpy()
+    return X, y, target_cols[0], le
+
+
+def unscale_target(y: np.ndarray, spec: dict | None, target_col: str) -> np.ndarray:
+    """전처리 스펙이 타깃까지 스케일했으면 원래 단위로 되돌림 (타깃을 모르고 전처리한 예전 결과 / 채팅 경로)
+
+    학습·지표(MSE)·/predict 출력이 모두 원래 단위가 되도록 학습 전에 한 번만 적용
+    """
+    for step in (spec or {}).get("steps", []):
+        p = step.get("params")
+        if step.get("op") != "scale" or step.get("column") != target_col or p is None:
+            continue
+        y = np.asarray(y, dtype=np.float64)
+        if step["method"] == "zscore":
+            y = y * p["std"] + p["mean"]
+        else:
+            y = y * (p["max"] - p["min"]) + p["min"]
+        print(f"[INFO] 전처리에서 스케일된 타깃 '{target_col}' 을 원래 단위로 되돌려 학습합니다 ({step['method']}).")
+    return y
+
+
+def subsample(X, y, n: int, stratify: bool):
+    """n 행 (분류면 클래스 비율 유지). 층화가 불가능하면(희귀 클래스) 단순 무작위"""
+    if n >= len(X):
+        return X, y
+    try:
+        X_s, _, y_s, _ = train_test_split(X, y, train_size=n, random_state=RANDOM_STATE,
+                                          stratify=y if stratify else None)
+    except ValueError:
+        X_s, _, y_s, _ = train_test_split(X, y, train_size=n, random_state=RANDOM_STATE)
+    return X_s, y_s
 
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
 
 # ───────────────────────────────────────────────
-# 4. 모델 로딩 함수 (모든 경우 대비)
+# 2. 모델
 # ───────────────────────────────────────────────
-def load_model(model_name: str, params: dict):
+def load_model(model_name: str, params: dict, problem_type: str, n_jobs: int = N_JOBS):
     if "XGBoost" in model_name:
         from xgboost import XGBRegressor, XGBClassifier
+        params = {"tree_method": "hist", "n_jobs": n_jobs, "n_estimators": XGB_MAX_ROUNDS, **params}
         return XGBRegressor(**params) if "Regressor" in model_name else XGBClassifier(**params)
     elif "RandomForest" in model_name:
         from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
+        params = {"n_jobs": n_jobs, **params}
         return RandomForestRegressor(**params) if "Regressor" in model_name else RandomForestClassifier(**params)
     elif "LinearRegression" in model_name:
         from sklearn.linear_model import LinearRegression
-        return LinearRegression(**params)
+        return _with_imputer(LinearRegression(**params))
     elif "LogisticRegression" in model_name:
         from sklearn.linear_model import LogisticRegression
-        return LogisticRegression(**params)
+        return _with_imputer(LogisticRegression(**params))
     else:
         print(f"[WARN] 지원하지 않는 모델명 '{model_name}', 기본 모델로 대체합니다.")
         from sklearn.linear_model import LogisticRegression, LinearRegression
-        return LogisticRegression() if problem_type == "classification" else LinearRegression()
+        return _with_imputer(LogisticRegression() if problem_type == "classification" else LinearRegression())
+
+
+def _with_imputer(model):
+    """선형 모델은 결측을 못 받으므로 평균 대치를 모델 앞에 붙인다
+
+    대치값은 학습 분할에서 fit 되어 pkl 에 함께 저장 → CV 폴드 / 최종 학습 / /predict 가 같은 규칙을 씀
+    (전부 결측인 컬럼은 0 으로 채워 피처 수를 유지)
+    """
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import make_pipeline
+    return make_pipeline(SimpleImputer(strategy="mean", keep_empty_features=True), model)
+
+
+def _is_xgb(model) -> bool:
+    return type(model).__name__.startswith("XGB")
+
+
+def _is_forest(model) -> bool:
+    return type(model).__name__.startswith("RandomForest")
+
+
+def fit_with_budget(model, X, y, deadline: float, stratify: bool) -> dict:
+    """마감 시각(deadline, perf_counter 기준)을 넘기지 않도록 학습. 학습 정보 dict 반환"""
+    info = {"stopped_by_budget": False}
+    if _is_xgb(model):
+        from xgboost.callback import TrainingCallback
+
+        class Deadline(TrainingCallback):
+            def after_iteration(self, m, epoch, evals_log):
+                if time.perf_counter() > deadline:
+                    info["stopped_by_budget"] = True
+                    return True
+                return False
+
+        try:
+            X_fit, X_val, y_fit, y_val = train_test_split(X, y, test_size=VALID_SIZE, random_state=RANDOM_STATE,
+                                                          stratify=y if stratify else None)
+        except ValueError:
+            X_fit, X_val, y_fit, y_val = train_test_split(X, y, test_size=VALID_SIZE, random_state=RANDOM_STATE)
+        if model.get_params().get("early_stopping_rounds") is None:
+            model.set_params(early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+        model.set_params(callbacks=[Deadline()])
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        model.set_params(callbacks=None)
+        info["best_iteration"] = int(getattr(model, "best_iteration", 0) or 0)
+        info["rows_fit"] = len(X_fit)
+        return info
+
+    if _is_forest(model):
+        total = model.get_params().get("n_estimators", 100)
+        model.set_params(warm_start=True, n_estimators=0)
+        while model.n_estimators < total:
+            model.set_params(n_estimators=min(total, model.n_estimators + RF_TREES_PER_STEP))
+            model.fit(X, y)
+            if time.perf_counter() > deadline and model.n_estimators < total:
+                info["stopped_by_budget"] = True
+                break
+        model.set_params(warm_start=False)
+        info["n_estimators"] = model.n_estimators
+        info["rows_fit"] = len(X)
+        return info
+
+    model.fit(X, y)
+    info["rows_fit"] = len(X)
+    return info
+
+
+def score(model, X, y, problem_type: str) -> tuple[str, float]:
+    y_pred = model.predict(X)
+    if problem_type == "regression":
+        return "mse", float(mean_squared_error(y, y_pred))
+    return "accuracy", float(accuracy_score(y, y_pred))
+
+
+def score_with_interval(model, X, y, problem_type: str, n_boot: int = BOOTSTRAP_ROUNDS) -> tuple[str, float, list]:
+    """평가 점수 + 테스트 분할 부트스트랩 95% 구간 (예측은 한 번만, 재표본은 인덱스로)"""
+    y_true = np.asarray(y)
+    y_pred = np.asarray(model.predict(X))
+    if problem_type == "regression":
+        name, per_row = "mse", (y_true.astype(np.float64) - y_pred.astype(np.float64)) ** 2
+    else:
+        name, per_row = "accuracy", (y_true == y_pred).astype(np.float64)
+    value = float(per_row.mean())
+    if len(per_row) < 2 or n_boot <= 0:
+        return name, value, [value, value]
+    rng = np.random.default_rng(RANDOM_STATE)
+    boot = np.empty(n_boot)
+    for i in range(n_boot):
+        boot[i] = per_row[rng.integers(0, len(per_row), len(per_row))].mean()
+    lo, hi = np.percentile(boot, [2.5, 97.5])
+    return name, value, [float(lo), float(hi)]
+
+
+# ───────────────────────────────────────────────
+# 3. 학습 곡선으로 사용할 행 수 결정
+# ───────────────────────────────────────────────
+def plan_rows(model_name, params, problem_type, X_train, y_train, X_test, y_test, budget_s, n_jobs, stratify):
+    """작은 표본 몇 개로 (행 수, 학습 시간, 점수)를 재고, 남은 예산 안에 끝날 행 수를 외삽"""
+    n = len(X_train)
+    t_start = time.perf_counter()
+    curve = []
+    for frac in CURVE_FRACTIONS:
+        m = max(1000, int(n * frac))
+        X_s, y_s = subsample(X_train, y_train, m, stratify)
+        model = load_model(model_name, params, problem_type, n_jobs)
+        t0 = time.perf_counter()
+        fit_with_budget(model, X_s, y_s, t0 + budget_s, stratify)
+        fit_s = time.perf_counter() - t0
+        metric, value = score(model, X_test, y_test, problem_type)
+        curve.append({"rows": len(X_s), "fit_s": round(fit_s, 3), metric: value})
+        # 다음 표본까지 가기 전에 예산의 1/4 를 넘겼으면 측정 중단
+        if time.perf_counter() - t_start > budget_s * 0.25:
+            break
+
+    remaining = budget_s - (time.perf_counter() - t_start)
+    # t = a · rows^k  (마지막 두 점으로 지수 추정, 최소 1 = 선형)
+    if len(curve) >= 2 and curve[-2]["fit_s"] > 0 and curve[-1]["fit_s"] > 0:
+        k = np.log(curve[-1]["fit_s"] / curve[-2]["fit_s"]) / np.log(curve[-1]["rows"] / curve[-2]["rows"])
+        k = max(1.0, float(k))
+    else:
+        k = 1.0
+    r_last, t_last = curve[-1]["rows"], max(curve[-1]["fit_s"], 1e-3)
+    affordable = int(r_last * (max(remaining, 0) * BUDGET_SAFETY / t_last) ** (1 / k))
+    return max(r_last, min(n, affordable)), curve
+
 
 # ───────────────────────────────────────────────
-# 5. 모델 학습 및 평가
+# 4. 리더보드 (여러 후보 동시 비교)
 # ───────────────────────────────────────────────
-model = load_model(model_name, params)
-model.fit(X_train, y_train)
-
-if problem_type == 'regression':
-    y_pred = model.predict(X_test)
-    mse = mean_squared_error(y_test, y_pred)
-    result_text = f"모델: {model_name}\nMSE: {mse:.4f}\n"
-else:
-    y_pred = model.predict(X_test)
-    acc = accuracy_score(y_test, y_pred)
-    result_text = f"모델: {model_name}\n정확도: {acc:.4f}\n"
+def leaderboard_candidates(ml_rec: dict, problem_type: str) -> list[dict]:
+    """추천 모델 → alternatives → 기본 모델 순, 이름 중복 제거 (먼저 나온 params 사용)"""
+    seen, out = set(), []
+    recs = [ml_rec, *(ml_rec.get("alternatives") or [])]
+    recs += [{"model": m, "params": {}} for m in BASELINE_MODELS.get(problem_type, BASELINE_MODELS["classification"])]
+    for rec in recs:
+        name = (rec or {}).get("model")
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        out.append({"model": name, "params": rec.get("params") or {}})
+    return out
+
+
+def _is_linear(model_name: str) -> bool:
+    # 선형 모델 (빠름 — 리더보드에서 트리 계열 뒤에 배정)
+    return "Linear" in model_name or "Logistic" in model_name
+
+
+def _cv_task(cand: dict, fold: int, train_idx, test_idx, X, y, problem_type: str,
+             stratify: bool, deadline_wall: float) -> dict:
+    """후보 1개 × 폴드 1개 학습/평가 (joblib 워커에서 실행, 스레드는 1개만 사용)"""
+    name = cand["model"]
+    model = load_model(name, cand["params"], problem_type, n_jobs=1)
+    deadline = time.perf_counter() + max(0.0, deadline_wall - time.time())
+    row = {"model": name, "fold": fold}
+    try:
+        t0 = time.perf_counter()
+        info = fit_with_budget(model, X[train_idx], y[train_idx], deadline, stratify)
+        row["fit_s"] = time.perf_counter() - t0
+        X_test = X[test_idx]
+        t1 = time.perf_counter()
+        y_pred = model.predict(X_test)
+        row["predict_s"] = time.perf_counter() - t1
+        row["predict_rows"] = len(test_idx)
+        if problem_type == "regression":
+            row["metric"], row["value"] = "mse", float(mean_squared_error(y[test_idx], y_pred))
+        else:
+            row["metric"], row["value"] = "accuracy", float(accuracy_score(y[test_idx], y_pred))
+        row["stopped_by_budget"] = info.get("stopped_by_budget", False)
+    except Exception as e:
+        row["error"] = str(e)
+    return row
+
+
+def run_leaderboard(X, y, candidates: list[dict], problem_type: str, folds: int, n_jobs: int,
+                    budget_s: float) -> list[dict]:
+    """모든 후보를 같은 폴드로 교차검증 → 지표 기준 순위표"""
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import KFold, StratifiedKFold
+
+    stratify = problem_type == "classification"
+    if len(X) > LEADERBOARD_MAX_ROWS:
+        X, y = subsample(X, y, LEADERBOARD_MAX_ROWS, stratify)
+
+    # 공통 피처 행렬 (한 번만 만들고 모든 후보가 공유. 큰 배열은 joblib 이 memmap 으로 넘김)
+    X = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+    y = np.asarray(y)
+
+    # 같은 폴드 재사용
+    splitter = StratifiedKFold(folds, shuffle=True, random_state=RANDOM_STATE) if stratify \
+        else KFold(folds, shuffle=True, random_state=RANDOM_STATE)
+    try:
+        splits = list(splitter.split(X, y))
+    except ValueError:
+        splits = list(KFold(folds, shuffle=True, random_state=RANDOM_STATE).split(X, y))
+
+    # 느린 후보(트리 계열)부터 먼저 배정해 마지막에 긴 작업 하나만 남는 일을 줄임
+    order = sorted(candidates, key=lambda c: _is_linear(c["model"]))
+    deadline_wall = time.time() + budget_s
+    rows = Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(_cv_task)(c, k, tr, te, X, y, problem_type, stratify, deadline_wall)
+        for c in order for k, (tr, te) in enumerate(splits)
+    )
+
+    table = []
+    for c in candidates:
+        mine = [r for r in rows if r["model"] == c["model"]]
+        ok = [r for r in mine if "error" not in r]
+        if not ok:
+            table.append({"model": c["model"], "params": c["params"],
+                          "error": next((r["error"] for r in mine if "error" in r), "unknown")})
+            continue
+        vals = np.array([r["value"] for r in ok])
+        pred_rows = sum(r["predict_rows"] for r in ok)
+        table.append({
+            "model": c["model"],
+            "params": c["params"],
+            "metric": ok[0]["metric"],
+            "mean": float(vals.mean()),
+            "std": float(vals.std()),
+            "folds": len(ok),
+            "fit_time_s": round(float(np.mean([r["fit_s"] for r in ok])), 3),
+            "predict_ms_per_1k": round(1000 * sum(r["predict_s"] for r in ok) / pred_rows * 1000, 3),
+            "stopped_by_budget": any(r["stopped_by_budget"] for r in ok),
+        })
+
+    higher_is_better = problem_type != "regression"
+    ranked = sorted((r for r in table if "error" not in r),
+                    key=lambda r: -r["mean"] if higher_is_better else r["mean"])
+    ranked += [r for r in table if "error" in r]
+    for i, r in enumerate(ranked, 1):
+        r["rank"] = i
+    return ranked
+
+
+def write_leaderboard(ranked: list[dict], path: str):
+    cols = ["rank", "model", "metric", "mean", "std", "folds", "fit_time_s", "predict_ms_per_1k",
+            "stopped_by_budget", "error"]
+    pd.DataFrame([{c: r.get(c) for c in cols} for r in ranked], columns=cols).to_csv(path, index=False)
+
+
+def leaderboard_text(ranked: list[dict]) -> str:
+    lines = ["", "[리더보드]"]
+    for r in ranked:
+        if "error" in r:
+            lines.append(f"{r['rank']}. {r['model']}: 실패 ({r['error']})")
+        else:
+            lines.append(f"{r['rank']}. {r['model']}: {r['metric']}={r['mean']:.4f}±{r['std']:.4f} "
+                         f"fit={r['fit_time_s']}s predict={r['predict_ms_per_1k']}ms/1k행")
+    return "\n".join(lines) + "\n"
+
+
+def model_metadata(model_name: str, problem_type: str, target_col: str, feature_names: list[str],
+                   le, report: dict, preprocess: dict | None = None) -> dict:
+    """model_{timestamp}.meta.json — 피처 순서/타입, 타깃, 분류 라벨(인코딩 순서), 전처리 스펙"""
+    meta = {
+        "model": model_name,
+        "problemType": problem_type,
+        "target": target_col,
+        "features": feature_names,
+        "dtype": "float32",
+        "classes": [c.item() if hasattr(c, "item") else c for c in le.classes_] if le is not None else None,
+        "metric": report["metric"],
+        "rows_used": report["rows_used"],
+        "created": time.time(),
+    }
+    if preprocess is not None:
+        # 전처리 결과로 학습한 경우: /predict 가 원본 형태 입력에 같은 변환을 다시 적용
+        meta["preprocess"] = preprocess
+    return meta
+
 
 # ───────────────────────────────────────────────
-# 6. 결과 저장
+# 5. 실행
 # ───────────────────────────────────────────────
-result_path = os.path.join(output_dir, f"ml_result_{timestamp}.txt")
-with open(result_path, "w", encoding="utf-8") as f:
-    f.write(result_text)
+def run(file_path: str, selector_result: dict, output_dir: str, timestamp: str,
+        time_budget: float = TIME_BUDGET, n_jobs: int = N_JOBS, max_rows: int = MAX_ROWS,
+        leaderboard: bool = LEADERBOARD, cv_folds: int = CV_FOLDS) -> dict:
+    """selector 결과로 학습/평가 → 결과 파일 저장. {reportPath, modelPath, text, report} 반환"""
+    t_begin = time.perf_counter()
+    deadline = t_begin + time_budget
+    selector_result = selector_result or {}
+
+    # 안전한 파싱 (NoneType 방지)
+    target = selector_result.get("targetColumn")
+    problem_type = selector_result.get("problemType", "classification")
+    ml_rec = selector_result.get("mlModelRecommendation")
+
+    # ✅ 기본 모델 Fallback
+    if not ml_rec or not isinstance(ml_rec, dict):
+        print("[WARN] mlModelRecommendation이 None이므로 기본 모델을 사용합니다.")
+        ml_rec = {
+            "model": "LogisticRegression" if problem_type == "classification" else "LinearRegression",
+            "params": {},
+            "reason": "기본 모델 사용 (추천 없음)"
+        }
+    model_name = ml_rec.get("model", "LogisticRegression")
+    params = ml_rec.get("params", {}) or {}
+    stratify = problem_type == "classification"
+
+    X, y, target_col, le = load_dataset(file_path, target, problem_type)
+    spec = load_spec(file_path)
+    if problem_type == "regression":
+        y = unscale_target(y, spec, target_col)
+    feature_names = [str(c) for c in X.columns]
+    rows_total = len(X)
+    if rows_total > max_rows:
+        print(f"[INFO] {rows_total}행 → {max_rows}행 표본으로 학습합니다.")
+        X, y = subsample(X, y, max_rows, stratify)
+
+    try:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=y if stratify else None)
+    except ValueError:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+    del X, y
+
+    ranked = None
+    if leaderboard or selector_result.get("leaderboard"):
+        candidates = leaderboard_candidates(ml_rec, problem_type)
+        ranked = run_leaderboard(X_train, y_train, candidates, problem_type, cv_folds, n_jobs,
+                                 time_budget * LEADERBOARD_BUDGET_SHARE)
+        write_leaderboard(ranked, os.path.join(output_dir, f"leaderboard_{timestamp}.csv"))
+        best = next((r for r in ranked if "error" not in r), None)
+        if best is not None:
+            model_name, params = best["model"], best["params"]
+            print(f"[INFO] 리더보드 1위: {model_name}")
+
+    curve = []
+    if len(X_train) > CURVE_MIN_ROWS:
+        rows, curve = plan_rows(model_name, params, problem_type, X_train, y_train, X_test, y_test,
+                                deadline - time.perf_counter(), n_jobs, stratify)
+        if rows < len(X_train):
+            print(f"[INFO] 시간 예산 {time_budget:.0f}s 에 맞춰 학습 행 수 {len(X_train)} → {rows}")
+            X_train, y_train = subsample(X_train, y_train, rows, stratify)
+
+    # 모델 학습 및 평가
+    model = load_model(model_name, params, problem_type, n_jobs)
+    t0 = time.perf_counter()
+    fit_info = fit_with_budget(model, X_train, y_train, deadline, stratify)
+    train_time_s = time.perf_counter() - t0
+    metric, value, ci95 = score_with_interval(model, X_test, y_test, problem_type)
+
+    report = {
+        "model": model_name,
+        "problemType": problem_type,
+        "target": target_col,
+        "metric": {"name": metric, "value": value, "ci95": ci95, "n_test": int(len(y_test))},
+        "train_time_s": round(train_time_s, 3),
+        "rows_used": int(fit_info.get("rows_fit", len(X_train))),
+        "rows_total": int(rows_total),
+        "features": int(X_train.shape[1]),
+        "time_budget_s": time_budget,
+        "total_time_s": round(time.perf_counter() - t_begin, 3),
+        **{k: v for k, v in fit_info.items() if k != "rows_fit"},
+        "learning_curve": curve,
+    }
+    if ranked is not None:
+        report["leaderboard"] = ranked
+
+    if problem_type == 'regression':
+        result_text = f"모델: {model_name}\nMSE: {value:.4f}\n"
+    else:
+        result_text = f"모델: {model_name}\n정확도: {value:.4f}\n"
+    result_text += (f"metric: {metric}={value:.4f} (95% CI {ci95[0]:.4f}~{ci95[1]:.4f}, n_test={len(y_test)})\n"
+                    f"train_time_s: {report['train_time_s']}\n"
+                    f"rows_used: {report['rows_used']}\n")
+    if fit_info.get("stopped_by_budget"):
+        result_text += "[INFO] 시간 예산 초과로 학습을 조기 종료했습니다.\n"
+    if ranked is not None:
+        result_text += leaderboard_text(ranked)
+
+    # 결과 저장
+    result_path = os.path.join(output_dir, f"ml_result_{timestamp}.txt")
+    with open(result_path, "w", encoding="utf-8") as f:
+        f.write(result_text)
+    with open(os.path.join(output_dir, f"ml_result_{timestamp}.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    joblib.dump(model, os.path.join(output_dir, f"model_{timestamp}.pkl"))
+    # 서빙(/predict)이 CSV 를 다시 읽지 않고 같은 피처 순서 / 라벨 매핑을 쓰도록 메타데이터를 함께 저장
+    with open(os.path.join(output_dir, f"model_{timestamp}.meta.json"), "w", encoding="utf-8") as f:
+        json.dump(model_metadata(model_name, problem_type, target_col, feature_names, le, report, spec),
+                  f, ensure_ascii=False, indent=2)
+
+    written = [f"ml_result_{timestamp}.txt", f"ml_result_{timestamp}.json",
+               f"model_{timestamp}.pkl", f"model_{timestamp}.meta.json"]
+    if ranked is not None:
+        written.append(f"leaderboard_{timestamp}.csv")
+    record_artifacts(output_dir, written, step="train")
+
+    return {"reportPath": result_path, "modelPath": os.path.join(output_dir, f"model_{timestamp}.pkl"),
+            "text": result_text, "report": report}
+
+
+def main():
+    stage_metrics.track("train_ml_model")
+    ap = argparse.ArgumentParser()
+    ap.add_argument("file_path")
+    ap.add_argument("selector_json", help='selector JSON, "-" 이면 표준입력')
+    ap.add_argument("output_dir")
+    ap.add_argument("timestamp")
+    ap.add_argument("--time-budget", type=float, default=TIME_BUDGET)
+    ap.add_argument("--n-jobs", type=int, default=N_JOBS)
+    ap.add_argument("--max-rows", type=int, default=MAX_ROWS)
+    ap.add_argument("--leaderboard", action="store_true", default=LEADERBOARD)
+    ap.add_argument("--cv-folds", type=int, default=CV_FOLDS)
+    args = ap.parse_args()
+
+    raw = sys.stdin.read() if args.selector_json == "-" else args.selector_json
+    out = run(args.file_path, json.loads(raw) if raw else {}, args.output_dir, args.timestamp,
+              args.time_budget, args.n_jobs, args.max_rows, args.leaderboard, args.cv_folds)
+    print(out["text"])
 
-joblib.dump(model, os.path.join(output_dir, f"model_{timestamp}.pkl"))
 
-print(result_text)
+if __name__ == "__main__":
+    main()
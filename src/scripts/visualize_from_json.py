@@ -1,128 +1,310 @@
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-import sys
-import os
+"""
+추천 페어 기반 차트 생성 (VisualizationTool 이 호출)
+
+- 컬럼별 통계(수치 여부 / 분산 / 고유값 수)는 필요한 컬럼에 대해 한 번만 계산
+- 차트는 비대화형 Agg 백엔드에서, 여러 장이면 프로세스 풀로 병렬 렌더링
+- 행이 많으면(--agg-rows 초과) 원본 대신 서버에서 집계한 값만 그린다
+    · 수치 × 수치  → 산점도 대신 2D 히스토그램
+    · 수치 × 범주  → 그룹별 분위수를 미리 계산한 박스플롯
+    · 범주 × 범주  → 미리 센 교차 빈도 막대
+    · 단일 분포    → 미리 센 히스토그램 (+ KDE)
+  그래서 차트 생성 시간이 행 수 × 페어 수에 비례해 늘지 않는다.
+
+상주 계산 워커(compute_worker.py)는 run() 을 직접 호출하고, 명령행 실행은 main() 이 같은 run() 을 부른다.
+
+사용 예)
+    python src/scripts/visualize_from_json.py data.csv '<selector json>' src/outputs/<sessionId> [timestamp]
+        [--top-n 5] [--format png] [--dpi 100] [--jobs 2] [--agg-rows 50000]
+    selector json 자리에 "-" 를 주면 표준입력에서 읽는다 (명령행 길이 제한 회피)
+"""
+import argparse
 import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from artifact_manifest import record as record_artifacts
+from columnar_store import read_frame, numeric_columns
+import stage_metrics
+
+TOP_N = int(os.environ.get("VIZ_TOP_N", "5"))
+IMAGE_FORMAT = os.environ.get("VIZ_FORMAT", "png")
+DPI = int(os.environ.get("VIZ_DPI", "100"))
+JOBS = int(os.environ.get("VIZ_JOBS", str(min(os.cpu_count() or 1, 4))))
+AGG_ROWS = int(os.environ.get("VIZ_AGG_ROWS", "50000"))   # 이 행 수를 넘으면 집계 후 렌더
 
-# 인자 받기 (csv경로, json문자열, 결과 저장 폴더)
-file_path = sys.argv[1]
-selector_result_json = sys.argv[2]
-output_dir = sys.argv[3]
+HIST2D_BINS = 120
+MAX_HIST_BINS = 200
+MAX_FLIERS = 200          # 박스플롯 그룹당 이상치 점 최대 개수
+MAX_BOX_GROUPS = 30       # 범주가 너무 많으면 빈도 상위만
+LOW_UNIQUE = 10           # 고유값이 이 이하인 수치 컬럼은 범주처럼 취급
 
-# JSON 문자열 파싱
-selector_result = json.loads(selector_result_json)
 
-# CSV 파일 로드
-df = pd.read_csv(file_path)
+# ───────────────────────────────────────────────
+# 1. 컬럼 통계 (한 번만)
+# ───────────────────────────────────────────────
+def column_stats(df: pd.DataFrame) -> dict:
+    stats = {}
+    for c in df.columns:
+        s = df[c]
+        numeric = pd.api.types.is_numeric_dtype(s)
+        stats[c] = {
+            "numeric": numeric,
+            "var": float(s.var()) if numeric else None,
+            "nunique": int(s.nunique()),
+        }
+    return stats
 
-# 시각화 스타일 설정
-sns.set(style="whitegrid")
 
-# 추천 페어 중요도 기준으로 정렬 후 top N 추출
-def get_top_pairs(df, recommendedPairs, top_n=5):
+def get_top_pairs(stats: dict, recommendedPairs, top_n=TOP_N):
+    """추천 페어 중요도(수치: 분산, 범주: 1/고유값 수) 기준 상위 N개"""
+    def score(col):
+        st = stats[col]
+        if st["numeric"]:
+            return st["var"] if st["var"] and st["var"] > 0 else 0
+        return 1 / (st["nunique"] + 1e-6)
+
     scored_pairs = []
     for pair in recommendedPairs:
         col1, col2 = pair["column1"], pair["column2"]
-        if col1 not in df.columns or col2 not in df.columns:
+        if col1 not in stats or col2 not in stats:
             continue
+        scored_pairs.append((score(col1) + score(col2), pair))
 
-        # 점수 계산
-        score = 0
-        if pd.api.types.is_numeric_dtype(df[col1]):
-            score += df[col1].var() if df[col1].var() > 0 else 0
-        else:
-            score += 1 / (df[col1].nunique() + 1e-6)
-        if pd.api.types.is_numeric_dtype(df[col2]):
-            score += df[col2].var() if df[col2].var() > 0 else 0
-        else:
-            score += 1 / (df[col2].nunique() + 1e-6)
-        scored_pairs.append((score, pair))
-    
-    # 점수 높은 순 정렬 후 top N
     scored_pairs.sort(reverse=True, key=lambda x: x[0])
     return [p[1] for p in scored_pairs[:top_n]]
 
-# top 5 페어 가져오기
-top_pairs = get_top_pairs(df, selector_result.get("recommendedPairs", []), top_n=5)
-if not top_pairs:
-    print("추천된 컬럼 페어가 없습니다. 시각화를 수행할 수 없습니다.")
-    # A. 단일 컬럼: 수치형 중 분산이 가장 큰 컬럼 1개 (분포 확인용)
-    numeric_cols = df.select_dtypes(include=['number']).columns
-    if not numeric_cols.empty:
-        var_series = df[numeric_cols].var().sort_values(ascending=False)
-        top_single_col = var_series.index[0]
-        
-        # 분포 시각화 (히스토그램)
-        try:
-            plt.figure(figsize=(8, 6))
-            sns.histplot(df[top_single_col], kde=True)
-            plt.title(f"Distribution of {top_single_col}")
-            plt.tight_layout()
-            file_name = f"Distribution_of_{top_single_col}.png".replace(" ", "_")
-            file_path_out = os.path.join(output_dir, file_name)
-            plt.savefig(file_path_out)
-            plt.close()
-        except Exception as e:
-            print(f"오류: 단일 컬럼 {top_single_col} 시각화 실패 → {e}")
-            
-    # B. 페어 생성: 상관계수가 가장 높은 상위 3개 수치형 페어
+
+def fallback_charts(df: pd.DataFrame, stats: dict):
+    """추천 페어가 없을 때: 분산 최대 컬럼 분포 1장 + 상관 상위 3개 수치 페어"""
+    single, pairs = None, []
+    numeric_cols = [c for c in df.columns if stats[c]["numeric"]]
+    if numeric_cols:
+        single = max(numeric_cols, key=lambda c: -np.inf if pd.isna(stats[c]["var"]) else stats[c]["var"])
     if len(numeric_cols) >= 2:
-        corr_matrix = df[numeric_cols].corr().abs()
-        np.fill_diagonal(corr_matrix.values, 0) # 자기 자신과의 상관계수 제외
-        
-        # 상관계수가 높은 상위 3개 페어 추출
-        upper = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1).astype(bool))
-        sorted_corr = upper.stack().sort_values(ascending=False).head(3)
+        corr = df[numeric_cols].corr().abs().to_numpy(copy=True)
+        np.fill_diagonal(corr, 0)   # 자기 자신과의 상관계수 제외
+        iu = np.triu_indices(len(numeric_cols), k=1)
+        vals = corr[iu]
+        order = [i for i in np.argsort(-np.nan_to_num(vals, nan=-1), kind="stable") if not np.isnan(vals[i])][:3]
+        pairs = [{"column1": numeric_cols[iu[0][i]], "column2": numeric_cols[iu[1][i]]} for i in order]
+    return single, pairs
 
-        for (col1, col2), corr_value in sorted_corr.items():
-            top_pairs.append({"column1": col1, "column2": col2})
 
-    if not top_pairs:
-        print("시각화를 수행할 수 있는 컬럼 페어를 찾지 못했습니다.")
-        sys.exit(0) # 시각화할 것이 없으면 종료
+# ───────────────────────────────────────────────
+# 2. 차트 사양 (렌더에 필요한 최소 데이터만 담음)
+# ───────────────────────────────────────────────
+def _file_name(stem: str, fmt: str) -> str:
+    return f"{stem}.{fmt}".replace(" ", "_")
 
-# 시각화
-for pair in top_pairs:
-    col1 = pair["column1"]
-    col2 = pair["column2"]
 
-    plt.figure(figsize=(8, 6))
+def hist_spec(df: pd.DataFrame, col: str, agg_rows: int) -> dict:
+    spec = {"kind": "hist", "col": col, "title": f"Distribution of {col}",
+            "stem": f"Distribution_of_{col}"}
+    values = df[col].dropna().to_numpy(dtype=float)
+    if len(df) <= agg_rows:
+        spec["data"] = pd.DataFrame({col: values})
+        return spec
+    edges = np.histogram_bin_edges(values, bins="auto")
+    if len(edges) - 1 > MAX_HIST_BINS:
+        edges = np.linspace(values.min(), values.max(), MAX_HIST_BINS + 1)
+    counts, edges = np.histogram(values, bins=edges)
+    spec.update(kind="hist_agg", edges=edges, counts=counts)
+    return spec
 
-    try:
-        col1_numeric = pd.api.types.is_numeric_dtype(df[col1])
-        col2_numeric = pd.api.types.is_numeric_dtype(df[col2])
-        col1_unique = df[col1].nunique()
-        col2_unique = df[col2].nunique()
-
-        # col1 수치 + col2 범주 또는 고유값 적음 -> boxplot
-        if col1_numeric and (not col2_numeric or col2_unique <= 10):
-            sns.boxplot(x=col2, y=col1, data=df)
-            plt.title(f"{col1} by {col2}")
-        # col2 수치 + col1 범주 -> boxplot 반대로
-        elif col2_numeric and (not col1_numeric or col1_unique <= 10):
-            sns.boxplot(x=col1, y=col2, data=df)
-            plt.title(f"{col2} by {col1}")
-        # 둘 다 수치형 -> scatterplot
-        elif col1_numeric and col2_numeric:
-            hue_col = selector_result.get("selectedColumns")[-1] if selector_result.get("selectedColumns") else None
-            if hue_col and hue_col in df.columns:
-                sns.scatterplot(x=col1, y=col2, hue=df[hue_col])
-            else:
-                sns.scatterplot(x=col1, y=col2, data=df)
-            plt.title(f"{col1} vs {col2}")
-        # 둘 다 범주형 -> countplot
-        else:
-            sns.countplot(x=col1, hue=col2, data=df)
-            plt.title(f"{col1} count by {col2}")
-
-        plt.tight_layout()
-        file_name = f"{col1}_vs_{col2}.png".replace(" ", "_")
-        print(output_dir)
-        file_path_out = os.path.join(output_dir, file_name)
-        plt.savefig(file_path_out)
-        plt.close()
 
+def box_quantiles(values: np.ndarray, label) -> dict:
+    """matplotlib bxp 입력 (1.5 IQR 수염, 이상치는 표본만)"""
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    fliers = values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)]
+    if len(fliers) > MAX_FLIERS:
+        fliers = np.random.default_rng(0).choice(fliers, MAX_FLIERS, replace=False)
+    return {"label": str(label), "q1": q1, "med": med, "q3": q3,
+            "whislo": inside.min() if len(inside) else q1, "whishi": inside.max() if len(inside) else q3,
+            "fliers": fliers}
+
+
+def pair_spec(df: pd.DataFrame, stats: dict, col1: str, col2: str, hue_col, agg_rows: int) -> dict:
+    n1, n2 = stats[col1]["numeric"], stats[col2]["numeric"]
+    u1, u2 = stats[col1]["nunique"], stats[col2]["nunique"]
+    big = len(df) > agg_rows
+    spec = {"stem": f"{col1}_vs_{col2}"}
+
+    # col1 수치 + col2 범주 또는 고유값 적음 -> boxplot / 반대 경우는 축을 바꿔서
+    if (n1 and (not n2 or u2 <= LOW_UNIQUE)) or (n2 and (not n1 or u1 <= LOW_UNIQUE)):
+        y, x = (col1, col2) if n1 and (not n2 or u2 <= LOW_UNIQUE) else (col2, col1)
+        spec.update(kind="box", x=x, y=y, title=f"{y} by {x}")
+        sub = df[[x, y]]
+        if not big:
+            spec["data"] = sub
+            return spec
+        sub = sub.dropna()
+        top = sub[x].value_counts().index[:MAX_BOX_GROUPS]
+        groups = sub[sub[x].isin(top)].groupby(x, sort=True, observed=True)[y]
+        spec.update(kind="box_agg", boxes=[box_quantiles(g.to_numpy(dtype=float), k) for k, g in groups])
+        return spec
+
+    # 둘 다 수치형 -> scatterplot (행이 많으면 2D 히스토그램)
+    if n1 and n2:
+        spec.update(x=col1, y=col2, title=f"{col1} vs {col2}")
+        if not big:
+            cols = [col1, col2] + ([hue_col] if hue_col and hue_col in df.columns and hue_col not in (col1, col2) else [])
+            spec.update(kind="scatter", data=df[cols],
+                        hue=hue_col if hue_col and hue_col in df.columns else None)
+            return spec
+        xy = df[[col1, col2]].dropna().to_numpy(dtype=float)
+        counts, xe, ye = np.histogram2d(xy[:, 0], xy[:, 1], bins=HIST2D_BINS)
+        spec.update(kind="hist2d", counts=counts, xedges=xe, yedges=ye)
+        return spec
+
+    # 둘 다 범주형 -> countplot (행이 많으면 미리 센 빈도)
+    spec.update(x=col1, hue=col2, title=f"{col1} count by {col2}")
+    if not big:
+        spec.update(kind="count", data=df[[col1, col2]])
+        return spec
+    counts = df.groupby([col1, col2], sort=False, observed=True).size().rename("count").reset_index()
+    spec.update(kind="count_agg", data=counts)
+    return spec
+
+
+# ───────────────────────────────────────────────
+# 3. 렌더 (워커 프로세스)
+# ───────────────────────────────────────────────
+def render(spec: dict, output_dir: str, fmt: str, dpi: int):
+    """사양 1개 → 이미지 파일. (경로, 오류 메시지) 반환"""
+    sns.set(style="whitegrid")
+    kind = spec["kind"]
+    fig = plt.figure(figsize=(8, 6))
+    try:
+        ax = fig.gca()
+        if kind == "hist":
+            sns.histplot(spec["data"][spec["col"]], kde=True, ax=ax)
+        elif kind == "hist_agg":
+            edges = spec["edges"]
+            binned = pd.DataFrame({spec["col"]: (edges[:-1] + edges[1:]) / 2, "count": spec["counts"]})
+            sns.histplot(data=binned, x=spec["col"], weights="count", bins=list(edges), kde=True, ax=ax)
+        elif kind == "box":
+            sns.boxplot(x=spec["x"], y=spec["y"], data=spec["data"], ax=ax)
+        elif kind == "box_agg":
+            ax.bxp(spec["boxes"], showfliers=True)
+            ax.set_xlabel(spec["x"])
+            ax.set_ylabel(spec["y"])
+        elif kind == "scatter":
+            sns.scatterplot(x=spec["x"], y=spec["y"], hue=spec.get("hue"), data=spec["data"], ax=ax)
+        elif kind == "hist2d":
+            mesh = ax.pcolormesh(spec["xedges"], spec["yedges"], np.ma.masked_equal(spec["counts"].T, 0),
+                                 cmap="viridis")
+            fig.colorbar(mesh, ax=ax, label="count")
+            ax.set_xlabel(spec["x"])
+            ax.set_ylabel(spec["y"])
+        elif kind == "count":
+            sns.countplot(x=spec["x"], hue=spec["hue"], data=spec["data"], ax=ax)
+        elif kind == "count_agg":
+            sns.barplot(x=spec["x"], y="count", hue=spec["hue"], data=spec["data"], ax=ax)
+        ax.set_title(spec["title"])
+        fig.tight_layout()
+        path = os.path.join(output_dir, _file_name(spec["stem"], fmt))
+        tmp = f"{path}.{os.getpid()}.tmp"      # 캐시와 하드링크로 공유된 이전 차트를 덮어쓰지 않도록 교체
+        fig.savefig(tmp, format=fmt, dpi=dpi)
+        os.replace(tmp, path)
+        return path, None
     except Exception as e:
-        print(f"오류: {col1} - {col2} 시각화 실패 → {e}")
+        return None, f"오류: {spec['title']} 시각화 실패 → {e}"
+    finally:
+        plt.close(fig)
+
+
+def render_all(specs: list[dict], output_dir: str, fmt: str, dpi: int, jobs: int) -> list[str]:
+    if jobs <= 1 or len(specs) <= 1:
+        results = [render(s, output_dir, fmt, dpi) for s in specs]
+    else:
+        import multiprocessing as mp
+        ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=min(jobs, len(specs)), mp_context=ctx) as pool:
+            results = list(pool.map(render, specs, [output_dir] * len(specs),
+                                    [fmt] * len(specs), [dpi] * len(specs)))
+    paths = []
+    for path, err in results:
+        if err:
+            print(err)
+        elif path:
+            paths.append(path)
+    return paths
+
+
+# ───────────────────────────────────────────────
+# 4. 실행
+# ───────────────────────────────────────────────
+def build_specs(file_path: str, selector_result: dict, top_n: int, agg_rows: int) -> list[dict]:
+    pairs = selector_result.get("recommendedPairs", []) or []
+    hue_cols = (selector_result.get("selectedColumns") or [])[-1:]
+    hue_col = hue_cols[0] if hue_cols else None
+
+    # 필요한 컬럼만 로드 (업로드 때 만든 Parquet 사본이 있으면 그쪽에서)
+    pair_cols = [p[k] for p in pairs for k in ("column1", "column2")]
+    df = read_frame(file_path, pair_cols + hue_cols)
+    stats = column_stats(df)
+    top_pairs = get_top_pairs(stats, pairs, top_n=top_n)
+
+    specs = []
+    if not top_pairs:
+        print("추천된 컬럼 페어가 없습니다. 시각화를 수행할 수 없습니다.")
+        # 추천 페어가 없으면 수치형 컬럼 전체가 필요 (사본이 없으면 전체 로드)
+        num_cols = numeric_columns(file_path)
+        df = read_frame(file_path, None if num_cols is None else num_cols + hue_cols)
+        stats = column_stats(df)
+        single, top_pairs = fallback_charts(df, stats)
+        if single is not None:
+            specs.append(hist_spec(df, single, agg_rows))
+        if not top_pairs and not specs:
+            print("시각화를 수행할 수 있는 컬럼 페어를 찾지 못했습니다.")
+            return []
+
+    for pair in top_pairs:
+        specs.append(pair_spec(df, stats, pair["column1"], pair["column2"], hue_col, agg_rows))
+    return specs
+
+
+def run(file_path: str, selector_result: dict, output_dir: str, top_n: int = TOP_N, fmt: str = IMAGE_FORMAT,
+        dpi: int = DPI, jobs: int = JOBS, agg_rows: int = AGG_ROWS) -> list[str]:
+    """selector 결과 → 차트 파일 경로 목록 (시각화할 것이 없으면 빈 목록)"""
+    os.makedirs(output_dir, exist_ok=True)
+    specs = build_specs(file_path, selector_result or {}, top_n, agg_rows)
+    if not specs:
+        return []
+    paths = render_all(specs, output_dir, fmt, dpi, jobs)
+    record_artifacts(output_dir, paths, kind="chart", step="visual")
+    return paths
+
+
+def main():
+    stage_metrics.track("visualize_from_json")
+    ap = argparse.ArgumentParser()
+    ap.add_argument("file_path")
+    ap.add_argument("selector_json", help='selector JSON, "-" 이면 표준입력')
+    ap.add_argument("output_dir")
+    ap.add_argument("timestamp", nargs="?")
+    ap.add_argument("--top-n", type=int, default=TOP_N)
+    ap.add_argument("--format", default=IMAGE_FORMAT, choices=["png", "jpg", "jpeg", "webp"])
+    ap.add_argument("--dpi", type=int, default=DPI)
+    ap.add_argument("--jobs", type=int, default=JOBS)
+    ap.add_argument("--agg-rows", type=int, default=AGG_ROWS)
+    args = ap.parse_args()
+
+    raw = sys.stdin.read() if args.selector_json == "-" else args.selector_json
+    run(args.file_path, json.loads(raw), args.output_dir, args.top_n, args.format, args.dpi, args.jobs,
+        args.agg_rows)
+
+
+if __name__ == "__main__":
+    main()
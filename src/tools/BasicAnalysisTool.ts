@@ -1,5 +1,6 @@
 import * as fs from "fs/promises";
 import * as path from "path";
+import { execFile } from "child_process";
 import * as csv from "csv-parse/sync";
 import { BasicAnalysisInput, BasicAnalysisOutput } from "./types";
 
@@ -61,6 +62,17 @@ export class BasicAnalysisTool {
         throw new Error("지정한 경로는 디렉터리입니다. CSV 파일을 입력해주세요.");
       }
 
+      // [NEW] 파이썬 엔진(청크 스트리밍 2패스, 근사 고유값) 우선. 실패 시 기존 전체 로드 경로
+      try {
+        const out = await this.runEngine(resolvedPath);
+        console.log(`[BasicAnalysisTool] engine rows=${out.rows}`);
+        console.log(" BasicAnalysisTool 결과:", out.columnStats); // output_extractor 폴백이 이 형식을 읽음
+        return { columnStats: out.columnStats };
+      } catch (e: any) {
+        if (/CSV 파일에 데이터가 없습니다/.test(e?.message ?? "")) throw e;
+        console.log(`[BasicAnalysisTool] engine 실패 → TS 계산으로 대체: ${e?.message ?? e}`);
+      }
+
       const fileContent = await fs.readFile(resolvedPath, "utf-8");
 
       const records = csv.parse(fileContent, {
@@ -118,4 +130,18 @@ export class BasicAnalysisTool {
       throw new Error(`파일 분석 중 오류 발생: ${(err as Error).message}`);
     }
   }
+
+  private runEngine(filePath: string): Promise<BasicAnalysisOutput & { rows: number }> {
+    return new Promise((resolve, reject) => {
+      execFile("python", ["src/scripts/basic_analysis.py", filePath], { maxBuffer: 64 * 1024 * 1024 },
+        (error, stdout, stderr) => {
+          if (error) return reject(new Error(stderr?.toString().trim() || error.message));
+          try {
+            resolve(JSON.parse(stdout.toString().trim().split(/\r?\n/).pop() || ""));
+          } catch (e) {
+            reject(e);
+          }
+        });
+    });
+  }
 }
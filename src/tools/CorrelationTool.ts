@@ -21,7 +21,9 @@
  */
 import * as fs from "fs";
 import * as path from "path";
+import { execFile } from "child_process";
 import { CorrelationInput, CorrelationOutput } from "./types";
+import { recordArtifacts, writeArtifactSync } from "./artifactManifest";
 
 export class CorrelationTool {
   static readonly description = "숫자형 컬럼 간 상관계수를 계산하고, threshold 이상인 컬럼 쌍을 반환";
@@ -64,26 +66,42 @@ export class CorrelationTool {
    * 상관관계 계산 실행 메서드
    */
   public async run(input: CorrelationInput): Promise<CorrelationOutput> {
-    const { filePath , data, method = "pearson", dropna = true, threshold = 0.5} = input;
+    const { filePath , data, columns, method = "pearson", dropna = true, threshold = 0.5} = input;
     console.log("\n[CorrelationTool] 상관관계 계산 시작");
 
+    let sessionId = input.sessionId ?? this.inferSessionIdFromPath(filePath);
+
+    const timestamp = Date.now();
+    const outputDir = sessionId
+              ? path.join(process.cwd(), "src/outputs", sessionId) // 세션별 출력
+              : path.join(process.cwd(), "src/outputs");
+    fs.mkdirSync(outputDir, { recursive: true });
+
+    // [ADD] CSV 파일이 있으면 Python 엔진(NumPy 행렬 연산)으로 계산 + 산출물 저장까지 위임
+    if (filePath && fs.existsSync(filePath)) {
+      const cols = columns ?? (data ? Object.keys(data) : undefined);
+      try {
+        const result = await this.runEngine(filePath, outputDir, method, threshold, cols);
+        console.log(`[CorrelationTool 완료] method=${method} (engine)`);
+        console.log(`[CorrelationTool 저장] ${result.matrixCsv}`);
+        return { method: result.method, correlationMatrix: result.correlationMatrix, highCorrPairs: result.highCorrPairs };
+      } catch (e: any) {
+        console.log(`[CorrelationTool] engine 실패 → JS 계산으로 대체: ${e?.message ?? e}`);
+      }
+    }
+
     let numericData = data;
     if (!numericData || Object.keys(numericData).length === 0) {
       numericData = this.buildCorrelationData(filePath);
+      if (columns?.length) {
+        for (const k of Object.keys(numericData)) if (!columns.includes(k)) delete numericData[k];
+      }
     }
 
     if (!numericData || Object.keys(numericData).length === 0) {
       throw new Error("유효한 숫자형 데이터가 없습니다.");
     }
 
-    let sessionId = input.sessionId ?? this.inferSessionIdFromPath(filePath);
-
-    const timestamp = Date.now();
-    const outputDir = sessionId
-              ? path.join(process.cwd(), "src/outputs", sessionId) // 세션별 출력
-              : path.join(process.cwd(), "src/outputs");
-    fs.mkdirSync(outputDir, { recursive: true });
-
     // 1️. 입력 데이터 유효성 검사
     // if (!numericData || Object.keys(data).length === 0)
     //   throw new Error("유효한 데이터가 없습니다. (data 필드 확인)");
@@ -137,6 +155,36 @@ export class CorrelationTool {
     };
   }
 
+  // [ADD] src/scripts/correlation_engine.py 실행 → CorrelationOutput (+ 산출물 경로)
+  private runEngine(
+    filePath: string,
+    outputDir: string,
+    method: string,
+    threshold: number,
+    columns?: string[]
+  ): Promise<CorrelationOutput & { matrixCsv: string; pairsJson: string }> {
+    const args = [
+      "src/scripts/correlation_engine.py", filePath, outputDir,
+      "--method", method, "--threshold", String(threshold),
+      ...(columns?.length ? ["--columns", JSON.stringify(columns)] : []),
+    ];
+    return new Promise((resolve, reject) => {
+      execFile("python", args, { maxBuffer: 256 * 1024 * 1024 }, (error, stdout, stderr) => {
+        if (error) return reject(new Error(stderr?.toString() || error.message));
+        try {
+          const out = JSON.parse(stdout.toString().trim().split(/\r?\n/).pop() || "");
+          // 계산 불가(null) 셀은 기존 JS 결과와 같이 NaN 으로
+          for (const row of Object.values(out.correlationMatrix ?? {}) as Record<string, number | null>[]) {
+            for (const k of Object.keys(row)) if (row[k] === null) row[k] = NaN;
+          }
+          resolve(out);
+        } catch (e) {
+          reject(e);
+        }
+      });
+    });
+  }
+
   // csv 호출
   private buildCorrelationData(filePath: string): Record<string, number[]> {
     const text = fs.readFileSync(filePath, "utf-8");
@@ -299,8 +347,9 @@ export class CorrelationTool {
         return [r, ...vals].join(",");
       });
 
-      fs.writeFileSync(matrixCsv, [header, ...rows].join("\n"), "utf-8");
-      fs.writeFileSync(pairsJson, JSON.stringify(corr.highCorrPairs, null, 2), "utf-8");
+      writeArtifactSync(matrixCsv, [header, ...rows].join("\n"));       // [CHANGED] 하드링크 캐시 보호
+      writeArtifactSync(pairsJson, JSON.stringify(corr.highCorrPairs, null, 2));
+      recordArtifacts(outDir, [matrixCsv, pairsJson], "corr");
 
       console.log(`[CorrelationTool 저장] ${matrixCsv}`);
       console.log(`[CorrelationTool 저장] ${pairsJson}`);
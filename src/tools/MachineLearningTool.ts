@@ -1,4 +1,4 @@
-import { exec } from "child_process";
+import { computeWorker } from "./computeWorker";
 import fs from "fs";
 import path from "path";
 import { MachineLearningInput, MachineLearningOutput } from "./types";
@@ -59,50 +59,46 @@ export class MachineLearningTool {
               : path.join(process.cwd(), "src/outputs");
     fs.mkdirSync(outputDir, { recursive: true });
 
-    const selectorJsonEscaped = JSON.stringify(selectorResult)
-      .replace(/\\/g, "\\\\")
-      .replace(/"/g, '\\"');
-
-    // 2. Python 실행 커맨드 구성
-    const pythonScriptPath = "src/scripts/train_ml_model.py";
-    //const selectorJsonEscaped = JSON.stringify(selectorResult).replace(/"/g, '\\"');
-    const command = `python ${pythonScriptPath} "${filePath}" "${selectorJsonEscaped}" "${outputDir}" ${timestamp}`;
-
-    return new Promise((resolve, reject) => {
-      exec(command, (error, stdout, stderr) => {
-        if (error) {
-          console.error("[MachineLearningTool 에러]", stderr);
-          reject(stderr);
-        }
-
-        // 모델 결과 파일(.pkl) 탐색 — 타임스탬프를 파일명에 포함하는 기존 규칙 가정
-        const modelFile = fs
-          .readdirSync(outputDir)
-          .filter((f) => f.endsWith(".pkl") && f.includes(String(timestamp)))[0];
-
-        if (!modelFile) {
-          reject("ML 결과 파일(.pkl)을 찾을 수 없습니다.");
-          return;
-        }
-
-        // 보고서 경로(텍스트/HTML 등) — 파이썬 스크립트가 생성한다고 가정
-        // 필요 시 train_ml_model.py에서 실제 파일명 규칙만 맞추면 됨
-        const reportTxtPath = path.join(outputDir, `${timestamp}_report.txt`);
-        const reportHtmlPath = path.join(outputDir, `${timestamp}_report.html`);
-        const reportPath = fs.existsSync(reportHtmlPath) ? reportHtmlPath : reportTxtPath;
-
-        // ✅ 반환 표면: MachineLearningOutput
-        // - FastAPI map_artifacts()는 reportPath를 우선 매핑하여 /outputs 링크를 붙임
-        // - modelPath/rawLog는 추가 정보 (UI에서 안 쓰면 무시됨)
-        const out: MachineLearningOutput = {
-          reportPath,
-          modelPath: path.join(outputDir, modelFile),
-          rawLog: (stdout || "").toString().trim(),
-        };
-
-        resolve(out);        
-      });
-    });
+    // [CHANGED] 상주 계산 워커에서 학습 — sklearn/xgboost import 를 매번 반복하지 않고,
+    // selector JSON 은 프레임 본문으로 (이스케이프·명령행 길이 제한 없음)
+    let job;
+    try {
+      job = await computeWorker.run("train", { filePath, selectorResult, outputDir, timestamp });
+    } catch (error: any) {
+      console.error("[MachineLearningTool 에러]", error?.message ?? error);
+      throw error?.message ?? error;
+    }
+    const { result, stdout } = job;
+
+    // 모델 결과 파일(.pkl) — 워커가 돌려준 경로 우선, 없으면 타임스탬프를 파일명에 포함하는 기존 규칙으로 탐색
+    const modelFile = result.modelPath
+      ? path.basename(result.modelPath)
+      : fs.readdirSync(outputDir).filter((f) => f.endsWith(".pkl") && f.includes(String(timestamp)))[0];
+
+    if (!modelFile || !fs.existsSync(path.join(outputDir, modelFile))) {
+      throw "ML 결과 파일(.pkl)을 찾을 수 없습니다.";
+    }
+
+    // 보고서 경로(텍스트/HTML 등) — 파이썬 스크립트가 생성한다고 가정
+    // 필요 시 train_ml_model.py에서 실제 파일명 규칙만 맞추면 됨
+    const reportTxtPath = path.join(outputDir, `${timestamp}_report.txt`);
+    const reportHtmlPath = path.join(outputDir, `${timestamp}_report.html`);
+    // train_ml_model.py 가 실제로 쓰는 결과 파일 (요약 + metric / train_time_s / rows_used)
+    const mlResultTxtPath = result.reportPath ?? path.join(outputDir, `ml_result_${timestamp}.txt`);
+    const reportPath = fs.existsSync(reportHtmlPath)
+      ? reportHtmlPath
+      : fs.existsSync(mlResultTxtPath) ? mlResultTxtPath : reportTxtPath;
+
+    // ✅ 반환 표면: MachineLearningOutput
+    // - FastAPI map_artifacts()는 reportPath를 우선 매핑하여 /outputs 링크를 붙임
+    // - modelPath/rawLog는 추가 정보 (UI에서 안 쓰면 무시됨)
+    const out: MachineLearningOutput = {
+      reportPath,
+      modelPath: path.join(outputDir, modelFile),
+      rawLog: (stdout || "").toString().trim(),
+      ...(result.metric ? { metric: result.metric } : {}),
+    };
+    return out;
   }
   private inferSessionIdFromPath(filePath: string): string | undefined {
     // .../uploads/<sessionId>/<file>.csv 형태를 가정
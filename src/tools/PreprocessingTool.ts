@@ -1,8 +1,10 @@
 import * as fs from "fs/promises";
 import * as path from "path";
+import { execFile } from "child_process";
 import { parse } from "csv-parse/sync";
 import { stringify } from "csv-stringify/sync";
 import { PreprocessingInput, PreprocessingOutput, PreprocessStep } from "./types";
+import { recordArtifacts } from "./artifactManifest";
 
 type Data = Record<string, string | number>[];
 
@@ -188,6 +190,21 @@ export class PreprocessingTool {
     const cleanedFilePath = request.filePath.replace(new RegExp(`^.*${sessionId}[\\\\/]`), "").replace(/^.*uploads[\\/]/, "");
     const resolvedPath = path.join(defaultDir, cleanedFilePath);
 
+    const outputDir = request.sessionId
+      ? path.join(process.cwd(), "src/outputs", request.sessionId) // 세션별 출력
+      : path.join(process.cwd(), "src/outputs");
+    const outputFileName = `preprocessed_${cleanedFilePath}`;
+
+    // [NEW] 파이썬 엔진(청크 단위 fit → 변환, 스펙 저장) 우선. 실패 시 기존 행 객체 경로로 대체
+    try {
+      const out = await this.runEngine(resolvedPath, outputDir, outputFileName, request.recommendations,
+        request.targetColumn);
+      console.log(`[PreprocessingTool 완료] engine rows=${out.rows} fitPasses=${out.fitPasses}`);
+      return { messages: out.messages, preprocessedFilePath: out.preprocessedFilePath, specPath: out.specPath };
+    } catch (e: any) {
+      console.log(`[PreprocessingTool] engine 실패 → TS 처리로 대체: ${e?.message ?? e}`);
+    }
+
     try {
       const file = await fs.readFile(resolvedPath, "utf-8");
       this.data = parse(file, { columns: true, skip_empty_lines: true }) as Data;
@@ -205,31 +222,57 @@ export class PreprocessingTool {
         results.push(this.handleMissingColumn({ column: rec.column, strategy: rec.fillna }));
       }
     }
+    // [ADD] 타깃은 스케일/인코딩하지 않음 (학습·지표·예측이 원래 단위로 남도록)
+    const target = request.targetColumn ?? null;
     for (const rec of request.recommendations as PreprocessStep[]) {
-      if (rec.normalize) {
+      if (rec.normalize && rec.column !== target) {
         results.push(this.scaleColumn({ column: rec.column, method: rec.normalize }));
       }
     }
     for (const rec of request.recommendations as PreprocessStep[]) {
-      if (rec.encoding) {
+      if (rec.encoding && rec.column !== target) {
         results.push(this.encodeColumn({ column: rec.column, method: rec.encoding }));
       }
     }
-    
-    const outputDir = request.sessionId
-      ? path.join(process.cwd(), "src/outputs", request.sessionId) // 세션별 출력
-      : path.join(process.cwd(), "src/outputs");
 
     await fs.mkdir(outputDir, { recursive: true });
 
-    const outputFileName = `preprocessed_${cleanedFilePath}`;
     const outputPath = path.join(outputDir, outputFileName);
 
 
     const csv = stringify(this.data, { header: true });
-    await fs.writeFile(outputPath, csv, "utf-8");
+    // [CHANGED] 임시 파일 + rename (하드링크로 공유된 캐시 사본을 덮어쓰지 않도록)
+    const tmp = `${outputPath}.${process.pid}.tmp`;
+    await fs.writeFile(tmp, csv, "utf-8");
+    await fs.rename(tmp, outputPath);
+    recordArtifacts(outputDir, [outputPath], "preprocess");
 
     return { messages: results, preprocessedFilePath: outputPath };
   }
 
+  private runEngine(
+    filePath: string,
+    outputDir: string,
+    outputName: string,
+    recommendations: PreprocessStep[],
+    targetColumn?: string | null
+  ): Promise<PreprocessingOutput & { rows: number; fitPasses: number }> {
+    const args = [
+      "src/scripts/preprocess_engine.py", filePath, outputDir,
+      "--recommendations", JSON.stringify(recommendations ?? []),
+      "--output-name", outputName,
+      ...(targetColumn ? ["--target", targetColumn] : []),
+    ];
+    return new Promise((resolve, reject) => {
+      execFile("python", args, { maxBuffer: 64 * 1024 * 1024 }, (error, stdout, stderr) => {
+        if (error) return reject(new Error(stderr?.toString() || error.message));
+        try {
+          resolve(JSON.parse(stdout.toString().trim().split(/\r?\n/).pop() || ""));
+        } catch (e) {
+          reject(e);
+        }
+      });
+    });
+  }
+
 }
@@ -1,4 +1,4 @@
-import { exec } from "child_process";
+import { computeWorker } from "./computeWorker";
 import { VisualizationInput, VisualizationOutput } from "./types";
 import fs from "fs";
 import path from "path";
@@ -54,33 +54,25 @@ export class VisualizationTool {
     const webBase = sessionId ? `/outputs/${sessionId}` : `/outputs`;
     const timestamp = Date.now();
 
-    // 2. Python 실행 커맨드 구성
-    const pythonScriptPath = "src/scripts/visualize_from_json.py";
-    const selectorJsonEscaped = JSON.stringify(selectorResult).replace(/"/g, '\\"');
-
-    const command = `python ${pythonScriptPath} "${filePath}" "${selectorJsonEscaped}" "${outputDir}" ${timestamp}`;
+    // 2. [CHANGED] 상주 계산 워커에 작업 전달 — 인터프리터 기동/라이브러리 import 없이 렌더만,
+    //    selector JSON 은 프레임 본문으로 (셸 이스케이프·명령행 길이 제한 없음)
     const urls: string[] = [];
-
-    await new Promise<void>((resolve, reject) => {
-      exec(command, (error, _stdout, stderr) => {
-        if (error) return reject(new Error(stderr?.toString() || "VisualizationTool error"));
-
-
-        // ② 이번 실행에 생성된 파일만 포함(수정시각으로 필터) — 타임스탬프 의존 제거
-        const files = fs.readdirSync(outputDir)
-          .filter((f) => /\.(png|jpg|jpeg|webp|gif)$/i.test(f))
-          .filter((f) => {
-            try {
-              const stat = fs.statSync(path.join(outputDir, f));
-              return stat.mtimeMs >= timestamp - 2000; // 여유 2초
-            } catch { return false; }
-          });
-
-        // 웹에서 접근 가능한 URL로 변환 (항상 슬래시 사용, 선행 슬래시 포함)
-        for (const f of files) urls.push(`${webBase}/${f}`.replace(/\\/g, "/"));
-        resolve();
-      });
-    });
+    const { result } = await computeWorker.run("visualize", { filePath, selectorResult, outputDir, timestamp });
+
+    // ② 워커가 돌려준 파일 목록 우선. 스크립트 실행(COMPUTE_WORKER=0)이면 이번 실행에 생성된 파일만(수정시각으로 필터)
+    const files: string[] = Array.isArray(result.chartPaths)
+      ? result.chartPaths.map((p: string) => path.basename(p))
+      : fs.readdirSync(outputDir)
+        .filter((f) => /\.(png|jpg|jpeg|webp|gif)$/i.test(f))
+        .filter((f) => {
+          try {
+            const stat = fs.statSync(path.join(outputDir, f));
+            return stat.mtimeMs >= timestamp - 2000; // 여유 2초
+          } catch { return false; }
+        });
+
+    // 웹에서 접근 가능한 URL로 변환 (항상 슬래시 사용, 선행 슬래시 포함)
+    for (const f of files) urls.push(`${webBase}/${f}`.replace(/\\/g, "/"));
 
     // (선택) heatmap 포함/복사
     if (correlation?.heatmapPath && fs.existsSync(correlation.heatmapPath)) {
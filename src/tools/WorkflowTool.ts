@@ -12,12 +12,23 @@ import {
   VisualizationInput, VisualizationOutput,
   PreprocessingInput, PreprocessingOutput,
   MachineLearningInput, MachineLearningOutput,
-  WorkflowResult, ProblemType
+  WorkflowResult, ProblemType,
+  WorkflowStepKey, WorkflowStepEvent, WorkflowOptions
 } from "./types";
+import { StepStore, fileSignature, fingerprint } from "./stepState";
+import { StageRecorder } from "./stageMetrics";
+import { writeArtifactSync } from "./artifactManifest";
 import fs from "fs";
 import path from "path";      
 
 
+// [ADD] 실행 한 번 동안 단계들이 공유하는 상태: 저장소(재사용) + 재사용된 단계 + 계측기
+interface RunContext {
+  state: StepStore | null;
+  reused: WorkflowStepKey[];
+  rec: StageRecorder;
+}
+
 export class WorkflowTool {
   static readonly description = "CSV 파일 경로를 받아 통계 분석 및 컬럼 추천, 모델 추천을 자동 수행합니다.";
   
@@ -69,50 +80,31 @@ export class WorkflowTool {
     console.log(`[Workflow:${step}] ${msg}`);
   }
 
-  // [NEW] CSV를 가볍게 파싱해 숫자형 컬럼만 data: Record<string, number[]> 로 구성
-  //       (의존성 없이, 쉼표 기반 단순 파싱: 큰따옴표 포함 복잡한 CSV는 별도 파서 권장)
-  private buildCorrelationData(filePath: string, columnStats: ColumnStat[]): Record<string, number[]> {
+
+  // [ADD] 단계 완료 이벤트 — 리스너 오류가 워크플로를 멈추지 않도록 격리
+  private emit(onStep: ((ev: WorkflowStepEvent) => void) | undefined, key: WorkflowStepKey,
+               ok: boolean, data: WorkflowStepEvent["data"], ctx?: RunContext) {
+    if (!onStep) return;
+    const reused = !!ctx?.reused.includes(key);
+    const timing = ctx?.rec.timings[key];
+    try {
+      onStep({ key, status: ok ? "done" : "skipped", data, ...(reused ? { reused } : {}), ...(timing ? { timing } : {}) });
+    } catch (e: any) {
+      this.log("EVENT", `listener failed: ${e?.message ?? e}`);
+    }
+  }
+
+  // [ADD] columnStats 에서 숫자형 컬럼 이름만
+  private numericColumns(columnStats: ColumnStat[]): string[] {
     const isNumericDtype = (dt: string) =>
       ["numeric", "number", "int", "integer", "float", "double"].includes(
         (dt || "").toLowerCase()
       );
-
-    const numericCols = columnStats
-    .filter(c => isNumericDtype(String(c.dtype)))
-    .map(c => c.column);
-    
-    if (numericCols.length === 0) return {};
-
-    const text = fs.readFileSync(filePath, "utf-8");
-    const lines = text.split(/\r?\n/).filter(Boolean);
-    if (lines.length === 0) return {};
-
-    // 헤더
-    const header = lines[0].split(",");
-    const colIndex: Record<string, number> = {};
-    header.forEach((h, idx) => {
-      colIndex[h.trim()] = idx;
-    });
-
-    // 선택된 숫자형 컬럼만 초기화
-    const data: Record<string, number[]> = {};
-    for (const col of numericCols) data[col] = [];
-
-    // 데이터 행 파싱
-    for (let i = 1; i < lines.length; i++) {
-      const cells = lines[i].split(",");
-      for (const col of numericCols) {
-        const idx = colIndex[col];
-        if (idx == null) continue;
-        const v = cells[idx]?.trim();
-        const num = Number(v);
-        data[col].push(v === "" || v == null || !Number.isFinite(num) ? NaN : num);
-      }
-    }
-    return data;
+    return columnStats
+      .filter(c => isNumericDtype(String(c.dtype)))
+      .map(c => c.column);
   }
 
-
   // [NEW] 상관행렬/페어 파일 아티팩트 생성(표 렌더용)
   private saveCorrelationArtifacts(filePath: string, corr: CorrelationOutput) {
     const outDir = path.join(path.dirname(filePath), "artifacts");
@@ -132,16 +124,71 @@ export class WorkflowTool {
       });
       return [r, ...rvals].join(",");
     });
-    fs.writeFileSync(matrixCsv, [header, ...rows].join("\n"), "utf-8");
+    writeArtifactSync(matrixCsv, [header, ...rows].join("\n"));      // [CHANGED] 하드링크 캐시 보호
 
     // high pairs JSON
-    fs.writeFileSync(pairsJson, JSON.stringify(corr.highCorrPairs, null, 2), "utf-8");
+    writeArtifactSync(pairsJson, JSON.stringify(corr.highCorrPairs, null, 2));
 
     return { matrixCsv, pairsJson };
   }
 
+  // [ADD] 단계 실행 + 상태 재사용: 지문이 같고 산출물이 남아 있으면 저장된 출력, 아니면 compute 후 저장
+  //       compute 가 null 을 돌려주면(단계 실패/건너뜀) 저장하지 않는다
+  //       [ADD] 재사용/실패와 무관하게 단계 시간·메모리를 ctx.rec 에 기록
+  private async runStep<T extends Record<string, any>>(
+    ctx: RunContext, key: WorkflowStepKey, fp: string,
+    compute: () => Promise<{ data: T; artifacts: (string | null | undefined)[] } | null>
+  ): Promise<T | null> {
+    const t0 = ctx.rec.begin(key);
+    try {
+      const hit = ctx.state?.get(key, fp);
+      if (hit) {
+        this.log("REUSE", `${key} (${fp.slice(0, 8)})`);
+        ctx.reused.push(key);
+        return hit.data as T;
+      }
+      const out = await compute();
+      if (out && ctx.state) ctx.state.put(key, fp, out.data, out.artifacts);
+      return out ? out.data : null;
+    } finally {
+      const t = ctx.rec.end(key, t0, ctx.reused.includes(key));
+      this.log("TIME", `${key} ${t.seconds}s rss=${t.rssMb}MB`);
+    }
+  }
+
+  // [ADD] 사용자가 지정한 모델로 추천 교체 (같은 이름의 대안이 있으면 그 파라미터 사용)
+  private overrideModel(rec: SelectorOutput["mlModelRecommendation"], model?: string): SelectorOutput["mlModelRecommendation"] {
+    if (!model || rec?.model === model) return rec;
+    const alt = rec?.alternatives?.find(a => a.model === model);
+    return {
+      model,
+      score: alt?.score ?? 0,
+      reason: "사용자 지정 모델",
+      params: alt?.params ?? {},
+      alternatives: rec ? [rec, ...(rec.alternatives ?? [])].filter(a => a.model !== model)
+        .map(({ model, score, reason, params }) => ({ model, score, reason, params })) : [],
+    };
+  }
+
+  // [ADD] 단계 계측기를 실행마다 만들고, 실패해도 환경변수/임시 파일을 정리
+  public async run(
+    input: { filePath: string; options?: WorkflowOptions },
+    hooks: { sessionId?: string; onStep?: (ev: WorkflowStepEvent) => void }
+  ): Promise<Awaited<ReturnType<WorkflowTool["runSteps"]>>> {
+    const rec = new StageRecorder();
+    try {
+      return await this.runSteps(input, hooks, rec);
+    } finally {
+      rec.close();
+    }
+  }
+
   // ✅ 반환 타입을 공통 타입으로 고정
-  public async run({ filePath }: { filePath: string }, {sessionId} : {sessionId?:string}): Promise<WorkflowResult & {
+  private async runSteps(
+    { filePath, options }: { filePath: string; options?: WorkflowOptions },
+    { sessionId, onStep }: { sessionId?: string; onStep?: (ev: WorkflowStepEvent) => void },
+    rec: StageRecorder
+  ): Promise<WorkflowResult & {
     steps: {
       basic: { input: BasicAnalysisInput; output: BasicAnalysisOutput };
       correlation?: { input: CorrelationInput; output: CorrelationOutput; artifacts: { matrixCsv: string; pairsJson: string } };
@@ -153,41 +200,73 @@ export class WorkflowTool {
   }> {
 
     if (!filePath) throw new Error("파일 경로(filePath)는 필수입니다.");
-    this.log("START", `filePath=${filePath}, sessionId=${sessionId ?? "none"}`);
+    this.log("START", `filePath=${filePath}, sessionId=${sessionId ?? "none"}, options=${JSON.stringify(options ?? {})}`);
+
+    // [ADD] 증분 재실행: 단계별 입력 지문 → 저장된 출력 (options.force 면 전부 다시 계산)
+    const fileSig = fileSignature(filePath);
+    const state = fileSig && !options?.force ? StepStore.forRun(filePath, sessionId) : null;
+    const ctx: RunContext = { state, reused: [], rec };
+    const reusedSteps = ctx.reused;
 
     // 1) BasicAnalysis
     const analyzer = new BasicAnalysisTool();
     const basicInput: BasicAnalysisInput = { filePath };                  // [ADD]
-    const basicOutput: BasicAnalysisOutput = await analyzer.run(basicInput); // [ADD]
-    const columnStats: ColumnStat[] = (basicOutput?.columnStats ?? []) as ColumnStat[];
+    const basicFp = fingerprint("basic", { file: fileSig });
+    const basicData = await this.runStep(ctx, "basic", basicFp, async () => {
+      const basicOutput: BasicAnalysisOutput = await analyzer.run(basicInput); // [ADD]
+      const stats = (basicOutput?.columnStats ?? []) as ColumnStat[];
+      return stats.length ? { data: { columnStats: stats }, artifacts: [] } : null;
+    });
+    const columnStats: ColumnStat[] = basicData?.columnStats ?? [];
+    this.emit(onStep, "basic", columnStats.length > 0, { columnStats }, ctx);
 
 
     // 2) Correlation
     let correlationResults: CorrelationOutput | undefined;
     let corrArtifacts: { matrixCsv: string; pairsJson: string } | undefined;
     let correlationStep: { input: CorrelationInput; output: CorrelationOutput; artifacts: { matrixCsv: string; pairsJson: string } } | undefined; // [ADD]
+    // [CHANGED] 숫자형 컬럼 이름만 넘기고 계산은 CorrelationTool(→ Python 엔진)이 CSV에서 직접 수행
+    //           (엔진을 쓸 수 없을 때만 CorrelationTool 내부에서 JS 배열을 만든다)
+    const numericCols = this.numericColumns(columnStats);
+    const corrInput: CorrelationInput = { filePath, sessionId, columns: numericCols, method: "pearson", dropna: true, threshold: 0.7 }; // [ADD]
+    const corrFp = fingerprint("corr", { basic: basicFp, columns: numericCols, method: corrInput.method, threshold: corrInput.threshold });
     try {
       const corrTool = new CorrelationTool();
-      const corrData = this.buildCorrelationData(filePath, columnStats);
-      if (Object.keys(corrData).length) {
-        const corrInput: CorrelationInput = { filePath, sessionId, data: corrData, method: "pearson", dropna: true, threshold: 0.7 }; // [ADD]
-        const corrOutput: CorrelationOutput = await corrTool.run(corrInput); 
-        
-        correlationResults = corrOutput;
-        corrArtifacts = this.saveCorrelationArtifacts(filePath, corrOutput);
-        correlationStep = { input: corrInput, output: corrOutput, artifacts: corrArtifacts };
-
+      if (numericCols.length) {
+        const corrData = await this.runStep(ctx, "corr", corrFp, async () => {
+          const corrOutput: CorrelationOutput = await corrTool.run(corrInput);
+          const saved = this.saveCorrelationArtifacts(filePath, corrOutput);
+          // 서버가 표로 읽는 세션 산출물 쪽 행렬 CSV 도 남아 있어야 재사용 가능
+          const base = path.basename(filePath).replace(/\.[^.]+$/, "");
+          const sessionCsv = sessionId ? path.join(process.cwd(), "src/outputs", sessionId, `${base}.corr_matrix.csv`) : null;
+          return { data: { correlationResults: corrOutput, corrArtifacts: saved },
+                   artifacts: [saved.matrixCsv, saved.pairsJson, sessionCsv] };
+        });
+        correlationResults = corrData?.correlationResults;
+        corrArtifacts = corrData?.corrArtifacts;
+        if (correlationResults && corrArtifacts) {
+          correlationStep = { input: corrInput, output: correlationResults, artifacts: corrArtifacts };
+        }
       } else {
         this.log("CORR", "no numeric columns → skip");
       }
     } catch (e: any) {
       this.log("CORR", `failed: ${e?.message ?? e}`);
     }
+    this.emit(onStep, "corr", !!correlationResults, { corrMatrixPath: corrArtifacts?.matrixCsv }, ctx);
 
     // 3) Selector (Correlation은 이후 단계에서 연결)
+    //    [ADD] options.targetColumn / problemType 은 hint 로 전달 (컬럼/페어/전처리 권고는 타깃과 무관)
     const selector = new SelectorTool();
-    const selectorInput: SelectorInput = { columnStats, correlationResults }; // [ADD]
-    const selectorOutput: SelectorOutput = await selector.run(selectorInput); // [ADD]
+    const hint = options?.targetColumn || options?.problemType
+      ? { targetColumn: options?.targetColumn ?? null, problemType: options?.problemType ?? null }
+      : undefined;
+    const selectorInput: SelectorInput = { columnStats, correlationResults, ...(hint ? { hint } : {}) }; // [ADD]
+    const selectorFp = fingerprint("selector", { basic: basicFp, corr: corrFp, hint });
+    const selectorOutput: SelectorOutput | null = await this.runStep(ctx, "selector", selectorFp, async () => {
+      const out: SelectorOutput = await selector.run(selectorInput); // [ADD]
+      return out ? { data: out, artifacts: [] } : null;
+    });
 
     // ✅ undefined 방지: 전부 기본값 보장
     const selectedColumns = selectorOutput?.selectedColumns ?? [];
@@ -195,25 +274,35 @@ export class WorkflowTool {
     const preprocessingRecommendations = selectorOutput?.preprocessingRecommendations ?? [];
     const targetColumn = selectorOutput?.targetColumn ?? null;
     const problemType = (selectorOutput?.problemType ?? null) as Exclude<ProblemType, null> | null;
-    const mlModelRecommendation = selectorOutput?.mlModelRecommendation ?? null;
+    const mlModelRecommendation = this.overrideModel(selectorOutput?.mlModelRecommendation ?? null, options?.model); // [CHANGED]
+    this.emit(onStep, "selector",
+      selectedColumns.length > 0 || recommendedPairs.length > 0 || preprocessingRecommendations.length > 0,
+      { selectedColumns, recommendedPairs, preprocessingRecommendations, targetColumn, problemType, mlModelRecommendation },
+      ctx);
 
     // 4) Visualization
     const visualizer = new VisualizationTool();
     let chartPaths: string[] = [];
     let visualizationOutput: VisualizationOutput = { chartPaths: [] };
+    const visualizationInput: VisualizationInput = {          // [ADD]
+      filePath,
+      sessionId,
+      selectorResult: { selectedColumns, recommendedPairs },
+      correlation: { matrixPath: corrArtifacts?.matrixCsv },
+    };
+    const visualFp = fingerprint("visual", { file: fileSig, corr: corrFp, selectedColumns, recommendedPairs });
     try {
-      const visualizationInput: VisualizationInput = {          // [ADD]
-        filePath,
-        sessionId,
-        selectorResult: { selectedColumns, recommendedPairs },
-        correlation: { matrixPath: corrArtifacts?.matrixCsv },
-      };
-      const vizRaw = await visualizer.run(visualizationInput);
-      chartPaths = Array.isArray(vizRaw) ? vizRaw : (vizRaw as VisualizationOutput)?.chartPaths ?? [];
+      const vizData = await this.runStep(ctx, "visual", visualFp, async () => {
+        const vizRaw = await visualizer.run(visualizationInput);
+        const paths = Array.isArray(vizRaw) ? vizRaw : (vizRaw as VisualizationOutput)?.chartPaths ?? [];
+        return paths.length ? { data: { chartPaths: paths }, artifacts: paths } : null;
+      });
+      chartPaths = vizData?.chartPaths ?? [];
       visualizationOutput = { chartPaths };
     } catch (e:any) {
       this.log("VIZ", `skip: ${e?.message ?? e}`);
     }
+    this.emit(onStep, "visual", chartPaths.length > 0, { chartPaths }, ctx);
 
     // 5) Preprocessing
     //    ⬇️ PreprocessingTool은 fillna: "drop" | "mean" | "mode" 만 지원.
@@ -221,44 +310,62 @@ export class WorkflowTool {
     const preprocessor = new PreprocessingTool();
     let preprocessingOutput: PreprocessingOutput | undefined;
     let effectiveFilePath = filePath;
+    const preprocessFp = fingerprint("preprocess", {
+      file: fileSig, recommendations: preprocessingRecommendations, target: targetColumn,
+    });
     try{
       const preprocessingInput : PreprocessingInput = {
         filePath,
         recommendations: preprocessingRecommendations,
         sessionId,
+        targetColumn, // [ADD] 타깃은 스케일/인코딩 제외
       };
-      preprocessingOutput = await preprocessor.runPreprocessing(preprocessingInput);
+      preprocessingOutput = await this.runStep(ctx, "preprocess", preprocessFp, async () => {
+        const out = await preprocessor.runPreprocessing(preprocessingInput);
+        return out?.preprocessedFilePath ? { data: out, artifacts: [out.preprocessedFilePath, out.specPath] } : null;
+      }) ?? undefined;
       effectiveFilePath = preprocessingOutput?.preprocessedFilePath || filePath;
     } catch (e:any){
       this.log("PREPROC", `skip: ${e?.message ?? e}`);
     }
+    this.emit(onStep, "preprocess", !!preprocessingOutput?.preprocessedFilePath,
+      { preprocessedFilePath: preprocessingOutput?.preprocessedFilePath ?? null }, ctx);
 
     // 6) MachineLearning
     const mlTool = new MachineLearningTool();
     let mlResultPath: { reportPath: string } | undefined = undefined;
+    const mlInput: MachineLearningInput = {                   // [ADD]
+      filePath: effectiveFilePath,
+      sessionId,
+      selectorResult: {
+        targetColumn: targetColumn ?? undefined,
+        problemType: (problemType ?? undefined) as Exclude<ProblemType, null> | undefined, // [FIX] 안전 캐스팅
+        mlModelRecommendation: mlModelRecommendation ?? undefined,
+      },
+    };
+    const trainFp = fingerprint("train", {
+      file: fileSignature(effectiveFilePath), preprocess: preprocessingOutput ? preprocessFp : null,
+      selectorResult: mlInput.selectorResult,
+    });
 
     try{
-      const mlInput: MachineLearningInput = {                   // [ADD]
-        filePath: effectiveFilePath,
-        sessionId,
-        selectorResult: {
-          targetColumn: targetColumn ?? undefined,
-          problemType: (problemType ?? undefined) as Exclude<ProblemType, null> | undefined, // [FIX] 안전 캐스팅
-          mlModelRecommendation: mlModelRecommendation ?? undefined,
-        },
-      };
-    
       // 🔧 문자열/객체 모두 { reportPath: string }으로 정규화 (map_artifacts와 호환)
-      const mlRaw = await mlTool.run(mlInput);
-      mlResultPath =
-        typeof mlRaw === "string"
-          ? { reportPath: mlRaw }
-          : { reportPath: (mlRaw as MachineLearningOutput).reportPath };
+      const mlData = await this.runStep(ctx, "train", trainFp, async () => {
+        const mlRaw = await mlTool.run(mlInput);
+        const out: MachineLearningOutput = typeof mlRaw === "string" ? { reportPath: mlRaw } : (mlRaw as MachineLearningOutput);
+        return out?.reportPath
+          ? { data: { mlResultPath: { reportPath: out.reportPath } }, artifacts: [out.reportPath, out.modelPath] }
+          : null;
+      });
+      mlResultPath = mlData?.mlResultPath;
     } catch (e:any){
       this.log("ML", `skip: ${e?.message ?? e}`);
     }
+    this.emit(onStep, "train", !!mlResultPath?.reportPath, { mlResultPath: mlResultPath ?? null, mlModelRecommendation },
+      ctx);
 
-    this.log("DONE", "workflow completed.");
+    state?.save();
+    this.log("DONE", `workflow completed. reused=[${reusedSteps.join(",")}]`);
 
     // ✅ WorkflowResult 형태로 반환
     return {
@@ -274,13 +381,15 @@ export class WorkflowTool {
       chartPaths: chartPaths ?? [],
       preprocessedFilePath: preprocessingOutput?.preprocessedFilePath ?? null,
       mlResultPath: mlResultPath ?? null,
+      reusedSteps,                                   // [ADD] 저장된 출력을 다시 쓴 단계
+      timings: { ...rec.timings },                   // [ADD] 단계별 소요 시간/메모리
       // [ADD] 단계별 I/O 기록(디버그/리포트용)
       steps: {
         basic: { input: { filePath }, output: { columnStats } as any },
         ...(correlationStep ? { correlation: correlationStep } : {}),
-        selector: { input: selectorInput, output: selectorOutput },
+        selector: { input: selectorInput, output: selectorOutput as SelectorOutput },
         visualization: { 
-          input: { filePath, sessionId, selectorResult: { selectedColumns, recommendedPairs }, correlation: { matrixPath: corrArtifacts?.matrixCsv } }, 
+          input: visualizationInput, 
           output: visualizationOutput 
         },
         preprocessing: {
@@ -288,7 +397,7 @@ export class WorkflowTool {
           output: preprocessingOutput ?? { preprocessedFilePath: null, messages: [] } // ok
         },
         machineLearning: { 
-          input: { filePath: effectiveFilePath, sessionId, selectorResult: { targetColumn: targetColumn ?? undefined, problemType: (problemType ?? undefined) as any, mlModelRecommendation: mlModelRecommendation ?? undefined } }, 
+          input: mlInput, 
           output: mlResultPath ?? { reportPath: "" } 
         },
       }
@@ -0,0 +1,93 @@
+// src/tools/artifactManifest.ts
+
+/**
+ * 세션 산출물 매니페스트 기록 (TS 도구용)
+ * ────────────────────────────────
+ * src/outputs/{sessionId}/.manifest.jsonl 에 산출물 한 줄씩 덧붙인다.
+ * 형식/분류 규칙은 src/scripts/artifact_manifest.py 와 같다. (서버는 이 파일만 읽어 목록을 만든다)
+ */
+import * as fs from "fs";
+import * as path from "path";
+
+export const MANIFEST_NAME = ".manifest.jsonl";
+
+const IMAGE_EXTS = new Set([".png", ".jpg", ".jpeg", ".gif", ".webp"]);
+const KIND_STEPS: Record<string, string> = {
+  corr_matrix: "corr", corr_pairs: "corr", chart: "visual", preprocessed: "preprocess", preprocess_spec: "preprocess",
+  model: "train", model_meta: "train", report: "train", leaderboard: "train",
+};
+
+export function kindOf(name: string): string {
+  const low = name.toLowerCase();
+  if (IMAGE_EXTS.has(path.extname(low))) return "chart";
+  if (low.endsWith(".corr_matrix.csv")) return "corr_matrix";
+  if (low.endsWith(".corr_pairs.json") || low.endsWith(".high_corr_pairs.json")) return "corr_pairs";
+  if (low.startsWith("model_")) return low.endsWith(".meta.json") ? "model_meta" : "model";
+  if (low.startsWith("ml_result_")) return "report";
+  if (low.startsWith("leaderboard_")) return "leaderboard";
+  if (low.endsWith(".spec.json")) return "preprocess_spec";
+  if (low.startsWith("preprocessed_")) return "preprocessed";
+  return "file";
+}
+
+/**
+ * 산출물 쓰기: 임시 파일에 쓰고 rename (artifact_manifest.write_text 와 같음)
+ * 산출물 캐시가 파일을 하드링크로 공유하므로 제자리에서 덮어쓰면 캐시 사본까지 바뀐다.
+ */
+export function writeArtifactSync(file: string, data: string): void {
+  const tmp = `${file}.${process.pid}.tmp`;
+  fs.writeFileSync(tmp, data, "utf-8");
+  fs.renameSync(tmp, file);
+}
+
+function entryLine(outDir: string, name: string, step?: string): string | null {
+  try {
+    const st = fs.statSync(path.join(outDir, name));
+    if (!st.isFile()) return null;
+    const kind = kindOf(name);
+    return JSON.stringify({
+      op: "add", name, kind, size: st.size, step: step ?? KIND_STEPS[kind] ?? null,
+      created_at: Math.round(st.mtimeMs) / 1000,
+    });
+  } catch {
+    return null;      // 파일이 없으면 기록하지 않음
+  }
+}
+
+/** 한 번의 append → 파이썬 스크립트와 동시에 기록해도 줄이 섞이지 않음 */
+function appendLines(outDir: string, lines: string[]): void {
+  if (!lines.length) return;
+  try {
+    fs.appendFileSync(path.join(outDir, MANIFEST_NAME), lines.join("\n") + "\n", "utf-8");
+  } catch (e) {
+    console.warn(`[manifest] 기록 실패: ${(e as Error).message}`);
+  }
+}
+
+/**
+ * [ADD] 매니페스트가 없는 기존 세션 폴더를 한 번 훑어 매니페스트 생성 (artifact_manifest.bootstrap 과 같음)
+ * 없으면 TS 도구가 첫 기록자일 때 이전 파일들이 목록에서 영영 빠진다. exclude: 곧 따로 기록할 파일
+ */
+function bootstrap(outDir: string, exclude: Set<string>): void {
+  const manifest = path.join(outDir, MANIFEST_NAME);
+  let names: string[];
+  try {
+    if (fs.existsSync(manifest)) return;
+    names = fs.readdirSync(outDir).filter(n => !n.startsWith(".") && !exclude.has(n)).sort();
+  } catch {
+    return;
+  }
+  appendLines(outDir, names.map(n => entryLine(outDir, n)).filter((l): l is string => !!l));
+  try {
+    fs.closeSync(fs.openSync(manifest, "a"));
+  } catch {
+    // 기록 실패는 appendLines 에서 이미 경고
+  }
+}
+
+/** outDir 안에 쓴 파일들을 매니페스트에 추가 (실패해도 도구 실행은 계속) */
+export function recordArtifacts(outDir: string, files: string[], step?: string): void {
+  const names = files.map(f => path.basename(f));
+  bootstrap(outDir, new Set(names));
+  appendLines(outDir, names.map(n => entryLine(outDir, n, step)).filter((l): l is string => !!l));
+}
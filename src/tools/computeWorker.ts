@@ -0,0 +1,115 @@
+// src/tools/computeWorker.ts
+
+/**
+ * 상주 파이썬 계산 워커 클라이언트 (src/scripts/compute_worker.py)
+ * ────────────────────────────────
+ * 시각화/학습 도구가 매번 `python ...` 을 새로 띄우지 않고, pandas·seaborn·sklearn·xgboost 를 미리 올려둔
+ * 워커 하나에 stdin/stdout 프레임("<<<FRAME>>>" + JSON 한 줄)으로 작업을 보낸다.
+ * selector JSON 은 프레임 본문으로 가므로 셸 이스케이프나 명령행 길이 제한이 없다.
+ *  - 처음 쓸 때 띄우고 이 Node 프로세스가 끝날 때까지 재사용 (서버 모드면 여러 요청에 걸쳐 유지)
+ *  - 진행 중인 작업이 없으면 unref → 1회성 실행(--mode=workflow)에서도 Node 종료를 막지 않음
+ *  - 워커가 죽으면 대기 중 작업은 실패 처리하고 다음 호출 때 다시 띄움
+ *  - COMPUTE_WORKER=0 이면 예전처럼 스크립트를 실행 (selector JSON 은 표준입력 "-" 로 전달)
+ * 단계 계측(STAGE_METRICS_FILE/STEP)은 호출 시점 값을 요청에 실어 보내 워커가 작업 단위로 기록한다.
+ */
+import { ChildProcess, execFile, spawn } from "child_process";
+import * as readline from "readline";
+
+const FRAME = "<<<FRAME>>>";
+const ENABLED = process.env.COMPUTE_WORKER !== "0";
+const WORKER_SCRIPT = "src/scripts/compute_worker.py";
+const SCRIPTS = {
+  visualize: "src/scripts/visualize_from_json.py",
+  train: "src/scripts/train_ml_model.py",
+} as const;
+
+export type ComputeOp = keyof typeof SCRIPTS;
+
+export interface ComputeJob {
+  filePath: string;
+  selectorResult: unknown;
+  outputDir: string;
+  timestamp?: string | number;
+  options?: Record<string, unknown>;
+}
+
+export interface ComputeResult {
+  result: Record<string, any>;   // 워커 경로: visualize → { chartPaths }, train → { reportPath, modelPath, metric }
+  stdout: string;
+}
+
+interface Pending {
+  resolve: (r: ComputeResult) => void;
+  reject: (e: Error) => void;
+}
+
+class ComputeWorker {
+  private proc?: ChildProcess;
+  private readonly pending = new Map<string, Pending>();
+  private seq = 0;
+  private stderrTail: string[] = [];
+
+  run(op: ComputeOp, job: ComputeJob): Promise<ComputeResult> {
+    if (!ENABLED) return runScript(op, job);
+    const proc = this.proc ?? (this.proc = this.spawn());
+    const id = `${process.pid}-${++this.seq}`;
+    return new Promise<ComputeResult>((resolve, reject) => {
+      this.pending.set(id, { resolve, reject });
+      this.setRef(proc, true);
+      const metrics = { file: process.env.STAGE_METRICS_FILE, step: process.env.STAGE_METRICS_STEP };
+      proc.stdin!.write(`${FRAME}${JSON.stringify({ id, op, ...job, metrics })}\n`);
+    });
+  }
+
+  private spawn(): ChildProcess {
+    const proc = spawn("python", [WORKER_SCRIPT], { stdio: ["pipe", "pipe", "pipe"] });
+    this.stderrTail = [];
+
+    readline.createInterface({ input: proc.stdout! }).on("line", (line) => {
+      if (!line.startsWith(FRAME)) return;
+      let frame: any;
+      try { frame = JSON.parse(line.slice(FRAME.length)); } catch { return; }
+      const p = frame.type === "result" ? this.pending.get(frame.id) : undefined;
+      if (!p) return;   // ready 프레임 등
+      this.pending.delete(frame.id);
+      if (this.pending.size === 0) this.setRef(proc, false);
+      if (frame.code === 0) p.resolve({ result: frame.result ?? {}, stdout: frame.stdout ?? "" });
+      else p.reject(new Error(frame.stderr || `compute worker: ${frame.id} 실패`));
+    });
+    proc.stderr!.on("data", (d) => {
+      this.stderrTail.push(String(d));
+      if (this.stderrTail.length > 50) this.stderrTail.shift();
+    });
+    proc.stdin!.on("error", () => { /* 워커 종료 → exit 에서 처리 */ });
+
+    const fail = (reason: string) => {
+      if (this.proc === proc) this.proc = undefined;
+      const err = new Error(this.stderrTail.join("").slice(-2000) || reason);
+      for (const p of this.pending.values()) p.reject(err);
+      this.pending.clear();
+    };
+    proc.on("error", (e) => fail(`compute worker 실행 실패: ${e.message}`));
+    proc.on("exit", (code) => fail(`compute worker 종료 (code ${code})`));
+    this.setRef(proc, false);
+    return proc;
+  }
+
+  private setRef(proc: ChildProcess, on: boolean) {
+    const handles: any[] = [proc, proc.stdin, proc.stdout, proc.stderr];
+    for (const h of handles) (on ? h?.ref : h?.unref)?.call(h);
+  }
+}
+
+/** COMPUTE_WORKER=0 또는 비교용: 스크립트 1회 실행 (결과는 파일로만 남음 → result 는 비어 있음) */
+function runScript(op: ComputeOp, job: ComputeJob): Promise<ComputeResult> {
+  const args = [SCRIPTS[op], job.filePath, "-", job.outputDir, String(job.timestamp ?? Date.now())];
+  return new Promise((resolve, reject) => {
+    const child = execFile("python", args, { maxBuffer: 64 * 1024 * 1024 }, (error, stdout, stderr) => {
+      if (error) return reject(new Error(stderr?.toString() || error.message));
+      resolve({ result: {}, stdout: (stdout || "").toString().trim() });
+    });
+    child.stdin?.end(JSON.stringify(job.selectorResult ?? {}));
+  });
+}
+
+export const computeWorker = new ComputeWorker();
@@ -0,0 +1,75 @@
+// src/tools/stageMetrics.ts
+
+/**
+ * 워크플로 단계 계측 (소요 시간 / Node RSS / 파이썬 엔진 지표)
+ * ────────────────────────────────
+ * 실행마다 임시 JSONL 파일을 하나 만들어 STAGE_METRICS_FILE 로 넘기고, 단계마다 STAGE_METRICS_STEP 을 바꾼다.
+ * 도구가 띄우는 파이썬 스크립트는 종료 시 src/scripts/stage_metrics.py 로 이 파일에 한 줄씩 남기므로
+ * 단계가 끝난 뒤 그 단계의 줄만 모으면 된다. (자식 프로세스는 실행 시점의 process.env 를 물려받음)
+ */
+import * as fs from "fs";
+import * as os from "os";
+import * as path from "path";
+import { ScriptTiming, StageTiming } from "./types";
+
+const MB = 1024 * 1024;
+
+export class StageRecorder {
+  readonly timings: Record<string, StageTiming> = {};
+  private readonly file: string;
+  private readonly prevFile?: string;
+  private readonly prevStep?: string;
+  private readonly startedAt = performance.now();
+
+  constructor() {
+    this.file = path.join(os.tmpdir(), `stage_metrics_${process.pid}_${Date.now()}.jsonl`);
+    this.prevFile = process.env.STAGE_METRICS_FILE;
+    this.prevStep = process.env.STAGE_METRICS_STEP;
+    process.env.STAGE_METRICS_FILE = this.file;
+  }
+
+  /** 단계 시작: 이후 실행되는 파이썬 스크립트가 이 단계 이름으로 기록 */
+  begin(key: string): number {
+    process.env.STAGE_METRICS_STEP = key;
+    return performance.now();
+  }
+
+  end(key: string, t0: number, reused = false): StageTiming {
+    const timing: StageTiming = {
+      component: "tool",
+      seconds: Math.round(performance.now() - t0) / 1000,
+      rssMb: Math.round(process.memoryUsage().rss / MB * 10) / 10,
+      peakRssMb: Math.round(process.resourceUsage().maxRSS / 1024 * 10) / 10,   // maxRSS 는 KB (프로세스 전체 최댓값)
+      ...(reused ? { reused } : {}),
+    };
+    const scripts = this.scripts(key);
+    if (scripts.length) timing.scripts = scripts;
+    this.timings[key] = timing;
+    return timing;
+  }
+
+  private scripts(key: string): ScriptTiming[] {
+    try {
+      return fs.readFileSync(this.file, "utf-8").split("\n")
+        .filter(Boolean)
+        .map(line => { try { return JSON.parse(line); } catch { return null; } })
+        .filter((r: any) => r && r.step === key)
+        .map(({ step, ...rest }: any) => rest as ScriptTiming);
+    } catch {
+      return [];  // 이 단계에서 파이썬 스크립트를 띄우지 않았음
+    }
+  }
+
+  totalSeconds(): number {
+    return Math.round(performance.now() - this.startedAt) / 1000;
+  }
+
+  /** 환경변수 원복 + 임시 파일 삭제 */
+  close() {
+    if (this.prevFile === undefined) delete process.env.STAGE_METRICS_FILE;
+    else process.env.STAGE_METRICS_FILE = this.prevFile;
+    if (this.prevStep === undefined) delete process.env.STAGE_METRICS_STEP;
+    else process.env.STAGE_METRICS_STEP = this.prevStep;
+    fs.rm(this.file, { force: true }, () => {});
+  }
+}
@@ -0,0 +1,133 @@
+// src/tools/stepState.ts
+
+/**
+ * 워크플로 단계 상태 (증분 재실행용)
+ * ────────────────────────────────
+ * 단계마다 입력 지문(fingerprint) → 출력(단계 이벤트 data)과 산출물 경로를
+ * src/outputs/{sessionId}/.workflow_state.json 에 남긴다.
+ * 다시 실행할 때 지문이 같고 산출물이 그대로 있으면 그 단계를 건너뛰고 저장된 출력을 쓴다.
+ * "그대로" = 저장 당시의 크기/수정시각과 같음 — preprocessed_<파일>.csv, 차트 등은 타깃이 달라도 이름이
+ * 같아서, 존재만 확인하면 다른 지문의 실행이 덮어쓴 파일을 재사용하게 된다.
+ *
+ * 지문은 단계 입력(파일 크기/수정시각, 윗단계 지문, 단계 파라미터)의 해시라서
+ * 타깃/모델만 바꾸면 학습 단계만, 원본이 바뀌면 전체가 다시 계산된다.
+ * 같은 세션에서 표본/전체 실행을 오가도 서로의 상태를 지우지 않도록 단계별로 여러 지문을 보관(최근 MAX_ENTRIES 개).
+ */
+import * as crypto from "crypto";
+import * as fs from "fs";
+import * as path from "path";
+
+export const STATE_NAME = ".workflow_state.json";
+const STATE_VERSION = 2;      // 단계 로직/출력 형식이 바뀌면 올려서 이전 상태 무효화
+const MAX_ENTRIES = 60;
+
+export interface StepEntry {
+  key: string;
+  data: Record<string, any>;
+  artifacts: string[];
+  signatures: ({ size: number; mtimeMs: number } | null)[];   // [ADD] artifacts 와 같은 순서
+  savedAt: number;
+}
+
+/** 키 순서와 무관한 JSON (지문이 객체 생성 순서에 흔들리지 않도록) */
+function stableJson(v: any): string {
+  if (Array.isArray(v)) return `[${v.map(stableJson).join(",")}]`;
+  if (v && typeof v === "object") {
+    return `{${Object.keys(v).sort().filter(k => v[k] !== undefined)
+      .map(k => `${JSON.stringify(k)}:${stableJson(v[k])}`).join(",")}}`;
+  }
+  return JSON.stringify(v ?? null);
+}
+
+export function fingerprint(key: string, inputs: Record<string, any>): string {
+  return crypto.createHash("sha256")
+    .update(stableJson({ v: STATE_VERSION, key, inputs }))
+    .digest("hex").slice(0, 32);
+}
+
+/** 입력 파일 서명 (경로 + 크기 + 수정시각). 파일이 없으면 null */
+export function fileSignature(filePath: string): { path: string; size: number; mtimeMs: number } | null {
+  try {
+    const st = fs.statSync(filePath);
+    return { path: path.resolve(filePath), size: st.size, mtimeMs: Math.round(st.mtimeMs) };
+  } catch {
+    return null;
+  }
+}
+
+/** 산출물 경로 → 디스크 경로 ("/outputs/..." 웹 경로는 src/outputs 아래로) */
+function resolveArtifact(p: string): string {
+  const web = p.replace(/\\/g, "/");
+  if (web.startsWith("/outputs/")) return path.join(process.cwd(), "src", web);
+  return path.resolve(p);
+}
+
+export class StepStore {
+  private readonly file: string;
+  private entries: Record<string, StepEntry> = {};
+
+  constructor(dir: string) {
+    this.file = path.join(dir, STATE_NAME);
+    try {
+      const raw = JSON.parse(fs.readFileSync(this.file, "utf-8"));
+      if (raw?.version === STATE_VERSION && raw.entries && typeof raw.entries === "object") {
+        this.entries = raw.entries;
+      }
+    } catch {
+      // 상태가 없거나 깨졌으면 처음부터
+    }
+  }
+
+  static forRun(filePath: string, sessionId?: string): StepStore {
+    const dir = sessionId
+      ? path.join(process.cwd(), "src/outputs", sessionId)
+      : path.dirname(filePath);
+    return new StepStore(dir);
+  }
+
+  /** 지문이 같고 산출물이 모두 저장 당시 그대로(크기/수정시각) 남아 있을 때만 저장된 출력 */
+  get(key: string, fp: string): StepEntry | null {
+    const e = this.entries[fp];
+    if (!e || e.key !== key) return null;
+    const intact = e.artifacts.every((a, i) => {
+      const sig = fileSignature(resolveArtifact(a));
+      const saved = e.signatures?.[i];
+      return !!sig && !!saved && sig.size === saved.size && sig.mtimeMs === saved.mtimeMs;
+    });
+    if (!intact) {
+      delete this.entries[fp];
+      return null;
+    }
+    return e;
+  }
+
+  put(key: string, fp: string, data: Record<string, any>, artifacts: (string | null | undefined)[]) {
+    const paths = artifacts.filter((a): a is string => !!a);
+    this.entries[fp] = {
+      key, data, savedAt: Date.now(),
+      artifacts: paths,
+      signatures: paths.map(a => {
+        const sig = fileSignature(resolveArtifact(a));
+        return sig && { size: sig.size, mtimeMs: sig.mtimeMs };
+      }),
+    };
+    const fps = Object.keys(this.entries);
+    if (fps.length > MAX_ENTRIES) {
+      fps.sort((a, b) => this.entries[a].savedAt - this.entries[b].savedAt)
+        .slice(0, fps.length - MAX_ENTRIES)
+        .forEach(f => delete this.entries[f]);
+    }
+  }
+
+  /** 임시 파일에 쓰고 rename (쓰는 도중 죽어도 이전 상태는 유지) */
+  save() {
+    try {
+      fs.mkdirSync(path.dirname(this.file), { recursive: true });
+      const tmp = `${this.file}.${process.pid}.tmp`;
+      fs.writeFileSync(tmp, JSON.stringify({ version: STATE_VERSION, entries: this.entries }), "utf-8");
+      fs.renameSync(tmp, this.file);
+    } catch (e) {
+      console.warn(`[stepState] 저장 실패: ${(e as Error).message}`);
+    }
+  }
+}
@@ -8,8 +8,11 @@ export interface ColumnStat {
   dtype: DType;
   missing: number;
   unique: number;
+  uniqueApprox?: boolean; // 고유값이 많아 HyperLogLog 근사값인 경우
   mean?: number;
   std?: number;
+  min?: number;
+  max?: number;
 }
 
 // ── BasicAnalysisTool ───────────────────────────────────────
@@ -32,7 +35,8 @@ export interface CorrelationPair {
 export interface CorrelationInput {
   filePath: string;
   sessionId?: string;  
-  data: Record<string, number[]>;
+  data?: Record<string, number[]>;   // 없으면 filePath 의 CSV에서 직접 계산
+  columns?: string[];                 // [ADD] 대상 컬럼 (기본: 숫자형 전체)
   method?: CorrMethod;  // default "pearson"
   dropna?: boolean;     // default true
   threshold?: number;   // high correlation 기준, default 0.5
@@ -101,10 +105,12 @@ export interface PreprocessingInput {
   filePath: string;
   recommendations: PreprocessStep[];
   sessionId?: string;
+  targetColumn?: string | null; // [ADD] 학습 타깃 — 스케일/인코딩하지 않음 (결측 처리만)
 }
 export interface PreprocessingOutput {
   preprocessedFilePath?: string | null;
   messages?: string[];
+  specPath?: string | null; // fit 된 전처리 스펙 (학습/서빙에서 재사용)
 }
 
 // ── MachineLearningTool ────────────────────────────────────
@@ -115,6 +121,7 @@ export interface MachineLearningInput {
     targetColumn?: string;
     problemType?: Exclude<ProblemType, null>;
     mlModelRecommendation?: SelectorOutput['mlModelRecommendation'];
+    leaderboard?: boolean; // [ADD] true 면 추천 모델 + alternatives + 기본 모델을 같은 CV 폴드로 동시 비교
   };
 }
 export interface MachineLearningOutput {
@@ -137,4 +144,45 @@ export interface WorkflowResult {
   chartPaths: string[];
   preprocessedFilePath: string | null;
   mlResultPath: { reportPath: string } | null; // FastAPI가 기대하는 표면
+  reusedSteps?: WorkflowStepKey[];             // [ADD] 입력 지문이 같아 저장된 출력을 다시 쓴 단계
+  timings?: Record<string, StageTiming>;       // [ADD] 단계별 소요 시간/메모리 (+ orchestrator 전체)
+}
+
+// [ADD] 단계 계측 — 파이썬 엔진 한 번 실행 (src/scripts/stage_metrics.py 가 기록)
+export interface ScriptTiming {
+  script: string;
+  seconds: number;          // 프로세스 시작 ~ 종료
+  importSeconds: number;    // 그중 모듈 import 까지
+  cpuSeconds: number;
+  peakRssMb: number | null;
+  childPeakRssMb?: number | null;
+  pid: number;
+  worker?: boolean;         // [ADD] 상주 계산 워커에서 실행 (importSeconds 0)
+}
+export interface StageTiming {
+  component: 'tool' | 'orchestrator' | string;
+  seconds: number;
+  rssMb?: number;           // 단계 종료 시점 Node RSS
+  peakRssMb?: number;       // Node 프로세스 최대 RSS
+  reused?: boolean;
+  scripts?: ScriptTiming[];
+  [k: string]: any;
+}
+
+// [ADD] 워크플로 실행 옵션 — 바뀐 값에 의존하는 단계만 다시 계산된다 (타깃/모델 → 학습 단계)
+export interface WorkflowOptions {
+  targetColumn?: string | null;
+  problemType?: ProblemType;
+  model?: string;       // 추천 대신 쓸 모델 이름 (예: "RandomForestRegressor")
+  force?: boolean;      // true 면 저장된 단계 출력을 쓰지 않고 전부 다시 계산
+}
+
+// [ADD] 워크플로 진행 이벤트 — 단계가 끝날 때마다 부분 결과(WorkflowResult의 일부 키)를 내보낸다
+export type WorkflowStepKey = 'basic' | 'corr' | 'selector' | 'visual' | 'preprocess' | 'train';
+export interface WorkflowStepEvent {
+  key: WorkflowStepKey;
+  status: 'done' | 'skipped';
+  reused?: boolean;     // [ADD] 이전 실행의 출력을 그대로 씀
+  timing?: StageTiming; // [ADD] 단계 소요 시간/메모리
+  data: Partial<WorkflowResult> & { corrMatrixPath?: string; error?: string };
 }
@@ -0,0 +1,37 @@
+import io
+
+import pandas as pd
+import pytest
+
+from upload_ingest import IngestStats, UploadValidationError
+
+
+def ingest(data: bytes, split: int | None = None) -> dict:
+    stats = IngestStats()
+    if split is None:
+        stats.feed(data)
+    else:
+        stats.feed(data[:split])
+        stats.feed(data[split:])
+    return stats.finish()
+
+
+CASES = [
+    b'name,size\nTV 55" screen,3\n',                      # 필드 중간의 " 하나
+    b'name,size\nTV 55" screen,3\nmonitor 27" x2",4\n',  # 짝수 개여도 행 수가 맞아야 함
+    b'a,b\n"x\ny",1\n"p ""q""\nr",2\n',                  # 따옴표 안 줄바꿈 + "" 이스케이프
+    b'a;b\n"1;2";3\n4";5\n',
+    b'a,b\n1,2',                                          # 마지막 줄바꿈 없음
+]
+
+
+@pytest.mark.parametrize("data", CASES)
+def test_rows_match_pandas_at_every_chunk_boundary(data):
+    expected = len(pd.read_csv(io.BytesIO(data), sep=None, engine="python"))
+    for split in [None, *range(1, len(data))]:
+        assert ingest(data, split)["rows"] == expected, split
+
+
+def test_unclosed_quote_is_rejected():
+    with pytest.raises(UploadValidationError):
+        ingest(b'a,b\n"x,1\n2,3\n')
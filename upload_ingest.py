@@ -0,0 +1,244 @@
+"""
+CSV 업로드 스트리밍 저장 + 검증
+
+기존 `f.write(await file.read())` 는 업로드 전체를 메모리에 올렸다. 여기서는
+
+- 고정 크기 청크로 읽어 임시 파일에 쓰고, 끝나면 rename (중간 실패 시 반쪽 파일이 남지 않음)
+- 같은 패스에서 sha256, 인코딩(BOM / UTF-8 검증 / cp949 폴백), 구분자(앞부분 sniff),
+  헤더 컬럼, 행 수(따옴표 안 줄바꿈 제외)를 계산해 `<파일>.ingest.json` 에 남긴다
+- 최대 크기(max_bytes)를 넘으면 즉시 중단하고 413
+
+업로드 요청 본문 자체도 UploadSizeLimitMiddleware 가 Content-Length / 누적 바이트로 막는다
+(멀티파트 파싱 전에 거절 → 큰 요청이 임시 파일로 끝까지 스풀되지 않도록).
+업로드 하나의 최대 메모리 사용량은 청크 크기 + 스니핑 샘플(SNIFF_BYTES) 정도로 고정된다.
+"""
+import codecs
+import csv
+import hashlib
+import io
+import json
+import os
+import time
+from pathlib import Path
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+SNIFF_BYTES = 64 << 10        # 구분자/헤더 판별에 쓰는 앞부분 크기
+DELIMITERS = ",;\t|"
+# 이 바이트 바로 뒤의 " 만 따옴표 필드를 연다 (필드 중간의 " 는 pandas/csv 처럼 그냥 문자)
+FIELD_START = frozenset((DELIMITERS + "\r\n").encode())
+
+# 따옴표 상태: 밖 / 따옴표 필드 안 / 안에서 " 를 막 만남 (바로 " 가 또 오면 "" 이스케이프)
+_OUT, _IN, _CLOSING = 0, 1, 2
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class UploadValidationError(ValueError):
+    pass
+
+
+# ------------------------------
+# 요청 본문 크기 제한 (ASGI 미들웨어)
+# ------------------------------
+class UploadSizeLimitMiddleware:
+    def __init__(self, app, max_bytes: int, paths: tuple[str, ...] = ("/upload_csv/",)):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths or self.max_bytes <= 0:
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        try:
+            declared = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        if declared > self.max_bytes:
+            resp = JSONResponse({"error": f"업로드 최대 크기({self.max_bytes >> 20}MB)를 넘었습니다."},
+                                status_code=413)
+            return await resp(scope, receive, send)
+
+        # Content-Length 없이(chunked) 오는 경우: 받은 만큼 세다가 넘으면 중단
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413,
+                                        detail=f"업로드 최대 크기({self.max_bytes >> 20}MB)를 넘었습니다.")
+            return message
+
+        return await self.app(scope, limited_receive, send)
+
+
+# ------------------------------
+# 한 패스 통계
+# ------------------------------
+class IngestStats:
+    """청크를 순서대로 받아 해시/인코딩/구분자/행·컬럼 수 계산 (청크를 보관하지 않음)"""
+
+    def __init__(self):
+        self.sha = hashlib.sha256()
+        self.size = 0
+        self.newlines = 0
+        self.quote = _OUT
+        self.prev = ord("\n")          # 파일 시작도 필드 시작
+        self.last_byte = b""
+        self.sample = bytearray()
+        self.encoding: str | None = None
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._utf8_ok = True
+
+    def feed(self, chunk: bytes):
+        if not chunk:
+            return
+        self.sha.update(chunk)
+        self.size += len(chunk)
+        self.last_byte = chunk[-1:]
+        if len(self.sample) < SNIFF_BYTES:
+            self.sample += chunk[:SNIFF_BYTES - len(self.sample)]
+        if self._utf8_ok:
+            try:
+                self._utf8.decode(chunk)
+            except UnicodeDecodeError:
+                self._utf8_ok = False
+        self._count_rows(chunk)
+
+    def _count_rows(self, chunk: bytes):
+        # 따옴표 필드 밖의 줄바꿈만 센다. " 는 필드 시작(구분자/줄바꿈 직후)일 때만 필드를 연다
+        if self.quote != _IN and b'"' not in chunk:
+            self.newlines += chunk.count(b"\n")
+            self.quote = _OUT
+            self.prev = chunk[-1]
+            return
+        parts = chunk.split(b'"')
+        last = len(parts) - 1
+        for i, part in enumerate(parts):
+            if part:
+                if self.quote == _CLOSING:      # 닫는 따옴표 뒤에 다른 문자 → 필드 밖
+                    self.quote = _OUT
+                if self.quote == _OUT:
+                    self.newlines += part.count(b"\n")
+                self.prev = part[-1]
+            if i == last:
+                break
+            if self.quote == _IN:
+                self.quote = _CLOSING
+            elif self.quote == _CLOSING:        # "" → 따옴표 필드 안의 문자 "
+                self.quote = _IN
+            elif self.prev in FIELD_START:
+                self.quote = _IN
+            self.prev = ord('"')
+
+    def _detect_encoding(self) -> str:
+        head = bytes(self.sample[:4])
+        if head.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return "utf-16"
+        try:
+            self._utf8.decode(b"", final=True)
+        except UnicodeDecodeError:
+            self._utf8_ok = False
+        if self._utf8_ok:
+            return "utf-8"
+        # 국내 엑셀 CSV 는 대부분 cp949. 앞부분이 cp949 로도 안 풀리면 latin-1 (항상 디코드 가능)
+        try:
+            bytes(self.sample).decode("cp949")
+            return "cp949"
+        except UnicodeDecodeError as e:
+            if e.start >= len(self.sample) - 1:     # 샘플 끝에서 잘린 멀티바이트 문자
+                return "cp949"
+            return "latin-1"
+
+    def finish(self) -> dict:
+        if self.size == 0:
+            raise UploadValidationError("빈 파일입니다.")
+        self.encoding = self._detect_encoding()
+        if self.encoding != "utf-16" and b"\x00" in self.sample:
+            raise UploadValidationError("CSV 가 아닌 바이너리 파일로 보입니다.")
+
+        text = bytes(self.sample).decode(self.encoding, errors="replace")
+        if len(self.sample) >= SNIFF_BYTES and "\n" in text:
+            text = text[:text.rfind("\n") + 1]          # 잘린 마지막 줄 제외
+        try:
+            delimiter = csv.Sniffer().sniff(text, delimiters=DELIMITERS).delimiter
+        except csv.Error:
+            delimiter = ","
+        header = next(csv.reader(io.StringIO(text), delimiter=delimiter), [])
+        header = [h.strip() for h in header]
+        if not any(header):
+            raise UploadValidationError("헤더(컬럼명)를 찾지 못했습니다.")
+        if self.quote == _IN:
+            raise UploadValidationError("닫히지 않은 따옴표가 있습니다.")
+
+        lines = self.newlines + (0 if self.last_byte == b"\n" else 1)
+        return {
+            "sha256": self.sha.hexdigest(),
+            "size": self.size,
+            "encoding": self.encoding,
+            "delimiter": delimiter,
+            "columns": len(header),
+            "header": header,
+            "rows": max(lines - 1, 0),
+        }
+
+
+# ------------------------------
+# 저장
+# ------------------------------
+def ingest_meta_path(file_path) -> Path:
+    p = Path(file_path)
+    return p.with_name(p.name + ".ingest.json")
+
+
+def load_ingest_meta(file_path) -> dict | None:
+    """업로드 때 계산한 메타데이터 (원본이 그 뒤 바뀌었으면 None)"""
+    try:
+        meta = json.loads(ingest_meta_path(file_path).read_text(encoding="utf-8"))
+        st = os.stat(file_path)
+    except (OSError, ValueError):
+        return None
+    if meta.get("size") != st.st_size or meta.get("mtime_ns") != st.st_mtime_ns:
+        return None
+    return meta
+
+
+async def save_upload(upload, dest: Path, max_bytes: int, chunk_bytes: int = 1 << 20) -> dict:
+    """UploadFile 을 청크 단위로 dest 에 저장하면서 메타데이터 계산 → 메타 dict
+
+    max_bytes 초과 → UploadTooLargeError, 형식 문제 → UploadValidationError (둘 다 파일은 지워짐)
+    """
+    t0 = time.perf_counter()
+    stats = IngestStats()
+    tmp = dest.with_name(dest.name + ".part")
+    try:
+        with tmp.open("wb") as f:
+            while True:
+                chunk = await upload.read(chunk_bytes)
+                if not chunk:
+                    break
+                if max_bytes > 0 and stats.size + len(chunk) > max_bytes:
+                    raise UploadTooLargeError(f"업로드 최대 크기({max_bytes >> 20}MB)를 넘었습니다.")
+                stats.feed(chunk)
+                f.write(chunk)
+        meta = stats.finish()
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    st = dest.stat()
+    meta.update({"filename": dest.name, "mtime_ns": st.st_mtime_ns,
+                 "seconds": round(time.perf_counter() - t0, 3)})
+    ingest_meta_path(dest).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    return meta
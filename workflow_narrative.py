@@ -0,0 +1,62 @@
+"""
+워크플로 결과 해설 (선택) — 로컬 워크플로에서 LLM 을 쓰는 유일한 곳
+
+결과 dict 에서 요약(타깃/문제 유형/모델/지표/강한 상관)을 짧게 만들어 OpenAI 호환 chat completions 에 한 번 보낸다.
+외부 SDK 없이 표준 라이브러리로 호출하고, 키가 없거나 실패하면 None (분석 결과에는 영향 없음).
+OPENAI_BASE_URL 을 바꾸면 다른 호환 서버(벤치마크 스텁 포함)로 보낼 수 있다.
+"""
+import json
+import os
+import urllib.error
+import urllib.request
+
+NARRATIVE_MODEL = os.environ.get("NARRATIVE_MODEL", "gpt-4.1-mini")
+NARRATIVE_TIMEOUT = float(os.environ.get("NARRATIVE_TIMEOUT", "30"))
+NARRATIVE_MAX_PAIRS = 5
+
+SYSTEM_PROMPT = ("너는 데이터 분석 결과를 비전문가에게 설명하는 분석가다. 주어진 JSON 요약만 근거로 "
+                 "핵심 발견 3~5개를 한국어 불릿으로 쓰고, 숫자는 그대로 인용하며 없는 내용은 만들지 않는다.")
+
+
+def summarize(wf: dict, ml_report: dict | None = None) -> dict:
+    """LLM 에 보낼 결과 요약 (컬럼 통계 전체 대신 필요한 것만 — 프롬프트 크기 고정)"""
+    corr = (wf.get("correlationResults") or {}).get("highCorrPairs") or []
+    corr = sorted(corr, key=lambda p: -abs(p.get("corr") or 0))[:NARRATIVE_MAX_PAIRS]
+    rec = wf.get("mlModelRecommendation") or {}
+    summary = {
+        "columns": len(wf.get("columnStats") or []),
+        "missingColumns": [c["column"] for c in wf.get("columnStats") or [] if c.get("missing")][:10],
+        "targetColumn": wf.get("targetColumn"),
+        "problemType": wf.get("problemType"),
+        "model": rec.get("model"),
+        "highCorrPairs": corr,
+        "charts": len(wf.get("chartPaths") or []),
+    }
+    if ml_report:
+        summary["metric"] = ml_report.get("metric")
+    if wf.get("sampling"):
+        summary["sampledRows"] = wf["sampling"].get("rows")
+        summary["totalRows"] = wf["sampling"].get("totalRows")
+    return summary
+
+
+def generate(wf: dict, ml_report: dict | None = None) -> str | None:
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    base = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+    body = json.dumps({
+        "model": NARRATIVE_MODEL,
+        "temperature": 0,
+        "messages": [{"role": "system", "content": SYSTEM_PROMPT},
+                     {"role": "user", "content": json.dumps(summarize(wf, ml_report), ensure_ascii=False)}],
+    }, ensure_ascii=False).encode("utf-8")
+    req = urllib.request.Request(f"{base}/chat/completions", data=body, method="POST", headers={
+        "Content-Type": "application/json", "Authorization": f"Bearer {api_key}"})
+    try:
+        with urllib.request.urlopen(req, timeout=NARRATIVE_TIMEOUT) as resp:
+            out = json.loads(resp.read().decode("utf-8"))
+        return (out["choices"][0]["message"]["content"] or "").strip() or None
+    except (urllib.error.URLError, OSError, ValueError, KeyError, IndexError) as e:
+        print(f"[NARRATIVE] 실패: {e}")
+        return None